@@ -2,8 +2,11 @@
 
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- Primary keys default to uuid_generate_v7() from uuid-v7.sql, which must
+-- be applied first.
+
 CREATE TABLE IF NOT EXISTS users (
-  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
   username TEXT UNIQUE NOT NULL,
   password_hash TEXT NOT NULL,
   is_admin BOOLEAN NOT NULL DEFAULT FALSE,
@@ -2,14 +2,176 @@
 
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
 
+-- Primary keys default to uuid_generate_v7() from uuid-v7.sql, which must
+-- be applied first.
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'order_status') THEN
+    CREATE TYPE order_status AS ENUM ('PENDING', 'APPROVED', 'REJECTED');
+  END IF;
+END $$;
+
+-- Every distinct item name once; orders reference it by a 4-byte id.
+-- `intern_item_name` returns a name's id, inserting it on first sight.
+CREATE TABLE IF NOT EXISTS item_names (
+  id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  name TEXT UNIQUE NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION intern_item_name(p_name text) RETURNS integer AS $$
+DECLARE
+  found_id integer;
+BEGIN
+  SELECT id INTO found_id FROM item_names WHERE name = p_name;
+  IF found_id IS NULL THEN
+    INSERT INTO item_names (name) VALUES (p_name)
+      ON CONFLICT (name) DO NOTHING RETURNING id INTO found_id;
+    IF found_id IS NULL THEN
+      -- a concurrent insert won the race and has committed by now
+      SELECT id INTO found_id FROM item_names WHERE name = p_name;
+    END IF;
+  END IF;
+  RETURN found_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- fillfactor leaves room on each page for the row versions written by
+-- approve/reject.
 CREATE TABLE IF NOT EXISTS orders (
-  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
   user_id UUID REFERENCES users(id),
-  item_name TEXT NOT NULL,
+  item_name_id INTEGER NOT NULL REFERENCES item_names(id),
   quantity INT NOT NULL CHECK (quantity >= 1 AND quantity <= 100),
   notes TEXT,
-  status TEXT NOT NULL DEFAULT 'PENDING',
+  status order_status NOT NULL DEFAULT 'PENDING',
   created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
   admin_action_at TIMESTAMP WITH TIME ZONE
+) WITH (fillfactor = 80);
+
+-- Keyset walks of the `/orders/changes` feed, the analytics snapshot and the
+-- archiver.
+CREATE INDEX IF NOT EXISTS orders_updated_at_id_idx ON orders (updated_at, id);
+
+-- The auto-approval rules engine (services/order-service/app/rules.py): its
+-- keyset walk over the PENDING queue and per-user order velocity.
+CREATE INDEX IF NOT EXISTS orders_pending_id_idx ON orders (id) WHERE status = 'PENDING';
+CREATE INDEX IF NOT EXISTS orders_user_id_created_at_idx ON orders (user_id, created_at);
+
+-- Admin listing filters (services/order-service/app/order_filters.py): every
+-- indexed query walks one of these or the index above in created_at order.
+-- Neither column changes after insert, so approve/reject stays HOT.
+CREATE INDEX IF NOT EXISTS orders_created_at_id_idx ON orders (created_at, id);
+CREATE INDEX IF NOT EXISTS orders_item_name_id_created_at_idx ON orders (item_name_id, created_at);
+CREATE INDEX IF NOT EXISTS item_names_name_prefix_idx ON item_names (name text_pattern_ops);
+
+-- Append-only audit trail of order status transitions. Rows are only ever
+-- inserted (in the same statement that changes `orders.status`), never
+-- updated or deleted, so compliance questions become indexed range scans.
+CREATE TABLE IF NOT EXISTS order_events (
+  id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  order_id UUID NOT NULL,
+  actor TEXT,
+  from_status TEXT,
+  to_status TEXT NOT NULL,
+  occurred_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS order_events_order_id_idx ON order_events (order_id, id);
+CREATE INDEX IF NOT EXISTS order_events_occurred_at_idx ON order_events (occurred_at, id);
+
+-- Bucket -> shard overrides for hash-sharded order-service deployments
+-- (DATABASE_SHARD_URLS). Only read on shard 0; buckets without a row live on
+-- shard `bucket % n_shards`. `frozen` blocks writes while a bucket moves.
+CREATE TABLE IF NOT EXISTS order_shard_map (
+  bucket SMALLINT PRIMARY KEY CHECK (bucket >= 0 AND bucket < 256),
+  shard SMALLINT NOT NULL CHECK (shard >= 0),
+  frozen BOOLEAN NOT NULL DEFAULT FALSE,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Finalized orders moved to cold storage: order id -> archive segment file
+-- and line within it (see services/order-service/app/archive.py). `user_id`
+-- lets scripts/reshard_orders.py move the entries with their bucket.
+CREATE TABLE IF NOT EXISTS order_archive_index (
+  order_id UUID PRIMARY KEY,
+  user_id UUID,
+  segment TEXT NOT NULL,
+  ordinal INT NOT NULL,
+  archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+-- Stock-tracked items. Each item's stock is split across several
+-- inventory_slots rows (sharded counters) so concurrent reservations of a
+-- hot item lock different rows (see services/order-service/app/inventory.py).
+CREATE TABLE IF NOT EXISTS items (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
+  name TEXT UNIQUE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS inventory_slots (
+  item_id UUID NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+  slot SMALLINT NOT NULL,
+  available INT NOT NULL CHECK (available >= 0),
+  PRIMARY KEY (item_id, slot)
+);
+
+-- One row per order that took stock; released (and the stock returned to
+-- its slot) when the order is rejected.
+CREATE TABLE IF NOT EXISTS inventory_reservations (
+  order_id UUID PRIMARY KEY,
+  item_id UUID NOT NULL REFERENCES items(id),
+  slot SMALLINT NOT NULL,
+  quantity INT NOT NULL CHECK (quantity > 0),
+  status TEXT NOT NULL DEFAULT 'RESERVED',
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  released_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Time-bucketed order counts by status and item, folded in from
+-- order_events by a watermark job (see services/order-service/app/rollups.py).
+CREATE TABLE IF NOT EXISTS order_rollups (
+  granularity TEXT NOT NULL CHECK (granularity IN ('minute', 'hour', 'day')),
+  bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+  status TEXT NOT NULL,
+  item_name TEXT NOT NULL,
+  orders BIGINT NOT NULL,
+  quantity BIGINT NOT NULL,
+  PRIMARY KEY (granularity, bucket_start, status, item_name)
+);
+
+CREATE TABLE IF NOT EXISTS order_rollup_watermark (
+  name TEXT PRIMARY KEY,
+  last_occurred_at TIMESTAMP WITH TIME ZONE,
+  last_event_id BIGINT,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+);
+INSERT INTO order_rollup_watermark (name) VALUES ('order_events') ON CONFLICT DO NOTHING;
+
+-- Durable background jobs, claimed with SKIP LOCKED by the worker runtime in
+-- every replica (see services/order-service/app/worker.py).
+CREATE TABLE IF NOT EXISTS jobs (
+  id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
+  kind TEXT NOT NULL,
+  params JSONB NOT NULL DEFAULT '{}',
+  status TEXT NOT NULL DEFAULT 'queued'
+    CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+  attempts INT NOT NULL DEFAULT 0,
+  max_attempts INT NOT NULL DEFAULT 5,
+  run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  locked_by TEXT,
+  locked_until TIMESTAMP WITH TIME ZONE,
+  progress_done BIGINT NOT NULL DEFAULT 0,
+  progress_total BIGINT,
+  result JSONB,
+  last_error TEXT,
+  created_by TEXT,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+  started_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE,
+  updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
 );
+CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs (kind, run_after) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS jobs_running_idx ON jobs (kind, locked_until) WHERE status = 'running';
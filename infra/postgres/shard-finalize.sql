@@ -0,0 +1,5 @@
+-- shard-finalize.sql: runs after init-orders.sql on extra order shards.
+-- user ids are validated by auth-service/the main database, not per shard.
+
+ALTER TABLE orders DROP CONSTRAINT IF EXISTS orders_user_id_fkey;
+DROP TABLE IF EXISTS users;
@@ -0,0 +1,8 @@
+-- shard-prelude.sql: runs before init-orders.sql on extra order shards.
+-- Users live only in the main database; this placeholder lets the shared
+-- orders schema create its users(id) foreign key, which
+-- shard-finalize.sql then drops again.
+
+CREATE TABLE IF NOT EXISTS users (
+  id UUID PRIMARY KEY
+);
@@ -0,0 +1,17 @@
+-- uuid-v7.sql: the uuid_generate_v7() column default shared by the auth and
+-- order schemas. Apply it before init-auth.sql / init-orders.sql; the
+-- alembic migrations that switch to v7 keys load this file too.
+
+-- Time-ordered UUIDv7 (RFC 9562): a 48-bit Unix-millisecond prefix over a v4
+-- random body, so new primary keys append to the right edge of the B-tree.
+CREATE OR REPLACE FUNCTION uuid_generate_v7() RETURNS uuid AS $$
+  SELECT encode(
+    set_bit(
+      set_bit(
+        overlay(uuid_send(gen_random_uuid())
+                placing substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                FROM 1 FOR 6),
+        52, 1),
+      53, 1),
+    'hex')::uuid;
+$$ LANGUAGE sql VOLATILE;
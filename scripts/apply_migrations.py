@@ -5,7 +5,7 @@ This small helper is intended for CI/test runs where a DATABASE_URL is available
 It executes SQL files in order and exits non‑zero on failure.
 
 Usage:
-  DATABASE_URL=postgres://... python scripts/apply_migrations.py --files infra/postgres/init-auth.sql infra/postgres/init-orders.sql
+  DATABASE_URL=postgres://... python scripts/apply_migrations.py --files infra/postgres/uuid-v7.sql infra/postgres/init-auth.sql infra/postgres/init-orders.sql
 
 The script uses `psycopg` (psycopg3). If it's not installed the script will print an instruction.
 """
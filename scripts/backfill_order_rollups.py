@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Rebuild order_rollups from order_events, one UTC day per transaction.
+
+order-service folds new events into `order_rollups` with a watermark job
+(services/order-service/app/rollups.py). This tool loads existing history
+(or repairs a range) without double counting:
+
+1. if the watermark was never advanced, pin it to the newest settled event
+   so the job continues from there,
+2. for every day up to the watermark: lock the watermark row (the job skips
+   its pass meanwhile), delete the day's rollup rows and re-aggregate the
+   day's events up to the watermark, then commit.
+
+Each day is rebuilt from scratch, so re-running any range is safe. Run it
+once per database (every shard when sharded).
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/backfill_order_rollups.py
+  python scripts/backfill_order_rollups.py --since 2025-01-01 --until 2025-02-01
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from datetime import UTC, date, timedelta
+
+PIN_WATERMARK_SQL = """
+UPDATE order_rollup_watermark w
+SET last_occurred_at = e.occurred_at, last_event_id = e.id, updated_at = now()
+FROM (
+    SELECT occurred_at, id FROM order_events
+    WHERE occurred_at <= now() - make_interval(secs => %s)
+    ORDER BY occurred_at DESC, id DESC LIMIT 1
+) e
+WHERE w.name = 'order_events' AND w.last_occurred_at IS NULL
+"""
+LOCK_WATERMARK_SQL = (
+    "SELECT last_occurred_at, last_event_id FROM order_rollup_watermark "
+    "WHERE name = 'order_events' FOR UPDATE"
+)
+EVENT_DAYS_SQL = (
+    "SELECT (date_trunc('day', min(occurred_at), 'UTC') AT TIME ZONE 'UTC')::date, "
+    "(date_trunc('day', max(occurred_at), 'UTC') AT TIME ZONE 'UTC')::date FROM order_events"
+)
+DELETE_DAY_SQL = (
+    "DELETE FROM order_rollups WHERE bucket_start >= (%s::date AT TIME ZONE 'UTC') "
+    "AND bucket_start < ((%s::date + 1) AT TIME ZONE 'UTC')"
+)
+# Same aggregation as ROLLUP_ADVANCE_SQL, over one day up to the watermark.
+REBUILD_DAY_SQL = """
+INSERT INTO order_rollups (granularity, bucket_start, status, item_name, orders, quantity)
+SELECT g.granularity, date_trunc(g.granularity, e.occurred_at, 'UTC'), e.to_status,
+       coalesce(n.name, '(archived)'), count(*), sum(coalesce(o.quantity, 0))
+FROM order_events e
+    LEFT JOIN orders o ON o.id = e.order_id
+    LEFT JOIN item_names n ON n.id = o.item_name_id
+CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g(granularity)
+WHERE e.occurred_at >= (%s::date AT TIME ZONE 'UTC')
+  AND e.occurred_at < ((%s::date + 1) AT TIME ZONE 'UTC')
+  AND (e.occurred_at, e.id) <= (%s, %s)
+GROUP BY 1, 2, 3, 4
+"""
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def backfill(conn, since: date | None, until: date | None, settle: float) -> None:
+    with conn.cursor() as cur:
+        cur.execute(PIN_WATERMARK_SQL, (settle,))
+        cur.execute(EVENT_DAYS_SQL)
+        first, last = cur.fetchone()
+    conn.commit()
+    if first is None:
+        print("no order_events; nothing to backfill")
+        return
+    day = max(first, since) if since else first
+    end = min(last, until) if until else last
+    rebuilt = 0
+    while day <= end:
+        with conn.cursor() as cur:
+            cur.execute(LOCK_WATERMARK_SQL)
+            row = cur.fetchone()
+            if row is None or row[0] is None:
+                conn.rollback()
+                fail("order_rollup_watermark is missing; run the 0009 migration first")
+            wm_at, wm_id = row
+            if day > wm_at.astimezone(UTC).date():
+                conn.rollback()
+                break
+            cur.execute(DELETE_DAY_SQL, (day, day))
+            cur.execute(REBUILD_DAY_SQL, (day, day, wm_at, wm_id))
+            rows = cur.rowcount
+        conn.commit()
+        rebuilt += 1
+        print(f"{day}: {rows} rollup rows")
+        day += timedelta(days=1)
+    print(f"rebuilt {rebuilt} day(s)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild order_rollups from order_events")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--since", type=date.fromisoformat, help="First UTC day to rebuild")
+    parser.add_argument("--until", type=date.fromisoformat, help="Last UTC day to rebuild")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=float(os.getenv("CHANGES_SETTLE_SECONDS", "1.0")),
+        help="Events newer than this are left to the watermark job",
+    )
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail("DATABASE_URL must be provided via --database-url or the DATABASE_URL env var", 2)
+
+    try:
+        import psycopg
+    except ImportError:
+        fail("psycopg is required. Install with: pip install 'psycopg[binary]'")
+
+    with psycopg.connect(database_url) as conn:
+        backfill(conn, args.since, args.until, args.settle)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,22 +3,30 @@
 
 This lightweight script exercises a single endpoint repeatedly and reports
 latency percentiles (p50/p90/p95/p99). It uses only the stdlib so it can run
-in CI without extra packages.
+in CI without extra packages. For concurrent load use scripts/load_test.py.
+
+The p95 and error rate are checked against the budgets in perf/budgets.json
+(`/health`: 200ms, errors: 1%); `--json` writes the samples for
+scripts/perf_baseline.py.
 
 Usage:
   ./scripts/benchmark.py --url http://localhost:8001/health --n 100
+  ./scripts/benchmark.py --url http://localhost:8001/health --n 500 --json health.json
 
-Exit code: 0 on success
+Exit code: 0 on success, 2 when every request failed, 3 when a budget is exceeded
 """
 from __future__ import annotations
 
 import argparse
-import sys
+import importlib.util
+import json
 import time
 import urllib.request
-from statistics import median
+from pathlib import Path
 from typing import List
 
+PERF_BASELINE = Path(__file__).resolve().parent / "perf_baseline.py"
+
 
 def run_once(url: str, timeout: float = 5.0) -> float:
     start = time.monotonic()
@@ -43,11 +51,23 @@ def percentile(values: List[float], p: float) -> float:
     return d0 + d1
 
 
+def budget_violations(url: str, latencies: list[float], errors: int, budgets: Path) -> list[str]:
+    """Budget rules in `budgets` that this run's p50/p95/p99 or error rate exceed."""
+    spec = importlib.util.spec_from_file_location("scripts_perf_baseline", PERF_BASELINE)
+    perf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(perf)
+    report = {"meta": {"url": url}, "requests": len(latencies) + errors, "errors": errors, "latencies_ms": latencies}
+    _, suite, metrics = perf.extract(report)
+    return perf.budget_violations(suite, metrics, perf.load_budgets(budgets))
+
+
 def main(argv=None) -> int:
     parser = argparse.ArgumentParser(description="Lightweight HTTP benchmark")
     parser.add_argument("--url", required=True, help="Full URL to hit")
     parser.add_argument("--n", type=int, default=100, help="Number of requests")
     parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout (s)")
+    parser.add_argument("--budgets", type=Path, default=PERF_BASELINE.parents[1] / "perf" / "budgets.json", help="Performance budget rules")
+    parser.add_argument("--json", help="Also write the samples to this file (for perf_baseline.py)")
     args = parser.parse_args(argv)
 
     latencies: List[float] = []
@@ -72,13 +92,19 @@ def main(argv=None) -> int:
     print(f"p99: {percentile(latencies, 99):.2f}ms")
     print(f"max: {max(latencies):.2f}ms")
 
-    # Simple policy check: p95 target for /health should be < 200ms by default
-    p95 = percentile(latencies, 95)
-    if "/health" in args.url and p95 > 200:
-        print(f"WARNING: p95 {p95:.2f}ms exceeds target 200ms")
-        return 3
-
-    return 0
+    if args.json:
+        report = {
+            "meta": {"url": args.url, "n": args.n, "timeout": args.timeout},
+            "requests": args.n,
+            "errors": errors,
+            "latencies_ms": latencies,
+        }
+        Path(args.json).write_text(json.dumps(report))
+
+    violations = budget_violations(args.url, latencies, errors, args.budgets)
+    for line in violations:
+        print(f"WARNING: {line}")
+    return 3 if violations else 0
 
 
 if __name__ == "__main__":
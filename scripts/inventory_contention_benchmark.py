@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""Hot-SKU contention benchmark: one stock row vs sharded counter slots.
+
+Many concurrent buyers each buy one unit of the same item, `--purchases`
+times. Every configuration runs against a fresh scratch table:
+
+- `row`: a single stock row decremented with a plain blocking UPDATE (what
+  a naive `stock` column does: every buyer queues on one row lock),
+- `slots=N`: stock split over N rows, decremented with the same
+  `ORDER BY random() ... FOR UPDATE SKIP LOCKED` pick that order-service
+  uses in app/inventory.py (retrying, then rebalancing, when all are busy).
+
+Reports purchases/s, p50/p99 latency, retries, and checks that no unit was
+oversold (remaining stock == initial stock - successful purchases).
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/inventory_contention_benchmark.py \
+      --buyers 200 --purchases 50 --slots 1,4,16,64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+TABLE = "bench_inventory_slots"
+
+RESERVE_ROW_SQL = (
+    f"UPDATE {TABLE} SET available = available - 1 "
+    "WHERE item = 1 AND slot = 0 AND available >= 1 RETURNING slot"
+)
+RESERVE_SLOT_SQL = f"""
+WITH pick AS (
+    SELECT item, slot FROM {TABLE}
+    WHERE item = 1 AND available >= 1
+    ORDER BY random() LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE {TABLE} t SET available = t.available - 1
+FROM pick WHERE t.item = pick.item AND t.slot = pick.slot
+RETURNING t.slot
+"""
+REBALANCE_SQL = f"""
+WITH locked AS (
+    SELECT slot, available FROM {TABLE} WHERE item = 1 ORDER BY slot FOR UPDATE
+), totals AS (
+    SELECT coalesce(sum(available), 0)::int AS total, count(*)::int AS n FROM locked
+), balanced AS (
+    UPDATE {TABLE} s
+    SET available = t.total / t.n + CASE WHEN s.slot < t.total % t.n THEN 1 ELSE 0 END
+    FROM totals t WHERE s.item = 1
+)
+SELECT total FROM totals
+"""
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+async def setup(pool, slots: int, stock: int) -> None:
+    async with pool.connection() as conn:
+        await conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        await conn.execute(
+            f"CREATE TABLE {TABLE} (item int, slot int, available int NOT NULL "
+            "CHECK (available >= 0), PRIMARY KEY (item, slot))"
+        )
+        base, extra = divmod(stock, slots)
+        await conn.execute(
+            f"INSERT INTO {TABLE} SELECT 1, s, %s + CASE WHEN s < %s THEN 1 ELSE 0 END "
+            "FROM generate_series(0, %s - 1) AS s",
+            (base, extra, slots),
+        )
+
+
+async def buy_one(pool, mode: str, stats: dict) -> bool:
+    async with pool.connection() as conn:
+        if mode == "row":
+            cur = await conn.execute(RESERVE_ROW_SQL)
+            return await cur.fetchone() is not None
+        for attempt in range(8):
+            cur = await conn.execute(RESERVE_SLOT_SQL)
+            if await cur.fetchone() is not None:
+                return True
+            stats["retries"] += 1
+            if attempt == 0:
+                cur = await conn.execute(REBALANCE_SQL)
+                if (await cur.fetchone())[0] < 1:
+                    return False
+            else:
+                await asyncio.sleep(0.001 * attempt)
+                await conn.commit()
+        return False
+
+
+async def run_mode(database_url: str, mode: str, slots: int, args) -> dict:
+    from psycopg_pool import AsyncConnectionPool
+
+    stock = args.buyers * args.purchases
+    latencies: list[float] = []
+    stats = {"retries": 0, "ok": 0, "failed": 0}
+    async with AsyncConnectionPool(
+        database_url, min_size=args.pool_size, max_size=args.pool_size
+    ) as pool:
+        await setup(pool, slots, stock)
+
+        async def buyer() -> None:
+            for _ in range(args.purchases):
+                start = time.perf_counter()
+                ok = await buy_one(pool, mode, stats)
+                latencies.append(time.perf_counter() - start)
+                stats["ok" if ok else "failed"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(buyer() for _ in range(args.buyers)))
+        elapsed = time.perf_counter() - started
+
+        async with pool.connection() as conn:
+            cur = await conn.execute(f"SELECT sum(available) FROM {TABLE}")
+            remaining = (await cur.fetchone())[0]
+            if not args.keep:
+                await conn.execute(f"DROP TABLE {TABLE}")
+
+    latencies.sort()
+    return {
+        "mode": mode if mode == "row" else f"slots={slots}",
+        "per_sec": stats["ok"] / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "retries": stats["retries"],
+        "failed": stats["failed"],
+        "oversold": remaining != stock - stats["ok"],
+    }
+
+
+async def amain(args, database_url: str) -> int:
+    results = [await run_mode(database_url, "row", 1, args)]
+    for slots in args.slots:
+        results.append(await run_mode(database_url, "slots", slots, args))
+
+    print(
+        f"{'mode':<10} {'buys/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'retries':>8} {'failed':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['per_sec']:>10.0f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+            f"{r['retries']:>8} {r['failed']:>7}"
+        )
+    if any(r["oversold"] for r in results):
+        print(
+            "ERROR: stock accounting mismatch (oversold or lost units)", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-item stock contention benchmark")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--buyers", type=int, default=200, help="Concurrent buyers")
+    parser.add_argument("--purchases", type=int, default=50, help="Purchases per buyer")
+    parser.add_argument(
+        "--pool-size", type=int, default=50, help="Connections in the pool"
+    )
+    parser.add_argument(
+        "--slots",
+        type=lambda s: [int(x) for x in s.split(",") if x],
+        default=[1, 4, 16, 64],
+        help="Comma-separated slot counts to compare",
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the scratch table of the last run"
+    )
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail(
+            "DATABASE_URL must be provided via --database-url or the DATABASE_URL env var",
+            2,
+        )
+
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        fail(
+            "psycopg and psycopg-pool are required. Install with: pip install 'psycopg[binary]' psycopg-pool"
+        )
+
+    return asyncio.run(amain(args, database_url))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
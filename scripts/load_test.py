@@ -0,0 +1,876 @@
+#!/usr/bin/env python3
+"""Open-loop HTTP load generator with scripted user-flow scenarios.
+
+`scripts/benchmark.py` sends one request at a time to one URL, so the
+request rate falls as soon as the server slows down and the load never
+exceeds what the server can take. This tool is open loop: arrivals are
+scheduled at `--rate` per second (Poisson by default, `--arrivals uniform`
+for a fixed gap) whether or not earlier ones have finished, and each arrival
+runs one scenario drawn from the `--mix` weights:
+
+- `register`: a new account (auth-service `/register`, one bcrypt hash),
+- `login`: a pooled user logs in (auth-service `/token`, one bcrypt check),
+- `create_order`: `POST /orders/` with a bearer token,
+- `list_orders`: `GET /orders/me`,
+- `shopper`: login, create an order, list orders (a returning customer),
+- `api_approve`: an admin approves a PENDING order via `POST /orders/{id}/approve`,
+- `gateway_order`: the browser flow: the web-gateway form `POST /order`
+  with the session cookies and the double-submit CSRF token, then `GET /orders`,
+- `gateway_approve`: the admin page's HTMX approve via the gateway (cookies
+  and the `X-CSRF-Token` header),
+- `health`: order-service `GET /health`, for the harness's own floor.
+
+Latency is measured from the moment an arrival was *scheduled*, not from
+when its request went out, so time spent queued behind a slow server (or
+a saturated client) is counted instead of silently omitted (coordinated
+omission). Each scenario gets that response time and its service time
+(from the actual start) in HDR-style histograms (`Histogram`: log-linear
+buckets, 3 significant digits, any range). Requests wait for a free slot
+when `--max-inflight` are outstanding; that wait is part of the response
+time as well.
+
+Load shapes, all in windows (`--window` seconds, or one window per step):
+
+- constant: `--rate 50 --duration 60`
+- ramp: `--rate 10 --ramp-to 400 --duration 300` rises linearly
+- step: `--steps 25,50,100,200 --step-duration 30`
+
+A window is saturated when its error rate exceeds `--max-error-rate`, its
+p99 response time exceeds `--slo-p99-ms`, or it completes less than 90% of
+the offered rate; the report names the last rate that held and the first
+that did not.
+
+Before the run `--users` accounts (`<--user-prefix><n>`, `--password`) are
+registered if missing and logged in; users made by
+scripts/seed_synthetic_data.py work with `--user-prefix user-`. The admin
+scenarios need `--admin-user`/`--admin-password` (default ADMIN_USERNAME /
+ADMIN_PASSWORD, the accounts auth-service bootstraps).
+
+Usage:
+  python scripts/load_test.py --mix shopper=3,list_orders=5,api_approve=1 --rate 50 --duration 60
+  python scripts/load_test.py --mix create_order --rate 10 --ramp-to 500 --duration 300 --json ramp.json
+  python scripts/load_test.py --mix gateway_order=4,gateway_approve=1 --steps 20,40,80,160 --step-duration 30
+
+Exit code: 0 when the overall error rate is within --max-error-rate, 1 otherwise.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import bisect
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MIX = "shopper=2,create_order=3,list_orders=5,api_approve=1"
+PERCENTILES = (50, 90, 95, 99, 99.9)
+# re-login before the default 900s access token expires
+TOKEN_MAX_AGE = 600.0
+# a window completing less than this share of its offered rate is saturated
+THROUGHPUT_FLOOR = 0.9
+PENDING_REFILL = 500
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+class Histogram:
+    """Latency histogram in integer microseconds with HdrHistogram's bucket layout.
+
+    Values below 2048 are exact; above that each power of two is split into
+    1024 linear sub-buckets, so every value is kept to 3 significant digits
+    and recording is O(1) whatever the range. Counts are sparse, so a
+    histogram serializes to a small dict and merges by adding counts.
+    """
+
+    SUB_BUCKET_BITS = 11
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min = 0
+        self.max = 0
+
+    @classmethod
+    def index(cls, value: int) -> int:
+        shift = max(value.bit_length() - cls.SUB_BUCKET_BITS, 0)
+        return (shift << (cls.SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    @classmethod
+    def highest_equivalent(cls, index: int) -> int:
+        """Largest value recorded into bucket `index`."""
+        half = 1 << (cls.SUB_BUCKET_BITS - 1)
+        if index < 2 * half:
+            return index
+        shift = index // half - 1
+        return ((index - shift * half) << shift) + (1 << shift) - 1
+
+    def record(self, seconds: float, count: int = 1) -> None:
+        value = max(int(seconds * 1_000_000), 0)
+        idx = self.index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + count
+        self.min = value if not self.total else min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += count
+        self.sum += value * count
+
+    def merge(self, other: Histogram) -> None:
+        if not other.total:
+            return
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.min = other.min if not self.total else min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.total += other.total
+        self.sum += other.sum
+
+    def percentile(self, p: float) -> float:
+        """Value at percentile `p` in milliseconds (0 when empty)."""
+        if not self.total:
+            return 0.0
+        return self.value_at_rank(max(1, math.ceil(self.total * p / 100)))
+
+    def value_at_rank(self, rank: int) -> float:
+        """The `rank`-th smallest recorded value (1-based) in milliseconds."""
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                return min(self.highest_equivalent(idx), self.max) / 1000
+        return self.max / 1000
+
+    def summary(self) -> dict[str, float]:
+        out = {f"p{p:g}".replace(".", "_"): self.percentile(p) for p in PERCENTILES}
+        out["mean"] = self.sum / self.total / 1000 if self.total else 0.0
+        out["min"] = self.min / 1000
+        out["max"] = self.max / 1000
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "unit": "us",
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "counts": {str(idx): n for idx, n in sorted(self.counts.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Histogram:
+        hist = cls()
+        hist.counts = {int(idx): n for idx, n in data["counts"].items()}
+        hist.total, hist.sum = data["total"], data["sum"]
+        hist.min, hist.max = data["min"], data["max"]
+        return hist
+
+
+@dataclass(slots=True)
+class Window:
+    """One reporting interval of the load shape; the rate moves linearly across it."""
+
+    start: float
+    duration: float
+    rate_from: float
+    rate_to: float
+    arrivals: int = 0
+    ok: int = 0
+    errors: int = 0
+    response: Histogram = field(default_factory=Histogram)
+
+    @property
+    def offered(self) -> float:
+        return (self.rate_from + self.rate_to) / 2
+
+    def rate_at(self, t: float) -> float:
+        frac = (t - self.start) / self.duration
+        return self.rate_from + (self.rate_to - self.rate_from) * frac
+
+
+def build_windows(args) -> list[Window]:
+    if args.steps:
+        rates = parse_steps(args.steps)
+        return [
+            Window(i * args.step_duration, args.step_duration, rate, rate)
+            for i, rate in enumerate(rates)
+        ]
+    end_rate = args.rate if args.ramp_to is None else args.ramp_to
+    windows = []
+    start = 0.0
+    while start < args.duration - 1e-9:
+        length = min(args.window, args.duration - start)
+        lo = args.rate + (end_rate - args.rate) * start / args.duration
+        hi = args.rate + (end_rate - args.rate) * (start + length) / args.duration
+        windows.append(Window(start, length, lo, hi))
+        start += length
+    return windows
+
+
+def parse_steps(text: str) -> list[float]:
+    return [float(step) for step in text.split(",") if step.strip()]
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for pair in text.split(","):
+        name, _, weight = pair.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def find_saturation(
+    windows: list[Window], slo_p99_ms: float, max_error_rate: float
+) -> dict[str, Any] | None:
+    """First window that missed the SLO, and the last rate that held before it."""
+    last_good = None
+    for win in windows:
+        done = win.ok + win.errors
+        reasons = []
+        if done and win.errors / done > max_error_rate:
+            reasons.append(f"error rate {win.errors / done:.1%} > {max_error_rate:.1%}")
+        p99 = win.response.percentile(99)
+        if p99 > slo_p99_ms:
+            reasons.append(f"p99 {p99:.0f}ms > {slo_p99_ms:.0f}ms")
+        if win.ok / win.duration < THROUGHPUT_FLOOR * win.offered:
+            reasons.append(f"completed {win.ok / win.duration:.1f}/s of {win.offered:.1f}/s offered")
+        if reasons:
+            return {
+                "last_good_rps": last_good,
+                "first_bad_rps": win.offered,
+                "at_s": win.start,
+                "reasons": reasons,
+            }
+        last_good = win.offered
+    return None
+
+
+class StepFailed(Exception):
+    """A request in a scenario failed; the rest of the flow is skipped."""
+
+
+@dataclass(slots=True)
+class StepStats:
+    service: Histogram = field(default_factory=Histogram)
+    errors: int = 0
+    statuses: Counter = field(default_factory=Counter)
+
+
+@dataclass(slots=True)
+class ScenarioStats:
+    response: Histogram = field(default_factory=Histogram)
+    service: Histogram = field(default_factory=Histogram)
+    ok: int = 0
+    errors: int = 0
+
+
+@dataclass(slots=True)
+class Session:
+    """One account's credentials: a bearer token and, once used, gateway cookies."""
+
+    username: str
+    password: str
+    token: str | None = None
+    token_at: float = 0.0
+    cookies: dict[str, str] | None = None
+    cookies_at: float = 0.0
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    run: Callable[[Flow], Awaitable[None]]
+    admin: bool
+    gateway: bool
+    doc: str
+
+
+SCENARIOS: dict[str, Scenario] = {}
+
+
+def scenario(name: str, *, admin: bool = False, gateway: bool = False):
+    """Register a scenario coroutine `fn(flow)` under `name`."""
+
+    def register(fn: Callable[[Flow], Awaitable[None]]):
+        SCENARIOS[name] = Scenario(name, fn, admin, gateway, (fn.__doc__ or "").strip())
+        return fn
+
+    return register
+
+
+class Context:
+    """Shared state of a run: the client, the targets, the user pool and the stats."""
+
+    def __init__(self, args, client) -> None:
+        self.args = args
+        self.client = client
+        self.rng = random.Random(args.seed)
+        self.users: list[Session] = []
+        self.admin: Session | None = None
+        self.pending: deque[str] = deque(maxlen=100_000)
+        self.pending_lock = asyncio.Lock()
+        self.registered = itertools.count(1)
+        self.run_tag = f"{int(time.time()):x}"
+        self.items = [f"item-{k:05d}" for k in range(args.items)]
+        self.item_weights = list(itertools.accumulate(1 / k for k in range(1, args.items + 1)))
+        self.steps: dict[str, StepStats] = {}
+        self.scenarios: dict[str, ScenarioStats] = {}
+        self.logged_errors: set[str] = set()
+
+    def item(self) -> str:
+        return self.rng.choices(self.items, cum_weights=self.item_weights)[0]
+
+    async def request(
+        self, step: str, method: str, url: str, *, expect: tuple[int, ...], record: bool = True, **kwargs: Any
+    ):
+        stats = self.steps.setdefault(step, StepStats()) if record else StepStats()
+        started = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except Exception as exc:
+            stats.errors += 1
+            stats.statuses[type(exc).__name__] += 1
+            self.log_error(step, repr(exc))
+            raise StepFailed(f"{step}: {exc!r}") from exc
+        stats.statuses[str(r.status_code)] += 1
+        if r.status_code not in expect:
+            stats.errors += 1
+            self.log_error(step, f"HTTP {r.status_code} {r.text[:200]}")
+            raise StepFailed(f"{step}: HTTP {r.status_code}")
+        stats.service.record(time.perf_counter() - started)
+        return r
+
+    def log_error(self, step: str, detail: str) -> None:
+        if step not in self.logged_errors:
+            self.logged_errors.add(step)
+            print(f"{step}: {detail}", file=sys.stderr)
+
+    async def login(self, user: Session, *, record: bool = True) -> str:
+        r = await self.request(
+            "auth_token",
+            "POST",
+            f"{self.args.auth_url}/token",
+            json={"username": user.username, "password": user.password},
+            expect=(200,),
+            record=record,
+        )
+        user.token, user.token_at = r.json()["access_token"], time.monotonic()
+        return user.token
+
+    async def bearer(self, user: Session) -> dict[str, str]:
+        if user.token is None or time.monotonic() - user.token_at > TOKEN_MAX_AGE:
+            async with user.lock:
+                if user.token is None or time.monotonic() - user.token_at > TOKEN_MAX_AGE:
+                    await self.login(user, record=False)
+        return {"Authorization": f"Bearer {user.token}"}
+
+    async def gateway_login(self, user: Session, *, record: bool = True) -> dict[str, str]:
+        r = await self.request(
+            "gateway_login",
+            "POST",
+            f"{self.args.gateway_url}/login",
+            data={"username": user.username, "password": user.password},
+            expect=(303,),
+            record=record,
+        )
+        cookies = {name: r.cookies[name] for name in ("access_token", "csrf_token") if name in r.cookies}
+        if "csrf_token" not in cookies:
+            raise StepFailed(f"gateway_login: no session cookies for {user.username}")
+        user.cookies, user.cookies_at = cookies, time.monotonic()
+        return cookies
+
+    async def gateway_cookies(self, user: Session) -> dict[str, str]:
+        if user.cookies is None or time.monotonic() - user.cookies_at > TOKEN_MAX_AGE:
+            async with user.lock:
+                if user.cookies is None or time.monotonic() - user.cookies_at > TOKEN_MAX_AGE:
+                    await self.gateway_login(user, record=False)
+        return user.cookies
+
+    async def pending_order(self) -> str:
+        """A PENDING order id: one this run created, else one listed by the admin API."""
+        if not self.pending:
+            async with self.pending_lock:
+                if not self.pending:
+                    r = await self.request(
+                        "admin_list_pending",
+                        "GET",
+                        f"{self.args.order_url}/orders/admin",
+                        params={"status": "PENDING", "limit": PENDING_REFILL},
+                        headers=await self.bearer(self.admin),
+                        expect=(200,),
+                    )
+                    self.pending.extend(row["id"] for row in r.json())
+        if not self.pending:
+            self.log_error("pending_order", "no PENDING orders to approve")
+            raise StepFailed("no PENDING orders to approve")
+        return self.pending.popleft()
+
+
+@dataclass(slots=True)
+class Flow:
+    """One arrival: the scenario's view of the context, bound to a pooled user."""
+
+    ctx: Context
+    user: Session
+
+    @property
+    def args(self):
+        return self.ctx.args
+
+    async def call(self, step: str, method: str, url: str, *, expect: tuple[int, ...] = (200,), **kwargs: Any):
+        return await self.ctx.request(step, method, url, expect=expect, **kwargs)
+
+
+def cookie_header(cookies: dict[str, str]) -> str:
+    return "; ".join(f"{name}={value}" for name, value in cookies.items())
+
+
+@scenario("register")
+async def register_user(flow: Flow) -> None:
+    """Register a new account (one bcrypt hash in auth-service)."""
+    ctx = flow.ctx
+    username = f"{ctx.args.user_prefix}{ctx.run_tag}-{next(ctx.registered)}"
+    await flow.call(
+        "auth_register",
+        "POST",
+        f"{flow.args.auth_url}/register",
+        json={"username": username, "password": ctx.args.password},
+        expect=(201,),
+    )
+
+
+@scenario("login")
+async def login(flow: Flow) -> None:
+    """Log a pooled user in (one bcrypt check in auth-service)."""
+    await flow.ctx.login(flow.user)
+
+
+async def _create_order(flow: Flow) -> None:
+    r = await flow.call(
+        "order_create",
+        "POST",
+        f"{flow.args.order_url}/orders/",
+        json={"item_name": flow.ctx.item(), "quantity": flow.ctx.rng.randint(1, 5)},
+        headers=await flow.ctx.bearer(flow.user),
+        expect=(201, 202),
+    )
+    flow.ctx.pending.append(r.json()["id"])
+
+
+async def _list_orders(flow: Flow) -> None:
+    await flow.call(
+        "order_list_me",
+        "GET",
+        f"{flow.args.order_url}/orders/me",
+        headers=await flow.ctx.bearer(flow.user),
+    )
+
+
+@scenario("create_order")
+async def create_order(flow: Flow) -> None:
+    """Create an order via the API; the ids feed the approve scenarios."""
+    await _create_order(flow)
+
+
+@scenario("list_orders")
+async def list_orders(flow: Flow) -> None:
+    """List the user's orders via the API."""
+    await _list_orders(flow)
+
+
+@scenario("shopper")
+async def shopper(flow: Flow) -> None:
+    """A returning customer: log in, create an order, list orders."""
+    await flow.ctx.login(flow.user)
+    await _create_order(flow)
+    await _list_orders(flow)
+
+
+@scenario("api_approve", admin=True)
+async def api_approve(flow: Flow) -> None:
+    """An admin approves a PENDING order via the order-service API."""
+    ctx = flow.ctx
+    order_id = await ctx.pending_order()
+    # 404: decided meanwhile (another approver, the rules engine)
+    await flow.call(
+        "order_approve",
+        "POST",
+        f"{flow.args.order_url}/orders/{order_id}/approve",
+        headers=await ctx.bearer(ctx.admin),
+        expect=(200, 404),
+    )
+
+
+@scenario("gateway_order", gateway=True)
+async def gateway_order(flow: Flow) -> None:
+    """The browser flow: the gateway order form with cookies and CSRF, then the orders page."""
+    ctx = flow.ctx
+    cookies = await ctx.gateway_cookies(flow.user)
+    headers = {"Cookie": cookie_header(cookies)}
+    await flow.call(
+        "gateway_order_form",
+        "POST",
+        f"{flow.args.gateway_url}/order",
+        data={
+            "item_name": ctx.item(),
+            "quantity": str(ctx.rng.randint(1, 5)),
+            "csrf_token": cookies["csrf_token"],
+        },
+        headers=headers,
+    )
+    await flow.call("gateway_orders_page", "GET", f"{flow.args.gateway_url}/orders", headers=headers)
+
+
+@scenario("gateway_approve", admin=True, gateway=True)
+async def gateway_approve(flow: Flow) -> None:
+    """The admin page's HTMX approve through the gateway (cookies and X-CSRF-Token)."""
+    ctx = flow.ctx
+    order_id = await ctx.pending_order()
+    cookies = await ctx.gateway_cookies(ctx.admin)
+    await flow.call(
+        "gateway_admin_approve",
+        "POST",
+        f"{flow.args.gateway_url}/admin/{order_id}/approve",
+        headers={
+            "Cookie": cookie_header(cookies),
+            "X-CSRF-Token": cookies["csrf_token"],
+            "HX-Request": "true",
+        },
+    )
+
+
+@scenario("health")
+async def health(flow: Flow) -> None:
+    """order-service /health: the floor of what the harness can measure."""
+    await flow.call("order_health", "GET", f"{flow.args.order_url}/health")
+
+
+async def setup_users(ctx: Context, mix: dict[str, float]) -> None:
+    """Register (if missing) and log in the user pool and, when needed, the admin."""
+    args = ctx.args
+    gateway = any(SCENARIOS[name].gateway for name in mix)
+    sem = asyncio.Semaphore(args.setup_concurrency)
+
+    async def prepare(user: Session, register: bool) -> None:
+        async with sem:
+            if register:
+                await ctx.request(
+                    "setup_register",
+                    "POST",
+                    f"{args.auth_url}/register",
+                    json={"username": user.username, "password": user.password},
+                    expect=(201, 400),
+                    record=False,
+                )
+            await ctx.login(user, record=False)
+            if gateway:
+                await ctx.gateway_login(user, record=False)
+
+    ctx.users = [Session(f"{args.user_prefix}{n}", args.password) for n in range(1, args.users + 1)]
+    jobs = [prepare(user, True) for user in ctx.users]
+    if any(SCENARIOS[name].admin for name in mix):
+        ctx.admin = Session(args.admin_user, args.admin_password)
+        jobs.append(prepare(ctx.admin, False))
+    started = time.perf_counter()
+    await asyncio.gather(*jobs)
+    print(f"set up {len(jobs)} sessions in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+async def run_load(args, mix: dict[str, float], transport=None) -> dict[str, Any]:
+    """Set up the sessions, drive the arrivals and return the report."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.max_inflight, max_keepalive_connections=args.max_inflight)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits, transport=transport) as client:
+        ctx = Context(args, client)
+        await setup_users(ctx, mix)
+        windows = build_windows(args)
+        names = list(mix)
+        weights = list(itertools.accumulate(mix[n] for n in names))
+        slots = asyncio.Semaphore(args.max_inflight)
+        loop = asyncio.get_running_loop()
+        tasks: set[asyncio.Task] = set()
+        lag = 0.0
+
+        async def arrival(name: str, scheduled: float, window: Window | None) -> None:
+            flow = Flow(ctx, ctx.rng.choice(ctx.users))
+            async with slots:
+                started = loop.time()
+                try:
+                    await SCENARIOS[name].run(flow)
+                    failed = False
+                except StepFailed:
+                    failed = True
+                except (ValueError, LookupError, TypeError) as exc:
+                    # an unexpected body; the step itself was counted as ok
+                    ctx.log_error(name, repr(exc))
+                    failed = True
+            if window is None:
+                return
+            done = loop.time()
+            stats = ctx.scenarios.setdefault(name, ScenarioStats())
+            if failed:
+                stats.errors += 1
+                window.errors += 1
+                return
+            stats.ok += 1
+            window.ok += 1
+            # coordinated omission: charge the time since the arrival was due
+            stats.response.record(done - scheduled)
+            stats.service.record(done - started)
+            window.response.record(done - scheduled)
+
+        async def drive(duration: float, rate_at: Callable[[float], float], window_at) -> None:
+            nonlocal lag
+            rng = random.Random(ctx.rng.random())
+            origin = loop.time()
+            t = 0.0
+            while True:
+                rate = rate_at(t)
+                if rate <= 0:
+                    t += 0.01
+                else:
+                    t += rng.expovariate(rate) if args.arrivals == "poisson" else 1 / rate
+                if t >= duration:
+                    return
+                if rate <= 0:
+                    continue
+                due = origin + t
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    lag = max(lag, -delay)
+                window = window_at(t)
+                if window is not None:
+                    window.arrivals += 1
+                name = names[bisect.bisect_right(weights, rng.random() * weights[-1])]
+                task = asyncio.create_task(arrival(name, due, window))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        if args.warmup > 0:
+            first = windows[0].rate_from
+            await drive(args.warmup, lambda t: first, lambda t: None)
+            if tasks:
+                await asyncio.gather(*tasks)
+            ctx.steps.clear()
+            lag = 0.0
+
+        starts = [win.start for win in windows]
+
+        def window_at(t: float) -> Window:
+            return windows[max(bisect.bisect_right(starts, t) - 1, 0)]
+
+        duration = windows[-1].start + windows[-1].duration
+        started = time.perf_counter()
+        await drive(duration, lambda t: window_at(t).rate_at(t), window_at)
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    return build_report(args, mix, ctx, windows, elapsed, lag)
+
+
+def shape(args) -> str:
+    if args.steps:
+        return "step"
+    return "constant" if args.ramp_to is None else "ramp"
+
+
+def build_report(args, mix, ctx: Context, windows: list[Window], elapsed: float, lag: float) -> dict[str, Any]:
+    overall = Histogram()
+    ok = errors = 0
+    scenarios = {}
+    for name, stats in sorted(ctx.scenarios.items()):
+        overall.merge(stats.response)
+        ok, errors = ok + stats.ok, errors + stats.errors
+        scenarios[name] = {
+            "ok": stats.ok,
+            "errors": stats.errors,
+            "throughput_rps": stats.ok / elapsed,
+            "response_ms": stats.response.summary(),
+            "service_ms": stats.service.summary(),
+            "histogram": stats.response.to_dict(),
+        }
+    steps = {
+        name: {
+            "ok": stats.service.total,
+            "errors": stats.errors,
+            "statuses": dict(sorted(stats.statuses.items())),
+            "service_ms": stats.service.summary(),
+        }
+        for name, stats in sorted(ctx.steps.items())
+    }
+    return {
+        "meta": {
+            "started_at": args.started_at,
+            "shape": shape(args),
+            "mix": mix,
+            "arrivals": args.arrivals,
+            "max_inflight": args.max_inflight,
+            "users": args.users,
+            "seed": args.seed,
+            "slo_p99_ms": args.slo_p99_ms,
+            "max_error_rate": args.max_error_rate,
+            "targets": {
+                "auth": args.auth_url,
+                "order": args.order_url,
+                "gateway": args.gateway_url,
+            },
+        },
+        "totals": {
+            "ok": ok,
+            "errors": errors,
+            "error_rate": errors / (ok + errors) if ok + errors else 0.0,
+            "elapsed_s": elapsed,
+            "throughput_rps": ok / elapsed,
+            "response_ms": overall.summary(),
+            "generator_lag_ms": lag * 1000,
+        },
+        "scenarios": scenarios,
+        "steps": steps,
+        "windows": [
+            {
+                "start_s": win.start,
+                "duration_s": win.duration,
+                "offered_rps": win.offered,
+                "achieved_rps": win.ok / win.duration,
+                "arrivals": win.arrivals,
+                "ok": win.ok,
+                "errors": win.errors,
+                "response_ms": win.response.summary(),
+            }
+            for win in windows
+        ],
+        "saturation": find_saturation(windows, args.slo_p99_ms, args.max_error_rate),
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(
+        f"{'window':>8} {'offered/s':>10} {'done/s':>8} {'errors':>7} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for win in report["windows"]:
+        r = win["response_ms"]
+        print(
+            f"{win['start_s']:>7.0f}s {win['offered_rps']:>10.1f} {win['achieved_rps']:>8.1f} "
+            f"{win['errors']:>7} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['max']:>8.1f}"
+        )
+    print()
+    print(
+        f"{'scenario':<16} {'ok':>8} {'errors':>7} {'ok/s':>8} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}"
+    )
+    for name, sc in report["scenarios"].items():
+        r = sc["response_ms"]
+        print(
+            f"{name:<16} {sc['ok']:>8} {sc['errors']:>7} {sc['throughput_rps']:>8.1f} {r['p50']:>8.1f} "
+            f"{r['p95']:>8.1f} {r['p99']:>8.1f} {r['p99_9']:>9.1f} {r['max']:>8.1f}"
+        )
+    print()
+    print(f"{'step':<22} {'ok':>8} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+    for name, st in report["steps"].items():
+        r = st["service_ms"]
+        statuses = " ".join(f"{code}:{n}" for code, n in st["statuses"].items())
+        print(f"{name:<22} {st['ok']:>8} {st['errors']:>7} {r['p50']:>8.1f} {r['p99']:>8.1f}  {statuses}")
+    totals = report["totals"]
+    print()
+    print(
+        f"{totals['ok']:,} ok, {totals['errors']:,} errors ({totals['error_rate']:.2%}) in "
+        f"{totals['elapsed_s']:.0f}s, {totals['throughput_rps']:.1f}/s, "
+        f"p99 {totals['response_ms']['p99']:.1f}ms (from the scheduled start)"
+    )
+    if totals["generator_lag_ms"] > 50:
+        print(
+            f"warning: arrivals were dispatched up to {totals['generator_lag_ms']:.0f}ms late; "
+            "the client is saturated, latencies include its delay"
+        )
+    sat = report["saturation"]
+    if sat:
+        held = "nothing" if sat["last_good_rps"] is None else f"{sat['last_good_rps']:.1f}/s"
+        print(
+            f"saturated at {sat['first_bad_rps']:.1f}/s (t={sat['at_s']:.0f}s: "
+            f"{'; '.join(sat['reasons'])}); last rate that held: {held}"
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Open-loop HTTP load test with scenarios")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Scenario weights, name=weight,... ({', '.join(SCENARIOS)})")
+    parser.add_argument("--rate", type=float, default=20, help="Arrivals per second (start rate of a ramp)")
+    parser.add_argument("--ramp-to", type=float, help="Rise linearly to this rate over --duration")
+    parser.add_argument("--duration", type=float, default=60, help="Measured seconds (constant and ramp)")
+    parser.add_argument("--window", type=float, default=10, help="Reporting window seconds (constant and ramp)")
+    parser.add_argument("--steps", help="Step load: comma-separated rates, each held --step-duration")
+    parser.add_argument("--step-duration", type=float, default=30, help="Seconds per step")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds at the first rate")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson", help="Inter-arrival times")
+    parser.add_argument("--max-inflight", type=int, default=512, help="Concurrent scenarios (and connections)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-request timeout (s)")
+    parser.add_argument("--slo-p99-ms", type=float, default=500, help="A window above this p99 is saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate that saturates a window or fails the run")
+    parser.add_argument("--users", type=int, default=50, help="Pooled user accounts")
+    parser.add_argument("--user-prefix", default="loadtest-", help="Pooled usernames are <prefix><n>")
+    parser.add_argument("--password", default="password123", help="Password of the pooled users")
+    parser.add_argument("--admin-user", default=os.getenv("ADMIN_USERNAME"), help="Admin account for the approve scenarios")
+    parser.add_argument("--admin-password", default=os.getenv("ADMIN_PASSWORD"), help="Admin password")
+    parser.add_argument("--items", type=int, default=1000, help="Distinct item names (Zipf popularity)")
+    parser.add_argument("--setup-concurrency", type=int, default=16, help="Concurrent logins while setting up")
+    parser.add_argument("--auth-url", default=os.getenv("AUTH_SERVICE_URL", "http://localhost:8001"))
+    parser.add_argument("--order-url", default=os.getenv("ORDER_SERVICE_URL", "http://localhost:8002"))
+    parser.add_argument("--gateway-url", default=os.getenv("WEB_GATEWAY_URL", "http://localhost:8000"))
+    parser.add_argument("--seed", type=int, default=1, help="Random seed of arrivals and choices")
+    parser.add_argument("--json", help="Also write the report (with histograms) to this file")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    mix = parse_mix(args.mix)
+    unknown = sorted(set(mix) - set(SCENARIOS))
+    if unknown:
+        fail(f"unknown scenario(s) in --mix: {', '.join(unknown)}; known: {', '.join(SCENARIOS)}", 2)
+    if args.steps:
+        if not parse_steps(args.steps) or min(parse_steps(args.steps)) <= 0 or args.step_duration <= 0:
+            fail("--steps must be positive rates and --step-duration positive", 2)
+    elif args.rate <= 0 or args.duration <= 0 or args.window <= 0 or (args.ramp_to is not None and args.ramp_to < 0):
+        fail("--rate, --duration and --window must be positive", 2)
+    if min(args.users, args.max_inflight, args.items, args.setup_concurrency) < 1:
+        fail("--users, --max-inflight, --items and --setup-concurrency must be positive", 2)
+    admin = [name for name in mix if SCENARIOS[name].admin]
+    if admin and not (args.admin_user and args.admin_password):
+        fail(f"{', '.join(admin)} need --admin-user and --admin-password (or ADMIN_USERNAME/ADMIN_PASSWORD)", 2)
+
+    try:
+        import httpx  # noqa: F401
+    except ImportError:
+        fail("httpx is required. Install with: pip install httpx")
+
+    args.started_at = datetime.now(UTC).isoformat()
+    try:
+        report = asyncio.run(run_load(args, mix))
+    except StepFailed as exc:
+        fail(f"setup failed: {exc}")
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    return 1 if report["totals"]["error_rate"] > args.max_error_rate else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
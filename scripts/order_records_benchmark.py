@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Memory benchmark for order listings: per-row dicts vs slotted records.
+
+Replays the two halves of a large `/orders/admin` listing without a database:
+
+- order-service: DB rows (tuples, as psycopg returns them) to the JSON body.
+  "dicts" is the former path (a dict per row, then FastAPI's
+  `jsonable_encoder` and `json.dumps`); "records" builds
+  `app.records.AdminOrder` objects and serializes them with orjson;
+  "stream" feeds the rows in ORDER_STREAM_CHUNK_ROWS chunks through
+  `records_stream_response` (`?stream=true`) and discards each chunk once
+  sent, as the socket would.
+- web-gateway: JSON body to rendered HTML. "dicts" is the former
+  `_normalize_list` copy plus id fix-up; "records" is
+  `app.records.parse_orders`. Both render the same Jinja table.
+
+Every (stage, variant) runs in a fresh subprocess so peak RSS is its own.
+Reported per 10k rows: peak RSS growth over the process baseline and wall
+time (untraced pass), then peak tracemalloc bytes and the blocks still
+allocated for the stage's output (traced pass). Service stages also report
+the time to the first byte of the body.
+
+`--json` also writes the results for scripts/perf_baseline.py.
+
+Usage:
+  python scripts/order_records_benchmark.py --rows 100000
+  python scripts/order_records_benchmark.py --rows 100000 --json records.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import functools
+import importlib.util
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+KEYS = ["id", "user_id", "item_name", "quantity", "status", "created_at"]
+TEMPLATE = (
+    "<table>{% for o in orders %}<tr><td>{{ o.id }}</td><td>{{ o.user_id }}</td>"
+    "<td>{{ o.item_name }}</td><td>{{ o.quantity }}</td><td>{{ o.status }}</td>"
+    "<td>{{ o.created_at }}</td></tr>{% endfor %}</table>"
+)
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+@functools.cache
+def load(service: str, name: str) -> Any:
+    """Import a service's app module by path (service dirs are not packages)."""
+    path = REPO_ROOT / "services" / service / "app" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"{service}_{name}".replace("-", "_"), path)
+    if spec is None or spec.loader is None:
+        fail(f"cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_rows(n: int) -> list[tuple]:
+    t0 = datetime(2025, 1, 1, tzinfo=UTC)
+    users = [uuid.uuid4() for _ in range(1000)]
+    statuses = ["PENDING", "APPROVED", "REJECTED"]
+    return [
+        (uuid.uuid4(), users[i % 1000], f"item-{i % 500}", 1 + i % 100, statuses[i % 3], t0 + timedelta(seconds=i))
+        for i in range(n)
+    ]
+
+
+def service_dicts(rows: list[tuple]) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+
+    mapped = [dict(zip(KEYS, [str(r[0])] + list(r[1:]))) for r in rows]
+    return json.dumps(
+        jsonable_encoder(mapped), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def service_records(rows: list[tuple]) -> bytes:
+    records = load("order-service", "records")
+    return records.records_response(records.records_from_rows(records.AdminOrder, rows)).body
+
+
+def service_stream(rows: list[tuple], chunk_rows: int = 500) -> tuple[int, float]:
+    """Drain a streamed response; returns (body bytes, seconds to first byte)."""
+    records = load("order-service", "records")
+
+    async def chunks() -> Any:
+        for i in range(0, len(rows), chunk_rows):
+            yield rows[i : i + chunk_rows]
+
+    async def drain() -> tuple[int, float]:
+        start = time.perf_counter()
+        response = await records.records_stream_response(records.AdminOrder, chunks())
+        first, total = 0.0, 0
+        async for part in response.body_iterator:
+            first = first or time.perf_counter() - start
+            total += len(part)
+        return total, first
+
+    return asyncio.run(drain())
+
+
+def gateway_dicts(payload: Any) -> list[Any]:
+    out = []
+    for item in payload:
+        if isinstance(item, dict):
+            out.append({str(k): v for k, v in item.items()})
+    for o in out:
+        if o.get("id") is not None:
+            o["id"] = str(o["id"])
+    return out
+
+
+def gateway_records(payload: Any) -> list[Any]:
+    return load("web-gateway", "records").parse_orders(payload)
+
+
+def current_rss_kb() -> int:
+    with open("/proc/self/status", encoding="utf-8") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def run_stage(stage: str, variant: str, rows: int) -> dict:
+    import jinja2
+
+    template = jinja2.Environment(autoescape=True).from_string(TEMPLATE)
+    data = make_rows(rows)
+    if stage == "gateway":
+        data = service_records(data)
+    service = {"dicts": service_dicts, "records": service_records, "stream": service_stream}[variant]
+    gateway = gateway_dicts if variant == "dicts" else gateway_records
+    first_byte: list[float] = []
+
+    def run() -> Any:
+        if stage == "service":
+            t0 = time.perf_counter()
+            out = service(data)
+            # a buffered body's first byte goes out once all of it is built
+            first_byte.append(out[1] if variant == "stream" else time.perf_counter() - t0)
+            return out
+        out = gateway(json.loads(data))
+        html = template.render(orders=out)
+        assert html.count("<tr>") == rows
+        return out
+
+    # warm up imports so they are not counted
+    service_stream(make_rows(10))
+    gateway(json.loads(service_records(make_rows(10))))
+    baseline_kb = current_rss_kb()
+    # untraced pass: peak RSS and time
+    start = time.perf_counter()
+    out = run()
+    elapsed = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    del out
+    # traced pass: Python-level peak and the blocks the output keeps alive
+    tracemalloc.start()
+    out = run()
+    _, peak = tracemalloc.get_traced_memory()
+    live_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del out  # held until the snapshot so its blocks are counted
+    per = 10_000 / rows
+    return {
+        "stage": stage,
+        "variant": variant,
+        "rss_mb": max(0, peak_rss_kb - baseline_kb) / 1024 * per,
+        "traced_mb": peak / 1024 / 1024 * per,
+        "live_blocks": live_blocks * per,
+        "seconds": elapsed * per,
+        # untraced pass, whole listing (not per 10k rows)
+        "first_byte_ms": first_byte[0] * 1000 if first_byte else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Order listing memory benchmark")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows in the listing")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--stage", choices=["service", "gateway"], help=argparse.SUPPRESS)
+    parser.add_argument("--variant", choices=["dicts", "records", "stream"], help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.stage:
+        print(json.dumps(run_stage(args.stage, args.variant, args.rows)))
+        return 0
+
+    try:
+        import fastapi  # noqa: F401
+        import jinja2  # noqa: F401
+        import orjson  # noqa: F401
+    except ImportError:
+        fail("fastapi, jinja2 and orjson are required (see the service pyproject files)")
+
+    results = []
+    runs = [("service", v) for v in ("dicts", "records", "stream")] + [
+        ("gateway", v) for v in ("dicts", "records")
+    ]
+    for stage, variant in runs:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--rows", str(args.rows), "--stage", stage, "--variant", variant],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if proc.returncode != 0:
+            fail(proc.stderr)
+        results.append(json.loads(proc.stdout))
+
+    print(f"per 10k rows ({args.rows} rows per run)")
+    print(
+        f"{'stage':<8} {'variant':<8} {'peak RSS MB':>12} {'traced MB':>10} {'live blocks':>12} "
+        f"{'ms':>8} {'first byte ms*':>15}"
+    )
+    for r in results:
+        first = "" if r["first_byte_ms"] is None else f"{r['first_byte_ms']:.1f}"
+        print(
+            f"{r['stage']:<8} {r['variant']:<8} {r['rss_mb']:>12.2f} {r['traced_mb']:>10.2f} "
+            f"{r['live_blocks']:>12.0f} {r['seconds'] * 1000:>8.1f} {first:>15}"
+        )
+    print("* for the whole listing, not per 10k rows")
+    if args.json:
+        Path(args.json).write_text(json.dumps({"meta": {"rows": args.rows}, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
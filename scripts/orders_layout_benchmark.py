@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Table size and approve/reject throughput: legacy vs compact orders layout.
+
+Builds two scratch copies of the orders table and fills both with the same
+`--rows` orders over `--items` distinct item names (a few names are very
+popular, as in real traffic):
+
+- legacy: TEXT `status` and `item_name`, default fillfactor, a B-tree on
+  `(updated_at, id)` and a partial index on `status = 'PENDING'`,
+- compact: the current layout (migrations 0010, 0014 and 0015: enum status,
+  INTEGER item-name id, fillfactor 80, the same three indexes).
+
+It then approves `--updates` random PENDING orders one statement at a time,
+the way the admin endpoint does, and reports:
+
+- heap and index size before and after the updates,
+- approvals per second,
+- the share of updates that were HOT (heap-only: no index entries written).
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/orders_layout_benchmark.py --rows 1000000
+
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import time
+
+LEGACY_DDL = """
+CREATE TABLE bench_orders_legacy (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id UUID NOT NULL,
+  item_name TEXT NOT NULL,
+  quantity INT NOT NULL,
+  notes TEXT,
+  status TEXT NOT NULL DEFAULT 'PENDING',
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  admin_action_at TIMESTAMPTZ
+);
+CREATE INDEX ON bench_orders_legacy (updated_at, id);
+CREATE INDEX ON bench_orders_legacy (id) WHERE status = 'PENDING';
+CREATE INDEX ON bench_orders_legacy (user_id, created_at);
+"""
+COMPACT_DDL = """
+CREATE TYPE bench_order_status AS ENUM ('PENDING', 'APPROVED', 'REJECTED');
+CREATE TABLE bench_item_names (
+  id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+  name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE bench_orders_compact (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id UUID NOT NULL,
+  item_name_id INTEGER NOT NULL REFERENCES bench_item_names(id),
+  quantity INT NOT NULL,
+  notes TEXT,
+  status bench_order_status NOT NULL DEFAULT 'PENDING',
+  created_at TIMESTAMPTZ DEFAULT now(),
+  updated_at TIMESTAMPTZ DEFAULT now(),
+  admin_action_at TIMESTAMPTZ
+) WITH (fillfactor = 80);
+CREATE INDEX ON bench_orders_compact (updated_at, id);
+CREATE INDEX ON bench_orders_compact (id) WHERE status = 'PENDING';
+CREATE INDEX ON bench_orders_compact (user_id, created_at);
+"""
+DROP_SQL = """
+DROP TABLE IF EXISTS bench_orders_legacy;
+DROP TABLE IF EXISTS bench_orders_compact;
+DROP TABLE IF EXISTS bench_item_names;
+DROP TYPE IF EXISTS bench_order_status;
+"""
+
+# Item names are log-uniform over `items` (item i has weight ~ 1/(i + 1)),
+# 5000 users, one order per second of history.
+LOAD_LEGACY_SQL = """
+INSERT INTO bench_orders_legacy (user_id, item_name, quantity, notes, created_at, updated_at)
+SELECT md5(mod(g, 5000)::text)::uuid,
+       'item-' || (floor(exp(random() * ln(%(items)s)))::int - 1),
+       1 + mod(g, 100),
+       CASE WHEN mod(g, 4) = 0 THEN 'gift wrap' END,
+       now() - make_interval(secs => %(rows)s - g),
+       now() - make_interval(secs => %(rows)s - g)
+FROM generate_series(1, %(rows)s) g
+"""
+# The compact table gets the same orders (same ids) in the same order.
+LOAD_COMPACT_SQL = """
+INSERT INTO bench_item_names (name)
+SELECT DISTINCT item_name FROM bench_orders_legacy ORDER BY 1;
+INSERT INTO bench_orders_compact
+  (id, user_id, item_name_id, quantity, notes, status, created_at, updated_at)
+SELECT o.id, o.user_id, n.id, o.quantity, o.notes, 'PENDING', o.created_at, o.updated_at
+FROM bench_orders_legacy o JOIN bench_item_names n ON n.name = o.item_name
+ORDER BY o.created_at;
+"""
+APPROVE_SQL = {
+    "legacy": (
+        "UPDATE bench_orders_legacy SET status = 'APPROVED', admin_action_at = now(), "
+        "updated_at = now() WHERE id = %s AND status = 'PENDING'"
+    ),
+    "compact": (
+        "UPDATE bench_orders_compact SET status = 'APPROVED', admin_action_at = now(), "
+        "updated_at = now() WHERE id = %s AND status = 'PENDING'"
+    ),
+}
+SIZES_SQL = (
+    "SELECT pg_table_size(%s::regclass), pg_indexes_size(%s::regclass)"
+)
+HOT_SQL = (
+    "SELECT n_tup_upd, n_tup_hot_upd FROM pg_stat_user_tables WHERE relid = %s::regclass"
+)
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def sizes(cur, table: str) -> tuple[float, float]:
+    cur.execute(SIZES_SQL, (table, table))
+    heap, indexes = cur.fetchone()
+    return heap / 1024 / 1024, indexes / 1024 / 1024
+
+
+def hot_counts(cur, table: str) -> tuple[int, int]:
+    cur.execute("SELECT pg_stat_force_next_flush()")
+    cur.execute(HOT_SQL, (table,))
+    row = cur.fetchone()
+    return (int(row[0]), int(row[1])) if row else (0, 0)
+
+
+def run_updates(conn, layout: str, ids: list, batch: int) -> dict:
+    table = f"bench_orders_{layout}"
+    with conn.cursor() as cur:
+        heap_before, index_before = sizes(cur, table)
+        upd0, hot0 = hot_counts(cur, table)
+    conn.commit()
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        with conn.cursor() as cur:
+            for order_id in ids[i : i + batch]:
+                cur.execute(APPROVE_SQL[layout], (order_id,))
+        conn.commit()
+    elapsed = time.perf_counter() - start
+    with conn.cursor() as cur:
+        heap_after, index_after = sizes(cur, table)
+        upd1, hot1 = hot_counts(cur, table)
+    conn.commit()
+    updated = upd1 - upd0
+    return {
+        "layout": layout,
+        "heap_mb": heap_before,
+        "index_mb": index_before,
+        "heap_after_mb": heap_after,
+        "index_after_mb": index_after,
+        "updates_per_sec": len(ids) / elapsed,
+        "hot_pct": 100.0 * (hot1 - hot0) / updated if updated else 0.0,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Legacy vs compact orders layout benchmark")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Orders per table")
+    parser.add_argument("--items", type=int, default=2_000, help="Distinct item names")
+    parser.add_argument("--updates", type=int, default=50_000, help="Orders approved per layout")
+    parser.add_argument("--batch", type=int, default=100, help="Approvals per committed transaction")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch tables for inspection")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail("DATABASE_URL must be provided via --database-url or the DATABASE_URL env var", 2)
+
+    try:
+        import psycopg
+    except ImportError:
+        fail("psycopg (psycopg3) is required. Install with: pip install 'psycopg[binary]'")
+
+    try:
+        conn = psycopg.connect(database_url)
+    except psycopg.Error as exc:  # pragma: no cover - environment dependent
+        fail(f"Failed to connect to database: {exc}", 3)
+
+    results = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(DROP_SQL)
+            cur.execute(LEGACY_DDL)
+            cur.execute(COMPACT_DDL)
+            print(f"Loading {args.rows} orders over {args.items} item names...")
+            cur.execute(LOAD_LEGACY_SQL, {"rows": args.rows, "items": args.items})
+            cur.execute(LOAD_COMPACT_SQL)
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("VACUUM ANALYZE bench_orders_legacy")
+            cur.execute("VACUUM ANALYZE bench_orders_compact")
+            cur.execute("SELECT id FROM bench_orders_legacy")
+            ids = [r[0] for r in cur.fetchall()]
+        conn.autocommit = False
+        ids = random.sample(ids, min(args.updates, len(ids)))
+        for layout in ("legacy", "compact"):
+            print(f"Approving {len(ids)} orders ({layout})...")
+            results.append(run_updates(conn, layout, ids, args.batch))
+        if not args.keep:
+            with conn.cursor() as cur:
+                cur.execute(DROP_SQL)
+            conn.commit()
+    finally:
+        conn.close()
+
+    print(
+        f"{'layout':<8} {'heap MB':>9} {'index MB':>9} {'heap MB*':>9} {'index MB*':>10} "
+        f"{'updates/s':>10} {'HOT %':>6}"
+    )
+    for r in results:
+        print(
+            f"{r['layout']:<8} {r['heap_mb']:>9.1f} {r['index_mb']:>9.1f} "
+            f"{r['heap_after_mb']:>9.1f} {r['index_after_mb']:>10.1f} "
+            f"{r['updates_per_sec']:>10.0f} {r['hot_pct']:>6.1f}"
+        )
+    print("* after the updates")
+    legacy, compact = results
+    print(
+        f"compact/legacy: size {(compact['heap_mb'] + compact['index_mb']) / (legacy['heap_mb'] + legacy['index_mb']):.2f}x, "
+        f"update throughput {compact['updates_per_sec'] / legacy['updates_per_sec']:.2f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
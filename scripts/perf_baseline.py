@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""Benchmark history, baseline comparison and performance budgets.
+
+The benchmarks write JSON with `--json`: scripts/load_test.py,
+sql_workload_benchmark.py, order_records_benchmark.py and benchmark.py.
+This tool reads such a file as named metrics (throughput, p50/p95/p99,
+error rate, allocations) and keeps runs in an append-only JSON-lines
+history (`--store`, default perf/history.jsonl), one line per run, tagged
+with its suite, git commit and `--label`:
+
+  record FILE    add the run to the history
+  compare FILE   compare the run with its suite's baseline, the median of
+                 the last `--baseline-runs` runs, and with the budgets in
+                 perf/budgets.json; exit 1 on a regression or a blown
+                 budget (`--record` also adds the run afterwards)
+  trend          each metric of a suite across its recorded runs
+
+A metric regresses when it is worse than the baseline by more than
+`--tolerance` (relative; `--tolerance-for '*.p99_ms=0.25'` per metric glob)
+and the difference is significant:
+
+- with 3+ baseline runs: it lies more than 3 robust standard deviations
+  (1.4826 x MAD) of those runs from their median;
+- otherwise, when both runs carry 95% confidence intervals: the run's and
+  the latest baseline run's do not overlap. Throughputs get a Poisson
+  interval from their counts, percentiles a distribution-free interval from
+  the order statistics of the load test's histograms (or benchmark.py's
+  samples);
+- otherwise the tolerance alone decides and the verdict says so.
+
+Budgets are absolute limits per suite and metric glob (`max` or `min`),
+such as the 200ms `/health` p95 that benchmark.py checks.
+
+Runs are only compared within a suite, derived from the file
+(`load_test:<shape>:<mix>`, `sql_workload:<rows>rows:c<concurrency>`,
+`order_records:<rows>rows`, `benchmark:<path>`) unless `--suite` names one.
+
+Usage:
+  python scripts/load_test.py --mix create_order --rate 50 --duration 60 --json run.json
+  python scripts/perf_baseline.py compare run.json --record
+  python scripts/perf_baseline.py trend --suite 'load_test:*' --metric '*.p99_ms'
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import functools
+import hashlib
+import importlib.util
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+STORE = REPO_ROOT / "perf" / "history.jsonl"
+BUDGETS = REPO_ROOT / "perf" / "budgets.json"
+Z95 = 1.96
+# robust standard deviations a run may stray from the baseline median
+NOISE_SIGMAS = 3.0
+MAD_SCALE = 1.4826
+SPARKS = "▁▂▃▄▅▆▇█"
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+@functools.cache
+def _load_script(name: str) -> Any:
+    path = REPO_ROOT / "scripts" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"scripts_{name}", path)
+    if spec is None or spec.loader is None:
+        fail(f"cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def rank_interval(n: int, p: float) -> tuple[int, int]:
+    """1-based ranks bounding the `p`-quantile of n samples with ~95% confidence."""
+    half = Z95 * math.sqrt(n * p * (1 - p))
+    return max(1, math.floor(n * p - half)), min(n, math.ceil(n * p + half))
+
+
+def poisson_interval(count: int, seconds: float) -> list[float]:
+    half = Z95 * math.sqrt(count)
+    return [max(count - half, 0) / seconds, (count + half) / seconds]
+
+
+def metric(value: float, better: str, ci: list[float] | None = None) -> dict[str, Any]:
+    return {"value": value, "better": better, "ci": ci}
+
+
+def histogram_metrics(prefix: str, data: dict[str, Any]) -> dict[str, dict]:
+    """p50/p95/p99 with order-statistic intervals from a load_test histogram."""
+    hist = _load_script("load_test").Histogram.from_dict(data)
+    out = {}
+    for p in (50, 95, 99):
+        lo, hi = rank_interval(hist.total, p / 100)
+        out[f"{prefix}.p{p}_ms"] = metric(
+            hist.percentile(p), "lower", [hist.value_at_rank(lo), hist.value_at_rank(hi)]
+        )
+    return out
+
+
+def sample_metrics(samples: list[float]) -> dict[str, dict]:
+    """p50/p95/p99 with order-statistic intervals from raw samples (ms);
+    none without samples."""
+    values = sorted(samples)
+    n = len(values)
+    out: dict[str, dict] = {}
+    if n == 0:
+        return out
+    for p in (50, 95, 99):
+        lo, hi = rank_interval(n, p / 100)
+        value = values[max(1, math.ceil(n * p / 100)) - 1]
+        out[f"p{p}_ms"] = metric(value, "lower", [values[lo - 1], values[hi - 1]])
+    return out
+
+
+def extract(report: dict[str, Any]) -> tuple[str, str, dict[str, dict]]:
+    """(kind, suite, metrics) of a benchmark JSON file; raises if it is none of ours."""
+    if not isinstance(report, dict):
+        raise TypeError("not a JSON object")
+    meta = report.get("meta", {})
+    metrics: dict[str, dict] = {}
+    if "windows" in report and "scenarios" in report:
+        elapsed = report["totals"]["elapsed_s"]
+        for name, sc in report["scenarios"].items():
+            done = sc["ok"] + sc["errors"]
+            metrics[f"{name}.throughput_rps"] = metric(
+                sc["throughput_rps"], "higher", poisson_interval(sc["ok"], elapsed)
+            )
+            metrics[f"{name}.error_rate"] = metric(sc["errors"] / done if done else 0.0, "lower")
+            if sc["histogram"]["total"]:
+                metrics.update(histogram_metrics(name, sc["histogram"]))
+        mix = ",".join(f"{name}={weight:g}" for name, weight in sorted(meta["mix"].items()))
+        return "load_test", f"load_test:{meta['shape']}:{mix}", metrics
+    if "statements" in report:
+        for name, st in report["statements"].items():
+            metrics[f"{name}.ops_per_sec"] = metric(
+                st["ops_per_sec"], "higher", poisson_interval(st["ops"], meta["duration"])
+            )
+            for p in ("p50", "p95", "p99"):
+                metrics[f"{name}.{p}_ms"] = metric(st[f"{p}_ms"], "lower")
+        return "sql_workload", f"sql_workload:{meta['rows']}rows:c{meta['concurrency']}", metrics
+    if "results" in report:
+        for r in report["results"]:
+            key = f"{r['stage']}.{r['variant']}"
+            for field in ("traced_mb", "live_blocks", "rss_mb"):
+                metrics[f"{key}.{field}"] = metric(r[field], "lower")
+            metrics[f"{key}.ms_per_10k"] = metric(r["seconds"] * 1000, "lower")
+        return "order_records", f"order_records:{meta['rows']}rows", metrics
+    if "latencies_ms" in report:
+        metrics.update(sample_metrics(report["latencies_ms"]))
+        requests = report["requests"]
+        metrics["error_rate"] = metric(report["errors"] / requests if requests else 0.0, "lower")
+        return "benchmark", f"benchmark:{urlparse(meta['url']).path or '/'}", metrics
+    raise ValueError("expected load_test, sql_workload, order_records or benchmark --json output")
+
+
+def git_sha() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return None
+    return out.stdout.strip() or None
+
+
+def make_run(path: Path, suite: str | None, label: str | None) -> dict[str, Any]:
+    report = json.loads(path.read_text())
+    kind, derived, metrics = extract(report)
+    recorded_at = datetime.now(UTC).isoformat(timespec="seconds")
+    return {
+        "id": f"{recorded_at}-{hashlib.sha1(path.read_bytes()).hexdigest()[:8]}",
+        "recorded_at": recorded_at,
+        "suite": suite or derived,
+        "kind": kind,
+        "git_sha": git_sha(),
+        "label": label,
+        "source": path.name,
+        "meta": report.get("meta", {}),
+        "metrics": metrics,
+    }
+
+
+def load_history(store: Path) -> list[dict[str, Any]]:
+    if not store.exists():
+        return []
+    return [json.loads(line) for line in store.read_text().splitlines() if line.strip()]
+
+
+def append_run(store: Path, run: dict[str, Any]) -> None:
+    store.parent.mkdir(parents=True, exist_ok=True)
+    with store.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(run, sort_keys=True) + "\n")
+
+
+def load_budgets(path: Path) -> list[dict[str, Any]]:
+    return json.loads(path.read_text()) if path.exists() else []
+
+
+def budget_violations(suite: str, metrics: dict[str, dict], budgets: list[dict[str, Any]]) -> list[str]:
+    """Budget rules whose suite and metric globs match and whose limit is exceeded."""
+    out = []
+    for rule in budgets:
+        if not fnmatch.fnmatchcase(suite, rule["suite"]):
+            continue
+        for name, m in sorted(metrics.items()):
+            if not fnmatch.fnmatchcase(name, rule["metric"]):
+                continue
+            if "max" in rule and m["value"] > rule["max"]:
+                out.append(f"{name} {fmt(m['value'])} > budget {rule['max']:g}")
+            if "min" in rule and m["value"] < rule["min"]:
+                out.append(f"{name} {fmt(m['value'])} < budget {rule['min']:g}")
+    return out
+
+
+def parse_tolerances(default: float, overrides: list[str]) -> list[tuple[str, float]]:
+    rules = []
+    for item in overrides:
+        pattern, _, value = item.rpartition("=")
+        if not pattern:
+            fail(f"--tolerance-for expects GLOB=FRACTION, got {item!r}", 2)
+        rules.append((pattern, float(value)))
+    return [*reversed(rules), ("*", default)]
+
+
+def tolerance_for(name: str, rules: list[tuple[str, float]]) -> float:
+    return next(value for pattern, value in rules if fnmatch.fnmatchcase(name, pattern))
+
+
+def compare_metric(name: str, current: dict[str, Any], runs: list[dict[str, Any]], tolerance: float) -> dict[str, Any]:
+    """Verdict for one metric against the baseline runs (oldest first)."""
+    values = [run["metrics"][name]["value"] for run in runs]
+    base = statistics.median(values)
+    value = current["value"]
+    delta = (value - base) / base if base else (0.0 if value == base else math.inf)
+    worse = delta > 0 if current["better"] == "lower" else delta < 0
+    latest_ci = runs[-1]["metrics"][name].get("ci")
+    if len(values) >= 3:
+        spread = MAD_SCALE * statistics.median(abs(v - base) for v in values)
+        score = abs(value - base) / spread if spread else (math.inf if value != base else 0.0)
+        significant, test = score > NOISE_SIGMAS, f"{score:.1f} sd of {len(values)} runs"
+    elif current.get("ci") and latest_ci:
+        lo, hi = current["ci"]
+        significant = hi < latest_ci[0] or lo > latest_ci[1]
+        test = "95% CIs apart" if significant else "95% CIs overlap"
+    else:
+        significant, test = True, "tolerance only"
+    if abs(delta) <= tolerance or not significant:
+        verdict = "ok"
+    else:
+        verdict = "REGRESSED" if worse else "improved"
+    return {
+        "metric": name,
+        "baseline": base,
+        "current": value,
+        "delta": delta,
+        "tolerance": tolerance,
+        "test": test,
+        "verdict": verdict,
+    }
+
+
+def compare(run: dict[str, Any], history: list[dict[str, Any]], baseline_runs: int, tolerances) -> dict[str, Any]:
+    runs = [r for r in history if r["suite"] == run["suite"]][-baseline_runs:]
+    rows = []
+    for name, current in sorted(run["metrics"].items()):
+        with_metric = [r for r in runs if name in r["metrics"]]
+        if with_metric:
+            rows.append(compare_metric(name, current, with_metric, tolerance_for(name, tolerances)))
+    return {
+        "suite": run["suite"],
+        "baseline_runs": [{"id": r["id"], "git_sha": r["git_sha"], "label": r["label"]} for r in runs],
+        "metrics": rows,
+        "regressions": [row["metric"] for row in rows if row["verdict"] == "REGRESSED"],
+    }
+
+
+def fmt(value: float) -> str:
+    return f"{value:,.0f}" if abs(value) >= 1000 else f"{value:.4g}"
+
+
+def print_comparison(result: dict[str, Any], violations: list[str]) -> None:
+    runs = result["baseline_runs"]
+    if runs:
+        latest = runs[-1]
+        print(
+            f"suite {result['suite']}: baseline is the median of {len(runs)} run(s), "
+            f"latest {latest['id']} {latest['git_sha'] or ''} {latest['label'] or ''}".rstrip()
+        )
+        print(f"{'metric':<34} {'baseline':>10} {'current':>10} {'delta':>8}  {'test':<22} verdict")
+        for row in result["metrics"]:
+            print(
+                f"{row['metric']:<34} {fmt(row['baseline']):>10} {fmt(row['current']):>10} "
+                f"{row['delta']:>+8.1%}  {row['test']:<22} {row['verdict']}"
+            )
+    else:
+        print(f"suite {result['suite']}: no recorded runs yet, checking budgets only")
+    for line in violations:
+        print(f"BUDGET: {line}")
+
+
+def sparkline(values: list[float]) -> str:
+    lo, hi = min(values), max(values)
+    if hi == lo:
+        return SPARKS[0] * len(values)
+    return "".join(SPARKS[round((v - lo) / (hi - lo) * (len(SPARKS) - 1))] for v in values)
+
+
+def print_trend(history: list[dict[str, Any]], suite_glob: str, metric_glob: str, last: int) -> int:
+    suites = sorted({r["suite"] for r in history if fnmatch.fnmatchcase(r["suite"], suite_glob)})
+    if not suites:
+        print(f"no recorded runs match suite {suite_glob!r}")
+        return 1
+    for suite in suites:
+        runs = [r for r in history if r["suite"] == suite][-last:]
+        print(f"suite {suite}: {len(runs)} run(s) from {runs[0]['recorded_at']} to {runs[-1]['recorded_at']}")
+        for i, r in enumerate(runs):
+            print(f"  #{i:<3} {r['recorded_at']} {r['git_sha'] or '-':<10} {r['label'] or ''}")
+        print(f"  {'metric':<34} {'first':>10} {'last':>10} {'change':>8}  trend")
+        names = sorted({n for r in runs for n in r["metrics"] if fnmatch.fnmatchcase(n, metric_glob)})
+        for name in names:
+            values = [r["metrics"][name]["value"] for r in runs if name in r["metrics"]]
+            change = (values[-1] - values[0]) / values[0] if values[0] else 0.0
+            print(f"  {name:<34} {fmt(values[0]):>10} {fmt(values[-1]):>10} {change:>+8.1%}  {sparkline(values)}")
+        print()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark history, baseline comparison and budgets")
+    parser.add_argument("--store", type=Path, default=Path(os.getenv("PERF_HISTORY", STORE)), help="History file (JSON lines)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="Add a benchmark result to the history")
+    cmp_ = sub.add_parser("compare", help="Compare a result with its baseline and budgets")
+    for p in (rec, cmp_):
+        p.add_argument("result", type=Path, help="JSON written by a benchmark's --json")
+        p.add_argument("--suite", help="Suite name (default: derived from the result)")
+        p.add_argument("--label", help="Free-form label stored with the run")
+    cmp_.add_argument("--baseline-runs", type=int, default=5, help="Recorded runs the baseline is the median of")
+    cmp_.add_argument("--tolerance", type=float, default=0.10, help="Relative change allowed before a regression")
+    cmp_.add_argument("--tolerance-for", action="append", default=[], metavar="GLOB=FRACTION", help="Per-metric tolerance (repeatable)")
+    cmp_.add_argument("--budgets", type=Path, default=BUDGETS, help="Budget rules (JSON list)")
+    cmp_.add_argument("--record", action="store_true", help="Also add the run to the history")
+    cmp_.add_argument("--json", help="Also write the comparison to this file")
+
+    tr = sub.add_parser("trend", help="Metrics of a suite across recorded runs")
+    tr.add_argument("--suite", default="*", help="Suite glob")
+    tr.add_argument("--metric", default="*", help="Metric glob")
+    tr.add_argument("--last", type=int, default=20, help="Most recent runs per suite")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.store)
+    if args.command == "trend":
+        return print_trend(history, args.suite, args.metric, args.last)
+
+    if not args.result.exists():
+        fail(f"{args.result} does not exist", 2)
+    try:
+        run = make_run(args.result, args.suite, args.label)
+    except (ValueError, KeyError, TypeError) as exc:
+        fail(f"{args.result}: unrecognised benchmark JSON ({exc})", 2)
+    if args.command == "record":
+        append_run(args.store, run)
+        print(f"recorded {run['id']} ({len(run['metrics'])} metrics) in suite {run['suite']}")
+        return 0
+
+    if args.baseline_runs < 1:
+        fail("--baseline-runs must be positive", 2)
+    result = compare(run, history, args.baseline_runs, parse_tolerances(args.tolerance, args.tolerance_for))
+    violations = budget_violations(run["suite"], run["metrics"], load_budgets(args.budgets))
+    result["budget_violations"] = violations
+    print_comparison(result, violations)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+    if args.record:
+        append_run(args.store, run)
+    return 1 if result["regressions"] or violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,828 @@
+#!/usr/bin/env python3
+"""EXPLAIN every service SQL statement against a seeded Postgres and check it.
+
+Each SQL constant in order-service and auth-service has a `PlanCase` below
+(or an entry in NOT_PLANNED saying why it has no plan to check). A case
+binds realistic parameters and states what its plan must look like:
+
+- `indexes`: indexes the plan must use,
+- `max_rows`: upper bound on the planner's row estimate for the result,
+- `seq_scans`: large tables it may read in full (anything else in
+  LARGE_TABLES is a regression),
+- `sort_rows`: the most rows a Sort node may take (None: any number).
+
+The schema comes from infra/postgres/uuid-v7.sql and init-*.sql, in a scratch
+schema seeded by scripts/sql_workload_benchmark.py plus the SEED_*_SQL below
+(events, jobs, inventory, rollups, archive index), so plans are those of a
+loaded database rather than an empty one. Statements are only EXPLAINed, never
+run. Violations are printed with the plan, marking the offending nodes, and
+a diff against the outline recorded in BASELINE.
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/query_plans.py --rows 1000000
+  python scripts/query_plans.py --skip-seed --keep --only orders.
+  python scripts/query_plans.py --skip-seed --update-baseline
+
+tests/test_query_plans.py runs the same checks under pytest when
+RUN_INTEGRATION=1 and DATABASE_URL are set.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import difflib
+import importlib.util
+import json
+import os
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+BASELINE = REPO_ROOT / "tests" / "query_plan_baseline.json"
+SERVICES = ("order-service", "auth-service")
+
+# Tables that grow with traffic: reading one in full is never a hot path.
+LARGE_TABLES = frozenset(
+    {
+        "orders",
+        "order_events",
+        "users",
+        "jobs",
+        "order_archive_index",
+        "order_rollups",
+        "inventory_reservations",
+    }
+)
+
+# Constants with no table access of their own, or only a fragment of one.
+NOT_PLANNED = {
+    "order-service:scheduler.TRY_LEADER_LOCK_SQL": "advisory lock, no table",
+    "order-service:scheduler.LEADER_ALIVE_SQL": "connection check",
+    "order-service:worker.LOCK_JOB_KIND_SQL": "advisory lock, no table",
+    "order-service:sharding.BUCKET_SQL": "expression fragment",
+    "order-service:order_filters.ADMIN_SELECT_SQL": "prefix of the admin:* cases",
+}
+
+# One PENDING event per order plus the decision for decided ones, in time
+# order like the live table.
+SEED_EVENTS_SQL = """
+INSERT INTO order_events (order_id, actor, from_status, to_status, occurred_at)
+SELECT order_id, actor, from_status, to_status, occurred_at FROM (
+    SELECT id AS order_id, user_id::text AS actor, NULL AS from_status,
+           'PENDING' AS to_status, created_at AS occurred_at
+    FROM orders
+    UNION ALL
+    SELECT id, 'admin', 'PENDING', status::text, updated_at
+    FROM orders WHERE status <> 'PENDING'
+) e
+ORDER BY occurred_at
+"""
+SEED_ROLLUPS_SQL = """
+INSERT INTO order_rollups (granularity, bucket_start, status, item_name, orders, quantity)
+SELECT g.granularity, date_trunc(g.granularity, e.occurred_at, 'UTC'), e.to_status,
+       n.name, count(*), sum(o.quantity)
+FROM order_events e
+    JOIN orders o ON o.id = e.order_id
+    JOIN item_names n ON n.id = o.item_name_id
+    CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g(granularity)
+GROUP BY 1, 2, 3, 4
+"""
+SEED_WATERMARK_SQL = """
+UPDATE order_rollup_watermark
+SET (last_occurred_at, last_event_id) = (
+    SELECT occurred_at, id FROM order_events ORDER BY occurred_at DESC, id DESC LIMIT 1
+)
+WHERE name = 'order_events'
+"""
+# Finished jobs over the last 30 days, a short queue and a few running.
+SEED_JOBS_SQL = """
+INSERT INTO jobs (kind, status, attempts, run_after, locked_by, locked_until,
+                  progress_done, created_at, started_at, finished_at, updated_at)
+SELECT (ARRAY['archive', 'rollups', 'bulk_decide'])[1 + mod(g, 3)],
+       CASE WHEN g <= 50 THEN 'queued' WHEN g <= 60 THEN 'running'
+            WHEN mod(g, 50) = 0 THEN 'failed' ELSE 'succeeded' END,
+       1, now() - make_interval(secs => g * 10),
+       CASE WHEN g > 50 AND g <= 60 THEN 'host:1' END,
+       CASE WHEN g > 50 AND g <= 60 THEN now() + interval '1 minute' END,
+       0, now() - make_interval(secs => g * 10), now() - make_interval(secs => g * 10),
+       CASE WHEN g > 60 THEN now() - make_interval(secs => g * 10) END,
+       now() - make_interval(secs => g * 10)
+FROM generate_series(1, greatest(%(rows)s / 10, 1000)) g
+"""
+SEED_INVENTORY_SQL = """
+WITH new_items AS (
+    INSERT INTO items (id, name)
+    SELECT md5('stock-' || g)::uuid, 'item-' || g FROM generate_series(0, %(items)s - 1) g
+    RETURNING id
+)
+INSERT INTO inventory_slots (item_id, slot, available)
+SELECT id, s, 1000 FROM new_items, generate_series(0, 7) s
+"""
+# One in ten orders took stock; rejected ones gave it back.
+SEED_RESERVATIONS_SQL = """
+INSERT INTO inventory_reservations (order_id, item_id, slot, quantity, status, released_at)
+SELECT o.id, md5('stock-' || mod(o.item_name_id, %(items)s))::uuid,
+       mod(o.quantity, 8), o.quantity,
+       CASE WHEN o.status = 'REJECTED' THEN 'RELEASED' ELSE 'RESERVED' END,
+       CASE WHEN o.status = 'REJECTED' THEN o.updated_at END
+FROM orders o WHERE mod(o.quantity, 10) = 0
+"""
+# Orders already moved to cold storage: a fifth of the live count.
+SEED_ARCHIVE_SQL = """
+INSERT INTO order_archive_index (order_id, segment, ordinal)
+SELECT md5('archived-' || g)::uuid, 'segment-' || (g / 10000), mod(g, 10000)
+FROM generate_series(1, %(rows)s / 5) g
+"""
+SEED_SQL = (
+    SEED_EVENTS_SQL,
+    SEED_ROLLUPS_SQL,
+    SEED_WATERMARK_SQL,
+    SEED_JOBS_SQL,
+    SEED_INVENTORY_SQL,
+    SEED_RESERVATIONS_SQL,
+    SEED_ARCHIVE_SQL,
+)
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def _load_script(name: str) -> Any:
+    path = REPO_ROOT / "scripts" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"scripts_{name}", path)
+    if spec is None or spec.loader is None:
+        fail(f"cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+bench = _load_script("sql_workload_benchmark")
+
+
+def sql_constants() -> dict[str, str]:
+    """Every module-level `*_SQL` string constant, as `service:module.NAME`."""
+    found: dict[str, str] = {}
+    for service in SERVICES:
+        for path in sorted((REPO_ROOT / "services" / service / "app").glob("*.py")):
+            constants = bench.module_constants(path)
+            for node in ast.parse(path.read_text()).body:
+                if not (isinstance(node, ast.Assign) and len(node.targets) == 1):
+                    continue
+                target = node.targets[0]
+                if (
+                    isinstance(target, ast.Name)
+                    and target.id.endswith("_SQL")
+                    and target.id in constants
+                ):
+                    found[f"{service}:{path.stem}.{target.id}"] = constants[target.id]
+    return found
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    name: str
+    sql: str
+    params: tuple[Any, ...] = ()
+    indexes: tuple[str, ...] = ()
+    max_rows: float | None = None
+    seq_scans: frozenset[str] = frozenset()
+    sort_rows: float | None = 0
+    # why a full scan or sort is accepted for this statement
+    note: str = ""
+
+
+@dataclass(frozen=True)
+class PlanNode:
+    depth: int
+    node_type: str
+    relation: str | None
+    index: str | None
+    rows: float
+    detail: str
+
+
+def plan_nodes(plan: dict[str, Any], depth: int = 0) -> list[PlanNode]:
+    """Flatten an `EXPLAIN (FORMAT JSON)` plan tree, parents first."""
+    node_type = plan["Node Type"]
+    if node_type == "ModifyTable":
+        node_type = plan.get("Operation", "Modify")
+    detail = ""
+    for key in ("Sort Key", "Group Key", "Index Cond", "Recheck Cond", "Filter"):
+        if key in plan:
+            value = plan[key]
+            detail = f"{key}: {', '.join(value) if isinstance(value, list) else value}"
+            break
+    nodes = [
+        PlanNode(
+            depth,
+            node_type,
+            plan.get("Relation Name"),
+            plan.get("Index Name"),
+            float(plan.get("Plan Rows", 0)),
+            detail,
+        )
+    ]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child, depth + 1))
+    return nodes
+
+
+def _label(node: PlanNode) -> str:
+    label = node.node_type
+    if node.index:
+        label += f" using {node.index}"
+    if node.relation:
+        label += f" on {node.relation}"
+    return label
+
+
+def outline(nodes: list[PlanNode]) -> list[str]:
+    """The plan's shape without costs or estimates, for diffing."""
+    return ["  " * n.depth + _label(n) for n in nodes]
+
+
+def check_plan(case: PlanCase, nodes: list[PlanNode]) -> dict[int, str]:
+    """Violations of `case`'s expectations, keyed by plan node position."""
+    problems: dict[int, str] = {}
+    for i, node in enumerate(nodes):
+        if (
+            node.node_type == "Seq Scan"
+            and node.relation in LARGE_TABLES
+            and node.relation not in case.seq_scans
+        ):
+            problems[i] = f"seq scan on {node.relation}"
+        elif (
+            node.node_type in ("Sort", "Incremental Sort")
+            and case.sort_rows is not None
+            and node.rows > case.sort_rows
+        ):
+            problems[i] = f"sort of {node.rows:.0f} rows"
+    used = {n.index for n in nodes if n.index}
+    for index in case.indexes:
+        if index not in used:
+            problems[-1 - len(problems)] = f"does not use {index}"
+    if case.max_rows is not None and nodes and nodes[0].rows > case.max_rows:
+        problems[0] = f"estimates {nodes[0].rows:.0f} rows, expected <= {case.max_rows:.0f}"
+    return problems
+
+
+def render(
+    case: PlanCase,
+    nodes: list[PlanNode],
+    problems: dict[int, str],
+    recorded: list[str] | None = None,
+) -> str:
+    """A readable report: violations, the marked plan and the outline diff."""
+    lines = [f"{case.name}:"]
+    lines += [f"  - {p}" for i, p in sorted(problems.items()) if i < 0]
+    for i, node in enumerate(nodes):
+        text = f"    {'  ' * node.depth}{_label(node)}  (rows={node.rows:.0f})"
+        if node.detail:
+            text += f"  [{node.detail}]"
+        if i in problems:
+            text += f"  <-- {problems[i]}"
+        lines.append(text)
+    if recorded is not None and recorded != outline(nodes):
+        lines.append("  plan changed from the recorded baseline:")
+        lines += [
+            "    " + line.rstrip("\n")
+            for line in difflib.unified_diff(
+                recorded, outline(nodes), "baseline", "current", lineterm="", n=2
+            )
+        ]
+    return "\n".join(lines)
+
+
+def plan_cases(rows: int, users: int, items: int) -> list[PlanCase]:
+    """The statement catalogue, with parameters drawn from the seeded data."""
+    sql = sql_constants()
+
+    def q(key: str) -> str:
+        return sql[key]
+
+    filters = bench.load_module("order-service", "order_filters")
+    uuid7 = bench.load_module("order-service", "ids").uuid7
+    now = datetime.now(UTC)
+    user = bench.seeded_uuid("user", 1 + users // 2)
+    order = bench.seeded_uuid("order", rows // 2)
+    pending = bench.seeded_uuid("order", rows)
+    ids = [bench.seeded_uuid("order", n) for n in range(1, rows, max(rows // 50, 1))]
+    since = now - timedelta(hours=1)
+    zero = str(uuid.UUID(int=0))
+    job = str(uuid7())
+    item = "item-1"
+    stock = bench.seeded_uuid("stock", 1)
+    buckets = list(range(0, 256, 2))
+
+    o = "order-service:"
+    cases = [
+        # orders.py: the request path
+        PlanCase(
+            f"{o}orders.CREATE_ORDER_SQL",
+            q(f"{o}orders.CREATE_ORDER_SQL"),
+            (str(uuid7()), user, item, 1, None),
+        ),
+        PlanCase(
+            f"{o}orders.APPROVE_ORDER_SQL",
+            q(f"{o}orders.APPROVE_ORDER_SQL"),
+            (pending, "admin"),
+            indexes=("orders_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}orders.REJECT_ORDER_SQL",
+            q(f"{o}orders.REJECT_ORDER_SQL"),
+            (pending, "admin"),
+            indexes=("orders_pkey", "inventory_reservations_pkey", "inventory_slots_pkey"),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}orders.ORDER_BY_ID_SQL",
+            q(f"{o}orders.ORDER_BY_ID_SQL"),
+            (order,),
+            indexes=("orders_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}orders.ORDERS_BY_IDS_SQL",
+            q(f"{o}orders.ORDERS_BY_IDS_SQL"),
+            (ids,),
+            indexes=("orders_pkey",),
+            max_rows=len(ids),
+        ),
+        PlanCase(
+            f"{o}orders.USER_ORDERS_SQL",
+            q(f"{o}orders.USER_ORDERS_SQL"),
+            (user,),
+            indexes=("orders_user_id_created_at_idx",),
+            max_rows=10 * rows / users,
+            sort_rows=10 * rows / users,
+            note="returns all of one user's orders, so they are sorted after the fetch",
+        ),
+        PlanCase(
+            f"{o}orders.ORDER_HISTORY_SQL",
+            q(f"{o}orders.ORDER_HISTORY_SQL"),
+            (order, 0, 50),
+            indexes=("order_events_order_id_idx",),
+            max_rows=50,
+        ),
+        PlanCase(
+            f"{o}orders.EVENTS_IN_WINDOW_SQL",
+            q(f"{o}orders.EVENTS_IN_WINDOW_SQL"),
+            (since, now, since, 0, 500),
+            indexes=("order_events_occurred_at_idx",),
+            max_rows=500,
+        ),
+        PlanCase(
+            f"{o}orders.ORDER_CHANGES_SQL",
+            q(f"{o}orders.ORDER_CHANGES_SQL"),
+            (since, zero, 5, 500),
+            indexes=("orders_updated_at_id_idx",),
+            max_rows=500,
+        ),
+        PlanCase(
+            f"{o}orders.ORDER_STATUS_COUNTS_SQL",
+            q(f"{o}orders.ORDER_STATUS_COUNTS_SQL"),
+            seq_scans=frozenset({"orders"}),
+            sort_rows=10,
+            note="admin summary counts every order",
+        ),
+        PlanCase(
+            f"{o}orders.OWNED_ORDER_STATUS_COUNTS_SQL",
+            q(f"{o}orders.OWNED_ORDER_STATUS_COUNTS_SQL"),
+            (buckets,),
+            seq_scans=frozenset({"orders"}),
+            sort_rows=10,
+            note="admin summary counts every order of the shard",
+        ),
+        PlanCase(
+            f"{o}analytics.SNAPSHOT_CHANGES_SQL",
+            q(f"{o}analytics.SNAPSHOT_CHANGES_SQL"),
+            (since, zero, 5, 1000),
+            indexes=("orders_updated_at_id_idx",),
+            max_rows=1000,
+        ),
+        # archive.py
+        PlanCase(
+            f"{o}archive.ARCHIVE_CANDIDATES_SQL",
+            q(f"{o}archive.ARCHIVE_CANDIDATES_SQL"),
+            (7, 1000),
+            indexes=("orders_updated_at_id_idx",),
+            max_rows=1000,
+        ),
+        PlanCase(
+            f"{o}archive.ARCHIVE_COMMIT_SQL",
+            q(f"{o}archive.ARCHIVE_COMMIT_SQL"),
+            (ids, [now] * len(ids), list(range(len(ids))), "segment-1"),
+            indexes=("orders_updated_at_id_idx",),
+        ),
+        PlanCase(
+            f"{o}archive.ARCHIVE_LOOKUP_SQL",
+            q(f"{o}archive.ARCHIVE_LOOKUP_SQL"),
+            (bench.seeded_uuid("archived", 1),),
+            indexes=("order_archive_index_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}archive.ARCHIVE_LOOKUP_MANY_SQL",
+            q(f"{o}archive.ARCHIVE_LOOKUP_MANY_SQL"),
+            (ids,),
+            indexes=("order_archive_index_pkey",),
+            max_rows=len(ids),
+        ),
+        # batcher.py, spool.py
+        PlanCase(
+            f"{o}batcher.BATCH_INSERT_ORDERS_SQL",
+            q(f"{o}batcher.BATCH_INSERT_ORDERS_SQL"),
+            ([str(uuid7())], [user], [item], [1], [None]),
+        ),
+        PlanCase(
+            f"{o}spool.REPLAY_SPOOLED_ORDERS_SQL",
+            q(f"{o}spool.REPLAY_SPOOLED_ORDERS_SQL"),
+            ([str(uuid7())], [user], [item], [1], [None], [now]),
+        ),
+        # inventory.py, items.py
+        PlanCase(
+            f"{o}inventory.RESERVE_ORDER_SQL",
+            q(f"{o}inventory.RESERVE_ORDER_SQL"),
+            (stock, 1, 1, str(uuid7()), user, item, 1, None, 1),
+            indexes=("inventory_slots_pkey",),
+            sort_rows=64,
+            note="picks a random slot among one item's few slots",
+        ),
+        PlanCase(
+            f"{o}inventory.REBALANCE_ITEM_SQL",
+            q(f"{o}inventory.REBALANCE_ITEM_SQL"),
+            (stock, stock),
+            indexes=("inventory_slots_pkey",),
+            max_rows=1,
+            sort_rows=64,
+            note="locks one item's slots in slot order",
+        ),
+        PlanCase(
+            f"{o}inventory.TAKE_STOCK_SQL",
+            q(f"{o}inventory.TAKE_STOCK_SQL"),
+            (stock, 3, stock),
+            indexes=("inventory_slots_pkey",),
+            sort_rows=64,
+            note="locks one item's slots in slot order",
+        ),
+        PlanCase(
+            f"{o}inventory.GATHER_STOCK_SQL",
+            q(f"{o}inventory.GATHER_STOCK_SQL"),
+            (stock, 3, stock),
+            indexes=("inventory_slots_pkey",),
+            max_rows=1,
+            sort_rows=64,
+            note="locks one item's slots in slot order",
+        ),
+        PlanCase(
+            f"{o}inventory.CREATE_ITEM_SQL",
+            q(f"{o}inventory.CREATE_ITEM_SQL"),
+            (str(uuid7()), "new-item", [0, 1], [5, 5]),
+        ),
+        PlanCase(
+            f"{o}inventory.DELETE_ITEM_SQL",
+            q(f"{o}inventory.DELETE_ITEM_SQL"),
+            (stock,),
+            indexes=("items_pkey",),
+        ),
+        PlanCase(
+            f"{o}inventory.RESTOCK_ITEM_SQL",
+            q(f"{o}inventory.RESTOCK_ITEM_SQL"),
+            ([0, 1], [5, 5], stock),
+            indexes=("inventory_slots_pkey",),
+        ),
+        PlanCase(
+            f"{o}inventory.LIST_ITEMS_SQL",
+            q(f"{o}inventory.LIST_ITEMS_SQL"),
+            sort_rows=10 * items,
+            note="lists the whole (small) stock catalogue",
+        ),
+        PlanCase(
+            f"{o}inventory.ITEM_NAMES_SQL",
+            q(f"{o}inventory.ITEM_NAMES_SQL"),
+            note="loads the whole (small) stock catalogue",
+        ),
+        # rollups.py
+        PlanCase(
+            f"{o}rollups.ROLLUP_ADVANCE_SQL",
+            q(f"{o}rollups.ROLLUP_ADVANCE_SQL"),
+            ("order_events", 5, 5000, "order_events"),
+            indexes=("order_events_occurred_at_idx", "orders_pkey"),
+            sort_rows=5000,
+            note="aggregates one bounded batch of events",
+        ),
+        PlanCase(
+            f"{o}rollups.ROLLUP_WATERMARK_SQL",
+            q(f"{o}rollups.ROLLUP_WATERMARK_SQL"),
+            ("order_events",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}rollups.ROLLUP_REPORT_SQL",
+            q(f"{o}rollups.ROLLUP_REPORT_SQL"),
+            ("hour", now - timedelta(days=1), now, None, None, None, None, 1000),
+            indexes=("order_rollups_pkey",),
+            max_rows=1000,
+        ),
+        PlanCase(
+            f"{o}rollups.ROLLUP_REPORT_BY_STATUS_SQL",
+            q(f"{o}rollups.ROLLUP_REPORT_BY_STATUS_SQL"),
+            ("hour", now - timedelta(days=1), now, "PENDING", "PENDING", None, None, 1000),
+            indexes=("order_rollups_pkey",),
+            max_rows=1000,
+        ),
+        # rules.py
+        PlanCase(
+            f"{o}rules.PENDING_BATCH_SQL",
+            q(f"{o}rules.PENDING_BATCH_SQL"),
+            (zero, 200),
+            indexes=("orders_pending_id_idx",),
+            max_rows=200,
+        ),
+        PlanCase(
+            f"{o}rules.OWNED_PENDING_BATCH_SQL",
+            q(f"{o}rules.OWNED_PENDING_BATCH_SQL"),
+            (zero, buckets, 200),
+            indexes=("orders_pending_id_idx",),
+            max_rows=200,
+        ),
+        PlanCase(
+            f"{o}rules.USER_VELOCITY_SQL",
+            q(f"{o}rules.USER_VELOCITY_SQL"),
+            ([user, bench.seeded_uuid("user", 1)], 3600),
+            indexes=("orders_user_id_created_at_idx",),
+            # one row per user; the group estimate is loose
+            max_rows=10,
+        ),
+        PlanCase(
+            f"{o}rules.AUTO_DECIDE_SQL",
+            q(f"{o}rules.AUTO_DECIDE_SQL"),
+            ([pending], ["APPROVED"], ["rules"]),
+            indexes=("orders_pending_id_idx",),
+        ),
+        # sharding.py
+        PlanCase(
+            f"{o}sharding.SHARD_MAP_SQL",
+            q(f"{o}sharding.SHARD_MAP_SQL"),
+            note="at most 256 rows",
+        ),
+        PlanCase(
+            f"{o}sharding.LOCATE_ORDER_SQL",
+            q(f"{o}sharding.LOCATE_ORDER_SQL"),
+            (order,),
+            indexes=("orders_pkey",),
+            max_rows=1,
+        ),
+        # suggest.py
+        PlanCase(
+            f"{o}suggest.ITEM_POPULARITY_SQL",
+            q(f"{o}suggest.ITEM_POPULARITY_SQL"),
+            (now,),
+            seq_scans=frozenset({"orders"}),
+            sort_rows=10 * items,
+            note="counts every order once per replica start",
+        ),
+        PlanCase(
+            f"{o}suggest.NEW_ORDER_ITEMS_SQL",
+            q(f"{o}suggest.NEW_ORDER_ITEMS_SQL"),
+            (since, zero, now, 5000),
+            indexes=("orders_created_at_id_idx",),
+            max_rows=5000,
+            sort_rows=5000,
+        ),
+        # jobs.py
+        PlanCase(
+            f"{o}jobs.DECIDED_ORDERS_SQL",
+            q(f"{o}jobs.DECIDED_ORDERS_SQL"),
+            (ids, "REJECTED"),
+            indexes=("orders_pkey",),
+            max_rows=len(ids),
+        ),
+        # worker.py
+        PlanCase(
+            f"{o}worker.ENQUEUE_JOB_SQL",
+            q(f"{o}worker.ENQUEUE_JOB_SQL"),
+            (job, "rollups", "{}", 5, "admin"),
+        ),
+        PlanCase(
+            f"{o}worker.JOB_BY_ID_SQL",
+            q(f"{o}worker.JOB_BY_ID_SQL"),
+            (job,),
+            indexes=("jobs_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.EXPIRE_JOBS_SQL",
+            q(f"{o}worker.EXPIRE_JOBS_SQL"),
+            ("rollups",),
+            indexes=("jobs_running_idx",),
+        ),
+        PlanCase(
+            f"{o}worker.CLAIM_JOB_SQL",
+            q(f"{o}worker.CLAIM_JOB_SQL"),
+            ("rollups", "rollups", 2, "host:1", 60),
+            indexes=("jobs_running_idx", "jobs_pkey"),
+            max_rows=1,
+            sort_rows=1000,
+            note="orders the few claimable jobs of one kind",
+        ),
+        # lease updates: jobs_pkey, or the small running-jobs partial index
+        PlanCase(
+            f"{o}worker.RENEW_JOB_SQL",
+            q(f"{o}worker.RENEW_JOB_SQL"),
+            (60, job, "host:1"),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.REPORT_JOB_SQL",
+            q(f"{o}worker.REPORT_JOB_SQL"),
+            (10, None, 60, job, "host:1"),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.COMPLETE_JOB_SQL",
+            q(f"{o}worker.COMPLETE_JOB_SQL"),
+            ("{}", job, "host:1"),
+            indexes=("jobs_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.RELEASE_JOB_SQL",
+            q(f"{o}worker.RELEASE_JOB_SQL"),
+            (job, "host:1"),
+            indexes=("jobs_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.FAIL_JOB_SQL",
+            q(f"{o}worker.FAIL_JOB_SQL"),
+            (5.0, "boom", job, "host:1"),
+            indexes=("jobs_pkey",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{o}worker.PURGE_JOBS_SQL",
+            q(f"{o}worker.PURGE_JOBS_SQL"),
+            (7,),
+            seq_scans=frozenset({"jobs"}),
+            note="daily purge; the table only holds JOBS_RETENTION_DAYS of jobs",
+        ),
+    ]
+
+    # auth-service
+    a = "auth-service:"
+    cases += [
+        PlanCase(
+            f"{a}auth.USER_ID_BY_NAME_SQL",
+            q(f"{a}auth.USER_ID_BY_NAME_SQL"),
+            ("user-1",),
+            indexes=("users_username_key",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{a}auth.USER_CREDENTIALS_SQL",
+            q(f"{a}auth.USER_CREDENTIALS_SQL"),
+            ("user-1",),
+            indexes=("users_username_key",),
+            max_rows=1,
+        ),
+        PlanCase(
+            f"{a}auth.CREATE_USER_SQL",
+            q(f"{a}auth.CREATE_USER_SQL"),
+            ("new-user", "hash"),
+        ),
+    ]
+
+    # The admin listing's indexed shapes (order_filters.plan_admin_query):
+    # each must walk the index the planner promises in X-Query-Path.
+    # Per shape: the filter, and how many rows it may sort. One user's orders
+    # come off the index in created_at order but ties on id still sort, and
+    # a prefix merges the orders of every name it matches.
+    per_user = 10 * rows / users
+    admin_shapes = {
+        "status": (filters.AdminOrderFilter(status="PENDING"), 0),
+        "user_id": (filters.AdminOrderFilter(user_id=user), per_user),
+        "user_id+status": (
+            filters.AdminOrderFilter(user_id=user, status="PENDING"),
+            per_user,
+        ),
+        # a selective prefix: "item-1" matches a ninth of all orders, and
+        # walking created_at order then finds a page sooner
+        "item_prefix": (
+            filters.AdminOrderFilter(item_prefix="item-999"),
+            10 * rows / items,
+        ),
+        "created_after": (
+            filters.AdminOrderFilter(created_after=now - timedelta(days=1), sort="created_at"),
+            0,
+        ),
+        "created_before": (
+            filters.AdminOrderFilter(created_before=now - timedelta(days=1)),
+            0,
+        ),
+        "created_range+quantity": (
+            filters.AdminOrderFilter(created_after=now - timedelta(days=1), min_quantity=50),
+            0,
+        ),
+    }
+    for shape, (f, sort_rows) in admin_shapes.items():
+        for after in (None, (now - timedelta(hours=1), zero)):
+            query = filters.plan_admin_query(f, limit=50, after=after)
+            cases.append(
+                PlanCase(
+                    f"{o}admin:{shape}" + (":cursor" if after else ""),
+                    query.sql,
+                    query.params,
+                    indexes=(query.index,),
+                    max_rows=51,
+                    sort_rows=sort_rows,
+                )
+            )
+    return cases
+
+
+def explain(conn: Any, case: PlanCase) -> list[PlanNode]:
+    cur = conn.execute("EXPLAIN (FORMAT JSON) " + case.sql, case.params)
+    (doc,) = cur.fetchone()
+    if isinstance(doc, str):
+        doc = json.loads(doc)
+    return plan_nodes(doc[0]["Plan"])
+
+
+def seed(database_url: str, args) -> None:
+    bench.seed(database_url, args, SEED_SQL)
+
+
+def load_baseline(path: Path = BASELINE) -> dict[str, list[str]]:
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Check query plans of the services' SQL")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Seeded orders")
+    parser.add_argument("--users", type=int, default=10_000, help="Seeded users")
+    parser.add_argument("--items", type=int, default=1_000, help="Seeded item names")
+    parser.add_argument("--schema", default="plan_check", help="Scratch schema name")
+    parser.add_argument("--only", default="", help="Check only cases whose name contains this")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a kept, seeded schema")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help=f"Record current outlines in {BASELINE.name}"
+    )
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail("DATABASE_URL must be provided via --database-url or the DATABASE_URL env var", 2)
+    try:
+        import psycopg
+    except ImportError:
+        fail("psycopg is required. Install with: pip install 'psycopg[binary]'")
+
+    cases = [c for c in plan_cases(args.rows, args.users, args.items) if args.only in c.name]
+    baseline = load_baseline()
+    if not args.skip_seed:
+        seed(database_url, args)
+    failed = 0
+    outlines: dict[str, list[str]] = {}
+    try:
+        with psycopg.connect(database_url, **bench.conn_options(args.schema)) as conn:
+            for case in cases:
+                try:
+                    nodes = explain(conn, case)
+                except psycopg.Error as exc:
+                    # a statement the server cannot even plan is a regression too
+                    print(f"{case.name}: EXPLAIN failed: {exc}\n")
+                    failed += 1
+                    conn.rollback()
+                    continue
+                outlines[case.name] = outline(nodes)
+                problems = check_plan(case, nodes)
+                failed += bool(problems)
+                if problems or args.verbose:
+                    print(render(case, nodes, problems, baseline.get(case.name)) + "\n")
+                conn.rollback()
+    finally:
+        if not args.keep:
+            bench.drop_schema(database_url, args.schema)
+    print(f"{len(cases) - failed}/{len(cases)} plans as expected", file=sys.stderr)
+    if args.update_baseline:
+        baseline.update(outlines)
+        BASELINE.write_text(json.dumps(dict(sorted(baseline.items())), indent=2) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Move order buckets between shards online.
+
+order-service routes every order to a shard by `bucket(user_id)` and the
+`order_shard_map` table on shard 0 (see services/order-service/app/sharding.py).
+This tool moves whole buckets while the service keeps running:
+
+1. bulk-copy the bucket's orders, with their inventory reservations, from
+   the source to the target shard (upserts, in keyset batches; reads and
+   writes continue meanwhile),
+2. freeze the bucket in the map and wait for every router to notice; writes
+   for those users now answer 503 (or go to the local spool),
+3. catch up orders changed since the bulk copy started and copy the bucket's
+   order_events and order_archive_index entries,
+4. flip the bucket to the target shard and unfreeze it, wait again,
+5. delete the bucket's rows from the source shard in small batches.
+
+Inventory slots are per item, not per user, and every shard holds its own
+slots for every item, so they stay put: a moved reservation returns its
+stock to the target shard's slot if the order is later rejected.
+
+Every step is idempotent, so an interrupted move is resumed by re-running the
+same command. Writes for the bucket are blocked only during steps 3-4.
+
+Usage:
+  DATABASE_SHARD_URLS=postgres://...shard0,postgres://...shard1 \
+    python scripts/reshard_orders.py --bucket 7 --bucket 9 --to 1
+  python scripts/reshard_orders.py --plan   # bucket counts per shard
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+NUM_BUCKETS = 256
+# Must match BUCKET_SQL in services/order-service/app/sharding.py.
+BUCKET_SQL = "mod(('x' || substr(md5(user_id::text), 1, 8))::bit(32)::bigint, 256)"
+
+# Item-name ids are per-database, so orders travel with the name and are
+# re-interned on the destination.
+ORDER_COLUMNS = (
+    "o.id, o.user_id, n.name, o.quantity, o.notes, o.status, "
+    "o.created_at, o.updated_at, o.admin_action_at"
+)
+UPSERT_ORDER_SQL = (
+    "INSERT INTO orders (id, user_id, item_name_id, quantity, notes, status, "
+    "created_at, updated_at, admin_action_at) "
+    "VALUES (%s, %s, intern_item_name(%s), %s, %s, %s::order_status, %s, %s, %s) "
+    "ON CONFLICT (id) DO UPDATE SET status = EXCLUDED.status, notes = EXCLUDED.notes, "
+    "updated_at = EXCLUDED.updated_at, admin_action_at = EXCLUDED.admin_action_at"
+)
+RESERVATION_COLUMNS = "order_id, item_id, slot, quantity, status, created_at, released_at"
+UPSERT_RESERVATION_SQL = (
+    f"INSERT INTO inventory_reservations ({RESERVATION_COLUMNS}) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s) "
+    "ON CONFLICT (order_id) DO UPDATE SET status = EXCLUDED.status, "
+    "released_at = EXCLUDED.released_at"
+)
+ARCHIVE_INDEX_COLUMNS = "order_id, user_id, segment, ordinal, archived_at"
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def owner_of(directory, bucket: int, n_shards: int) -> tuple[int, bool]:
+    with directory.cursor() as cur:
+        cur.execute("SELECT shard, frozen FROM order_shard_map WHERE bucket = %s", (bucket,))
+        row = cur.fetchone()
+    directory.commit()
+    return (int(row[0]), bool(row[1])) if row else (bucket % n_shards, False)
+
+
+def set_owner(directory, bucket: int, shard: int, frozen: bool) -> None:
+    with directory.cursor() as cur:
+        cur.execute(
+            "INSERT INTO order_shard_map (bucket, shard, frozen) VALUES (%s, %s, %s) "
+            "ON CONFLICT (bucket) DO UPDATE SET shard = EXCLUDED.shard, "
+            "frozen = EXCLUDED.frozen, updated_at = now()",
+            (bucket, shard, frozen),
+        )
+    directory.commit()
+
+
+def copy_orders(src, dst, bucket: int, batch: int, changed_since=None) -> int:
+    """Upsert the bucket's orders and their reservations from src into dst,
+    keyset-paged by id; each page lands in one dst transaction."""
+    where = f"{BUCKET_SQL} = %s AND o.id > %s"
+    if changed_since is not None:
+        where += " AND o.updated_at >= %s"
+    sql = (
+        f"SELECT {ORDER_COLUMNS} FROM orders o JOIN item_names n ON n.id = o.item_name_id "
+        f"WHERE {where} ORDER BY o.id LIMIT %s"
+    )
+    copied = 0
+    last_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        params = (bucket, last_id) + ((changed_since,) if changed_since is not None else ()) + (batch,)
+        with src.cursor() as cur:
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+            reservations = []
+            if rows:
+                cur.execute(
+                    f"SELECT {RESERVATION_COLUMNS} FROM inventory_reservations "
+                    "WHERE order_id = ANY(%s)",
+                    ([r[0] for r in rows],),
+                )
+                reservations = cur.fetchall()
+        src.commit()
+        if not rows:
+            return copied
+        with dst.cursor() as cur:
+            cur.executemany(UPSERT_ORDER_SQL, rows)
+            cur.executemany(UPSERT_RESERVATION_SQL, reservations)
+        dst.commit()
+        copied += len(rows)
+        last_id = rows[-1][0]
+
+
+def copy_events(src, dst, bucket: int) -> int:
+    """Replace the bucket's order_events on dst with the source's, atomically.
+
+    Event ids are per-shard identities, so events are re-inserted with new
+    ids on dst; `occurred_at` and the per-order ordering are preserved.
+    """
+    with src.cursor() as cur:
+        cur.execute(
+            "SELECT e.order_id, e.actor, e.from_status, e.to_status, e.occurred_at "
+            f"FROM order_events e JOIN orders o ON o.id = e.order_id WHERE {BUCKET_SQL} = %s "
+            "ORDER BY e.id",
+            (bucket,),
+        )
+        events = cur.fetchall()
+    src.commit()
+    with dst.cursor() as cur:
+        cur.execute(
+            f"DELETE FROM order_events WHERE order_id IN (SELECT id FROM orders WHERE {BUCKET_SQL} = %s)",
+            (bucket,),
+        )
+        cur.executemany(
+            "INSERT INTO order_events (order_id, actor, from_status, to_status, occurred_at) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            events,
+        )
+    dst.commit()
+    return len(events)
+
+
+def copy_archive_index(src, dst, bucket: int) -> int:
+    """Copy the bucket's archive index entries from src into dst.
+
+    An order archived on src after its bulk copy is still a live row on dst;
+    it is deleted there in the same transaction, as the archiver would have.
+    """
+    with src.cursor() as cur:
+        cur.execute(
+            f"SELECT {ARCHIVE_INDEX_COLUMNS} FROM order_archive_index WHERE {BUCKET_SQL} = %s",
+            (bucket,),
+        )
+        entries = cur.fetchall()
+    src.commit()
+    with dst.cursor() as cur:
+        cur.executemany(
+            f"INSERT INTO order_archive_index ({ARCHIVE_INDEX_COLUMNS}) "
+            "VALUES (%s, %s, %s, %s, %s) ON CONFLICT (order_id) DO NOTHING",
+            entries,
+        )
+        ids = [e[0] for e in entries]
+        cur.execute("DELETE FROM inventory_reservations WHERE order_id = ANY(%s)", (ids,))
+        cur.execute("DELETE FROM orders WHERE id = ANY(%s)", (ids,))
+    dst.commit()
+    return len(entries)
+
+
+def delete_bucket(conn, bucket: int, batch: int) -> int:
+    """Delete the bucket's orders, with their events and reservations, and
+    its archive index entries from a shard in small batches."""
+    deleted = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT id FROM orders WHERE {BUCKET_SQL} = %s LIMIT %s", (bucket, batch))
+            ids = [r[0] for r in cur.fetchall()]
+            if not ids:
+                break
+            cur.execute("DELETE FROM order_events WHERE order_id = ANY(%s)", (ids,))
+            cur.execute("DELETE FROM inventory_reservations WHERE order_id = ANY(%s)", (ids,))
+            cur.execute("DELETE FROM orders WHERE id = ANY(%s)", (ids,))
+        conn.commit()
+        deleted += len(ids)
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM order_archive_index WHERE order_id IN ("
+                f"SELECT order_id FROM order_archive_index WHERE {BUCKET_SQL} = %s LIMIT %s)",
+                (bucket, batch),
+            )
+            n = cur.rowcount
+        conn.commit()
+        if not n:
+            return deleted
+
+
+def move_bucket(conns: list, bucket: int, target: int, batch: int, wait: float) -> None:
+    directory = conns[0]
+    source, _ = owner_of(directory, bucket, len(conns))
+    if source == target:
+        # already moved; finish the cleanup of an interrupted earlier run
+        for shard, conn in enumerate(conns):
+            if shard != target:
+                n = delete_bucket(conn, bucket, batch)
+                if n:
+                    print(f"bucket {bucket}: deleted {n} leftover orders from shard {shard}")
+        print(f"bucket {bucket}: on shard {target}")
+        return
+    src, dst = conns[source], conns[target]
+    with src.cursor() as cur:
+        # margin covers writes that were in flight when the copy started
+        cur.execute("SELECT now() - interval '5 seconds'")
+        copy_started = cur.fetchone()[0]
+    src.commit()
+
+    n = copy_orders(src, dst, bucket, batch)
+    print(f"bucket {bucket}: bulk-copied {n} orders shard {source} -> {target}")
+
+    set_owner(directory, bucket, source, True)
+    time.sleep(wait)
+    n = copy_orders(src, dst, bucket, batch, changed_since=copy_started)
+    e = copy_events(src, dst, bucket)
+    a = copy_archive_index(src, dst, bucket)
+    print(f"bucket {bucket}: frozen; caught up {n} orders, copied {e} events, {a} archived")
+
+    set_owner(directory, bucket, target, False)
+    time.sleep(wait)
+    n = delete_bucket(src, bucket, batch)
+    print(f"bucket {bucket}: now on shard {target}; deleted {n} orders from shard {source}")
+
+
+def print_plan(conns: list) -> None:
+    n_shards = len(conns)
+    owners = {b: owner_of(conns[0], b, n_shards) for b in range(NUM_BUCKETS)}
+    for shard in range(n_shards):
+        buckets = [b for b, (s, _) in owners.items() if s == shard]
+        with conns[shard].cursor() as cur:
+            cur.execute("SELECT count(*) FROM orders")
+            rows = cur.fetchone()[0]
+        conns[shard].commit()
+        print(f"shard {shard}: {len(buckets)} buckets, {rows} order rows")
+    frozen = [b for b, (_, f) in owners.items() if f]
+    if frozen:
+        print(f"frozen buckets (interrupted moves, re-run to finish): {frozen}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Move order buckets between shards")
+    parser.add_argument("--shard-urls", help="Comma-separated shard DSNs (or set DATABASE_SHARD_URLS)")
+    parser.add_argument("--bucket", type=int, action="append", default=[], help="Bucket to move (repeatable)")
+    parser.add_argument("--to", type=int, help="Target shard index")
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per copy/delete batch")
+    parser.add_argument(
+        "--wait",
+        type=float,
+        default=2 * float(os.getenv("ORDER_SHARD_MAP_REFRESH_SECONDS", "2")) + 1,
+        help="Seconds to wait for routers to reload the map (> 2x their refresh interval)",
+    )
+    parser.add_argument("--plan", action="store_true", help="Only print bucket ownership and row counts")
+    args = parser.parse_args(argv)
+
+    urls = [u.strip() for u in (args.shard_urls or os.getenv("DATABASE_SHARD_URLS", "")).split(",") if u.strip()]
+    if len(urls) < 2:
+        fail("At least two shard DSNs are required via --shard-urls or DATABASE_SHARD_URLS", 2)
+    if not args.plan:
+        if not args.bucket or args.to is None:
+            fail("--bucket and --to are required (or use --plan)", 2)
+        if not 0 <= args.to < len(urls):
+            fail(f"--to must be a shard index in 0..{len(urls) - 1}", 2)
+        bad = [b for b in args.bucket if not 0 <= b < NUM_BUCKETS]
+        if bad:
+            fail(f"buckets must be in 0..{NUM_BUCKETS - 1}: {bad}", 2)
+
+    try:
+        import psycopg
+    except ImportError:
+        fail("psycopg (psycopg3) is required. Install with: pip install 'psycopg[binary]'")
+
+    try:
+        conns = [psycopg.connect(url) for url in urls]
+    except psycopg.Error as exc:  # pragma: no cover - environment dependent
+        fail(f"Failed to connect to database: {exc}", 3)
+
+    try:
+        if args.plan:
+            print_plan(conns)
+        else:
+            for bucket in args.bucket:
+                move_bucket(conns, bucket, args.to, args.batch, args.wait)
+    finally:
+        for conn in conns:
+            conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
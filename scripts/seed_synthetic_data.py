@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Bulk-load synthetic users and orders into Postgres with COPY.
+
+Seeding through `/register` (bcrypt per call) and `POST /orders/` takes hours
+at scale. This tool writes the rows straight into the tables with COPY,
+in one transaction, and is deterministic for a given `--seed`:
+
+- users: `--users` accounts `user-<n>` whose password is `--password`. The
+  stored hashes are HASH_VARIANTS precomputed bcrypt hashes
+  (`--bcrypt-rounds`, base64 as auth-service stores them) with seeded
+  salts, shared round-robin, so login costs what it costs in production.
+- items: `--items` names; popularity is Zipfian (`--item-skew`).
+- orders: the buyer is Zipfian over users (`--user-skew`; a few heavy
+  buyers, a long tail). Orders are spread over `--days` of history with a
+  daily rate rising linearly by `--growth` and a day/night cycle (DIURNAL).
+  Quantities are mostly small. Orders of the last `--pending-hours` are
+  PENDING; older ones were decided a few hours after creation, `--reject-rate`
+  of them REJECTED. Ids are UUIDv7 of the creation time, like the service's.
+- order_events: the PENDING event of every order and the decision of every
+  decided one, as the service writes them.
+
+The load is one transaction: the secondary indexes and foreign keys of
+orders and order_events are dropped first and rebuilt after the COPY (one
+sort per index instead of a B-tree insert and an RI trigger per row), and
+an interrupted run leaves the tables as they were. With --truncate (which
+also clears order_rollups) the rows are written with COPY FREEZE, so the
+final VACUUM has nothing to do. `--batch-rows` only bounds how many orders
+are generated in memory at a time.
+
+The schema must exist (migrations or infra/postgres/init-*.sql) and the
+tables must be empty unless --truncate is given. Afterwards run scripts/backfill_order_rollups.py to fold the
+history into the rollups.
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/seed_synthetic_data.py --users 1000000 --orders 10000000
+  python scripts/seed_synthetic_data.py --orders 100000 --days 30 --seed 7 --truncate
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+from datetime import UTC, datetime, timedelta
+
+HASH_VARIANTS = 16
+BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+# relative order rate per UTC hour: quiet nights, an evening peak
+DIURNAL = (
+    2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 8, 9, 8, 8, 8, 9, 10, 11, 12, 12, 10, 7, 4,
+)
+NULL = "\\N"
+NOTES = ("gift wrap", "leave at the door", "call on arrival", "fragile")
+
+TABLES = ("order_events", "orders", "item_names", "users")
+COPY_USERS_SQL = "COPY users (id, username, password_hash, created_at) FROM STDIN"
+COPY_ITEMS_SQL = "COPY item_names (name) FROM STDIN"
+COPY_ORDERS_SQL = (
+    "COPY orders (id, user_id, item_name_id, quantity, notes, status, "
+    "created_at, updated_at, admin_action_at) FROM STDIN"
+)
+COPY_EVENTS_SQL = (
+    "COPY order_events (order_id, actor, from_status, to_status, occurred_at) FROM STDIN"
+)
+# rebuilt after the load; constraint-backed indexes (primary keys, unique) stay
+DEFERRED_TABLES = ["orders", "order_events"]
+DEFERRED_INDEXES_SQL = """
+SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+FROM pg_index i
+WHERE i.indrelid = ANY(%s::regclass[])
+  AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid)
+"""
+DEFERRED_FKS_SQL = """
+SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE contype = 'f' AND conrelid = ANY(%s::regclass[])
+"""
+TRUNCATE_SQL = "TRUNCATE order_events, orders, item_names, users, order_rollups RESTART IDENTITY"
+RESET_WATERMARK_SQL = (
+    "UPDATE order_rollup_watermark SET last_occurred_at = NULL, last_event_id = NULL"
+)
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def zipf_cum_weights(n: int, skew: float) -> list[float]:
+    """Cumulative Zipf weights for ranks 1..n (rank 1 most popular)."""
+    return list(itertools.accumulate(1 / (k**skew) for k in range(1, n + 1)))
+
+
+def zipf_sampler(rng: random.Random, n: int, skew: float):
+    """Draw a 0-based rank with probability proportional to 1 / (rank + 1)^skew."""
+    cum = zipf_cum_weights(n, skew)
+    total = cum[-1]
+    return lambda: bisect.bisect_left(cum, rng.random() * total)
+
+
+def uuid7_text(ms: int, rng: random.Random) -> str:
+    """UUIDv7 text for Unix millisecond `ms` with seeded random bits."""
+    rand = rng.getrandbits(74)
+    rand_a, rand_b = rand >> 62, rand & 0x3FFF_FFFF_FFFF_FFFF
+    head = f"{ms:012x}"
+    tail = f"{0x8000 | rand_b >> 48:04x}-{rand_b & 0xFFFF_FFFF_FFFF:012x}"
+    return f"{head[:8]}-{head[8:]}-7{rand_a:03x}-{tail}"
+
+
+def password_hashes(password: str, rounds: int, rng: random.Random) -> list[str]:
+    """HASH_VARIANTS bcrypt hashes of `password` with seeded salts, base64 like auth-service."""
+    import bcrypt
+
+    hashes = []
+    for _ in range(HASH_VARIANTS):
+        # the last salt character only carries 2 significant bits
+        salt_chars = "".join(rng.choice(BCRYPT_ALPHABET) for _ in range(21))
+        salt_chars += rng.choice(".Oeu")
+        salt = f"$2b${rounds:02d}${salt_chars}".encode()
+        hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
+        hashes.append(base64.b64encode(hashed).decode("ascii"))
+    return hashes
+
+
+def timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, UTC).isoformat()
+
+
+def order_times(rng: random.Random, orders: int, days: int, growth: float, end: datetime):
+    """Yield `orders` creation times (Unix seconds) in ascending order."""
+    rates = [1 + growth * d / max(days - 1, 1) for d in range(days)]
+    total = sum(rates)
+    start = (end - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+    emitted = 0
+    for d, rate in enumerate(rates):
+        count = orders - emitted if d == days - 1 else round(orders * rate / total)
+        count = min(count, orders - emitted)
+        day = start.timestamp() + d * 86400
+        hours = rng.choices(range(24), weights=DIURNAL, k=count)
+        times = sorted(day + h * 3600 + rng.random() * 3600 for h in hours)
+        emitted += count
+        yield from times
+
+
+def drop_deferred(conn) -> list[str]:
+    """Drop the secondary indexes and foreign keys of DEFERRED_TABLES; return the DDL to restore them."""
+    from psycopg import sql
+
+    restore = []
+    with conn.cursor() as cur:
+        for name, indexdef in cur.execute(DEFERRED_INDEXES_SQL, (DEFERRED_TABLES,)).fetchall():
+            cur.execute(f"DROP INDEX {name}")
+            restore.append(indexdef)
+        for table, conname, condef in cur.execute(DEFERRED_FKS_SQL, (DEFERRED_TABLES,)).fetchall():
+            constraint = sql.Identifier(conname).as_string(conn)
+            cur.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+            restore.append(f"ALTER TABLE {table} ADD CONSTRAINT {constraint} {condef}")
+    return restore
+
+
+class Copier:
+    """Buffers tab-separated rows and streams them into one COPY."""
+
+    def __init__(self, copy, flush_bytes: int = 1 << 20) -> None:
+        self.copy = copy
+        self.parts: list[str] = []
+        self.size = 0
+        self.flush_bytes = flush_bytes
+
+    def row(self, *values: object) -> None:
+        self.line("\t".join(NULL if v is None else str(v) for v in values) + "\n")
+
+    def line(self, text: str) -> None:
+        """Append one preformatted row (the hot loop formats its own)."""
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.parts:
+            self.copy.write("".join(self.parts))
+            self.parts, self.size = [], 0
+
+
+def copy_sql(statement: str, args) -> str:
+    # FREEZE is only allowed into tables truncated in the same transaction
+    return f"{statement} WITH (FREEZE)" if args.truncate else statement
+
+
+def load_users(conn, args, rng: random.Random, end: datetime) -> list[str]:
+    hashes = password_hashes(args.password, args.bcrypt_rounds, rng)
+    signup_start = (end - timedelta(days=args.days + 365)).timestamp()
+    ids = []
+    with conn.cursor() as cur, cur.copy(copy_sql(COPY_USERS_SQL, args)) as copy:
+        out = Copier(copy)
+        for n in range(1, args.users + 1):
+            # signed up within the year before the order history starts
+            created = signup_start + rng.random() * 365 * 86400
+            user_id = uuid7_text(int(created * 1000), rng)
+            ids.append(user_id)
+            out.row(user_id, f"user-{n}", hashes[n % HASH_VARIANTS], timestamp(created))
+        out.flush()
+    # shuffle which account is heavy, so Zipf rank 1 is not simply user-1
+    rng.shuffle(ids)
+    return ids
+
+
+def load_items(conn, args) -> list[int]:
+    names = [f"item-{k:05d}" for k in range(args.items)]
+    with conn.cursor() as cur:
+        with cur.copy(copy_sql(COPY_ITEMS_SQL, args)) as copy:
+            out = Copier(copy)
+            for name in names:
+                out.row(name)
+            out.flush()
+        cur.execute("SELECT name, id FROM item_names")
+        by_name = dict(cur.fetchall())
+    return [by_name[name] for name in names]
+
+
+def load_orders(conn, args, rng: random.Random, users: list[str], items: list[int], end: datetime) -> int:
+    pick_user = zipf_sampler(rng, len(users), args.user_skew)
+    pick_item = zipf_sampler(rng, len(items), args.item_skew)
+    pending_after = end.timestamp() - args.pending_hours * 3600
+    events = 0
+    times = order_times(rng, args.orders, args.days, args.growth, end)
+    started = time.perf_counter()
+    for lo in range(0, args.orders, args.batch_rows):
+        batch = list(itertools.islice(times, args.batch_rows))
+        event_lines = []
+        with conn.cursor() as cur:
+            with cur.copy(copy_sql(COPY_ORDERS_SQL, args)) as copy:
+                out = Copier(copy)
+                for created in batch:
+                    order_id = uuid7_text(int(created * 1000), rng)
+                    user_id = users[pick_user()]
+                    quantity = min(100, 1 + int(rng.expovariate(0.7)))
+                    notes = rng.choice(NOTES) if rng.random() < 0.1 else NULL
+                    created_text = timestamp(created)
+                    event_lines.append(f"{order_id}\t{user_id}\t{NULL}\tPENDING\t{created_text}\n")
+                    if created >= pending_after:
+                        status, updated_text, decided_text = "PENDING", created_text, NULL
+                    else:
+                        status = "REJECTED" if rng.random() < args.reject_rate else "APPROVED"
+                        # decided a few hours later, and before the pending window
+                        delay = min(rng.expovariate(1 / 7200), pending_after - created)
+                        updated_text = decided_text = timestamp(created + delay)
+                        event_lines.append(
+                            f"{order_id}\tadmin\tPENDING\t{status}\t{decided_text}\n"
+                        )
+                    out.line(
+                        f"{order_id}\t{user_id}\t{items[pick_item()]}\t{quantity}\t{notes}\t"
+                        f"{status}\t{created_text}\t{updated_text}\t{decided_text}\n"
+                    )
+                out.flush()
+            with cur.copy(copy_sql(COPY_EVENTS_SQL, args)) as copy:
+                out = Copier(copy)
+                for text in event_lines:
+                    out.line(text)
+                out.flush()
+        events += len(event_lines)
+        done = lo + len(batch)
+        rate = done / (time.perf_counter() - started)
+        print(f"loaded {done:,}/{args.orders:,} orders ({rate:,.0f}/s)", file=sys.stderr)
+    return events
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic users and orders with COPY")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--users", type=int, default=100_000, help="Users to create")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="Orders to create")
+    parser.add_argument("--items", type=int, default=5_000, help="Distinct item names")
+    parser.add_argument("--days", type=int, default=180, help="Days of order history")
+    parser.add_argument("--growth", type=float, default=1.0, help="Daily order rate rises by this factor over the history")
+    parser.add_argument("--user-skew", type=float, default=0.8, help="Zipf exponent of orders per user")
+    parser.add_argument("--item-skew", type=float, default=1.0, help="Zipf exponent of item popularity")
+    parser.add_argument("--pending-hours", type=float, default=24, help="Orders newer than this stay PENDING")
+    parser.add_argument("--reject-rate", type=float, default=0.12, help="Share of decided orders rejected")
+    parser.add_argument("--password", default="password123", help="Password of every seeded user")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="bcrypt work factor of the stored hashes")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed; same seed, same data")
+    parser.add_argument("--batch-rows", type=int, default=1_000_000, help="Orders generated in memory at a time")
+    parser.add_argument("--truncate", action="store_true", help="Empty users, orders, events, items and rollups first")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail(
+            "DATABASE_URL must be provided via --database-url or the DATABASE_URL env var",
+            2,
+        )
+    if min(args.users, args.orders, args.items, args.days, args.batch_rows) < 1:
+        fail("--users, --orders, --items, --days and --batch-rows must be positive", 2)
+    if not 4 <= args.bcrypt_rounds <= 31:
+        fail("--bcrypt-rounds must be between 4 and 31", 2)
+
+    try:
+        import bcrypt  # noqa: F401
+        import psycopg
+    except ImportError:
+        fail("psycopg and bcrypt are required. Install with: pip install 'psycopg[binary]' bcrypt")
+
+    rng = random.Random(args.seed)
+    # history ends at the current hour, so the pending window is "now"
+    end = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    started = time.perf_counter()
+    with psycopg.connect(database_url) as conn:
+        conn.execute("SET maintenance_work_mem = '1GB'")
+        if args.truncate:
+            conn.execute(TRUNCATE_SQL)
+            conn.execute(RESET_WATERMARK_SQL)
+        else:
+            for table in TABLES:
+                if conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+                    fail(f"{table} is not empty; pass --truncate to replace its rows", 2)
+        restore = drop_deferred(conn)
+        users = load_users(conn, args, rng, end)
+        print(f"loaded {len(users):,} users", file=sys.stderr)
+        items = load_items(conn, args)
+        events = load_orders(conn, args, rng, users, items, end)
+        rebuild = time.perf_counter()
+        for ddl in restore:
+            conn.execute(ddl)
+        conn.commit()
+        print(
+            f"rebuilt {len(restore)} indexes and foreign keys in {time.perf_counter() - rebuild:.0f}s",
+            file=sys.stderr,
+        )
+        conn.autocommit = True
+        conn.execute("VACUUM ANALYZE users, item_names, orders, order_events")
+    elapsed = time.perf_counter() - started
+    print(
+        f"{args.users:,} users, {args.orders:,} orders and {events:,} events "
+        f"in {elapsed:.0f}s ({args.orders / elapsed:,.0f} orders/s)"
+    )
+    print("next: python scripts/backfill_order_rollups.py to rebuild order_rollups")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
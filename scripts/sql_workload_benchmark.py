@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""Replay the services' own SQL against a seeded Postgres, per statement.
+
+`scripts/benchmark.py` times HTTP round trips; this tool takes the app and
+the network out and times the database alone. The statements are read from
+the service sources, so the text is exactly what the services send:
+
+- `insert_order`: order-service CREATE_ORDER_SQL (order + PENDING event),
+- `list_by_user`: USER_ORDERS_SQL for a random user,
+- `admin_by_status`: the `/orders/admin?status=PENDING&limit=50` query,
+  built by app/order_filters.py `plan_admin_query`,
+- `get_order`: ORDER_BY_ID_SQL,
+- `approve`: APPROVE_ORDER_SQL on a random PENDING order,
+- `user_lookup`: auth-service USER_CREDENTIALS_SQL (login).
+
+The schema comes from infra/postgres/uuid-v7.sql, init-auth.sql and
+init-orders.sql, created in a scratch schema (`--schema`, default
+`bench_sql`) that is put first on every connection's search_path, so real
+tables are never touched.
+It is seeded with `--rows` orders (the newest 10% PENDING) over `--users`
+users and `--items` item names, in committed batches.
+
+`--concurrency` workers then each pick a statement by the `--mix` weights
+for `--duration` seconds (after `--warmup`), and the tool prints ops/s and
+p50/p95/p99/max latency per statement. `--json` also writes the results to
+a file for comparison between runs.
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/sql_workload_benchmark.py --rows 1000000
+  python scripts/sql_workload_benchmark.py --rows 10000000 --keep
+  python scripts/sql_workload_benchmark.py --skip-seed --concurrency 64 --json out.json
+
+The scratch schema is dropped afterwards unless --keep is given; --skip-seed
+reuses a kept one.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import asyncio
+import hashlib
+import importlib.util
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+INIT_SQL = [
+    REPO_ROOT / "infra" / "postgres" / "uuid-v7.sql",
+    REPO_ROOT / "infra" / "postgres" / "init-auth.sql",
+    REPO_ROOT / "infra" / "postgres" / "init-orders.sql",
+]
+SEED_BATCH_ROWS = 1_000_000
+DEFAULT_MIX = (
+    "insert_order=2,list_by_user=4,admin_by_status=1,get_order=4,approve=1,user_lookup=2"
+)
+
+SEED_USERS_SQL = """
+INSERT INTO users (id, username, password_hash)
+SELECT md5('user-' || g)::uuid, 'user-' || g, 'bench'
+FROM generate_series(1, %(users)s) g
+"""
+SEED_ITEMS_SQL = """
+INSERT INTO item_names (name)
+SELECT 'item-' || g FROM generate_series(0, %(items)s - 1) g
+"""
+# Order g: user 1 + g mod users, log-uniform item popularity, one order per
+# second of history, the newest 10% still PENDING.
+SEED_ORDERS_SQL = """
+INSERT INTO orders (id, user_id, item_name_id, quantity, notes, status, created_at, updated_at)
+SELECT md5('order-' || g)::uuid,
+       md5('user-' || (1 + mod(g, %(users)s)))::uuid,
+       (SELECT min(id) FROM item_names) + floor(exp(random() * ln(%(items)s)))::int - 1,
+       1 + mod(g, 100),
+       CASE WHEN mod(g, 4) = 0 THEN 'gift wrap' END,
+       (CASE WHEN g > %(rows)s * 0.9 THEN 'PENDING'
+             WHEN mod(g, 5) = 0 THEN 'REJECTED' ELSE 'APPROVED' END)::order_status,
+       now() - make_interval(secs => %(rows)s - g),
+       now() - make_interval(secs => %(rows)s - g)
+FROM generate_series(%(lo)s, %(hi)s) g
+"""
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def _literal(node: ast.AST, env: dict[str, str] | None = None) -> str | None:
+    """Evaluate a string constant expression: literals, `+` and f-strings
+    whose fields are plain names of other string constants in `env`."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _literal(node.left, env), _literal(node.right, env)
+        if left is not None and right is not None:
+            return left + right
+    if isinstance(node, ast.JoinedStr) and env is not None:
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                if value.conversion != -1 or value.format_spec is not None:
+                    return None
+                value = value.value
+            if isinstance(value, ast.Name) and value.id in env:
+                parts.append(env[value.id])
+            elif isinstance(value, ast.Constant) and isinstance(value.value, str):
+                parts.append(value.value)
+            else:
+                return None
+        return "".join(parts)
+    return None
+
+
+def module_constants(path: Path, _seen: frozenset[Path] = frozenset()) -> dict[str, str]:
+    """Every module-level string constant of a service source file.
+
+    Names imported from sibling modules (`from .sharding import BUCKET_SQL`)
+    are resolved too, so constants may be composed with f-strings. Parsed
+    rather than imported: the service modules pull in the whole app
+    (FastAPI, settings, pools) and both services name their package `app`.
+    """
+    env: dict[str, str] = {}
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.ImportFrom) and node.level == 1 and node.module:
+            source = path.with_name(f"{node.module}.py")
+            if source.exists() and source not in _seen:
+                imported = module_constants(source, _seen | {path})
+                for alias in node.names:
+                    if alias.name in imported:
+                        env[alias.asname or alias.name] = imported[alias.name]
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name):
+                value = _literal(node.value, env)
+                if value is not None:
+                    env[target.id] = value
+    return env
+
+
+def load_sql(service: str, module: str, names: list[str]) -> dict[str, str]:
+    """Read module-level SQL string constants from a service source file."""
+    path = REPO_ROOT / "services" / service / "app" / f"{module}.py"
+    constants = module_constants(path)
+    found = {name: constants[name] for name in names if name in constants}
+    missing = sorted(set(names) - set(found))
+    if missing:
+        fail(f"{path}: no string constant(s) {', '.join(missing)}")
+    return found
+
+
+def load_module(service: str, name: str) -> Any:
+    """Import a stdlib-only service module by path."""
+    path = REPO_ROOT / "services" / service / "app" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"{service}_{name}".replace("-", "_"), path)
+    if spec is None or spec.loader is None:
+        fail(f"cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # dataclasses resolve their module by name
+    spec.loader.exec_module(module)
+    return module
+
+
+def seeded_uuid(kind: str, n: int) -> str:
+    """The id the seed SQL gave row n (`md5(kind || '-' || n)::uuid`)."""
+    return str(uuid.UUID(hashlib.md5(f"{kind}-{n}".encode()).hexdigest()))
+
+
+def build_statements(args) -> dict[str, Callable[[random.Random], tuple[str, tuple]]]:
+    """Statement name -> function drawing (sql, params) for one execution."""
+    orders = load_sql(
+        "order-service",
+        "orders",
+        ["CREATE_ORDER_SQL", "USER_ORDERS_SQL", "ORDER_BY_ID_SQL", "APPROVE_ORDER_SQL"],
+    )
+    auth = load_sql("auth-service", "auth", ["USER_CREDENTIALS_SQL"])
+    filters = load_module("order-service", "order_filters")
+    uuid7 = load_module("order-service", "ids").uuid7
+    admin = filters.plan_admin_query(filters.AdminOrderFilter(status="PENDING"), limit=50)
+    pending_from = int(args.rows * 0.9) + 1
+
+    def user(rng: random.Random) -> int:
+        return rng.randint(1, args.users)
+
+    return {
+        "insert_order": lambda rng: (
+            orders["CREATE_ORDER_SQL"],
+            (
+                str(uuid7()),
+                seeded_uuid("user", user(rng)),
+                f"item-{int(rng.paretovariate(1.2)) % args.items}",
+                rng.randint(1, 100),
+                None,
+            ),
+        ),
+        "list_by_user": lambda rng: (
+            orders["USER_ORDERS_SQL"],
+            (seeded_uuid("user", user(rng)),),
+        ),
+        "admin_by_status": lambda rng: (admin.sql, admin.params),
+        "get_order": lambda rng: (
+            orders["ORDER_BY_ID_SQL"],
+            (seeded_uuid("order", rng.randint(1, args.rows)),),
+        ),
+        "approve": lambda rng: (
+            orders["APPROVE_ORDER_SQL"],
+            (seeded_uuid("order", rng.randint(pending_from, args.rows)), "bench-admin"),
+        ),
+        "user_lookup": lambda rng: (
+            auth["USER_CREDENTIALS_SQL"],
+            (f"user-{user(rng)}",),
+        ),
+    }
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for pair in text.split(","):
+        name, _, weight = pair.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def conn_options(schema: str) -> dict[str, str]:
+    return {"options": f"-c search_path={schema},public"}
+
+
+def seed(database_url: str, args, extra_sql: tuple[str, ...] = ()) -> None:
+    """Create the scratch schema and seed it; `extra_sql` runs before ANALYZE."""
+    import psycopg
+
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {args.schema} CASCADE")
+        conn.execute(f"CREATE SCHEMA {args.schema}")
+    with psycopg.connect(database_url, **conn_options(args.schema)) as conn:
+        for path in INIT_SQL:
+            conn.execute(path.read_text())
+        params = {"users": args.users, "items": args.items, "rows": args.rows}
+        conn.execute(SEED_USERS_SQL, params)
+        conn.execute(SEED_ITEMS_SQL, params)
+        conn.commit()
+        started = time.perf_counter()
+        for lo in range(1, args.rows + 1, SEED_BATCH_ROWS):
+            hi = min(lo + SEED_BATCH_ROWS - 1, args.rows)
+            conn.execute(SEED_ORDERS_SQL, {**params, "lo": lo, "hi": hi})
+            conn.commit()
+            print(f"seeded {hi:,}/{args.rows:,} orders", file=sys.stderr)
+        for sql in extra_sql:
+            conn.execute(sql, params)
+            conn.commit()
+        conn.autocommit = True
+        conn.execute("VACUUM ANALYZE")
+        print(f"seed took {time.perf_counter() - started:.0f}s", file=sys.stderr)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+async def run_workload(database_url: str, args, statements, mix) -> dict[str, dict]:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies: dict[str, list[float]] = {n: [] for n in names}
+    errors: dict[str, int] = {n: 0 for n in names}
+    measuring = False
+
+    async def worker(seed_value: int, deadline: float) -> None:
+        rng = random.Random(seed_value)
+        async with pool.connection() as conn:
+            await conn.set_autocommit(True)
+            while time.perf_counter() < deadline:
+                name = rng.choices(names, weights)[0]
+                sql, params = statements[name](rng)
+                start = time.perf_counter()
+                try:
+                    cur = await conn.execute(sql, params)
+                    if cur.description is not None:
+                        await cur.fetchall()
+                except psycopg.Error as exc:
+                    if measuring:
+                        errors[name] += 1
+                        if errors[name] == 1:
+                            print(f"{name}: {exc!r}", file=sys.stderr)
+                    continue
+                if measuring:
+                    latencies[name].append(time.perf_counter() - start)
+
+    async with AsyncConnectionPool(
+        database_url,
+        min_size=args.concurrency,
+        max_size=args.concurrency,
+        kwargs=conn_options(args.schema),
+    ) as pool:
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(worker(-i, deadline) for i in range(args.concurrency)))
+        measuring = True
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(worker(i, deadline) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for name in names:
+        lat = sorted(latencies[name])
+        results[name] = {
+            "ops": len(lat),
+            "ops_per_sec": len(lat) / elapsed,
+            "p50_ms": percentile(lat, 0.50) * 1000,
+            "p95_ms": percentile(lat, 0.95) * 1000,
+            "p99_ms": percentile(lat, 0.99) * 1000,
+            "max_ms": (lat[-1] if lat else 0.0) * 1000,
+            "errors": errors[name],
+        }
+    return results
+
+
+def drop_schema(database_url: str, schema: str) -> None:
+    import psycopg
+
+    with psycopg.connect(database_url, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-statement SQL workload benchmark")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Seeded orders")
+    parser.add_argument("--users", type=int, default=10_000, help="Seeded users")
+    parser.add_argument("--items", type=int, default=1_000, help="Seeded item names")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent workers (connections)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Statement weights, name=weight,...")
+    parser.add_argument("--schema", default="bench_sql", help="Scratch schema name")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse a kept, seeded schema")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema afterwards")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail(
+            "DATABASE_URL must be provided via --database-url or the DATABASE_URL env var",
+            2,
+        )
+    if not re.fullmatch(r"[a-z_][a-z0-9_]*", args.schema):
+        fail(f"--schema must be a plain lower-case identifier, got {args.schema!r}", 2)
+
+    try:
+        import psycopg  # noqa: F401
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        fail(
+            "psycopg and psycopg-pool are required. Install with: pip install 'psycopg[binary]' psycopg-pool"
+        )
+
+    statements = build_statements(args)
+    mix = parse_mix(args.mix)
+    unknown = sorted(set(mix) - set(statements))
+    if unknown:
+        fail(f"unknown statement(s) in --mix: {', '.join(unknown)}; known: {', '.join(statements)}", 2)
+
+    if not args.skip_seed:
+        seed(database_url, args)
+    try:
+        results = asyncio.run(run_workload(database_url, args, statements, mix))
+    finally:
+        if not args.keep:
+            drop_schema(database_url, args.schema)
+
+    print(
+        f"{'statement':<16} {'ops':>8} {'ops/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'errors':>7}"
+    )
+    for name, r in results.items():
+        print(
+            f"{name:<16} {r['ops']:>8} {r['ops_per_sec']:>9.0f} {r['p50_ms']:>8.2f} "
+            f"{r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['errors']:>7}"
+        )
+    if args.json:
+        meta = {
+            "rows": args.rows,
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "mix": mix,
+        }
+        Path(args.json).write_text(json.dumps({"meta": meta, "statements": results}, indent=2))
+    return 1 if any(r["errors"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
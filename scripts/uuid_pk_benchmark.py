@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Insert-throughput benchmark: random UUIDv4 vs time-ordered UUIDv7 keys.
+
+Creates one scratch table per key type (`id uuid PRIMARY KEY` plus a small
+payload), grows each to `--rows` rows in committed batches and reports:
+
+- overall and tail (last 10% of batches) insert throughput; the tail is
+  where the v4 index has outgrown shared_buffers and the difference shows,
+- primary-key index size (page splits leave v4 leaves ~half empty),
+- WAL bytes written per row (full-page images after each checkpoint touch
+  far more distinct pages with random keys).
+
+Ids come either from SQL (`gen_random_uuid()` vs `uuid_generate_v7()`, the
+default installed by infra/postgres/uuid-v7.sql) or from the application
+(`uuid.uuid4()` vs order-service `app.ids.uuid7`, loaded via COPY).
+
+Usage:
+  DATABASE_URL=postgres://... python scripts/uuid_pk_benchmark.py --rows 5000000
+  DATABASE_URL=postgres://... python scripts/uuid_pk_benchmark.py --id-source app
+
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+import uuid
+from collections.abc import Callable
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def fail(msg: str, code: int = 1) -> None:
+    print(msg, file=sys.stderr)
+    sys.exit(code)
+
+
+def load_app_uuid7() -> Callable[[], uuid.UUID]:
+    """Import order-service's uuid7 by path (service dirs are not packages)."""
+    path = REPO_ROOT / "services" / "order-service" / "app" / "ids.py"
+    spec = importlib.util.spec_from_file_location("order_service_ids", path)
+    if spec is None or spec.loader is None:
+        fail(f"cannot load {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.uuid7
+
+
+def wal_lsn(cur) -> int:
+    cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), '0/0')::bigint")
+    return int(cur.fetchone()[0])
+
+
+def run_one(conn, kind: str, rows: int, batch: int, id_source: str, keep: bool) -> dict:
+    table = f"bench_pk_{kind}"
+    sql_default = "gen_random_uuid()" if kind == "v4" else "uuid_generate_v7()"
+    app_gen: Callable[[], uuid.UUID] = uuid.uuid4 if kind == "v4" else load_app_uuid7()
+    payload = "x" * 64
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"CREATE TABLE {table} (id uuid PRIMARY KEY, payload text NOT NULL)")
+    conn.commit()
+
+    batch_secs: list[float] = []
+    with conn.cursor() as cur:
+        wal_start = wal_lsn(cur)
+        inserted = 0
+        while inserted < rows:
+            n = min(batch, rows - inserted)
+            start = time.perf_counter()
+            if id_source == "sql":
+                cur.execute(
+                    f"INSERT INTO {table} (id, payload) "
+                    f"SELECT {sql_default}, %s FROM generate_series(1, %s)",
+                    (payload, n),
+                )
+            else:
+                with cur.copy(f"COPY {table} (id, payload) FROM STDIN") as copy:
+                    for _ in range(n):
+                        copy.write_row((app_gen(), payload))
+            conn.commit()
+            batch_secs.append(time.perf_counter() - start)
+            inserted += n
+        wal_bytes = wal_lsn(cur) - wal_start
+        cur.execute("SELECT pg_relation_size(%s)", (f"{table}_pkey",))
+        index_bytes = int(cur.fetchone()[0])
+        if not keep:
+            cur.execute(f"DROP TABLE {table}")
+    conn.commit()
+
+    tail = batch_secs[-max(1, len(batch_secs) // 10) :]
+    tail_rows = min(rows, len(tail) * batch)
+    return {
+        "kind": kind,
+        "rows_per_sec": rows / sum(batch_secs),
+        "tail_rows_per_sec": tail_rows / sum(tail),
+        "index_mb": index_bytes / 1024 / 1024,
+        "wal_bytes_per_row": wal_bytes / rows,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="UUIDv4 vs UUIDv7 primary-key insert benchmark")
+    parser.add_argument("--database-url", help="Postgres DSN (or set DATABASE_URL env)")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows per table")
+    parser.add_argument("--batch", type=int, default=10_000, help="Rows per committed batch")
+    parser.add_argument("--id-source", choices=["sql", "app"], default="sql", help="Where ids are generated")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch tables for inspection")
+    args = parser.parse_args(argv)
+
+    database_url = args.database_url or os.getenv("DATABASE_URL")
+    if not database_url:
+        fail("DATABASE_URL must be provided via --database-url or the DATABASE_URL env var", 2)
+
+    try:
+        import psycopg
+    except ImportError:
+        fail("psycopg (psycopg3) is required. Install with: pip install 'psycopg[binary]'")
+
+    try:
+        conn = psycopg.connect(database_url)
+    except psycopg.Error as exc:  # pragma: no cover - environment dependent
+        fail(f"Failed to connect to database: {exc}", 3)
+
+    results = []
+    try:
+        for kind in ("v4", "v7"):
+            print(f"Inserting {args.rows} rows with {kind} keys ({args.id_source}-generated)...")
+            results.append(run_one(conn, kind, args.rows, args.batch, args.id_source, args.keep))
+    finally:
+        conn.close()
+
+    print(f"{'key':<4} {'rows/s':>12} {'tail rows/s':>12} {'pk index MB':>12} {'WAL B/row':>10}")
+    for r in results:
+        print(
+            f"{r['kind']:<4} {r['rows_per_sec']:>12.0f} {r['tail_rows_per_sec']:>12.0f} "
+            f"{r['index_mb']:>12.1f} {r['wal_bytes_per_row']:>10.1f}"
+        )
+    v4, v7 = results
+    print(f"v7/v4 tail throughput: {v7['tail_rows_per_sec'] / v4['tail_rows_per_sec']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
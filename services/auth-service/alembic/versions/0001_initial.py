@@ -23,10 +23,11 @@ def upgrade() -> None:
     repo_root = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
     )
-    sql_path = os.path.join(repo_root, "infra", "postgres", "init-auth.sql")
-    with open(sql_path, encoding="utf-8") as fh:
-        sql = fh.read()
-    op.execute(sql)
+    for name in ("uuid-v7.sql", "init-auth.sql"):
+        sql_path = os.path.join(repo_root, "infra", "postgres", name)
+        with open(sql_path, encoding="utf-8") as fh:
+            sql = fh.read()
+        op.execute(sql)
 
 
 def downgrade() -> None:
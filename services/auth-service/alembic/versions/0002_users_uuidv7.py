@@ -0,0 +1,33 @@
+"""time-ordered UUIDv7 default for users.id
+
+Revision ID: 0002_users_uuidv7
+Revises: 0001_initial
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import os
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_users_uuidv7"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only the column default changes; existing v4 ids stay valid.
+    repo_root = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
+    )
+    sql_path = os.path.join(repo_root, "infra", "postgres", "uuid-v7.sql")
+    with open(sql_path, encoding="utf-8") as fh:
+        op.execute(fh.read())
+    op.execute("ALTER TABLE users ALTER COLUMN id SET DEFAULT uuid_generate_v7();")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE users ALTER COLUMN id SET DEFAULT gen_random_uuid();")
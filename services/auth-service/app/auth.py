@@ -1,3 +1,4 @@
+import asyncio
 import base64
 import binascii
 import os
@@ -7,6 +8,7 @@ from typing import Any
 
 import bcrypt
 import jwt
+import structlog
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
@@ -22,6 +24,13 @@ from .settings import settings
 security = HTTPBearer()
 router = APIRouter()
 
+# Module-level so scripts/sql_workload_benchmark.py replays the exact text.
+USER_ID_BY_NAME_SQL = "SELECT id FROM users WHERE username = %s"
+CREATE_USER_SQL = "INSERT INTO users (username, password_hash) VALUES (%s, %s)"
+USER_CREDENTIALS_SQL = (
+    "SELECT id, password_hash, is_admin FROM users WHERE username = %s"
+)
+
 # Simple in-memory token revocation store for MVP/demo.
 # This is intentionally lightweight and process-local. For production
 # use a centralized session store (Redis, Valkey) so revocations persist
@@ -59,6 +68,53 @@ def is_refresh_revoked(refresh_token: str) -> bool:
     return SESSION_STORE.is_refresh_revoked(refresh_token)
 
 
+async def cleanup_sessions() -> int:
+    """Session maintenance, run by every replica each cleanup interval.
+
+    In-memory sessions belong to one process, so every replica purges its
+    own; a shared Valkey keyspace is repaired by whichever replica claims
+    the interval first.
+    """
+    interval = settings.SESSION_CLEANUP_INTERVAL_SECONDS
+    if not await asyncio.to_thread(SESSION_STORE.claim_cleanup, interval):
+        return 0
+    n = await asyncio.to_thread(SESSION_STORE.purge_expired, REFRESH_TTL)
+    if n:
+        structlog.get_logger().info("sessions.cleaned", sessions=n)
+    return n
+
+
+async def _cleanup_forever() -> None:
+    while True:
+        try:
+            await cleanup_sessions()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            structlog.get_logger().warning("sessions.cleanup-failed", exc_info=True)
+        await asyncio.sleep(settings.SESSION_CLEANUP_INTERVAL_SECONDS)
+
+
+_cleanup_task: asyncio.Task[None] | None = None
+
+
+def start_session_cleanup() -> None:
+    global _cleanup_task
+    if settings.SESSION_CLEANUP_INTERVAL_SECONDS > 0 and _cleanup_task is None:
+        _cleanup_task = asyncio.create_task(_cleanup_forever())
+
+
+async def stop_session_cleanup() -> None:
+    global _cleanup_task
+    if _cleanup_task is not None:
+        _cleanup_task.cancel()
+        try:
+            await _cleanup_task
+        except asyncio.CancelledError:
+            pass
+        _cleanup_task = None
+
+
 def rotate_refresh_token(old_token: str) -> str | None:
     """Delegate rotation to the session store implementation."""
     return SESSION_STORE.rotate_refresh_token(old_token, REFRESH_TTL)
@@ -126,17 +182,12 @@ async def register(payload: RegisterIn) -> dict[str, Any]:
     async with pool.connection() as conn:
         cur: Any = conn.cursor()
         async with cur:
-            await cur.execute(
-                "SELECT id FROM users WHERE username = %s", (payload.username,)
-            )
+            await cur.execute(USER_ID_BY_NAME_SQL, (payload.username,))
             row: Any = await cur.fetchone()
             if row:
                 raise HTTPException(status_code=400, detail="username exists")
             hashed: str = await _hash_password(payload.password)
-            await cur.execute(
-                "INSERT INTO users (username, password_hash) VALUES (%s, %s)",
-                (payload.username, hashed),
-            )
+            await cur.execute(CREATE_USER_SQL, (payload.username, hashed))
             return {"username": payload.username}
 
 
@@ -148,10 +199,7 @@ async def token(form: RegisterIn) -> dict[str, Any]:
     async with pool.connection() as conn:
         cur: Any = conn.cursor()
         async with cur:
-            await cur.execute(
-                "SELECT id, password_hash, is_admin FROM users WHERE username = %s",
-                (form.username,),
-            )
+            await cur.execute(USER_CREDENTIALS_SQL, (form.username,))
             row: Any = await cur.fetchone()
             if not row:
                 raise HTTPException(status_code=401, detail="invalid credentials")
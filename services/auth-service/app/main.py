@@ -23,6 +23,10 @@ async def lifespan(app: FastAPI):
 
         await init_db_pool()
         await ensure_admin()
+
+        from .auth import start_session_cleanup
+
+        start_session_cleanup()
         # mark the app as ready once startup tasks complete
         app.state.ready = True
     except Exception:
@@ -32,8 +36,11 @@ async def lifespan(app: FastAPI):
         raise
     yield
     try:
+        from .auth import stop_session_cleanup
         from .db import close_db_pool
 
+        await stop_session_cleanup()
+
         await close_db_pool()
     except Exception:
         structlog.get_logger().exception("Error during shutdown")
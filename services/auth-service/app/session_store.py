@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 import time
 import uuid
 from typing import Any
@@ -19,6 +20,9 @@ except Exception:
 
 valkey = _valkey_module
 
+# held by the replica running this interval's session cleanup
+CLEANUP_LOCK_KEY = "lock:session-cleanup"
+
 
 class SessionStore:
     """Pluggable session store interface.
@@ -49,52 +53,86 @@ class SessionStore:
     def get_session(self, refresh_token: str) -> dict[str, Any] | None:
         raise NotImplementedError()
 
+    def purge_expired(self, ttl_seconds: int) -> int:
+        """Maintenance hook: clean up sessions that would otherwise linger.
+
+        Returns the number of sessions removed or repaired. Stores whose
+        backend expires entries itself have nothing to do.
+        """
+        return 0
+
+    def claim_cleanup(self, seconds: float) -> bool:
+        """Whether this replica should run `purge_expired` for the next
+        `seconds`. A store private to this process always should.
+        """
+        return True
+
 
 class InMemorySessionStore(SessionStore):
-    """Simple in-memory session store (single-process)."""
+    """Simple in-memory session store (single-process).
+
+    Every method holds `_lock`, since session cleanup runs `purge_expired`
+    in a worker thread while request handlers use the store on the loop.
+    """
 
     def __init__(self) -> None:
         # refresh_token -> session record
         self._store: dict[str, dict[str, Any]] = {}
+        self._lock = threading.RLock()
 
     def store_refresh_token(
         self, refresh_token: str, session_data: dict[str, Any], ttl_seconds: int
     ) -> None:
-        self._store[refresh_token] = {
-            "data": session_data,
-            "expires_at": time.time() + ttl_seconds,
-        }
+        with self._lock:
+            self._store[refresh_token] = {
+                "data": session_data,
+                "expires_at": time.time() + ttl_seconds,
+            }
 
     def rotate_refresh_token(self, old_token: str, ttl_seconds: int) -> str | None:
-        rec = self._store.get(old_token)
-        if not rec:
-            return None
-        # revoke old, create new
-        new_token = uuid.uuid4().hex
-        self._store.pop(old_token, None)
-        self._store[new_token] = {
-            "data": rec["data"],
-            "expires_at": time.time() + ttl_seconds,
-        }
-        return new_token
+        with self._lock:
+            rec = self._store.get(old_token)
+            if not rec:
+                return None
+            # revoke old, create new
+            new_token = uuid.uuid4().hex
+            self._store.pop(old_token, None)
+            self._store[new_token] = {
+                "data": rec["data"],
+                "expires_at": time.time() + ttl_seconds,
+            }
+            return new_token
 
     def revoke_refresh_token(self, refresh_token: str) -> None:
-        self._store.pop(refresh_token, None)
+        with self._lock:
+            self._store.pop(refresh_token, None)
 
     def is_refresh_revoked(self, refresh_token: str) -> bool:
-        rec = self._store.get(refresh_token)
-        if not rec:
-            return True
-        if rec.get("expires_at") and rec["expires_at"] < time.time():
-            # expired => treat as revoked
-            self._store.pop(refresh_token, None)
-            return True
-        return False
+        with self._lock:
+            rec = self._store.get(refresh_token)
+            if not rec:
+                return True
+            if rec.get("expires_at") and rec["expires_at"] < time.time():
+                # expired => treat as revoked
+                self._store.pop(refresh_token, None)
+                return True
+            return False
 
     def get_session(self, refresh_token: str) -> dict[str, Any] | None:
-        if self.is_refresh_revoked(refresh_token):
-            return None
-        return self._store.get(refresh_token, {}).get("data")
+        with self._lock:
+            if self.is_refresh_revoked(refresh_token):
+                return None
+            return self._store.get(refresh_token, {}).get("data")
+
+    def purge_expired(self, ttl_seconds: int) -> int:
+        now = time.time()
+        with self._lock:
+            records = list(self._store.items())
+        expired = [t for t, rec in records if rec["expires_at"] < now]
+        with self._lock:
+            for token in expired:
+                self._store.pop(token, None)
+        return len(expired)
 
 
 class ValkeySessionStore(SessionStore):
@@ -252,6 +290,31 @@ class ValkeySessionStore(SessionStore):
         r.raise_for_status()
         return r.json().get("session")
 
+    def claim_cleanup(self, seconds: float) -> bool:
+        """One replica per interval repairs the shared keyspace (client mode)."""
+        if getattr(self, "_mode", "http") != "client":
+            return True
+        return bool(
+            self.client.set(CLEANUP_LOCK_KEY, "1", nx=True, ex=max(1, int(seconds)))
+        )
+
+    def purge_expired(self, ttl_seconds: int) -> int:
+        """Give TTL-less `session:*` keys the refresh TTL (client mode).
+
+        Keys expire on their own, but a crash between SET and EXPIRE in
+        `store_refresh_token` leaves a key that never would. The HTTP
+        control plane applies TTLs server-side, so there is nothing to do.
+        """
+        if getattr(self, "_mode", "http") != "client":
+            return 0
+        repaired = 0
+        for key in self.client.scan_iter(match="session:*", count=500):
+            # -1: the key exists but has no expiry
+            if self.client.ttl(key) == -1:
+                self.client.expire(key, ttl_seconds)
+                repaired += 1
+        return repaired
+
 
 def get_session_store() -> SessionStore:
     """Factory: return ValkeySessionStore if VALKEY_URL configured, otherwise in-memory."""
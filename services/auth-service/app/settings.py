@@ -16,6 +16,11 @@ class Settings:
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     # Minimum bcrypt rounds to require when ENV != development
     MIN_BCRYPT_ROUNDS: int = int(os.getenv("MIN_BCRYPT_ROUNDS", "12"))
+    # Seconds between session cleanup passes (see SessionStore.purge_expired);
+    # 0 disables them
+    SESSION_CLEANUP_INTERVAL_SECONDS: float = float(
+        os.getenv("SESSION_CLEANUP_INTERVAL_SECONDS", "900")
+    )
 
     def validate(self) -> None:
         """Fail-fast validation for critical runtime settings.
@@ -0,0 +1,126 @@
+import asyncio
+import fnmatch
+import sys
+
+import pytest
+
+import app.session_store as session_store_mod
+from app import auth
+from app.session_store import (
+    CLEANUP_LOCK_KEY,
+    InMemorySessionStore,
+    ValkeySessionStore,
+)
+
+
+class TTLValkeyClient:
+    """Dummy valkey client that tracks key expiry like the real server."""
+
+    def __init__(self, host="localhost", port=6379, db=0, decode_responses=False):
+        self.store: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+
+    def set(self, k, v, nx=False, ex=None):
+        if nx and k in self.store:
+            return None
+        self.store[k] = v
+        if ex is not None:
+            self.ttls[k] = ex
+        return True
+
+    def expire(self, k, ttl):
+        self.ttls[k] = ttl
+        return True
+
+    def ttl(self, k):
+        if k not in self.store:
+            return -2
+        return self.ttls.get(k, -1)
+
+    def scan_iter(self, match=None, count=None):
+        return [k for k in list(self.store) if fnmatch.fnmatch(k, match)]
+
+
+def test_in_memory_store_drops_expired_sessions() -> None:
+    store = InMemorySessionStore()
+    store.store_refresh_token("old", {"sub": "u1"}, ttl_seconds=-1)
+    store.store_refresh_token("live", {"sub": "u2"}, ttl_seconds=60)
+
+    assert store.purge_expired(60) == 1
+    assert store.get_session("live") == {"sub": "u2"}
+    assert store.purge_expired(60) == 0
+
+
+def test_in_memory_purge_tolerates_concurrent_logins() -> None:
+    store = InMemorySessionStore()
+    for n in range(50_000):
+        store.store_refresh_token(f"old-{n}", {"sub": "u1"}, ttl_seconds=-1)
+
+    async def purge_while_logging_in() -> int:
+        # cleanup_sessions purges in a worker thread while handlers run here
+        purge = asyncio.create_task(asyncio.to_thread(store.purge_expired, 60))
+        n = 0
+        while not purge.done():
+            store.store_refresh_token(f"live-{n}", {"sub": "u2"}, ttl_seconds=60)
+            n += 1
+            await asyncio.sleep(0)
+        return await purge
+
+    # switch threads often enough for the purge to overlap the logins
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        purged = asyncio.run(purge_while_logging_in())
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert purged == 50_000
+    assert not any(t.startswith("old-") for t in store._store)
+
+
+def test_valkey_store_repairs_sessions_without_ttl(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fake_mod = type("fake", (), {"Valkey": TTLValkeyClient})
+    monkeypatch.setattr(session_store_mod, "valkey", fake_mod, raising=False)
+    store = ValkeySessionStore("valkey://localhost:6379/0")
+    store.store_refresh_token("ok", {"sub": "u1"}, ttl_seconds=60)
+    # a crash between SET and EXPIRE
+    store.client.set("session:orphan", "{}")
+    store.client.set("other:key", "x")
+
+    assert store.purge_expired(600) == 1
+    assert store.client.ttls == {"session:ok": 60, "session:orphan": 600}
+
+
+def test_valkey_cleanup_runs_on_one_replica_per_interval(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    fake_mod = type("fake", (), {"Valkey": TTLValkeyClient})
+    monkeypatch.setattr(session_store_mod, "valkey", fake_mod, raising=False)
+    store = ValkeySessionStore("valkey://localhost:6379/0")
+
+    assert store.claim_cleanup(900) is True
+    # a second replica in the same interval finds the lock taken
+    assert store.claim_cleanup(900) is False
+    assert store.client.ttls == {CLEANUP_LOCK_KEY: 900}
+    assert InMemorySessionStore().claim_cleanup(900) is True
+
+
+def test_cleanup_skips_the_purge_without_the_interval(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    purged: list[int] = []
+
+    class Store(InMemorySessionStore):
+        def claim_cleanup(self, seconds: float) -> bool:
+            return False
+
+        def purge_expired(self, ttl_seconds: int) -> int:
+            purged.append(ttl_seconds)
+            return 0
+
+    monkeypatch.setattr(auth, "SESSION_STORE", Store())
+
+    assert asyncio.run(auth.cleanup_sessions()) == 0
+    assert purged == []
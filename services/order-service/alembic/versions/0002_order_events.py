@@ -0,0 +1,41 @@
+"""order status history (order_events)
+
+Revision ID: 0002_order_events
+Revises: 0001_initial
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002_order_events"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Kept in sync with infra/postgres/init-orders.sql; IF NOT EXISTS makes
+    # this a no-op on databases initialised from the current SQL file.
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_events (
+          id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+          order_id UUID NOT NULL,
+          actor TEXT,
+          from_status TEXT,
+          to_status TEXT NOT NULL,
+          occurred_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS order_events_order_id_idx
+          ON order_events (order_id, id);
+        CREATE INDEX IF NOT EXISTS order_events_occurred_at_idx
+          ON order_events (occurred_at, id);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS order_events;")
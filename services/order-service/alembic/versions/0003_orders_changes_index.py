@@ -0,0 +1,26 @@
+"""cursor index for the orders changes feed
+
+Revision ID: 0003_orders_changes_index
+Revises: 0002_order_events
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_orders_changes_index"
+down_revision = "0002_order_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_updated_at_id_idx ON orders (updated_at, id);"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS orders_updated_at_id_idx;")
@@ -0,0 +1,35 @@
+"""time-ordered UUIDv7 default for orders.id
+
+Revision ID: 0004_orders_uuidv7
+Revises: 0003_orders_changes_index
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import os
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_orders_uuidv7"
+down_revision = "0003_orders_changes_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Only the column default changes, so no rewrite or backfill is needed:
+    # existing v4 ids stay valid, and new v7 ids share a timestamp prefix that
+    # keeps fresh inserts clustered on a few leaf pages of the primary key.
+    repo_root = os.path.abspath(
+        os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")
+    )
+    sql_path = os.path.join(repo_root, "infra", "postgres", "uuid-v7.sql")
+    with open(sql_path, encoding="utf-8") as fh:
+        op.execute(fh.read())
+    op.execute("ALTER TABLE orders ALTER COLUMN id SET DEFAULT uuid_generate_v7();")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE orders ALTER COLUMN id SET DEFAULT gen_random_uuid();")
@@ -0,0 +1,35 @@
+"""bucket -> shard map for hash-sharded orders
+
+Revision ID: 0005_order_shard_map
+Revises: 0004_orders_uuidv7
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_order_shard_map"
+down_revision = "0004_orders_uuidv7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Harmless on unsharded deployments: an empty map means every bucket
+    # lives on shard 0.
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_shard_map (
+          bucket SMALLINT PRIMARY KEY CHECK (bucket >= 0 AND bucket < 256),
+          shard SMALLINT NOT NULL CHECK (shard >= 0),
+          frozen BOOLEAN NOT NULL DEFAULT FALSE,
+          updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS order_shard_map;")
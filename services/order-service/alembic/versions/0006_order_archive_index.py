@@ -0,0 +1,34 @@
+"""index of orders archived to cold-storage segments
+
+Revision ID: 0006_order_archive_index
+Revises: 0005_order_shard_map
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006_order_archive_index"
+down_revision = "0005_order_shard_map"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_archive_index (
+          order_id UUID PRIMARY KEY,
+          segment TEXT NOT NULL,
+          ordinal INT NOT NULL,
+          archived_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    # Segment files are left in ORDER_ARCHIVE_DIR; only the index is dropped.
+    op.execute("DROP TABLE IF EXISTS order_archive_index;")
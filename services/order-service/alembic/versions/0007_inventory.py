@@ -0,0 +1,51 @@
+"""items, sharded inventory counters and stock reservations
+
+Revision ID: 0007_inventory
+Revises: 0006_order_archive_index
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_inventory"
+down_revision = "0006_order_archive_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS items (
+          id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
+          name TEXT UNIQUE NOT NULL,
+          created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        CREATE TABLE IF NOT EXISTS inventory_slots (
+          item_id UUID NOT NULL REFERENCES items(id) ON DELETE CASCADE,
+          slot SMALLINT NOT NULL,
+          available INT NOT NULL CHECK (available >= 0),
+          PRIMARY KEY (item_id, slot)
+        );
+        CREATE TABLE IF NOT EXISTS inventory_reservations (
+          order_id UUID PRIMARY KEY,
+          item_id UUID NOT NULL REFERENCES items(id),
+          slot SMALLINT NOT NULL,
+          quantity INT NOT NULL CHECK (quantity > 0),
+          status TEXT NOT NULL DEFAULT 'RESERVED',
+          created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+          released_at TIMESTAMP WITH TIME ZONE
+        );
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP TABLE IF EXISTS inventory_reservations; "
+        "DROP TABLE IF EXISTS inventory_slots; "
+        "DROP TABLE IF EXISTS items;"
+    )
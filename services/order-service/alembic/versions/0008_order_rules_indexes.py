@@ -0,0 +1,32 @@
+"""indexes for the auto-approval rules engine
+
+Revision ID: 0008_order_rules_indexes
+Revises: 0007_inventory
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_order_rules_indexes"
+down_revision = "0007_inventory"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_pending_id_idx "
+        "ON orders (id) WHERE status = 'PENDING'; "
+        "CREATE INDEX IF NOT EXISTS orders_user_id_created_at_idx "
+        "ON orders (user_id, created_at);"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP INDEX IF EXISTS orders_user_id_created_at_idx; "
+        "DROP INDEX IF EXISTS orders_pending_id_idx;"
+    )
@@ -0,0 +1,46 @@
+"""time-bucketed order rollups and their watermark
+
+Revision ID: 0009_order_rollups
+Revises: 0008_order_rules_indexes
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0009_order_rollups"
+down_revision = "0008_order_rules_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS order_rollups (
+          granularity TEXT NOT NULL CHECK (granularity IN ('minute', 'hour', 'day')),
+          bucket_start TIMESTAMP WITH TIME ZONE NOT NULL,
+          status TEXT NOT NULL,
+          item_name TEXT NOT NULL,
+          orders BIGINT NOT NULL,
+          quantity BIGINT NOT NULL,
+          PRIMARY KEY (granularity, bucket_start, status, item_name)
+        );
+        CREATE TABLE IF NOT EXISTS order_rollup_watermark (
+          name TEXT PRIMARY KEY,
+          last_occurred_at TIMESTAMP WITH TIME ZONE,
+          last_event_id BIGINT,
+          updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        INSERT INTO order_rollup_watermark (name) VALUES ('order_events')
+          ON CONFLICT DO NOTHING;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP TABLE IF EXISTS order_rollup_watermark; DROP TABLE IF EXISTS order_rollups;"
+    )
@@ -0,0 +1,114 @@
+"""compact orders layout: enum status, interned item names, HOT-friendly indexes
+
+Revision ID: 0010_compact_orders
+Revises: 0009_order_rollups
+Create Date: 2026-10-19
+
+- `status` becomes the 4-byte `order_status` enum instead of TEXT.
+- `item_name` becomes `item_name_id`, an INTEGER into the deduplicated
+  `item_names` table; `intern_item_name(text)` maps a name to its id,
+  inserting it on first sight.
+- `fillfactor = 80` leaves room on every heap page for the new row version
+  of an approve/reject, so the update stays on the page (HOT).
+- A HOT update also requires that no B-tree covers a changed column. The
+  approve/reject path changes `status`, `updated_at` and `admin_action_at`,
+  so the `(updated_at, id)` B-tree becomes a BRIN index (summarizing indexes
+  do not block HOT on PostgreSQL 16+) and the partial `status = 'PENDING'`
+  index is dropped; the rules engine walks the primary key instead.
+
+The column type changes rewrite `orders` once (under an ACCESS EXCLUSIVE
+lock), which also applies the new fillfactor to every page.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010_compact_orders"
+down_revision = "0009_order_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        DO $$
+        BEGIN
+          IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'order_status') THEN
+            CREATE TYPE order_status AS ENUM ('PENDING', 'APPROVED', 'REJECTED');
+          END IF;
+        END $$;
+        CREATE TABLE IF NOT EXISTS item_names (
+          id INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+          name TEXT UNIQUE NOT NULL
+        );
+        CREATE OR REPLACE FUNCTION intern_item_name(p_name text) RETURNS integer AS $$
+        DECLARE
+          found_id integer;
+        BEGIN
+          SELECT id INTO found_id FROM item_names WHERE name = p_name;
+          IF found_id IS NULL THEN
+            INSERT INTO item_names (name) VALUES (p_name)
+              ON CONFLICT (name) DO NOTHING RETURNING id INTO found_id;
+            IF found_id IS NULL THEN
+              -- a concurrent insert won the race and has committed by now
+              SELECT id INTO found_id FROM item_names WHERE name = p_name;
+            END IF;
+          END IF;
+          RETURN found_id;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP INDEX IF EXISTS orders_pending_id_idx;
+        DROP INDEX IF EXISTS orders_updated_at_id_idx;
+        ALTER TABLE orders SET (fillfactor = 80);
+        -- a schema created from the current init-orders.sql is already compact
+        DO $$
+        BEGIN
+          IF EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'orders' AND column_name = 'item_name'
+          ) THEN
+            INSERT INTO item_names (name)
+              SELECT DISTINCT item_name FROM orders ORDER BY 1 ON CONFLICT DO NOTHING;
+            ALTER TABLE orders
+              ALTER COLUMN status DROP DEFAULT,
+              ALTER COLUMN status TYPE order_status USING status::order_status,
+              ALTER COLUMN status SET DEFAULT 'PENDING',
+              ALTER COLUMN item_name TYPE integer USING intern_item_name(item_name);
+            ALTER TABLE orders RENAME COLUMN item_name TO item_name_id;
+            ALTER TABLE orders ADD CONSTRAINT orders_item_name_id_fkey
+              FOREIGN KEY (item_name_id) REFERENCES item_names (id);
+          END IF;
+        END $$;
+        CREATE INDEX IF NOT EXISTS orders_updated_at_brin ON orders USING brin (updated_at);
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        DROP INDEX IF EXISTS orders_updated_at_brin;
+        ALTER TABLE orders DROP CONSTRAINT IF EXISTS orders_item_name_id_fkey;
+        ALTER TABLE orders RENAME COLUMN item_name_id TO item_name;
+        CREATE OR REPLACE FUNCTION item_name_of(p_id integer) RETURNS text AS $$
+          SELECT name FROM item_names WHERE id = p_id
+        $$ LANGUAGE sql STABLE;
+        ALTER TABLE orders
+          ALTER COLUMN item_name TYPE text USING item_name_of(item_name),
+          ALTER COLUMN status DROP DEFAULT,
+          ALTER COLUMN status TYPE text USING status::text,
+          ALTER COLUMN status SET DEFAULT 'PENDING';
+        ALTER TABLE orders RESET (fillfactor);
+        DROP FUNCTION item_name_of(integer);
+        DROP FUNCTION IF EXISTS intern_item_name(text);
+        DROP TABLE IF EXISTS item_names;
+        DROP TYPE IF EXISTS order_status;
+        CREATE INDEX IF NOT EXISTS orders_updated_at_id_idx ON orders (updated_at, id);
+        CREATE INDEX IF NOT EXISTS orders_pending_id_idx
+          ON orders (id) WHERE status = 'PENDING';
+        """
+    )
@@ -0,0 +1,39 @@
+"""indexes for the admin order filter grammar
+
+Revision ID: 0011_admin_filter_indexes
+Revises: 0010_compact_orders
+Create Date: 2026-10-19
+
+Every indexed admin listing walks one B-tree in `created_at` order (see
+app/order_filters.py). `created_at` and `item_name_id` never change after
+insert, so these indexes keep approve/reject updates HOT.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011_admin_filter_indexes"
+down_revision = "0010_compact_orders"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_created_at_id_idx "
+        "ON orders (created_at, id); "
+        "CREATE INDEX IF NOT EXISTS orders_item_name_id_created_at_idx "
+        "ON orders (item_name_id, created_at); "
+        "CREATE INDEX IF NOT EXISTS item_names_name_prefix_idx "
+        "ON item_names (name text_pattern_ops);"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP INDEX IF EXISTS item_names_name_prefix_idx; "
+        "DROP INDEX IF EXISTS orders_item_name_id_created_at_idx; "
+        "DROP INDEX IF EXISTS orders_created_at_id_idx;"
+    )
@@ -0,0 +1,50 @@
+"""durable background job queue
+
+Revision ID: 0012_jobs
+Revises: 0011_admin_filter_indexes
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0012_jobs"
+down_revision = "0011_admin_filter_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+          id UUID PRIMARY KEY DEFAULT uuid_generate_v7(),
+          kind TEXT NOT NULL,
+          params JSONB NOT NULL DEFAULT '{}',
+          status TEXT NOT NULL DEFAULT 'queued'
+            CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+          attempts INT NOT NULL DEFAULT 0,
+          max_attempts INT NOT NULL DEFAULT 5,
+          run_after TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+          locked_by TEXT,
+          locked_until TIMESTAMP WITH TIME ZONE,
+          progress_done BIGINT NOT NULL DEFAULT 0,
+          progress_total BIGINT,
+          result JSONB,
+          last_error TEXT,
+          created_by TEXT,
+          created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+          started_at TIMESTAMP WITH TIME ZONE,
+          finished_at TIMESTAMP WITH TIME ZONE,
+          updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        );
+        CREATE INDEX IF NOT EXISTS jobs_queued_idx ON jobs (kind, run_after) WHERE status = 'queued';
+        CREATE INDEX IF NOT EXISTS jobs_running_idx ON jobs (kind, locked_until) WHERE status = 'running';
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS jobs;")
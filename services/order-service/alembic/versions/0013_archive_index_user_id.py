@@ -0,0 +1,29 @@
+"""record the owning user in order_archive_index
+
+Revision ID: 0013_archive_index_user_id
+Revises: 0012_jobs
+Create Date: 2026-10-19
+
+scripts/reshard_orders.py moves a bucket's archive index entries with its
+orders, and a bucket is a hash of `user_id`. Entries archived before this
+revision have no user and stay on the shard that archived them; lookups
+query every shard, so they are still found.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0013_archive_index_user_id"
+down_revision = "0012_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE order_archive_index ADD COLUMN IF NOT EXISTS user_id UUID;")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE order_archive_index DROP COLUMN IF EXISTS user_id;")
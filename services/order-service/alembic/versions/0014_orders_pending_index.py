@@ -0,0 +1,32 @@
+"""restore the partial PENDING index for the rules engine
+
+Revision ID: 0014_orders_pending_index
+Revises: 0013_archive_index_user_id
+Create Date: 2026-10-19
+
+0010 dropped `orders_pending_id_idx` so approve/reject could stay HOT and
+left the rules engine walking the primary key from the start on every pass.
+That walk reads every live order to find the PENDING ones, which costs far
+more than the index maintenance it saved.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0014_orders_pending_index"
+down_revision = "0013_archive_index_user_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_pending_id_idx "
+        "ON orders (id) WHERE status = 'PENDING';"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS orders_pending_id_idx;")
@@ -0,0 +1,38 @@
+"""restore the (updated_at, id) B-tree for the changes keyset
+
+Revision ID: 0015_orders_updated_at_index
+Revises: 0014_orders_pending_index
+Create Date: 2026-10-19
+
+0010 replaced `orders_updated_at_id_idx` with a BRIN index on `updated_at`
+to keep approve/reject HOT. BRIN has no order, so every `/orders/changes`
+page, snapshot refresh and archive batch sorted all rows in the matching
+block ranges, which for the archiver is the whole unarchived backlog. The
+B-tree answers each keyset page with a bounded index range scan, and with
+the PENDING index back (0014) approve/reject are no longer HOT anyway.
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0015_orders_updated_at_index"
+down_revision = "0014_orders_pending_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_updated_at_id_idx ON orders (updated_at, id); "
+        "DROP INDEX IF EXISTS orders_updated_at_brin;"
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS orders_updated_at_brin "
+        "ON orders USING brin (updated_at); "
+        "DROP INDEX IF EXISTS orders_updated_at_id_idx;"
+    )
@@ -0,0 +1,281 @@
+"""Cold-storage archival of finalized orders.
+
+APPROVED/REJECTED orders untouched for ORDER_ARCHIVE_RETENTION_DAYS are moved
+out of Postgres into immutable gzip-compressed NDJSON *segments* (one per
+batch) under ORDER_ARCHIVE_DIR, which may be local disk or a mounted
+object-store bucket. `order_archive_index` keeps `order_id -> (segment,
+ordinal)` so `GET /orders/{id}` can still answer with one index probe and one
+segment read.
+
+Each batch is made durable in this order, so the index never points at a
+missing file and no order is lost:
+
+1. select up to ORDER_ARCHIVE_BATCH_SIZE candidates (oldest first),
+2. write the segment (tmp file, fsync, rename),
+3. one statement deletes the rows *unchanged since step 1* and inserts their
+   index entries, atomically.
+
+A row modified in between (e.g. re-rejected) is simply not deleted; its
+stale copy in the segment is never referenced. Order events stay in Postgres
+as the audit trail. Batches are small and paced by
+ORDER_ARCHIVE_BATCH_PAUSE_SECONDS to avoid lock and WAL spikes.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+import structlog
+
+from .db import execute_fetchall
+from .ids import uuid7
+from .metrics import ORDER_ARCHIVE_ROWS
+from .scheduler import add_periodic_task, remove_periodic_task
+from .settings import settings
+from .sharding import all_order_pools
+
+logger = structlog.get_logger()
+
+ARCHIVE_KEYS = [
+    "id",
+    "user_id",
+    "item_name",
+    "quantity",
+    "notes",
+    "status",
+    "created_at",
+    "updated_at",
+    "admin_action_at",
+]
+
+# Served by orders_updated_at_id_idx; finalized rows are filtered on the way.
+ARCHIVE_CANDIDATES_SQL = (
+    "SELECT o.id, o.user_id, n.name AS item_name, o.quantity, o.notes, o.status, "
+    "o.created_at, o.updated_at, o.admin_action_at "
+    "FROM orders o JOIN item_names n ON n.id = o.item_name_id "
+    "WHERE o.updated_at < now() - make_interval(days => %s) "
+    "AND o.status IN ('APPROVED', 'REJECTED') "
+    "ORDER BY o.updated_at, o.id LIMIT %s"
+)
+
+# Delete only rows whose updated_at still matches what was written to the
+# segment, and index exactly those, in one atomic statement. A leftover index
+# row for the same id is repointed, so a deleted order is never unreachable.
+ARCHIVE_COMMIT_SQL = """
+WITH batch AS (
+    SELECT * FROM unnest(%s::uuid[], %s::timestamptz[], %s::int[])
+        AS b(id, updated_at, ordinal)
+), deleted AS (
+    DELETE FROM orders o USING batch b
+    WHERE o.id = b.id AND o.updated_at = b.updated_at
+    RETURNING o.id, o.user_id
+)
+INSERT INTO order_archive_index (order_id, user_id, segment, ordinal)
+SELECT b.id, d.user_id, %s, b.ordinal FROM deleted d JOIN batch b ON b.id = d.id
+ON CONFLICT (order_id) DO UPDATE
+    SET segment = EXCLUDED.segment, ordinal = EXCLUDED.ordinal
+RETURNING order_id
+"""
+
+ARCHIVE_LOOKUP_SQL = (
+    "SELECT segment, ordinal FROM order_archive_index WHERE order_id = %s"
+)
+ARCHIVE_LOOKUP_MANY_SQL = (
+    "SELECT order_id, segment, ordinal FROM order_archive_index "
+    "WHERE order_id = ANY(%s::uuid[])"
+)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+class LocalArchiveStore:
+    """Segment files in a directory (local disk or an object-store mount).
+
+    Reads run in worker threads; `_lock` guards the LRU of decompressed
+    segments but not the file reads themselves.
+    """
+
+    def __init__(self, root: str | os.PathLike[str]):
+        self.root = Path(root)
+        self._cache: OrderedDict[str, list[bytes]] = OrderedDict()
+        self._cache_size = 8
+        self._lock = threading.Lock()
+
+    def write_segment(self, records: list[dict[str, Any]]) -> str:
+        """Write an immutable segment and return its name."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        name = f"orders-{uuid7()}.ndjson.gz"
+        tmp = self.root / f".{name}.tmp"
+        with open(tmp, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+                for rec in records:
+                    gz.write(json.dumps(rec, separators=(",", ":")).encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, self.root / name)
+        return name
+
+    def read_record(self, segment: str, ordinal: int) -> dict[str, Any]:
+        with self._lock:
+            lines = self._cache.get(segment)
+            if lines is not None:
+                self._cache.move_to_end(segment)
+        if lines is None:
+            # segment names come from our own index, never from clients
+            with gzip.open(self.root / Path(segment).name, "rb") as fh:
+                lines = fh.read().splitlines()
+            with self._lock:
+                self._cache[segment] = lines
+                self._cache.move_to_end(segment)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return json.loads(lines[ordinal])
+
+
+def _rows_as_records(rows: list[Any]) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    for r in rows:
+        r_map = dict(r) if isinstance(r, dict) else dict(zip(ARCHIVE_KEYS, r))
+        out.append({k: _jsonable(r_map.get(k)) for k in ARCHIVE_KEYS})
+    return out
+
+
+async def archive_batch(pool: Any, store: LocalArchiveStore) -> int:
+    """Archive one batch from `pool`; returns the number of orders removed."""
+    rows = await execute_fetchall(
+        pool,
+        ARCHIVE_CANDIDATES_SQL,
+        (settings.ORDER_ARCHIVE_RETENTION_DAYS, settings.ORDER_ARCHIVE_BATCH_SIZE),
+    )
+    if not rows:
+        return 0
+    records = _rows_as_records(rows)
+    segment = await asyncio.to_thread(store.write_segment, records)
+    committed = await execute_fetchall(
+        pool,
+        ARCHIVE_COMMIT_SQL,
+        (
+            [r["id"] for r in records],
+            [r["updated_at"] for r in records],
+            list(range(len(records))),
+            segment,
+        ),
+    )
+    ORDER_ARCHIVE_ROWS.inc(len(committed))
+    logger.info(
+        "order-archive.batch",
+        segment=segment,
+        selected=len(records),
+        archived=len(committed),
+    )
+    return len(committed)
+
+
+async def run_archive_pass(store: LocalArchiveStore) -> int:
+    """Archive everything past retention on every database, batch by batch."""
+    total = 0
+    for pool in all_order_pools():
+        while True:
+            n = await archive_batch(pool, store)
+            total += n
+            # a short batch means this database's backlog is drained
+            if n < settings.ORDER_ARCHIVE_BATCH_SIZE:
+                break
+            await asyncio.sleep(settings.ORDER_ARCHIVE_BATCH_PAUSE_SECONDS)
+    return total
+
+
+async def find_archived_order(
+    pools: list[Any], store: LocalArchiveStore, order_id: str
+) -> dict[str, Any] | None:
+    """Look an order up in the archive index (on every shard) and segment."""
+    found = await asyncio.gather(
+        *(execute_fetchall(pool, ARCHIVE_LOOKUP_SQL, (order_id,)) for pool in pools)
+    )
+    for rows in found:
+        if rows:
+            row = rows[0]
+            segment, ordinal = (
+                (row["segment"], row["ordinal"]) if isinstance(row, dict) else row
+            )
+            record = await asyncio.to_thread(store.read_record, segment, int(ordinal))
+            return {**record, "archived": True}
+    return None
+
+
+async def find_archived_orders(
+    pools: list[Any], store: LocalArchiveStore, order_ids: list[str]
+) -> dict[str, dict[str, Any]]:
+    """Batch form of `find_archived_order`: one index query per shard."""
+    found = await asyncio.gather(
+        *(
+            execute_fetchall(pool, ARCHIVE_LOOKUP_MANY_SQL, (order_ids,))
+            for pool in pools
+        )
+    )
+    out: dict[str, dict[str, Any]] = {}
+    for rows in found:
+        for row in rows:
+            order_id, segment, ordinal = (
+                (row["order_id"], row["segment"], row["ordinal"])
+                if isinstance(row, dict)
+                else row
+            )
+            if str(order_id) in out:
+                continue
+            record = await asyncio.to_thread(store.read_record, segment, int(ordinal))
+            out[str(order_id)] = {**record, "archived": True}
+    return out
+
+
+async def _archive_pass() -> None:
+    if _store is not None:
+        await run_archive_pass(_store)
+
+
+_store: LocalArchiveStore | None = None
+
+
+async def start_order_archiver() -> None:
+    """Open the archive store; schedule archive passes when enabled.
+
+    The store is opened whenever ORDER_ARCHIVE_DIR exists so reads keep
+    working on replicas that do not run the job themselves. Passes run on
+    the scheduler's leader only (app/scheduler.py).
+    """
+    global _store
+    if _store is not None:
+        return
+    if settings.ORDER_ARCHIVE_ENABLED or Path(settings.ORDER_ARCHIVE_DIR).is_dir():
+        _store = LocalArchiveStore(settings.ORDER_ARCHIVE_DIR)
+    if settings.ORDER_ARCHIVE_ENABLED and _store is not None:
+        add_periodic_task(
+            "order-archive",
+            settings.ORDER_ARCHIVE_SCHEDULE
+            or f"@every {settings.ORDER_ARCHIVE_INTERVAL_SECONDS}",
+            _archive_pass,
+            jitter=30,
+        )
+
+
+def get_archive_store() -> LocalArchiveStore | None:
+    return _store
+
+
+async def stop_order_archiver() -> None:
+    global _store
+    remove_periodic_task("order-archive")
+    _store = None
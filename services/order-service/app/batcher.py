@@ -0,0 +1,262 @@
+"""Group-commit batching for order inserts.
+
+Under bursty load every `create_order` would otherwise check out its own
+pool connection to commit a single row. When enabled, callers enqueue their
+validated order and await a future; a collector task drains the queue for up
+to `linger_ms` (or `max_batch_size` rows) and writes the whole batch with one
+`unnest`-based INSERT ... RETURNING in one transaction. Ids (UUIDv7) are
+generated here, so each caller gets its own id back regardless of row order.
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import psycopg
+import structlog
+from fastapi import HTTPException
+
+from .db import execute_fetchall
+from .ids import uuid7
+from .metrics import (
+    ORDER_INSERT_BATCH_SECONDS,
+    ORDER_INSERT_BATCH_SIZE,
+    ORDER_INSERT_BATCH_WAIT_SECONDS,
+)
+from .pools import set_workload
+from .settings import settings
+from .sharding import BucketFrozenError, get_shard_router, user_bucket
+
+logger = structlog.get_logger()
+
+# One statement shape for every batch size: arrays bind as five parameters,
+# so the plan is reused and the creation events are written atomically.
+BATCH_INSERT_ORDERS_SQL = """
+WITH new_orders AS (
+    INSERT INTO orders (id, user_id, item_name_id, quantity, notes)
+    SELECT id, user_id, intern_item_name(item_name), quantity, notes
+    FROM unnest(%s::uuid[], %s::uuid[], %s::text[], %s::int[], %s::text[])
+        AS b(id, user_id, item_name, quantity, notes)
+    RETURNING id, user_id
+), events AS (
+    INSERT INTO order_events (order_id, actor, from_status, to_status)
+    SELECT id, user_id::text, NULL, 'PENDING' FROM new_orders
+)
+SELECT id FROM new_orders
+"""
+
+
+@dataclass
+class _PendingInsert:
+    order_id: str
+    user_id: Any
+    item_name: str
+    quantity: int
+    notes: str | None
+    future: asyncio.Future[str]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class OrderInsertBatcher:
+    """Coalesce concurrent order inserts into multi-row transactions."""
+
+    def __init__(
+        self,
+        get_pool: Callable[[], Any],
+        max_batch_size: int = 64,
+        linger_ms: float = 5.0,
+        max_inflight: int = 2,
+    ) -> None:
+        self._get_pool = get_pool
+        self.max_batch_size = max(1, max_batch_size)
+        self.linger = max(0.0, linger_ms) / 1000.0
+        self._inflight = asyncio.Semaphore(max(1, max_inflight))
+        # None is the stop signal: the collector flushes what it holds and exits
+        self._queue: asyncio.Queue[_PendingInsert | None] = asyncio.Queue()
+        self._collector: asyncio.Task[None] | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+
+    async def start(self) -> None:
+        if self._collector is None:
+            self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        """Flush everything already queued, then stop the collector.
+
+        The collector is signalled rather than cancelled, so a batch it is
+        still lingering on or holding for a flush slot is written too.
+        """
+        if self._collector is None:
+            return
+        self._queue.put_nowait(None)
+        await self._collector
+        self._collector = None
+        # anything submitted after the stop signal goes out in one last batch
+        late = [item for item in self._drain_nowait() if item is not None]
+        if late:
+            await self._inflight.acquire()
+            await self._flush(late)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _drain_nowait(self) -> list[_PendingInsert | None]:
+        items: list[_PendingInsert | None] = []
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def submit(
+        self,
+        user_id: Any,
+        item_name: str,
+        quantity: int,
+        notes: str | None,
+        order_id: str | None = None,
+    ) -> str:
+        """Queue one order for the next batch and return its id once committed."""
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(
+            _PendingInsert(
+                order_id or str(uuid7()), user_id, item_name, quantity, notes, future
+            )
+        )
+        return await future
+
+    async def _collect(self) -> None:
+        set_workload("user_write")
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Backpressure: wait for a flush slot before collecting further, so
+            # new arrivals accumulate into the next (larger) batch meanwhile.
+            await self._inflight.acquire()
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[_PendingInsert]) -> None:
+        try:
+            started = time.monotonic()
+            for item in batch:
+                ORDER_INSERT_BATCH_WAIT_SECONDS.observe(started - item.enqueued_at)
+            try:
+                await self._write(batch)
+            except (psycopg.errors.IntegrityError, psycopg.errors.DataError):
+                if len(batch) == 1:
+                    raise
+                # One bad row must not fail its neighbours: retry singly so
+                # only the offending caller sees the error.
+                logger.warning("order-batch.split", size=len(batch))
+                for item in batch:
+                    try:
+                        await self._write([item])
+                    except Exception as exc:
+                        if not item.future.done():
+                            item.future.set_exception(exc)
+            ORDER_INSERT_BATCH_SECONDS.observe(time.monotonic() - started)
+        except Exception as exc:
+            logger.exception("order-batch.failed", size=len(batch))
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+        finally:
+            self._inflight.release()
+
+    async def _write(self, batch: list[_PendingInsert]) -> None:
+        shards = get_shard_router()
+        if shards is None:
+            pool = self._get_pool()
+            if pool is None:
+                raise HTTPException(
+                    status_code=500, detail="Database pool not available"
+                )
+            await self._write_to(pool, batch)
+            return
+        # One INSERT per shard; orders for a bucket that is mid-move are
+        # failed individually so their callers can spool or retry.
+        writable: list[_PendingInsert] = []
+        for item in batch:
+            if shards.is_frozen(item.user_id):
+                if not item.future.done():
+                    item.future.set_exception(
+                        BucketFrozenError(user_bucket(item.user_id))
+                    )
+            else:
+                writable.append(item)
+        for pool, group in shards.partition(writable, lambda i: i.user_id):
+            await self._write_to(pool, group)
+
+    async def _write_to(self, pool: Any, batch: list[_PendingInsert]) -> None:
+        rows = await execute_fetchall(
+            pool,
+            BATCH_INSERT_ORDERS_SQL,
+            (
+                [i.order_id for i in batch],
+                [i.user_id for i in batch],
+                [i.item_name for i in batch],
+                [i.quantity for i in batch],
+                [i.notes for i in batch],
+            ),
+        )
+        ORDER_INSERT_BATCH_SIZE.observe(len(batch))
+        inserted = {str(r["id"] if isinstance(r, dict) else r[0]) for r in rows}
+        for item in batch:
+            if item.future.done():
+                continue
+            if item.order_id in inserted:
+                item.future.set_result(item.order_id)
+            else:
+                item.future.set_exception(
+                    RuntimeError(f"order {item.order_id} missing from batch result")
+                )
+
+
+_batcher: OrderInsertBatcher | None = None
+
+
+async def start_order_batcher(get_pool: Callable[[], Any]) -> None:
+    """Start the process-wide batcher when ORDER_BATCH_ENABLED is set."""
+    global _batcher
+    if not settings.ORDER_BATCH_ENABLED or _batcher is not None:
+        return
+    batcher = OrderInsertBatcher(
+        get_pool,
+        max_batch_size=settings.ORDER_BATCH_MAX_SIZE,
+        linger_ms=settings.ORDER_BATCH_LINGER_MS,
+        max_inflight=settings.ORDER_BATCH_MAX_INFLIGHT,
+    )
+    await batcher.start()
+    _batcher = batcher
+
+
+def get_order_batcher() -> OrderInsertBatcher | None:
+    return _batcher
+
+
+async def stop_order_batcher() -> None:
+    global _batcher
+    if _batcher is not None:
+        await _batcher.stop()
+        _batcher = None
@@ -1,8 +1,10 @@
 import os
+from collections.abc import AsyncGenerator
+from typing import Any
 
-from psycopg_pool import AsyncConnectionPool
+from .pools import PartitionedPool, open_partitioned_pool
 
-_pool: AsyncConnectionPool | None = None
+_pool: PartitionedPool | None = None
 
 
 async def init_db_pool() -> None:
@@ -10,18 +12,14 @@ async def init_db_pool() -> None:
     database_url = os.getenv("DATABASE_URL")
     if not database_url:
         raise RuntimeError("DATABASE_URL not set")
-    pool = AsyncConnectionPool(database_url, min_size=1, max_size=5, open=False)
-    await pool.open()
-    _pool = pool
+    _pool = await open_partitioned_pool(database_url)
 
 
-def get_db_pool() -> AsyncConnectionPool | None:
+def get_db_pool() -> PartitionedPool | None:
     pool = _pool
-    if not isinstance(pool, AsyncConnectionPool):
+    if not isinstance(pool, PartitionedPool):
         return None
-    if hasattr(pool, "open") and getattr(pool, "open", False):
-        return pool
-    return None
+    return pool
 
 
 async def close_db_pool() -> None:
@@ -29,3 +27,91 @@ async def close_db_pool() -> None:
     if _pool is not None:
         await _pool.close()
         _pool = None
+
+
+async def execute_fetchone(
+    pool: Any, sql: str, params: tuple[Any, ...] | None = None
+) -> Any:
+    """Execute a query and return a single row. Works with both the real pool
+    (connection()/cursor() API) and the test DummyPool (acquire()/fetchrow()).
+    """
+    params = params or ()
+    if hasattr(pool, "acquire"):
+        async with pool.acquire() as conn:
+            # Dummy test connection exposes fetchrow(sql, params)
+            if hasattr(conn, "fetchrow"):
+                return await conn.fetchrow(sql, params)
+            # otherwise fall back to cursor API
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchone()
+    else:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchone()
+
+
+async def execute_fetchall(
+    pool: Any, sql: str, params: tuple[Any, ...] | None = None
+) -> list[Any]:
+    params = params or ()
+    if hasattr(pool, "acquire"):
+        async with pool.acquire() as conn:
+            if hasattr(conn, "fetchall"):
+                return await conn.fetchall(sql, params)
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchall()
+    else:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(sql, params)
+                return await cur.fetchall()
+
+
+async def execute_transaction(
+    pool: Any, statements: list[tuple[str, tuple[Any, ...]]]
+) -> list[Any]:
+    """Run `statements` in order in one transaction; return the last one's rows.
+
+    Each statement gets a fresh snapshot (READ COMMITTED), so a lock taken by
+    one statement is in force before the next one reads.
+    """
+    if hasattr(pool, "acquire"):
+        async with pool.acquire() as conn:
+            rows: list[Any] = []
+            for sql, params in statements:
+                rows = await conn.fetchall(sql, params)
+            return rows
+    async with pool.connection() as conn:
+        async with conn.transaction():
+            async with conn.cursor() as cur:
+                for sql, params in statements:
+                    await cur.execute(sql, params)
+                return await cur.fetchall()
+
+
+async def execute_stream(
+    pool: Any, sql: str, params: tuple[Any, ...] | None = None, chunk_rows: int = 500
+) -> AsyncGenerator[list[Any]]:
+    """Yield a query's rows in chunks of at most `chunk_rows`.
+
+    On a real pool the rows come from a server-side (named) cursor, so only
+    one chunk is ever held client-side; the connection stays checked out
+    until the iterator is exhausted or closed. Test DummyPools are fetched
+    whole and then chunked.
+    """
+    params = params or ()
+    if hasattr(pool, "acquire"):
+        async with pool.acquire() as conn:
+            rows = await conn.fetchall(sql, params)
+        for i in range(0, len(rows), chunk_rows):
+            yield rows[i : i + chunk_rows]
+        return
+    async with pool.connection() as conn:
+        # named cursors live inside a transaction; the pool ends it on return
+        async with conn.cursor(name="order_stream") as cur:
+            await cur.execute(sql, params)
+            while rows := await cur.fetchmany(chunk_rows):
+                yield rows
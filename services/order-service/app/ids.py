@@ -0,0 +1,54 @@
+"""Time-ordered UUIDv7 identifiers (RFC 9562).
+
+Random v4 keys land on arbitrary leaf pages of the primary-key B-tree, so a
+high insert rate splits pages all over the index and dirties far more of it
+(more WAL, worse cache hit rate). A v7 id starts with a 48-bit Unix
+millisecond timestamp, so new keys append to the right-hand edge of the
+index just like a sequence, while staying globally unique and opaque.
+"""
+
+import os
+import threading
+import time
+from uuid import UUID
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def uuid7() -> UUID:
+    """Return a new UUIDv7.
+
+    The 12-bit `rand_a` field holds a counter seeded randomly each
+    millisecond (RFC 9562 method 1), so ids minted by this process are
+    strictly increasing even when many are created within the same ms.
+    """
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            _last_ms = ms
+            # leave headroom in the counter so a burst rarely overflows
+            _counter = int.from_bytes(os.urandom(2)) & 0x7FF
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                # counter exhausted: borrow the next millisecond
+                _last_ms += 1
+                _counter = 0
+        ms, counter = _last_ms, _counter
+    rand_b = int.from_bytes(os.urandom(8)) & 0x3FFF_FFFF_FFFF_FFFF
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    )
+    return UUID(int=value)
+
+
+def uuid7_floor(ms: int) -> UUID:
+    """Lowest id sorting at or after Unix millisecond `ms`.
+
+    Every UUIDv7 minted before `ms` sorts below it, so it works as an
+    upper bound for "ids created before this instant" keyset scans.
+    """
+    return UUID(int=(ms & 0xFFFF_FFFF_FFFF) << 80)
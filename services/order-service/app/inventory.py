@@ -0,0 +1,307 @@
+"""Items and stock reservation with contention-safe sharded counters.
+
+A tracked item's stock is split across `inventory_slots` rows (sharded
+counters). An order for it reserves stock in the same statement that inserts
+the order: one slot with enough stock is picked at random and decremented
+under `FOR UPDATE SKIP LOCKED`, so concurrent buyers of a hot item spread over
+the slots instead of queueing on a single row lock. Rejecting the order puts
+the quantity back into the slot it came from (see REJECT_ORDER_SQL).
+
+Stock is kept in Postgres rather than a Valkey counter so the reservation
+commits atomically with the order row: there is no reconciliation window in
+which stock and orders disagree. When no single slot can cover an order (all
+busy, or stock fragmented) the item's slots are rebalanced, which also
+reveals whether the item is actually sold out.
+
+Item names without an `items` row are untracked and are ordered exactly as
+before. Under sharding every shard holds its own slots for every item, so
+reservations stay local to the buyer's shard. When that shard runs short,
+stock is moved over from the other shards (taken there first, then added
+here, so a failure in between can under-count but never oversell) before
+the order is refused.
+"""
+
+import asyncio
+import random
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import structlog
+from fastapi import HTTPException
+
+from .db import execute_fetchall, execute_fetchone
+from .metrics import INVENTORY_RESERVE_RETRIES, INVENTORY_STOCK_BORROWED
+from .pools import set_workload
+from .settings import settings
+
+logger = structlog.get_logger()
+
+# Params: item_id, quantity, quantity, order_id, user_id, item_name,
+# quantity, notes, quantity.
+RESERVE_ORDER_SQL = """
+WITH pick AS (
+    SELECT item_id, slot FROM inventory_slots
+    WHERE item_id = %s AND available >= %s
+    ORDER BY random() LIMIT 1
+    FOR UPDATE SKIP LOCKED
+), taken AS (
+    UPDATE inventory_slots s SET available = s.available - %s
+    FROM pick WHERE s.item_id = pick.item_id AND s.slot = pick.slot
+    RETURNING s.item_id, s.slot
+), new_order AS (
+    INSERT INTO orders (id, user_id, item_name_id, quantity, notes)
+    SELECT %s, %s, intern_item_name(%s), %s, %s FROM taken
+    RETURNING id, user_id
+), reservation AS (
+    INSERT INTO inventory_reservations (order_id, item_id, slot, quantity)
+    SELECT new_order.id, taken.item_id, taken.slot, %s FROM new_order, taken
+), event AS (
+    INSERT INTO order_events (order_id, actor, from_status, to_status)
+    SELECT id, user_id::text, NULL, 'PENDING' FROM new_order
+)
+SELECT id FROM new_order
+"""
+
+# Locks every slot of one item (waiting out in-flight reservations), spreads
+# the total evenly and returns it. Params: item_id, item_id.
+REBALANCE_ITEM_SQL = """
+WITH locked AS (
+    SELECT slot, available FROM inventory_slots
+    WHERE item_id = %s ORDER BY slot FOR UPDATE
+), totals AS (
+    SELECT coalesce(sum(available), 0)::int AS total, count(*)::int AS n FROM locked
+), balanced AS (
+    UPDATE inventory_slots s
+    SET available = t.total / t.n + CASE WHEN s.slot < mod(t.total, t.n) THEN 1 ELSE 0 END
+    FROM totals t
+    WHERE s.item_id = %s AND t.n > 0
+)
+SELECT total FROM totals
+"""
+
+# Takes up to `needed` from an item's slots on a donor shard, lowest slot
+# first; returns how much was taken. Params: item_id, needed, item_id.
+TAKE_STOCK_SQL = """
+WITH locked AS (
+    SELECT slot, available FROM inventory_slots
+    WHERE item_id = %s ORDER BY slot FOR UPDATE
+), shares AS (
+    SELECT slot, least(available, greatest(
+        %s - (sum(available) OVER (ORDER BY slot) - available), 0)) AS share
+    FROM locked
+), taken AS (
+    UPDATE inventory_slots s SET available = s.available - sh.share
+    FROM shares sh
+    WHERE s.item_id = %s AND s.slot = sh.slot AND sh.share > 0
+    RETURNING sh.share
+)
+SELECT coalesce(sum(share), 0)::int AS taken FROM taken
+"""
+
+# Adds borrowed stock to an item and gathers all of it into its first slot,
+# so one reservation can use the whole remainder; returns the new total.
+# Params: item_id, added, item_id.
+GATHER_STOCK_SQL = """
+WITH locked AS (
+    SELECT slot, available FROM inventory_slots
+    WHERE item_id = %s ORDER BY slot FOR UPDATE
+), totals AS (
+    SELECT (coalesce(sum(available), 0) + %s)::int AS total, min(slot) AS first
+    FROM locked
+), gathered AS (
+    UPDATE inventory_slots s
+    SET available = CASE WHEN s.slot = t.first THEN t.total ELSE 0 END
+    FROM totals t
+    WHERE s.item_id = %s AND t.first IS NOT NULL
+)
+SELECT total FROM totals
+"""
+
+CREATE_ITEM_SQL = """
+WITH item AS (
+    INSERT INTO items (id, name) VALUES (%s, %s) RETURNING id
+)
+INSERT INTO inventory_slots (item_id, slot, available)
+SELECT item.id, s.slot, s.available
+FROM item, unnest(%s::int[], %s::int[]) AS s(slot, available)
+RETURNING item_id
+"""
+
+# Params: slots[], increments[], item_id.
+RESTOCK_ITEM_SQL = """
+UPDATE inventory_slots s SET available = s.available + d.add
+FROM unnest(%s::int[], %s::int[]) AS d(slot, add)
+WHERE s.item_id = %s AND s.slot = d.slot
+RETURNING s.slot
+"""
+
+LIST_ITEMS_SQL = (
+    "SELECT i.id, i.name, coalesce(sum(s.available), 0) AS available, count(s.slot) AS slots "
+    "FROM items i LEFT JOIN inventory_slots s ON s.item_id = i.id "
+    "GROUP BY i.id, i.name ORDER BY i.name"
+)
+ITEM_KEYS = ["id", "name", "available", "slots"]
+
+# Undoes a partially created item; its slots go with it (ON DELETE CASCADE).
+DELETE_ITEM_SQL = "DELETE FROM items WHERE id = %s"
+
+ITEM_NAMES_SQL = "SELECT id, name FROM items"
+
+
+def split_evenly(total: int, parts: int) -> list[int]:
+    """Split `total` into `parts` integers differing by at most one."""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+class ItemCatalog:
+    """Process-local `item name -> item id` map of tracked items."""
+
+    def __init__(self) -> None:
+        self._by_name: dict[str, str] = {}
+        self._refresher: asyncio.Task[None] | None = None
+
+    def item_id(self, name: str) -> str | None:
+        return self._by_name.get(name)
+
+    def add(self, name: str, item_id: str) -> None:
+        self._by_name[name] = item_id
+
+    async def refresh(self, pool: Any) -> None:
+        rows = await execute_fetchall(pool, ITEM_NAMES_SQL)
+        by_name: dict[str, str] = {}
+        for r in rows:
+            item_id, name = (r["id"], r["name"]) if isinstance(r, dict) else r
+            by_name[name] = str(item_id)
+        self._by_name = by_name
+
+    async def _refresh_forever(self, get_pool: Callable[[], Any]) -> None:
+        set_workload("bulk_read")
+        while True:
+            try:
+                pool = get_pool()
+                if pool is not None:
+                    await self.refresh(pool)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("item-catalog.refresh-failed", exc_info=True)
+            await asyncio.sleep(settings.ITEM_CATALOG_REFRESH_SECONDS)
+
+    def start_refresh(self, get_pool: Callable[[], Any]) -> None:
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_forever(get_pool))
+
+    async def stop_refresh(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+async def rebalance_item(pool: Any, item_id: str) -> int:
+    """Even out an item's slots; returns its total available stock."""
+    row = await execute_fetchone(pool, REBALANCE_ITEM_SQL, (item_id, item_id))
+    if row is None:
+        return 0
+    return int(row["total"] if isinstance(row, dict) else row[0])
+
+
+async def borrow_stock(donors: Sequence[Any], item_id: str, needed: int) -> int:
+    """Take up to `needed` of an item's stock from the `donors` shards;
+    returns how much was taken."""
+    borrowed = 0
+    for donor in donors:
+        row = await execute_fetchone(
+            donor, TAKE_STOCK_SQL, (item_id, needed - borrowed, item_id)
+        )
+        if row:
+            borrowed += int(row["taken"] if isinstance(row, dict) else row[0])
+        if borrowed >= needed:
+            break
+    INVENTORY_STOCK_BORROWED.inc(borrowed)
+    return borrowed
+
+
+async def gather_stock(pool: Any, item_id: str, added: int) -> int:
+    """Add `added` to an item and gather its stock into one slot; returns
+    the item's new total."""
+    row = await execute_fetchone(pool, GATHER_STOCK_SQL, (item_id, added, item_id))
+    if row is None:
+        return 0
+    return int(row["total"] if isinstance(row, dict) else row[0])
+
+
+async def reserve_and_create_order(
+    pool: Any,
+    order_id: str,
+    user_id: Any,
+    item_id: str,
+    item_name: str,
+    quantity: int,
+    notes: str | None,
+    donors: Sequence[Any] = (),
+) -> str:
+    """Insert an order for a tracked item, reserving its stock atomically.
+
+    `donors` are the other shards' pools, borrowed from when `pool` is short.
+    Raises 409 when the item does not have `quantity` in stock anywhere and
+    503 when stock exists but every slot stayed busy for all attempts.
+    """
+    params = (
+        item_id,
+        quantity,
+        quantity,
+        order_id,
+        user_id,
+        item_name,
+        quantity,
+        notes,
+        quantity,
+    )
+    for attempt in range(settings.INVENTORY_RESERVE_ATTEMPTS):
+        row = await execute_fetchone(pool, RESERVE_ORDER_SQL, params)
+        if row:
+            return str(row["id"] if isinstance(row, dict) else row[0])
+        INVENTORY_RESERVE_RETRIES.inc()
+        if attempt == 0:
+            # No unlocked slot could cover it: sold out, fragmented, or all
+            # slots busy. Rebalancing waits for the locks and tells us which.
+            total = await rebalance_item(pool, item_id)
+            if total < quantity and donors:
+                borrowed = await borrow_stock(donors, item_id, quantity - total)
+                if borrowed:
+                    total = await gather_stock(pool, item_id, borrowed)
+            if total < quantity:
+                raise HTTPException(status_code=409, detail="insufficient stock")
+        else:
+            await asyncio.sleep(random.uniform(0.001, 0.005) * attempt)  # noqa: S311 - jitter
+    raise HTTPException(
+        status_code=503,
+        detail="item is under heavy contention; retry",
+        headers={"Retry-After": "1"},
+    )
+
+
+_catalog: ItemCatalog | None = None
+
+
+async def start_item_catalog(get_pool: Callable[[], Any]) -> None:
+    global _catalog
+    if _catalog is None:
+        _catalog = ItemCatalog()
+        _catalog.start_refresh(get_pool)
+
+
+def get_item_catalog() -> ItemCatalog | None:
+    return _catalog
+
+
+async def stop_item_catalog() -> None:
+    global _catalog
+    if _catalog is not None:
+        await _catalog.stop_refresh()
+        _catalog = None
@@ -0,0 +1,128 @@
+from typing import Any
+from uuid import UUID
+
+import psycopg
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from .db import execute_fetchall
+from .ids import uuid7
+from .inventory import (
+    CREATE_ITEM_SQL,
+    DELETE_ITEM_SQL,
+    ITEM_KEYS,
+    LIST_ITEMS_SQL,
+    RESTOCK_ITEM_SQL,
+    get_item_catalog,
+    split_evenly,
+)
+from .models import ItemCreate, ItemRestock
+from .orders import get_current_user, require_admin
+from .pools import workload
+from .sharding import all_order_pools
+from .suggest import get_item_suggester
+
+router = APIRouter(prefix="/items")
+
+
+def _inventory_pools() -> list[Any]:
+    """Every database holding inventory slots (one per shard when sharded)."""
+    pools = all_order_pools()
+    if not pools:
+        raise HTTPException(status_code=500, detail="Database pool not available")
+    return pools
+
+
+@router.get("/")
+async def list_items(
+    _user: dict[str, Any] = Depends(get_current_user),
+) -> list[dict[str, Any]]:
+    """Tracked items with their available stock summed over all slots."""
+    merged: dict[str, dict[str, Any]] = {}
+    for pool in _inventory_pools():
+        rows = await execute_fetchall(pool, LIST_ITEMS_SQL)
+        for r in rows:
+            item = dict(r) if isinstance(r, dict) else dict(zip(ITEM_KEYS, r))
+            item["id"] = str(item["id"])
+            seen = merged.setdefault(item["id"], {**item, "available": 0, "slots": 0})
+            seen["available"] += int(item["available"])
+            seen["slots"] += int(item["slots"])
+    return sorted(merged.values(), key=lambda i: i["name"])
+
+
+@router.get("/suggest")
+async def suggest_items(
+    q: str = Query("", max_length=255),
+    limit: int = Query(8, ge=1, le=50),
+    _user: dict[str, Any] = Depends(get_current_user),
+) -> list[dict[str, Any]]:
+    """Most ordered item names starting with `q`, from the in-memory index."""
+    suggester = get_item_suggester()
+    if suggester is None or not q.strip():
+        return []
+    return suggester.index.suggest(q, limit)
+
+
+@router.post("/", status_code=201, dependencies=[Depends(workload("admin_write"))])
+async def create_item(
+    payload: ItemCreate, _admin: dict[str, Any] = Depends(require_admin)
+) -> dict[str, Any]:
+    """Admin: register a stock-tracked item, splitting stock across slots.
+
+    Under sharding the item is created on every shard or on none: a failure
+    on one shard deletes it again from the shards already written.
+    """
+    pools = _inventory_pools()
+    item_id = str(uuid7())
+    written: list[Any] = []
+    try:
+        for pool, share in zip(pools, split_evenly(payload.stock, len(pools))):
+            await execute_fetchall(
+                pool,
+                CREATE_ITEM_SQL,
+                (
+                    item_id,
+                    payload.name,
+                    list(range(payload.slots)),
+                    split_evenly(share, payload.slots),
+                ),
+            )
+            written.append(pool)
+    except Exception as exc:
+        for pool in written:
+            await execute_fetchall(pool, DELETE_ITEM_SQL, (item_id,))
+        if isinstance(exc, psycopg.errors.UniqueViolation):
+            raise HTTPException(status_code=409, detail="item already exists")
+        raise
+    catalog = get_item_catalog()
+    if catalog is not None:
+        catalog.add(payload.name, item_id)
+    return {"id": item_id, "name": payload.name, "available": payload.stock}
+
+
+@router.post("/{item_id}/restock", dependencies=[Depends(workload("admin_write"))])
+async def restock_item(
+    item_id: UUID,
+    payload: ItemRestock,
+    _admin: dict[str, Any] = Depends(require_admin),
+) -> dict[str, Any]:
+    """Admin: add stock to an item, spread evenly over its slots."""
+    pools = _inventory_pools()
+    restocked = False
+    for pool, share in zip(pools, split_evenly(payload.quantity, len(pools))):
+        slots = await execute_fetchall(
+            pool,
+            "SELECT slot FROM inventory_slots WHERE item_id = %s ORDER BY slot",
+            (str(item_id),),
+        )
+        if not slots:
+            continue
+        slot_ids = [s["slot"] if isinstance(s, dict) else s[0] for s in slots]
+        await execute_fetchall(
+            pool,
+            RESTOCK_ITEM_SQL,
+            (slot_ids, split_evenly(share, len(slot_ids)), str(item_id)),
+        )
+        restocked = True
+    if not restocked:
+        raise HTTPException(status_code=404, detail="item not found")
+    return {"id": str(item_id), "added": payload.quantity}
@@ -0,0 +1,136 @@
+"""Admin job API and the built-in job kinds (see app/worker.py).
+
+- `archive`: one full archival pass (app/archive.py) on every database.
+- `rollups`: drain every database's event backlog into the rollups.
+- `bulk_decide`: approve or reject a list of orders as the enqueuing admin.
+  Progress is the number of ids handled, so a retry resumes after them;
+  the result counts the ids now in the target status, whichever attempt
+  (or admin) decided them.
+"""
+
+from typing import Any
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, HTTPException, status
+
+from .archive import archive_batch, get_archive_store
+from .db import execute_fetchall, execute_fetchone
+from .models import BulkDecision, JobCreate
+from .orders import APPROVE_ORDER_SQL, REJECT_ORDER_SQL, order_pool, require_admin
+from .pools import set_workload
+from .rollups import advance_rollups
+from .settings import settings
+from .sharding import all_order_pools
+from .worker import JobContext, enqueue_job, get_job, jobs_pool, register_job
+
+router = APIRouter(prefix="/jobs")
+
+# ids decided between two progress reports; bounds the redo after a crash
+BULK_DECIDE_REPORT_EVERY = 50
+
+# Which of a job's orders are in its target status; served by orders_pkey.
+DECIDED_ORDERS_SQL = "SELECT id FROM orders WHERE id = ANY(%s::uuid[]) AND status = %s"
+DECIDED_STATUS = {"APPROVE": "APPROVED", "REJECT": "REJECTED"}
+
+
+def _pool() -> Any:
+    pool = jobs_pool()
+    if pool is None:
+        raise HTTPException(status_code=500, detail="Database pool not available")
+    return pool
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    job: JobCreate = Body(...), _admin: dict[str, Any] = Depends(require_admin)
+) -> dict[str, Any]:
+    """Queue a job; poll `GET /jobs/{id}` for its progress and result."""
+    try:
+        job_id = await enqueue_job(
+            _pool(), job.kind, job.params, _admin.get("sub"), job.max_attempts
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=400, detail=f"unknown job kind {job.kind!r}"
+        ) from None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"id": job_id, "status": "queued"}
+
+
+@router.get("/{job_id}")
+async def read_job(
+    job_id: UUID, _admin: dict[str, Any] = Depends(require_admin)
+) -> dict[str, Any]:
+    job = await get_job(_pool(), str(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@register_job("archive")
+async def run_archive_job(ctx: JobContext) -> dict[str, Any]:
+    store = get_archive_store()
+    if store is None:
+        raise RuntimeError("order archive is not enabled")
+    total = 0
+    for pool in all_order_pools():
+        while True:
+            n = await archive_batch(pool, store)
+            total += n
+            await ctx.report(total)
+            if n < settings.ORDER_ARCHIVE_BATCH_SIZE:
+                break
+    return {"archived": total}
+
+
+@register_job("rollups")
+async def run_rollups_job(ctx: JobContext) -> dict[str, Any]:
+    total = 0
+    for pool in all_order_pools():
+        while True:
+            n = await advance_rollups(pool)
+            total += n
+            await ctx.report(total)
+            if n < settings.ORDER_ROLLUP_BATCH_SIZE:
+                break
+    return {"events": total}
+
+
+def _bulk_decision(params: dict[str, Any]) -> dict[str, Any]:
+    # a pydantic ValidationError is the ValueError enqueue_job documents
+    return BulkDecision.model_validate(params).model_dump(mode="json")
+
+
+async def _decided_orders(ids: list[str], status: str) -> set[str]:
+    # a set, since an order mid-reshard can be found on two shards
+    decided: set[str] = set()
+    for pool in all_order_pools():
+        rows = await execute_fetchall(pool, DECIDED_ORDERS_SQL, (ids, status))
+        decided.update(str(r["id"] if isinstance(r, dict) else r[0]) for r in rows)
+    return decided
+
+
+@register_job("bulk_decide", concurrency=2, validate=_bulk_decision)
+async def run_bulk_decide_job(ctx: JobContext) -> dict[str, Any]:
+    set_workload("admin_write")
+    decision = BulkDecision.model_validate(ctx.params)
+    sql = APPROVE_ORDER_SQL if decision.action == "APPROVE" else REJECT_ORDER_SQL
+    ids = decision.order_ids
+    for n, order_id in enumerate(ids[ctx.done :], start=ctx.done + 1):
+        try:
+            pool = await order_pool(order_id, write=True)
+            await execute_fetchone(pool, sql, (str(order_id), ctx.created_by))
+        except HTTPException as exc:
+            if exc.status_code != 404:
+                raise
+        if n % BULK_DECIDE_REPORT_EVERY == 0 or n == len(ids):
+            await ctx.report(n, len(ids))
+    decided = await _decided_orders(
+        [str(i) for i in ids], DECIDED_STATUS[decision.action]
+    )
+    return {
+        "action": decision.action,
+        "decided": len(decided),
+        "missing": len(ids) - len(decided),
+    }
@@ -1,18 +1,56 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import make_asgi_app
+from psycopg_pool import PoolTimeout
 
-from .db import close_db_pool, init_db_pool
+from .analytics import start_order_analytics, stop_order_analytics
+from .archive import start_order_archiver, stop_order_archiver
+from .batcher import start_order_batcher, stop_order_batcher
+from .db import close_db_pool, get_db_pool, init_db_pool
+from .inventory import start_item_catalog, stop_item_catalog
+from .items import router as items_router
+from .jobs import router as jobs_router
 from .observability import request_id_middleware, setup_logging
 from .orders import router as orders_router
+from .rollups import start_order_rollups, stop_order_rollups
+from .rules import start_order_rules, stop_order_rules
+from .scheduler import start_scheduler, stop_scheduler
+from .sharding import start_shard_router, stop_shard_router
+from .spool import start_order_spool, stop_order_spool
+from .suggest import start_item_suggester, stop_item_suggester
+from .worker import start_job_worker, stop_job_worker
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db_pool()
+    await start_shard_router()
+    await start_item_catalog(get_db_pool)
+    await start_item_suggester()
+    await start_order_batcher(get_db_pool)
+    await start_order_spool(get_db_pool)
+    await start_order_archiver()
+    await start_order_rules()
+    await start_order_analytics()
+    await start_order_rollups()
+    await start_job_worker()
+    await start_scheduler()
     # mark ready after init
     app.state.ready = True
     yield
+    await stop_scheduler()
+    await stop_job_worker()
+    await stop_order_rollups()
+    await stop_order_analytics()
+    await stop_order_rules()
+    await stop_order_archiver()
+    await stop_order_spool()
+    await stop_order_batcher()
+    await stop_item_suggester()
+    await stop_item_catalog()
+    await stop_shard_router()
     await close_db_pool()
 
 
@@ -20,6 +58,17 @@ setup_logging()
 app = FastAPI(title="order-service", lifespan=lifespan)
 app.middleware("http")(request_id_middleware)
 app.include_router(orders_router)
+app.include_router(items_router)
+app.include_router(jobs_router)
+app.mount("/metrics", make_asgi_app())
+
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout(request: Request, exc: PoolTimeout) -> JSONResponse:
+    # the request's workload class is out of connections; shed it quickly
+    return JSONResponse(
+        {"detail": str(exc)}, status_code=503, headers={"Retry-After": "1"}
+    )
 
 
 @app.get("/health")
@@ -31,8 +80,6 @@ async def health() -> dict[str, str]:
 async def ready() -> dict[str, str]:
     if getattr(app.state, "ready", False):
         return {"status": "ready", "service": "order-service"}
-    from fastapi.responses import JSONResponse
-
     return JSONResponse(
         {"status": "not ready", "service": "order-service"}, status_code=503
     )
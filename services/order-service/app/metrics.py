@@ -0,0 +1,86 @@
+"""Prometheus metrics for order-service, exposed at `/metrics`.
+
+Metric objects live at module level so every module records into the
+default registry that `prometheus_client.make_asgi_app()` serves.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+ORDER_INSERT_BATCH_SIZE = Histogram(
+    "order_insert_batch_size",
+    "Orders written per group-commit INSERT statement",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+ORDER_INSERT_BATCH_SECONDS = Histogram(
+    "order_insert_batch_seconds",
+    "Time to execute and commit one group-commit batch",
+)
+ORDER_INSERT_BATCH_WAIT_SECONDS = Histogram(
+    "order_insert_batch_wait_seconds",
+    "Time a create_order call spends queued before its batch is flushed",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ORDER_SPOOL_WRITES = Counter(
+    "order_spool_writes",
+    "Orders accepted into the local spool instead of written to Postgres",
+)
+ORDER_SPOOL_DRAINED = Counter(
+    "order_spool_drained",
+    "Spooled orders consumed by the drainer (inserted, duplicate or rejected)",
+)
+ORDER_SPOOL_PENDING = Gauge(
+    "order_spool_pending",
+    "Spooled orders not yet replayed into Postgres",
+)
+ORDER_ARCHIVE_ROWS = Counter(
+    "order_archive_rows",
+    "Finalized orders moved from Postgres into archive segments",
+)
+INVENTORY_RESERVE_RETRIES = Counter(
+    "inventory_reserve_retries",
+    "Stock reservations that found no free slot and had to retry",
+)
+INVENTORY_STOCK_BORROWED = Counter(
+    "inventory_stock_borrowed",
+    "Units of stock moved from other shards to the buyer's shard",
+)
+ORDER_RULES_DECISIONS = Counter(
+    "order_rules_decisions",
+    "PENDING orders auto-approved or auto-rejected by the rules engine",
+    ["rule", "action"],
+)
+ORDER_RULES_BATCH_SECONDS = Histogram(
+    "order_rules_batch_seconds",
+    "Time to evaluate the rules over one fetched batch of PENDING orders",
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_in_use",
+    "Connections checked out, per pool and workload class",
+    ["pool", "workload"],
+)
+DB_POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent queued for a workload class's connection quota",
+    ["pool", "workload"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts",
+    "Checkouts that gave up after the workload class's queue timeout",
+    ["pool", "workload"],
+)
+SCHEDULED_TASK_SECONDS = Histogram(
+    "scheduled_task_seconds",
+    "Duration of one run of a leader-scheduled maintenance task",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+)
+SCHEDULED_TASK_RUNS = Counter(
+    "scheduled_task_runs",
+    "Scheduled task slots by outcome (ok, failed, cancelled, overlap)",
+    ["task", "outcome"],
+)
+SCHEDULER_LEADER = Gauge(
+    "scheduler_leader",
+    "1 while this replica holds the maintenance scheduler's leader lock",
+)
@@ -2,10 +2,14 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from uuid import UUID, uuid4
+from typing import Literal
+from uuid import UUID
 
+from pydantic import model_validator
 from sqlmodel import Field, SQLModel
 
+from .ids import uuid7
+
 
 class OrderStatus(str, Enum):
     PENDING = "PENDING"
@@ -13,10 +17,19 @@ class OrderStatus(str, Enum):
     REJECTED = "REJECTED"
 
 
+class ItemName(SQLModel, table=True):
+    """An interned item name; orders reference it by `id`."""
+
+    __tablename__ = "item_names"  # pyright: ignore[reportAssignmentType]
+
+    id: int | None = Field(default=None, primary_key=True)
+    name: str = Field(unique=True)
+
+
 class Order(SQLModel, table=True):
-    id: UUID | None = Field(default_factory=uuid4, primary_key=True)
+    id: UUID | None = Field(default_factory=uuid7, primary_key=True)
     user_id: str = Field(index=True)
-    item_name: str
+    item_name_id: int = Field(foreign_key="item_names.id")
     quantity: int
     notes: str | None = None
     status: OrderStatus = Field(default=OrderStatus.PENDING)
@@ -25,6 +38,19 @@ class Order(SQLModel, table=True):
     admin_action_at: datetime | None = Field(default=None)
 
 
+class OrderEvent(SQLModel, table=True):
+    """Append-only record of a single order status transition."""
+
+    __tablename__ = "order_events"  # pyright: ignore[reportAssignmentType]
+
+    id: int | None = Field(default=None, primary_key=True)
+    order_id: UUID = Field(index=True)
+    actor: str | None = None
+    from_status: OrderStatus | None = None
+    to_status: OrderStatus
+    occurred_at: datetime | None = Field(default=None)
+
+
 class OrderCreate(SQLModel):
     """Pydantic/SQLModel input model for creating orders.
 
@@ -34,3 +60,114 @@ class OrderCreate(SQLModel):
     item_name: str = Field(..., min_length=1, max_length=255)
     quantity: int = Field(..., ge=1, le=100)
     notes: str | None = Field(default=None, max_length=1000)
+
+
+class OrderLookup(SQLModel):
+    """Ids for a batch order lookup (`POST /orders/lookup`)."""
+
+    ids: list[UUID] = Field(..., min_length=1, max_length=500)
+
+
+class Item(SQLModel, table=True):
+    """A stock-tracked item; its stock lives in `inventory_slots`."""
+
+    __tablename__ = "items"  # pyright: ignore[reportAssignmentType]
+
+    id: UUID | None = Field(default_factory=uuid7, primary_key=True)
+    name: str = Field(unique=True)
+    created_at: datetime | None = Field(default=None)
+
+
+class ItemCreate(SQLModel):
+    """Admin input for registering a stock-tracked item."""
+
+    name: str = Field(..., min_length=1, max_length=255)
+    stock: int = Field(..., ge=0)
+    # Sharded-counter rows the stock is split across (per shard). More slots
+    # let more concurrent buyers of the same item commit in parallel.
+    slots: int = Field(default=8, ge=1, le=256)
+
+
+class ItemRestock(SQLModel):
+    quantity: int = Field(..., ge=1)
+
+
+class OrderRule(SQLModel):
+    """One auto-decision rule for PENDING orders (see app/rules.py).
+
+    Every predicate that is set must hold for the rule to match; unset
+    predicates are ignored. Rules are tried in order and the first match
+    decides the order.
+    """
+
+    name: str = Field(..., min_length=1, max_length=100)
+    action: Literal["APPROVE", "REJECT"]
+    min_quantity: int | None = None
+    max_quantity: int | None = None
+    # item allow-list / deny-list, matched exactly against item_name
+    items: list[str] | None = None
+    exclude_items: list[str] | None = None
+    # orders by the same user within ORDER_RULES_VELOCITY_WINDOW_SECONDS,
+    # counting the order being decided
+    min_user_orders: int | None = Field(default=None, ge=1)
+    max_user_orders: int | None = Field(default=None, ge=1)
+    # case-insensitive substrings of notes
+    notes_any: list[str] | None = None
+    notes_none: list[str] | None = None
+
+    @model_validator(mode="after")
+    def _has_a_predicate(self) -> OrderRule:
+        # a rule without predicates would decide every PENDING order
+        if (
+            self.min_quantity is None
+            and self.max_quantity is None
+            and self.items is None
+            and not self.exclude_items
+            and self.min_user_orders is None
+            and self.max_user_orders is None
+            and not self.notes_any
+            and not self.notes_none
+        ):
+            raise ValueError(f"rule {self.name!r} has no predicates")
+        return self
+
+
+class Job(SQLModel, table=True):
+    """A durable background job claimed and run by app/worker.py."""
+
+    __tablename__ = "jobs"  # pyright: ignore[reportAssignmentType]
+
+    id: UUID | None = Field(default_factory=uuid7, primary_key=True)
+    kind: str
+    params: str = "{}"
+    status: str = "queued"
+    attempts: int = 0
+    max_attempts: int = 5
+    run_after: datetime | None = Field(default=None)
+    locked_by: str | None = None
+    locked_until: datetime | None = Field(default=None)
+    progress_done: int = 0
+    progress_total: int | None = None
+    result: str | None = None
+    last_error: str | None = None
+    created_by: str | None = None
+    created_at: datetime | None = Field(default=None)
+    started_at: datetime | None = Field(default=None)
+    finished_at: datetime | None = Field(default=None)
+    updated_at: datetime | None = Field(default=None)
+
+
+class JobCreate(SQLModel):
+    """Admin input for enqueueing a job (`POST /jobs`)."""
+
+    kind: str = Field(..., min_length=1, max_length=100)
+    params: dict = Field(default_factory=dict)
+    # defaults to the job kind's own limit
+    max_attempts: int | None = Field(default=None, ge=1, le=50)
+
+
+class BulkDecision(SQLModel):
+    """Params of a `bulk_decide` job: one decision for many orders."""
+
+    action: Literal["APPROVE", "REJECT"]
+    order_ids: list[UUID] = Field(..., min_length=1, max_length=10000)
@@ -0,0 +1,187 @@
+"""Filter and sort grammar for the admin order listing.
+
+`GET /orders/admin` accepts a small, closed set of filters (status, user,
+item-name prefix, created/updated ranges, quantity band) and sorts. Each
+filter maps to one fixed, parameterized predicate below, so the SQL text is
+always one of a finite set of shapes and values only ever travel as
+parameters.
+
+The planner only accepts shapes an index can serve. An indexed query walks
+one B-tree in `created_at` order, picked by its driving filter:
+
+- `user_id`: orders_user_id_created_at_idx,
+- `item_prefix`: item_names_name_prefix_idx, then
+  orders_item_name_id_created_at_idx,
+- `created_after` / `created_before`, or no filter: orders_created_at_id_idx.
+
+The other filters (quantity band, updated range) are checked row by row
+during that walk, which is only cheap once a driving filter bounds it.
+`status` alone is still accepted, as the listing always has. Anything else,
+such as a quantity band on its own or a sort by quantity, is a scan. The
+caller must ask for it with `scan=true` and page through it with `limit`.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal
+
+AdminOrderSort = Literal["-created_at", "created_at", "-quantity", "quantity"]
+
+ADMIN_SELECT_SQL = (
+    "SELECT o.id, o.user_id, n.name AS item_name, o.quantity, o.status, o.created_at "
+    "FROM orders o JOIN item_names n ON n.id = o.item_name_id"
+)
+# filter name -> predicate; every predicate takes exactly one parameter
+PREDICATES = {
+    "status": "o.status = %s",
+    "user_id": "o.user_id = %s",
+    "item_prefix": (
+        "o.item_name_id IN (SELECT id FROM item_names WHERE name LIKE %s ESCAPE '\\')"
+    ),
+    "created_after": "o.created_at >= %s",
+    "created_before": "o.created_at < %s",
+    "updated_after": "o.updated_at >= %s",
+    "updated_before": "o.updated_at < %s",
+    "min_quantity": "o.quantity >= %s",
+    "max_quantity": "o.quantity <= %s",
+}
+# sort -> (column, descending, keyset predicate, ORDER BY clause)
+SORTS: dict[str, tuple[str, bool, str, str]] = {
+    "-created_at": (
+        "created_at",
+        True,
+        "(o.created_at, o.id) < (%s::timestamptz, %s::uuid)",
+        "ORDER BY o.created_at DESC, o.id DESC",
+    ),
+    "created_at": (
+        "created_at",
+        False,
+        "(o.created_at, o.id) > (%s::timestamptz, %s::uuid)",
+        "ORDER BY o.created_at, o.id",
+    ),
+    "-quantity": (
+        "quantity",
+        True,
+        "(o.quantity, o.id) < (%s::int, %s::uuid)",
+        "ORDER BY o.quantity DESC, o.id DESC",
+    ),
+    "quantity": (
+        "quantity",
+        False,
+        "(o.quantity, o.id) > (%s::int, %s::uuid)",
+        "ORDER BY o.quantity, o.id",
+    ),
+}
+_DRIVERS = ("user_id", "item_prefix", "created_after", "created_before")
+_RESIDUALS = ("updated_after", "updated_before", "min_quantity", "max_quantity")
+
+
+class FilterError(ValueError):
+    """The requested filter/sort is invalid or needs an explicit scan."""
+
+
+@dataclass(slots=True)
+class AdminOrderFilter:
+    status: str | None = None
+    user_id: str | None = None
+    item_prefix: str | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+    updated_after: datetime | None = None
+    updated_before: datetime | None = None
+    min_quantity: int | None = None
+    max_quantity: int | None = None
+    sort: AdminOrderSort = "-created_at"
+
+
+@dataclass(slots=True)
+class AdminOrderQuery:
+    sql: str
+    params: tuple[Any, ...]
+    # keyset columns, for merging shards and building the next cursor
+    sort_keys: list[str]
+    reverse: bool
+    path: Literal["indexed", "scan"]
+    # the B-tree an indexed query walks; None for scans
+    index: str | None
+
+
+def like_prefix(prefix: str) -> str:
+    """LIKE pattern matching names that start with `prefix` literally."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _check_ranges(f: AdminOrderFilter) -> None:
+    for low, high in (
+        ("created_after", "created_before"),
+        ("updated_after", "updated_before"),
+        ("min_quantity", "max_quantity"),
+    ):
+        lo, hi = getattr(f, low), getattr(f, high)
+        if lo is not None and hi is not None and lo > hi:
+            raise FilterError(f"{low} must not be after {high}")
+
+
+def _driving_index(f: AdminOrderFilter) -> str:
+    if f.user_id is not None:
+        return "orders_user_id_created_at_idx"
+    if f.item_prefix is not None:
+        return "orders_item_name_id_created_at_idx"
+    return "orders_created_at_id_idx"
+
+
+def plan_admin_query(
+    f: AdminOrderFilter,
+    *,
+    limit: int | None = None,
+    after: tuple[Any, Any] | None = None,
+    scan: bool = False,
+) -> AdminOrderQuery:
+    """Compile a filter into one parameterized query, or raise FilterError.
+
+    `after` is the (sort value, id) keyset position of the previous page;
+    `limit` rows are requested plus one, so callers can tell if more follow.
+    """
+    _check_ranges(f)
+    if after is not None and limit is None:
+        raise FilterError("cursor requires limit")
+    column, descending, keyset, order_by = SORTS[f.sort]
+    bounded = any(getattr(f, name) is not None for name in _DRIVERS)
+    residual = any(getattr(f, name) is not None for name in _RESIDUALS)
+    indexed = column == "created_at" and (bounded or not residual)
+    if not indexed:
+        if not scan:
+            raise FilterError(
+                "this filter/sort has no supporting index: add user_id, item_prefix "
+                "or a created_after/created_before range, or pass scan=true with a limit"
+            )
+        if limit is None:
+            raise FilterError("scan=true requires limit")
+
+    where: list[str] = []
+    params: list[Any] = []
+    for name, predicate in PREDICATES.items():
+        value = getattr(f, name)
+        if value is None:
+            continue
+        where.append(predicate)
+        params.append(like_prefix(value) if name == "item_prefix" else value)
+    if after is not None:
+        where.append(keyset)
+        params.extend(after)
+    parts = [ADMIN_SELECT_SQL]
+    if where:
+        parts.append("WHERE " + " AND ".join(where))
+    parts.append(order_by)
+    if limit is not None:
+        parts.append("LIMIT %s")
+        params.append(limit + 1)
+    return AdminOrderQuery(
+        sql=" ".join(parts),
+        params=tuple(params),
+        sort_keys=[column, "id"],
+        reverse=descending,
+        path="indexed" if indexed else "scan",
+        index=_driving_index(f) if indexed else None,
+    )
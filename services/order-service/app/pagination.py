@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*parts: Any) -> str:
+    """Encode keyset pagination values into an opaque, URL-safe cursor.
+
+    Values are stringified so timestamps and UUIDs round-trip as text and
+    can be passed straight back to the database as query parameters.
+    """
+    raw = json.dumps([str(p) for p in parts], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _parse(kind: type, value: str) -> Any:
+    if kind is datetime:
+        return datetime.fromisoformat(value)
+    return kind(value)
+
+
+def decode_cursor(
+    cursor: str, arity: int, types: Sequence[type] | None = None
+) -> list[Any]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    With `types` each value is parsed back into its type (`datetime` from
+    ISO 8601, otherwise by calling the type), so a tampered cursor fails
+    here rather than in the database.
+
+    Raises HTTPException(400) when the cursor is malformed, does not carry
+    the expected number of keyset values or a value does not parse.
+    """
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        decoded: Any = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if not isinstance(decoded, list) or len(decoded) != arity:  # pyright: ignore[reportUnknownArgumentType]
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    values = [str(p) for p in decoded]  # pyright: ignore[reportUnknownVariableType]
+    if types is None:
+        return values
+    try:
+        return [_parse(kind, value) for kind, value in zip(types, values, strict=True)]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
@@ -0,0 +1,112 @@
+"""Per-workload connection quotas over each Postgres pool.
+
+Every request and background job runs as one of four workload classes:
+
+- `user_write`: order creation (including batcher flushes and spool replay),
+- `admin_write`: approve/reject, item admin and the rules engine,
+- `interactive_read`: the default; single orders and paginated listings,
+- `bulk_read`: streamed and scan listings, feeds, summaries and the
+  periodic snapshot/archive/rollup jobs.
+
+A `PartitionedPool` wraps one psycopg pool whose size is the sum of the
+per-class quotas (DB_POOL_CLASS_SIZES), and lets a class hold at most its
+own quota. A flood in one class therefore queues behind its own quota while
+every other class still finds its connections free. A checkout that waits
+longer than its class's DB_POOL_CLASS_TIMEOUTS raises `PoolTimeout` (an
+`OperationalError`: create_order falls back to the spool, and the app maps
+it to 503).
+
+The class is read from a context variable, so call sites keep passing plain
+pools around; routes declare theirs with `Depends(workload(...))`.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+from .metrics import DB_POOL_IN_USE, DB_POOL_TIMEOUTS, DB_POOL_WAIT_SECONDS
+from .settings import settings
+
+WORKLOADS = ("user_write", "admin_write", "interactive_read", "bulk_read")
+
+_workload: ContextVar[str] = ContextVar("db_workload", default="interactive_read")
+
+
+def set_workload(name: str) -> None:
+    """Run the rest of the current task (and tasks it spawns) as `name`."""
+    if name not in WORKLOADS:
+        raise ValueError(f"unknown workload class {name!r}")
+    _workload.set(name)
+
+
+def current_workload() -> str:
+    return _workload.get()
+
+
+def workload(name: str) -> Callable[[], Awaitable[None]]:
+    """FastAPI dependency putting a route in workload class `name`."""
+    if name not in WORKLOADS:
+        raise ValueError(f"unknown workload class {name!r}")
+
+    async def _use_workload() -> None:
+        _workload.set(name)
+
+    return _use_workload
+
+
+class PartitionedPool:
+    """A connection pool with a separate checkout quota per workload class."""
+
+    def __init__(
+        self,
+        pool: Any,
+        sizes: dict[str, int],
+        timeouts: dict[str, float],
+        label: str = "main",
+    ) -> None:
+        self.pool = pool
+        self.label = label
+        self.sizes = {name: max(1, int(sizes[name])) for name in WORKLOADS}
+        self.timeouts = {name: float(timeouts[name]) for name in WORKLOADS}
+        self._gates = {name: asyncio.Semaphore(n) for name, n in self.sizes.items()}
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[Any]:
+        name = _workload.get()
+        gate = self._gates[name]
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(gate.acquire(), self.timeouts[name])
+        except TimeoutError:
+            DB_POOL_TIMEOUTS.labels(self.label, name).inc()
+            raise PoolTimeout(
+                f"no {name} connection free within {self.timeouts[name]}s"
+            ) from None
+        DB_POOL_WAIT_SECONDS.labels(self.label, name).observe(
+            time.perf_counter() - started
+        )
+        in_use = DB_POOL_IN_USE.labels(self.label, name)
+        in_use.inc()
+        try:
+            async with self.pool.connection() as conn:
+                yield conn
+        finally:
+            in_use.dec()
+            gate.release()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+async def open_partitioned_pool(url: str, label: str = "main") -> PartitionedPool:
+    sizes = settings.DB_POOL_CLASS_SIZES
+    pool = AsyncConnectionPool(
+        url, min_size=1, max_size=sum(sizes[name] for name in WORKLOADS), open=False
+    )
+    await pool.open()
+    return PartitionedPool(pool, sizes, settings.DB_POOL_CLASS_TIMEOUTS, label)
@@ -0,0 +1,91 @@
+"""Slotted order records for list responses.
+
+Listing endpoints used to turn every row into a dict and then let FastAPI's
+`jsonable_encoder` walk each value again, so a large admin listing held
+three copies of every order at once. Rows now become `__slots__` dataclasses
+(no per-instance `__dict__`) as they leave the database, and orjson writes
+them straight to JSON bytes: it encodes dataclasses, UUIDs and datetimes
+natively, with the same output the dict path produced.
+
+One class per response shape keeps the JSON keys of each endpoint unchanged.
+
+`records_stream_response` writes the same array incrementally: each chunk of
+rows from a server-side cursor is encoded and sent before the next is read.
+"""
+
+from collections.abc import AsyncGenerator, AsyncIterator
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+import orjson
+from fastapi.responses import Response, StreamingResponse
+
+
+@dataclass(slots=True)
+class OrderSummary:
+    """A user's view of one order (`/orders/me`, `/orders/user/{id}`)."""
+
+    id: UUID | str
+    item_name: str
+    quantity: int
+    status: str
+    created_at: datetime | None
+
+
+@dataclass(slots=True)
+class AdminOrder:
+    """One row of the admin listing."""
+
+    id: UUID | str
+    user_id: UUID | str | None
+    item_name: str
+    quantity: int
+    status: str
+    created_at: datetime | None
+
+
+def record_keys(cls: type) -> list[str]:
+    """Column order a record class expects (matches its SELECT list)."""
+    return [f.name for f in fields(cls)]
+
+
+def records_from_rows(cls: type[Any], rows: list[Any]) -> list[Any]:
+    """Build records from DB rows: tuples in column order, or mappings."""
+    if rows and isinstance(rows[0], dict):
+        keys = record_keys(cls)
+        return [cls(*(r.get(k) for k in keys)) for r in rows]
+    return [cls(*r) for r in rows]
+
+
+def records_response(records: list[Any]) -> Response:
+    return Response(orjson.dumps(records), media_type="application/json")
+
+
+async def records_stream_response(
+    cls: type[Any], chunks: AsyncGenerator[list[Any]]
+) -> StreamingResponse:
+    """Stream `chunks` of DB rows as one JSON array of `cls` records.
+
+    The first chunk is read before the response starts, so a failing query
+    still surfaces as an error status rather than a truncated body.
+    """
+    first = await anext(chunks, None)
+
+    async def body() -> AsyncIterator[bytes]:
+        sep = b"["
+        rows = first
+        try:
+            while rows is not None:
+                if rows:
+                    # orjson encodes the chunk as "[a,b]"; splice its items in
+                    yield sep + orjson.dumps(records_from_rows(cls, rows))[1:-1]
+                    sep = b","
+                rows = await anext(chunks, None)
+        finally:
+            # a client that disconnects mid-stream must not pin the connection
+            await chunks.aclose()
+        yield b"[]" if sep == b"[" else b"]"
+
+    return StreamingResponse(body(), media_type="application/json")
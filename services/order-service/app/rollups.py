@@ -0,0 +1,164 @@
+"""Pre-aggregated, time-bucketed order metrics.
+
+`order_rollups` holds per-minute, per-hour and per-day counts (and summed
+quantity) of orders entering each status, by item: a status transition is
+counted in the bucket of its `order_events.occurred_at`, so "PENDING" rows
+are orders placed and "APPROVED"/"REJECTED" rows are decisions made in that
+bucket.
+
+A watermark job folds new events into the rollups in one statement per batch:
+select events past the `(occurred_at, id)` watermark, upsert their per-bucket
+aggregates and advance the watermark, atomically, so a crash never counts a
+batch twice. Like the changes feed it only reads events older than
+CHANGES_SETTLE_SECONDS, so transactions still committing are not skipped.
+
+Staleness: the rollups trail `order_events` by at most CHANGES_SETTLE_SECONDS
+plus ORDER_ROLLUP_INTERVAL_SECONDS while the job keeps up (each pass drains
+the whole backlog in ORDER_ROLLUP_BATCH_SIZE batches). The reporting endpoint
+returns the watermark so callers can see the actual lag.
+
+Existing history is loaded with `scripts/backfill_order_rollups.py`, which
+rebuilds whole days up to the watermark and is safe to re-run.
+"""
+
+import asyncio
+from typing import Any
+
+import structlog
+
+from .db import execute_fetchall, execute_fetchone
+from .scheduler import add_periodic_task, remove_periodic_task
+from .settings import settings
+from .sharding import all_order_pools
+
+logger = structlog.get_logger()
+
+WATERMARK_NAME = "order_events"
+
+# Params: watermark name, settle seconds, batch size, watermark name.
+# SKIP LOCKED: a second replica running the job concurrently sees no
+# watermark row and does nothing.
+ROLLUP_ADVANCE_SQL = """
+WITH wm AS (
+    SELECT last_occurred_at, last_event_id FROM order_rollup_watermark
+    WHERE name = %s FOR UPDATE SKIP LOCKED
+), batch AS (
+    SELECT e.id, e.occurred_at, e.to_status,
+           coalesce(n.name, '(archived)') AS item_name,
+           coalesce(o.quantity, 0) AS quantity
+    FROM wm, order_events e
+        LEFT JOIN orders o ON o.id = e.order_id
+        LEFT JOIN item_names n ON n.id = o.item_name_id
+    WHERE (e.occurred_at, e.id) > (
+        coalesce(wm.last_occurred_at, '-infinity'), coalesce(wm.last_event_id, 0)
+    )
+      AND e.occurred_at <= now() - make_interval(secs => %s)
+    ORDER BY e.occurred_at, e.id LIMIT %s
+), rolled AS (
+    INSERT INTO order_rollups AS r
+        (granularity, bucket_start, status, item_name, orders, quantity)
+    SELECT g.granularity, date_trunc(g.granularity, b.occurred_at, 'UTC'),
+           b.to_status, b.item_name, count(*), sum(b.quantity)
+    FROM batch b CROSS JOIN (VALUES ('minute'), ('hour'), ('day')) AS g(granularity)
+    GROUP BY 1, 2, 3, 4
+    ON CONFLICT (granularity, bucket_start, status, item_name) DO UPDATE
+    SET orders = r.orders + excluded.orders, quantity = r.quantity + excluded.quantity
+), last AS (
+    SELECT occurred_at, id FROM batch ORDER BY occurred_at DESC, id DESC LIMIT 1
+), advanced AS (
+    UPDATE order_rollup_watermark w
+    SET last_occurred_at = last.occurred_at, last_event_id = last.id, updated_at = now()
+    FROM last WHERE w.name = %s
+)
+SELECT count(*) AS events FROM batch
+"""
+
+ROLLUP_WATERMARK_SQL = (
+    "SELECT last_occurred_at FROM order_rollup_watermark WHERE name = %s"
+)
+
+ROLLUP_KEYS = ["bucket_start", "status", "item_name", "orders", "quantity"]
+# Params: granularity, since, until, status (or NULL), item_name (or NULL), limit.
+ROLLUP_REPORT_SQL = (
+    "SELECT bucket_start, status, item_name, orders, quantity FROM order_rollups "
+    "WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s "
+    "AND (%s::text IS NULL OR status = %s) "
+    "AND (%s::text IS NULL OR item_name = %s) "
+    "ORDER BY bucket_start, status, item_name LIMIT %s"
+)
+# Same, summed over items.
+ROLLUP_REPORT_BY_STATUS_SQL = (
+    "SELECT bucket_start, status, NULL AS item_name, sum(orders)::bigint AS orders, "
+    "sum(quantity)::bigint AS quantity FROM order_rollups "
+    "WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s "
+    "AND (%s::text IS NULL OR status = %s) "
+    "AND (%s::text IS NULL OR item_name = %s) "
+    "GROUP BY bucket_start, status ORDER BY bucket_start, status LIMIT %s"
+)
+
+
+async def advance_rollups(pool: Any) -> int:
+    """Fold one batch of new events into the rollups; returns events folded."""
+    row = await execute_fetchone(
+        pool,
+        ROLLUP_ADVANCE_SQL,
+        (
+            WATERMARK_NAME,
+            settings.CHANGES_SETTLE_SECONDS,
+            settings.ORDER_ROLLUP_BATCH_SIZE,
+            WATERMARK_NAME,
+        ),
+    )
+    if row is None:
+        return 0
+    return int(row["events"] if isinstance(row, dict) else row[0])
+
+
+async def run_rollup_pass() -> int:
+    """Drain every database's event backlog into its rollups."""
+    total = 0
+    for pool in all_order_pools():
+        while True:
+            n = await advance_rollups(pool)
+            total += n
+            if n < settings.ORDER_ROLLUP_BATCH_SIZE:
+                break
+    return total
+
+
+async def read_watermarks(pools: list[Any]) -> list[Any]:
+    """The rollup watermark of every database (None until first advanced)."""
+    found = await asyncio.gather(
+        *(
+            execute_fetchall(pool, ROLLUP_WATERMARK_SQL, (WATERMARK_NAME,))
+            for pool in pools
+        )
+    )
+    out: list[Any] = []
+    for rows in found:
+        if not rows:
+            out.append(None)
+            continue
+        r = rows[0]
+        out.append(r["last_occurred_at"] if isinstance(r, dict) else r[0])
+    return out
+
+
+async def _rollups_pass() -> None:
+    n = await run_rollup_pass()
+    if n:
+        logger.info("order-rollups.pass", events=n)
+
+
+async def start_order_rollups() -> None:
+    """Fold events on the scheduler's leader every ORDER_ROLLUP_INTERVAL_SECONDS."""
+    if settings.ORDER_ROLLUP_ENABLED:
+        add_periodic_task(
+            "order-rollups",
+            f"@every {settings.ORDER_ROLLUP_INTERVAL_SECONDS}",
+            _rollups_pass,
+        )
+
+
+async def stop_order_rollups() -> None:
+    remove_periodic_task("order-rollups")
@@ -0,0 +1,390 @@
+"""Vectorised auto-approval rules for the PENDING queue.
+
+Instead of an admin approving every small order by hand, a periodic pass (on
+the scheduler's leader) walks the PENDING queue in id (UUIDv7, i.e. arrival)
+order, ORDER_RULES_BATCH_SIZE rows at a time. Each batch is turned into NumPy columns once and every rule
+predicate (quantity bounds, item allow/deny lists, per-user velocity, notes
+keywords) is a whole-column comparison, so the cost per batch is a handful
+of array operations rather than a Python loop over orders and rules.
+
+Rules are tried in order; the first one that matches decides the order.
+Matched orders are approved/rejected in one set-based statement that only
+touches rows still PENDING (an admin may have got there first), writes their
+events with `rule:<name>` as the actor, and releases stock for rejections
+exactly like REJECT_ORDER_SQL.
+
+ORDER_RULES_MODE=dry-run evaluates and logs the report without changing
+anything; `POST /orders/admin/rules/dry-run` returns the same report on demand.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import structlog
+
+from .db import execute_fetchall, get_db_pool
+from .metrics import ORDER_RULES_BATCH_SECONDS, ORDER_RULES_DECISIONS
+from .models import OrderRule
+from .pools import set_workload
+from .scheduler import add_periodic_task, remove_periodic_task
+from .settings import settings
+from .sharding import BUCKET_SQL, get_shard_router
+
+logger = structlog.get_logger()
+
+PENDING_KEYS = ["id", "user_id", "item_name", "quantity", "notes"]
+
+# Keyset walk over the PENDING queue, served by the partial index
+# orders_pending_id_idx: each batch reads only PENDING entries, however many
+# decided orders sit in front of them.
+PENDING_BATCH_SQL = (
+    "SELECT o.id, o.user_id, n.name AS item_name, o.quantity, o.notes "
+    "FROM orders o JOIN item_names n ON n.id = o.item_name_id "
+    "WHERE o.status = 'PENDING' AND o.id > %s ORDER BY o.id LIMIT %s"
+)
+# Sharded variant: only decide orders in buckets this shard owns, so a
+# bucket mid-move is decided once, on its source shard.
+OWNED_PENDING_BATCH_SQL = (
+    "SELECT o.id, o.user_id, n.name AS item_name, o.quantity, o.notes "  # noqa: S608 - BUCKET_SQL is a constant
+    "FROM orders o JOIN item_names n ON n.id = o.item_name_id "
+    "WHERE o.status = 'PENDING' AND o.id > %s "
+    f"AND {BUCKET_SQL} = ANY(%s) "
+    "ORDER BY o.id LIMIT %s"
+)
+
+# Orders per user in the velocity window; served by
+# orders_user_id_created_at_idx.
+USER_VELOCITY_SQL = (
+    "SELECT user_id, count(*) FROM orders "
+    "WHERE user_id = ANY(%s::uuid[]) AND created_at > now() - make_interval(secs => %s) "
+    "GROUP BY user_id"
+)
+
+# Params: ids[], statuses[], actors[].
+AUTO_DECIDE_SQL = """
+WITH decided AS (
+    SELECT * FROM unnest(%s::uuid[], %s::text[], %s::text[]) AS d(id, status, actor)
+), updated AS (
+    UPDATE orders o
+    SET status = d.status::order_status, admin_action_at = now(), updated_at = now()
+    FROM decided d WHERE o.id = d.id AND o.status = 'PENDING'
+    RETURNING o.id, o.status, d.actor
+), event AS (
+    INSERT INTO order_events (order_id, actor, from_status, to_status)
+    SELECT id, actor, 'PENDING', status FROM updated
+), released AS (
+    UPDATE inventory_reservations r SET status = 'RELEASED', released_at = now()
+    FROM updated
+    WHERE r.order_id = updated.id AND updated.status = 'REJECTED' AND r.status = 'RESERVED'
+    RETURNING r.item_id, r.slot, r.quantity
+), restocked AS (
+    UPDATE inventory_slots s SET available = s.available + released.quantity
+    FROM released WHERE s.item_id = released.item_id AND s.slot = released.slot
+)
+SELECT id, status, actor FROM updated
+"""
+
+_STATUS = {"APPROVE": "APPROVED", "REJECT": "REJECTED"}
+_FIRST_ID = "00000000-0000-0000-0000-000000000000"
+_SAMPLE_SIZE = 20
+
+
+@dataclass
+class PendingBatch:
+    """A batch of PENDING orders as NumPy columns."""
+
+    ids: np.ndarray
+    user_ids: np.ndarray
+    item_names: np.ndarray
+    quantities: np.ndarray
+    notes: np.ndarray  # lower-cased, "" for no notes
+    velocity: np.ndarray  # orders by the same user in the velocity window
+
+    @classmethod
+    def from_rows(cls, rows: list[Any]) -> "PendingBatch":
+        cols = [
+            [r[k] for k in PENDING_KEYS] if isinstance(r, dict) else list(r)
+            for r in rows
+        ]
+        ids, users, items, qty, notes = zip(*cols) if cols else ([],) * 5
+        return cls(
+            ids=np.array([str(i) for i in ids], dtype=np.str_),
+            user_ids=np.array([str(u) for u in users], dtype=np.str_),
+            item_names=np.array(items, dtype=np.str_),
+            quantities=np.array(qty, dtype=np.int64),
+            notes=np.strings.lower(np.array([n or "" for n in notes], dtype=np.str_)),
+            velocity=np.zeros(len(cols), dtype=np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(self, mask: np.ndarray) -> "PendingBatch":
+        return PendingBatch(
+            ids=self.ids[mask],
+            user_ids=self.user_ids[mask],
+            item_names=self.item_names[mask],
+            quantities=self.quantities[mask],
+            notes=self.notes[mask],
+            velocity=self.velocity[mask],
+        )
+
+
+def load_rules(path: str) -> list[OrderRule]:
+    """Read the JSON rules file; a missing file means no rules."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            raw = json.load(fh)
+    except FileNotFoundError:
+        return []
+    return [OrderRule.model_validate(r) for r in raw]
+
+
+def uses_velocity(rules: list[OrderRule]) -> bool:
+    return any(
+        r.min_user_orders is not None or r.max_user_orders is not None for r in rules
+    )
+
+
+def _contains_any(notes: np.ndarray, keywords: list[str]) -> np.ndarray:
+    found = np.zeros(len(notes), dtype=bool)
+    for kw in keywords:
+        found |= np.strings.find(notes, kw.lower()) >= 0
+    return found
+
+
+def rule_mask(rule: OrderRule, batch: PendingBatch) -> np.ndarray:
+    """Boolean column: which orders of the batch satisfy every predicate."""
+    mask = np.ones(len(batch), dtype=bool)
+    if rule.min_quantity is not None:
+        mask &= batch.quantities >= rule.min_quantity
+    if rule.max_quantity is not None:
+        mask &= batch.quantities <= rule.max_quantity
+    if rule.items is not None:
+        mask &= np.isin(batch.item_names, rule.items)
+    if rule.exclude_items:
+        mask &= ~np.isin(batch.item_names, rule.exclude_items)
+    if rule.min_user_orders is not None:
+        mask &= batch.velocity >= rule.min_user_orders
+    if rule.max_user_orders is not None:
+        mask &= batch.velocity <= rule.max_user_orders
+    if rule.notes_any:
+        mask &= _contains_any(batch.notes, rule.notes_any)
+    if rule.notes_none:
+        mask &= ~_contains_any(batch.notes, rule.notes_none)
+    return mask
+
+
+def evaluate(rules: list[OrderRule], batch: PendingBatch) -> np.ndarray:
+    """Index of the first matching rule for each order, -1 when none does."""
+    matched = np.full(len(batch), -1, dtype=np.int32)
+    for i, rule in enumerate(rules):
+        undecided = matched < 0
+        if not undecided.any():
+            break
+        matched[undecided & rule_mask(rule, batch)] = i
+    return matched
+
+
+class RulesReport:
+    """Per-rule match counts (and a few sample ids) accumulated over batches."""
+
+    def __init__(self, rules: list[OrderRule], dry_run: bool) -> None:
+        self.rules = rules
+        self.dry_run = dry_run
+        self.evaluated = 0
+        self.matched = [0] * len(rules)
+        self.decided = {"APPROVED": 0, "REJECTED": 0}
+        self.samples: list[list[str]] = [[] for _ in rules]
+
+    def add(self, batch: PendingBatch, matched: np.ndarray) -> None:
+        self.evaluated += len(batch)
+        counts = np.bincount(matched[matched >= 0], minlength=len(self.rules))
+        for i, n in enumerate(counts.tolist()):
+            self.matched[i] += n
+            room = _SAMPLE_SIZE - len(self.samples[i])
+            if n and room > 0:
+                self.samples[i].extend(batch.ids[matched == i][:room].tolist())
+
+    def as_dict(self) -> dict[str, Any]:
+        decided = dict(self.decided)
+        if self.dry_run:
+            for rule, n in zip(self.rules, self.matched):
+                decided[_STATUS[rule.action]] += n
+        return {
+            "dry_run": self.dry_run,
+            "evaluated": self.evaluated,
+            "approved": decided["APPROVED"],
+            "rejected": decided["REJECTED"],
+            "undecided": self.evaluated - sum(self.matched),
+            "rules": [
+                {
+                    "name": rule.name,
+                    "action": rule.action,
+                    "matched": n,
+                    "sample": sample,
+                }
+                for rule, n, sample in zip(self.rules, self.matched, self.samples)
+            ],
+        }
+
+
+async def fetch_pending_batch(
+    pool: Any,
+    after_id: str,
+    limit: int,
+    owned_buckets: list[int] | None,
+    with_velocity: bool,
+) -> tuple[PendingBatch, str | None]:
+    """Next batch of PENDING orders after `after_id`, and the id to resume at."""
+    if owned_buckets is None:
+        rows = await execute_fetchall(pool, PENDING_BATCH_SQL, (after_id, limit))
+    else:
+        rows = await execute_fetchall(
+            pool, OWNED_PENDING_BATCH_SQL, (after_id, owned_buckets, limit)
+        )
+    batch = PendingBatch.from_rows(rows)
+    next_id = str(batch.ids[-1]) if len(rows) >= limit else None
+    shards = get_shard_router()
+    users, inverse = np.unique(batch.user_ids, return_inverse=True)
+    if shards is not None and shards.frozen:
+        # users whose bucket is moving between shards are left for later
+        movable = np.array([not shards.is_frozen(u) for u in users], dtype=bool)
+        keep = movable[inverse]
+        batch, inverse = batch.select(keep), inverse[keep]
+    if with_velocity and len(batch):
+        counts = await execute_fetchall(
+            pool,
+            USER_VELOCITY_SQL,
+            (users.tolist(), settings.ORDER_RULES_VELOCITY_WINDOW_SECONDS),
+        )
+        by_user = {
+            str(u): int(n)
+            for u, n in (
+                (r["user_id"], r["count"]) if isinstance(r, dict) else r for r in counts
+            )
+        }
+        per_user = np.array([by_user.get(u, 0) for u in users], dtype=np.int64)
+        batch.velocity = per_user[inverse]
+    return batch, next_id
+
+
+async def apply_decisions(
+    pool: Any,
+    rules: list[OrderRule],
+    batch: PendingBatch,
+    matched: np.ndarray,
+) -> list[Any]:
+    """Approve/reject every matched order in one statement."""
+    hit = matched >= 0
+    if not hit.any():
+        return []
+    statuses = np.array([_STATUS[r.action] for r in rules], dtype=np.str_)
+    actors = np.array([f"rule:{r.name}" for r in rules], dtype=np.str_)
+    which = matched[hit]
+    rows = await execute_fetchall(
+        pool,
+        AUTO_DECIDE_SQL,
+        (
+            batch.ids[hit].tolist(),
+            statuses[which].tolist(),
+            actors[which].tolist(),
+        ),
+    )
+    for r in rows:
+        status, actor = (r["status"], r["actor"]) if isinstance(r, dict) else r[1:]
+        ORDER_RULES_DECISIONS.labels(rule=actor[len("rule:") :], action=status).inc()
+    return rows
+
+
+def rule_targets(default_pool: Any) -> list[tuple[Any, list[int] | None]]:
+    """(pool, owned buckets) for every database holding orders."""
+    shards = get_shard_router()
+    if shards is not None:
+        return [
+            (pool, shards.owned_buckets(shard))
+            for shard, pool in enumerate(shards.pools)
+        ]
+    return [(default_pool, None)] if default_pool is not None else []
+
+
+async def run_rules_pass(
+    rules: list[OrderRule],
+    targets: list[tuple[Any, list[int] | None]],
+    dry_run: bool,
+    limit: int | None = None,
+) -> dict[str, Any]:
+    """Evaluate the rules over the PENDING queue of every target database.
+
+    With `dry_run` nothing is written; `limit` caps how many orders are
+    evaluated per database.
+    """
+    report = RulesReport(rules, dry_run)
+    if not rules:
+        return report.as_dict()
+    with_velocity = uses_velocity(rules)
+    batch_size = settings.ORDER_RULES_BATCH_SIZE
+    for pool, owned in targets:
+        after_id: str | None = _FIRST_ID
+        remaining = limit
+        while after_id is not None:
+            size = batch_size if remaining is None else min(batch_size, remaining)
+            if size <= 0:
+                break
+            batch, after_id = await fetch_pending_batch(
+                pool, after_id, size, owned, with_velocity
+            )
+            if remaining is not None:
+                remaining -= size
+            started = time.perf_counter()
+            matched = evaluate(rules, batch)
+            ORDER_RULES_BATCH_SECONDS.observe(time.perf_counter() - started)
+            report.add(batch, matched)
+            if not dry_run:
+                for r in await apply_decisions(pool, rules, batch, matched):
+                    status = r["status"] if isinstance(r, dict) else r[1]
+                    report.decided[status] += 1
+    return report.as_dict()
+
+
+_rules: list[OrderRule] = []
+
+
+async def _rules_pass() -> None:
+    set_workload("admin_write")
+    dry_run = settings.ORDER_RULES_MODE != "enforce"
+    report = await run_rules_pass(_rules, rule_targets(get_db_pool()), dry_run)
+    if report["evaluated"]:
+        logger.info(
+            "order-rules.pass",
+            **{k: v for k, v in report.items() if k != "rules"},
+            matched={r["name"]: r["matched"] for r in report["rules"]},
+        )
+
+
+async def start_order_rules() -> None:
+    """Load ORDER_RULES_FILE; schedule rules passes unless ORDER_RULES_MODE=off.
+
+    Rules are loaded even when off so the dry-run endpoint can use them.
+    Passes run on the scheduler's leader only (app/scheduler.py), so two
+    replicas never decide the same orders.
+    """
+    global _rules
+    _rules = load_rules(settings.ORDER_RULES_FILE)
+    if settings.ORDER_RULES_MODE in ("dry-run", "enforce"):
+        add_periodic_task(
+            "order-rules",
+            f"@every {settings.ORDER_RULES_INTERVAL_SECONDS}",
+            _rules_pass,
+        )
+
+
+def get_order_rules() -> list[OrderRule]:
+    return _rules
+
+
+async def stop_order_rules() -> None:
+    remove_periodic_task("order-rules")
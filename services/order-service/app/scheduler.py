@@ -0,0 +1,339 @@
+"""Leader-elected periodic maintenance tasks.
+
+Maintenance (archive passes, rollup catch-up, job cleanup) must run on one
+replica at a time. Every replica runs a `Scheduler`, but only the leader
+runs tasks:
+
+- Election: each scheduler keeps one dedicated connection (outside the
+  pools) to the main database (shard 0 when sharded) and polls
+  `pg_try_advisory_lock` on SCHEDULER_LOCK_NAME. Postgres holds the lock
+  for that connection's session, so if the leader dies or loses its
+  connection, the lock is freed and the next replica to poll takes over.
+  The leader checks its connection every poll. If the check fails it steps
+  down and cancels its running tasks.
+- Schedules: five-field cron (`*/15 * * * *`, UTC) or `@every <seconds>`.
+  Interval tasks run as soon as a replica becomes leader.
+- Jitter: each run starts up to `jitter` seconds after its slot, so tasks
+  sharing a slot do not hit the database together.
+- Overlap: a task whose previous run is still going skips the slot.
+- Metrics: `scheduled_task_seconds` and `scheduled_task_runs` (by task and
+  outcome) and `scheduler_leader`.
+
+Tasks are registered with `add_periodic_task()` by the module that owns
+the work, before or after the scheduler starts.
+"""
+
+import asyncio
+import os
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import psycopg
+import structlog
+
+from .metrics import SCHEDULED_TASK_RUNS, SCHEDULED_TASK_SECONDS, SCHEDULER_LEADER
+from .pools import set_workload
+from .settings import settings
+
+logger = structlog.get_logger()
+
+TRY_LEADER_LOCK_SQL = "SELECT pg_try_advisory_lock(hashtext(%s))"
+LEADER_ALIVE_SQL = "SELECT 1"
+
+# day-of-week accepts 0-7; 7 is folded into 0 (Sunday)
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+_CRON_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+
+
+def _cron_field(text: str, low: int, high: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in text.split(","):
+        spec, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if spec == "*":
+            start, stop = low, high
+        elif "-" in spec:
+            a, b = spec.split("-", 1)
+            start, stop = int(a), int(b)
+        else:
+            start = int(spec)
+            stop = high if step_text else start
+        if step < 1 or start < low or stop > high or start > stop:
+            raise ValueError(f"cron field {text!r} out of range {low}-{high}")
+        values.update(range(start, stop + 1, step))
+    return frozenset(values)
+
+
+@dataclass(frozen=True, slots=True)
+class CronSchedule:
+    minutes: frozenset[int]
+    hours: frozenset[int]
+    days: frozenset[int]
+    months: frozenset[int]
+    weekdays: frozenset[int]
+    # cron matches day-of-month OR day-of-week when both are restricted
+    any_day: bool
+
+    def first_due(self, now: datetime) -> datetime:
+        return self.next_after(now)
+
+    def next_after(self, when: datetime) -> datetime:
+        t = when.astimezone(UTC).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError("cron schedule never fires")
+
+    def _day_matches(self, t: datetime) -> bool:
+        dom = t.day in self.days
+        dow = (t.isoweekday() % 7) in self.weekdays
+        return (dom or dow) if self.any_day else (dom and dow)
+
+
+@dataclass(frozen=True, slots=True)
+class IntervalSchedule:
+    seconds: float
+
+    def first_due(self, now: datetime) -> datetime:
+        return now
+
+    def next_after(self, when: datetime) -> datetime:
+        return when + timedelta(seconds=self.seconds)
+
+
+Schedule = CronSchedule | IntervalSchedule
+
+
+def parse_schedule(text: str) -> Schedule:
+    """Parse a five-field cron line, a cron alias or `@every <seconds>`."""
+    text = _CRON_ALIASES.get(text.strip(), text.strip())
+    if text.startswith("@every"):
+        seconds = float(text.removeprefix("@every").strip().removesuffix("s"))
+        if seconds <= 0:
+            raise ValueError(f"bad interval {text!r}")
+        return IntervalSchedule(seconds)
+    fields = text.split()
+    if len(fields) != 5:
+        raise ValueError(f"cron schedule needs 5 fields: {text!r}")
+    parsed = [
+        _cron_field(f, low, high)
+        for f, (low, high) in zip(fields, _CRON_FIELDS, strict=True)
+    ]
+    weekdays = frozenset(d % 7 for d in parsed[4])
+    return CronSchedule(
+        *parsed[:4], weekdays, any_day=fields[2] != "*" and fields[4] != "*"
+    )
+
+
+@dataclass(slots=True)
+class PeriodicTask:
+    name: str
+    schedule: Schedule
+    run: Callable[[], Awaitable[Any]]
+    jitter: float = 0.0
+    due: datetime | None = None
+    # start time of the pending run once its jitter is drawn
+    start_at: datetime | None = None
+    running: asyncio.Task[None] | None = field(default=None, repr=False)
+
+
+PERIODIC_TASKS: dict[str, PeriodicTask] = {}
+
+
+def add_periodic_task(
+    name: str, schedule: str, run: Callable[[], Awaitable[Any]], jitter: float = 0.0
+) -> None:
+    PERIODIC_TASKS[name] = PeriodicTask(name, parse_schedule(schedule), run, jitter)
+
+
+def remove_periodic_task(name: str) -> None:
+    task = PERIODIC_TASKS.pop(name, None)
+    if task is not None and task.running is not None:
+        task.running.cancel()
+
+
+class Scheduler:
+    """Runs `PERIODIC_TASKS` while this replica holds the leader lock."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[Any]],
+        lock_name: str,
+        tasks: dict[str, PeriodicTask] | None = None,
+    ) -> None:
+        self._connect = connect
+        self.lock_name = lock_name
+        self.tasks = PERIODIC_TASKS if tasks is None else tasks
+        self.leader = False
+        self._conn: Any = None
+        self._loop: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._loop is None:
+            self._loop = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.cancel()
+            try:
+                await self._loop
+            except asyncio.CancelledError:
+                pass
+            self._loop = None
+        await self._step_down()
+
+    async def _run_forever(self) -> None:
+        set_workload("bulk_read")
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("scheduler.tick-failed", exc_info=True)
+            await asyncio.sleep(settings.SCHEDULER_POLL_SECONDS)
+
+    async def tick(self, now: datetime | None = None) -> None:
+        """One poll: keep or seek leadership, then start the due tasks."""
+        if not await self._hold_lock():
+            return
+        now = now or datetime.now(UTC)
+        for task in list(self.tasks.values()):
+            self._maybe_start(task, now)
+
+    async def _hold_lock(self) -> bool:
+        try:
+            if self._conn is None:
+                self._conn = await self._connect()
+            if self.leader:
+                await self._query(LEADER_ALIVE_SQL, ())
+                return True
+            row = await self._query(TRY_LEADER_LOCK_SQL, (self.lock_name,))
+        except (psycopg.Error, OSError):
+            logger.warning("scheduler.connection-lost", leader=self.leader)
+            await self._step_down()
+            return False
+        if row and row[0]:
+            self.leader = True
+            SCHEDULER_LEADER.set(1)
+            logger.info("scheduler.elected", lock=self.lock_name)
+        return self.leader
+
+    async def _query(self, sql: str, params: tuple[Any, ...]) -> Any:
+        cur = await self._conn.execute(sql, params)
+        return await cur.fetchone()
+
+    async def _step_down(self) -> None:
+        was_leader, self.leader = self.leader, False
+        SCHEDULER_LEADER.set(0)
+        running = [t.running for t in self.tasks.values() if t.running is not None]
+        for task in self.tasks.values():
+            task.due = task.start_at = task.running = None
+        for job in running:
+            job.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            # closing the session releases the advisory lock
+            try:
+                await conn.close()
+            except Exception:
+                logger.warning("scheduler.close-failed", exc_info=True)
+        if was_leader:
+            logger.info("scheduler.stepped-down", lock=self.lock_name)
+
+    def _maybe_start(self, task: PeriodicTask, now: datetime) -> None:
+        if task.due is None:
+            task.due = task.schedule.first_due(now)
+        if task.start_at is None:
+            task.start_at = task.due + timedelta(
+                seconds=random.uniform(0, task.jitter)  # noqa: S311
+            )
+        if now < task.start_at:
+            return
+        due = task.due
+        task.due = task.schedule.next_after(due)
+        if task.due <= now:
+            # missed slots (leader change, long pause) collapse into one run
+            task.due = task.schedule.next_after(now)
+        task.start_at = None
+        if task.running is not None and not task.running.done():
+            SCHEDULED_TASK_RUNS.labels(task.name, "overlap").inc()
+            logger.info("scheduler.task-overlap", task=task.name, slot=due.isoformat())
+            return
+        task.running = asyncio.create_task(self._run(task))
+
+    async def _run(self, task: PeriodicTask) -> None:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            await task.run()
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            outcome = "failed"
+            logger.warning("scheduler.task-failed", task=task.name, exc_info=True)
+        finally:
+            elapsed = time.perf_counter() - started
+            SCHEDULED_TASK_SECONDS.labels(task.name).observe(elapsed)
+            SCHEDULED_TASK_RUNS.labels(task.name, outcome).inc()
+            logger.info(
+                "scheduler.task-finished",
+                task=task.name,
+                outcome=outcome,
+                duration_ms=round(elapsed * 1000, 1),
+            )
+
+
+def _leader_dsn() -> str | None:
+    if settings.DATABASE_SHARD_URLS:
+        return settings.DATABASE_SHARD_URLS[0]
+    return os.getenv("DATABASE_URL")
+
+
+_scheduler: Scheduler | None = None
+
+
+async def start_scheduler() -> None:
+    global _scheduler
+    dsn = _leader_dsn()
+    if not settings.SCHEDULER_ENABLED or _scheduler is not None or not dsn:
+        return
+
+    async def connect() -> Any:
+        return await psycopg.AsyncConnection.connect(dsn, autocommit=True)
+
+    _scheduler = Scheduler(connect, settings.SCHEDULER_LOCK_NAME)
+    _scheduler.start()
+
+
+def get_scheduler() -> Scheduler | None:
+    return _scheduler
+
+
+async def stop_scheduler() -> None:
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,173 @@
+import os
+from dataclasses import dataclass, field
+
+
+def _env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_map(name: str, default: str, cast: type) -> dict:
+    """Parse `key=value,...`; keys missing from the env keep their default."""
+    out = {}
+    for raw in (default, os.getenv(name, "")):
+        for pair in raw.split(","):
+            key, sep, value = pair.partition("=")
+            if sep:
+                out[key.strip()] = cast(value.strip())
+    return out
+
+
+@dataclass
+class Settings:
+    # Longest a `/orders/changes` long-poll may hold the request open (seconds)
+    CHANGES_MAX_WAIT_SECONDS: float = float(os.getenv("CHANGES_MAX_WAIT_SECONDS", "30"))
+    # How often a waiting long-poll re-checks for new changes (seconds)
+    CHANGES_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("CHANGES_POLL_INTERVAL_SECONDS", "0.5")
+    )
+    # Rows updated more recently than this are withheld from the feed so a
+    # transaction that started earlier but commits later is not skipped past
+    # by the `(updated_at, id)` cursor. Must exceed the longest write txn.
+    CHANGES_SETTLE_SECONDS: float = float(os.getenv("CHANGES_SETTLE_SECONDS", "1.0"))
+    # Group-commit batching for create_order (off by default). Concurrent
+    # inserts arriving within the linger window share one INSERT/commit.
+    ORDER_BATCH_ENABLED: bool = _env_flag("ORDER_BATCH_ENABLED")
+    ORDER_BATCH_MAX_SIZE: int = int(os.getenv("ORDER_BATCH_MAX_SIZE", "64"))
+    ORDER_BATCH_LINGER_MS: float = float(os.getenv("ORDER_BATCH_LINGER_MS", "5"))
+    # Batches flushed concurrently; keep below the pool size so reads and
+    # admin writes always have a connection available.
+    ORDER_BATCH_MAX_INFLIGHT: int = int(os.getenv("ORDER_BATCH_MAX_INFLIGHT", "2"))
+    # Local write-ahead spool for create_order: "off", "fallback" (spool only
+    # when Postgres is unreachable) or "always" (spool every order, drain async).
+    ORDER_SPOOL_MODE: str = os.getenv("ORDER_SPOOL_MODE", "off").strip().lower()
+    # Must be on a persistent volume; the spool is only as durable as this disk.
+    ORDER_SPOOL_DIR: str = os.getenv("ORDER_SPOOL_DIR", "/var/lib/order-service/spool")
+    ORDER_SPOOL_DRAIN_INTERVAL_SECONDS: float = float(
+        os.getenv("ORDER_SPOOL_DRAIN_INTERVAL_SECONDS", "1.0")
+    )
+    ORDER_SPOOL_DRAIN_BATCH_SIZE: int = int(
+        os.getenv("ORDER_SPOOL_DRAIN_BATCH_SIZE", "200")
+    )
+    # Connection quota and checkout queue timeout (seconds) per workload
+    # class (see app/pools.py). Each pool's size is the sum of the quotas.
+    DB_POOL_CLASS_SIZES: dict[str, int] = field(
+        default_factory=lambda: _env_map(
+            "DB_POOL_CLASS_SIZES",
+            "user_write=3,admin_write=2,interactive_read=3,bulk_read=3",
+            int,
+        )
+    )
+    DB_POOL_CLASS_TIMEOUTS: dict[str, float] = field(
+        default_factory=lambda: _env_map(
+            "DB_POOL_CLASS_TIMEOUTS",
+            "user_write=5,admin_write=5,interactive_read=2,bulk_read=30",
+            float,
+        )
+    )
+    # Durable background jobs (app/worker.py, `POST /jobs`). Every replica
+    # with the worker enabled claims queued jobs; JOBS_CONCURRENCY caps how
+    # many jobs of a kind run at once across all replicas (`kind=n,...`).
+    JOBS_WORKER_ENABLED: bool = _env_flag("JOBS_WORKER_ENABLED", "true")
+    JOBS_POLL_SECONDS: float = float(os.getenv("JOBS_POLL_SECONDS", "2"))
+    # A running job's claim expires unless renewed within this long; another
+    # replica then takes it over (a crashed worker's jobs are not lost).
+    JOBS_LEASE_SECONDS: float = float(os.getenv("JOBS_LEASE_SECONDS", "60"))
+    # Retry delay is BASE * 2^(attempt - 1), capped at MAX, with jitter.
+    JOBS_RETRY_BASE_SECONDS: float = float(os.getenv("JOBS_RETRY_BASE_SECONDS", "5"))
+    JOBS_RETRY_MAX_SECONDS: float = float(os.getenv("JOBS_RETRY_MAX_SECONDS", "600"))
+    JOBS_CONCURRENCY: dict[str, int] = field(
+        default_factory=lambda: _env_map("JOBS_CONCURRENCY", "", int)
+    )
+    # Finished jobs older than this are deleted on JOBS_PURGE_SCHEDULE.
+    JOBS_RETENTION_DAYS: int = int(os.getenv("JOBS_RETENTION_DAYS", "7"))
+    JOBS_PURGE_SCHEDULE: str = os.getenv("JOBS_PURGE_SCHEDULE", "30 3 * * *")
+    # Leader-elected maintenance scheduler (app/scheduler.py). Replicas with
+    # it disabled never run archive, rollup or purge passes.
+    SCHEDULER_ENABLED: bool = _env_flag("SCHEDULER_ENABLED", "true")
+    # How often the leader checks its lock and followers try to take it over
+    SCHEDULER_POLL_SECONDS: float = float(os.getenv("SCHEDULER_POLL_SECONDS", "5"))
+    SCHEDULER_LOCK_NAME: str = os.getenv(
+        "SCHEDULER_LOCK_NAME", "order-service:maintenance"
+    )
+    # Comma-separated shard DSNs (shard 0 first; it also holds the bucket
+    # map). Empty means unsharded: everything uses DATABASE_URL.
+    DATABASE_SHARD_URLS: list[str] = field(
+        default_factory=lambda: [
+            u.strip()
+            for u in os.getenv("DATABASE_SHARD_URLS", "").split(",")
+            if u.strip()
+        ]
+    )
+    # How often routers reload `order_shard_map`; the reshard tool waits
+    # longer than this between freeze, flip and delete.
+    ORDER_SHARD_MAP_REFRESH_SECONDS: float = float(
+        os.getenv("ORDER_SHARD_MAP_REFRESH_SECONDS", "2")
+    )
+    # Cold-storage archival of finalized (APPROVED/REJECTED) orders.
+    ORDER_ARCHIVE_ENABLED: bool = _env_flag("ORDER_ARCHIVE_ENABLED")
+    # Shared by all replicas (reads fall back to it); local disk or an
+    # object-store mount.
+    ORDER_ARCHIVE_DIR: str = os.getenv(
+        "ORDER_ARCHIVE_DIR", "/var/lib/order-service/archive"
+    )
+    ORDER_ARCHIVE_RETENTION_DAYS: int = int(
+        os.getenv("ORDER_ARCHIVE_RETENTION_DAYS", "90")
+    )
+    ORDER_ARCHIVE_BATCH_SIZE: int = int(os.getenv("ORDER_ARCHIVE_BATCH_SIZE", "500"))
+    ORDER_ARCHIVE_BATCH_PAUSE_SECONDS: float = float(
+        os.getenv("ORDER_ARCHIVE_BATCH_PAUSE_SECONDS", "0.2")
+    )
+    ORDER_ARCHIVE_INTERVAL_SECONDS: float = float(
+        os.getenv("ORDER_ARCHIVE_INTERVAL_SECONDS", "3600")
+    )
+    # Cron line for archive passes (UTC); empty = every ORDER_ARCHIVE_INTERVAL_SECONDS
+    ORDER_ARCHIVE_SCHEDULE: str = os.getenv("ORDER_ARCHIVE_SCHEDULE", "")
+    # Stock reservation: reserve attempts before answering 503, and how
+    # often each replica reloads the tracked-item catalog.
+    INVENTORY_RESERVE_ATTEMPTS: int = int(os.getenv("INVENTORY_RESERVE_ATTEMPTS", "4"))
+    ITEM_CATALOG_REFRESH_SECONDS: float = float(
+        os.getenv("ITEM_CATALOG_REFRESH_SECONDS", "30")
+    )
+    # Auto-approval rules engine for the PENDING queue: "off", "dry-run"
+    # (evaluate and log a report, change nothing) or "enforce".
+    ORDER_RULES_MODE: str = os.getenv("ORDER_RULES_MODE", "off").strip().lower()
+    # JSON list of rules (see OrderRule in app/models.py)
+    ORDER_RULES_FILE: str = os.getenv(
+        "ORDER_RULES_FILE", "/etc/order-service/rules.json"
+    )
+    ORDER_RULES_INTERVAL_SECONDS: float = float(
+        os.getenv("ORDER_RULES_INTERVAL_SECONDS", "5")
+    )
+    ORDER_RULES_BATCH_SIZE: int = int(os.getenv("ORDER_RULES_BATCH_SIZE", "5000"))
+    ORDER_RULES_VELOCITY_WINDOW_SECONDS: float = float(
+        os.getenv("ORDER_RULES_VELOCITY_WINDOW_SECONDS", "3600")
+    )
+    # In-memory columnar snapshot of orders behind `/orders/analytics`
+    # (off by default; costs ~20 bytes per order on every replica).
+    ORDER_ANALYTICS_ENABLED: bool = _env_flag("ORDER_ANALYTICS_ENABLED")
+    ORDER_ANALYTICS_REFRESH_SECONDS: float = float(
+        os.getenv("ORDER_ANALYTICS_REFRESH_SECONDS", "5")
+    )
+    ORDER_ANALYTICS_BATCH_SIZE: int = int(
+        os.getenv("ORDER_ANALYTICS_BATCH_SIZE", "20000")
+    )
+    # Watermark job folding order_events into the order_rollups table.
+    # Rollups trail events by CHANGES_SETTLE_SECONDS + this interval.
+    ORDER_ROLLUP_ENABLED: bool = _env_flag("ORDER_ROLLUP_ENABLED")
+    ORDER_ROLLUP_INTERVAL_SECONDS: float = float(
+        os.getenv("ORDER_ROLLUP_INTERVAL_SECONDS", "10")
+    )
+    ORDER_ROLLUP_BATCH_SIZE: int = int(os.getenv("ORDER_ROLLUP_BATCH_SIZE", "10000"))
+    # In-memory item-name autocomplete (`GET /items/suggest`).
+    ITEM_SUGGEST_ENABLED: bool = _env_flag("ITEM_SUGGEST_ENABLED", "true")
+    ITEM_SUGGEST_TOP_K: int = int(os.getenv("ITEM_SUGGEST_TOP_K", "10"))
+    ITEM_SUGGEST_REFRESH_SECONDS: float = float(
+        os.getenv("ITEM_SUGGEST_REFRESH_SECONDS", "5")
+    )
+    ITEM_SUGGEST_BATCH_SIZE: int = int(os.getenv("ITEM_SUGGEST_BATCH_SIZE", "5000"))
+    # Rows fetched from the server-side cursor and encoded per chunk when a
+    # listing is streamed (`?stream=true`); bounds the memory of one response.
+    ORDER_STREAM_CHUNK_ROWS: int = int(os.getenv("ORDER_STREAM_CHUNK_ROWS", "500"))
+
+
+settings = Settings()
@@ -0,0 +1,242 @@
+"""Hash-based sharding of orders across several Postgres databases.
+
+Orders are owned by the shard that holds their user's *bucket*: a stable
+hash of `user_id` into NUM_BUCKETS logical buckets, and a bucket -> shard map
+stored in the `order_shard_map` table on shard 0 (the directory). Buckets not
+listed in the table default to `bucket % n_shards`, so a fresh deployment
+needs no map rows at all.
+
+Moving users between shards means moving whole buckets
+(`scripts/reshard_orders.py`): the bucket is briefly *frozen* (reads keep
+working, writes answer 503 or go to the local spool), its rows are caught up
+on the target, the map flips and the source copy is deleted. While a bucket
+exists on two shards, fan-out readers keep only rows from the owning shard.
+
+Enabled by setting DATABASE_SHARD_URLS; otherwise order-service uses the
+single DATABASE_URL pool exactly as before.
+"""
+
+import asyncio
+import hashlib
+from collections.abc import Callable, Iterable
+from typing import Any, TypeVar
+from uuid import UUID
+
+import structlog
+
+from .db import execute_fetchall, get_db_pool
+from .pools import open_partitioned_pool
+from .settings import settings
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Fixed for the lifetime of the data: changing it re-buckets every user.
+NUM_BUCKETS = 256
+
+# SQL twin of `user_bucket()`, used by the reshard tool and owned-bucket
+# filters. Both take the first 32 bits of md5 over the canonical uuid text.
+BUCKET_SQL = "mod(('x' || substr(md5(user_id::text), 1, 8))::bit(32)::bigint, 256)"
+
+SHARD_MAP_SQL = "SELECT bucket, shard, frozen FROM order_shard_map"
+LOCATE_ORDER_SQL = "SELECT user_id FROM orders WHERE id = %s"
+
+
+def user_bucket(user_id: Any) -> int:
+    """Stable bucket for a user id (independent of PYTHONHASHSEED/process)."""
+    try:
+        key = str(UUID(str(user_id)))
+    except ValueError:
+        key = str(user_id)
+    digest = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+    return int(digest[:8], 16) % NUM_BUCKETS
+
+
+class BucketFrozenError(Exception):
+    """A write targeted a bucket that is being moved between shards."""
+
+    def __init__(self, bucket: int):
+        super().__init__(f"bucket {bucket} is being resharded; retry shortly")
+        self.bucket = bucket
+
+
+class ShardRouter:
+    """Route order reads/writes to shard pools by user bucket."""
+
+    def __init__(
+        self,
+        pools: list[Any],
+        bucket_map: dict[int, int] | None = None,
+        frozen: Iterable[int] = (),
+    ) -> None:
+        if not pools:
+            raise ValueError("at least one shard pool is required")
+        self.pools = pools
+        self._apply_map(bucket_map or {}, set(frozen))
+        self._refresher: asyncio.Task[None] | None = None
+
+    @property
+    def n_shards(self) -> int:
+        return len(self.pools)
+
+    def _apply_map(self, overrides: dict[int, int], frozen: set[int]) -> None:
+        n = len(self.pools)
+        table = [b % n for b in range(NUM_BUCKETS)]
+        for bucket, shard in overrides.items():
+            if not 0 <= shard < n:
+                # map written for a larger shard list than this process has
+                logger.error("shard-map.unknown-shard", bucket=bucket, shard=shard)
+                continue
+            table[bucket] = shard
+        self.bucket_to_shard = table
+        self.frozen = frozen
+
+    def shard_for_user(self, user_id: Any) -> int:
+        return self.bucket_to_shard[user_bucket(user_id)]
+
+    def owns(self, shard: int, user_id: Any) -> bool:
+        return self.shard_for_user(user_id) == shard
+
+    def owned_buckets(self, shard: int) -> list[int]:
+        return [b for b, s in enumerate(self.bucket_to_shard) if s == shard]
+
+    def is_frozen(self, user_id: Any) -> bool:
+        return user_bucket(user_id) in self.frozen
+
+    def pool_for_user(self, user_id: Any, write: bool = False) -> Any:
+        bucket = user_bucket(user_id)
+        if write and bucket in self.frozen:
+            raise BucketFrozenError(bucket)
+        return self.pools[self.bucket_to_shard[bucket]]
+
+    def partition(
+        self, items: Iterable[T], user_of: Callable[[T], Any], write: bool = False
+    ) -> list[tuple[Any, list[T]]]:
+        """Group items by owning shard pool, preserving their order."""
+        groups: dict[int, list[T]] = {}
+        for item in items:
+            bucket = user_bucket(user_of(item))
+            if write and bucket in self.frozen:
+                raise BucketFrozenError(bucket)
+            groups.setdefault(self.bucket_to_shard[bucket], []).append(item)
+        return [(self.pools[shard], group) for shard, group in groups.items()]
+
+    async def fetchall_each(
+        self, sql: str, params: tuple[Any, ...] | Callable[[int], tuple[Any, ...]] = ()
+    ) -> list[list[Any]]:
+        """Run `sql` on every shard concurrently; result i is shard i's rows.
+
+        `params` may be a callable taking the shard index, for per-shard
+        parameters such as the owned-bucket list.
+        """
+        return list(
+            await asyncio.gather(
+                *(
+                    execute_fetchall(
+                        pool, sql, params(shard) if callable(params) else params
+                    )
+                    for shard, pool in enumerate(self.pools)
+                )
+            )
+        )
+
+    async def pool_for_order(self, order_id: str, write: bool = False) -> Any | None:
+        """Find the shard owning an order by id (fan-out point lookup).
+
+        Ids do not encode their shard, so every shard is probed; mid-move a
+        row may exist twice and the copy on the owning shard wins.
+        """
+        found = await self.fetchall_each(LOCATE_ORDER_SQL, (order_id,))
+        for shard, rows in enumerate(found):
+            if not rows:
+                continue
+            row = rows[0]
+            user_id = row.get("user_id") if isinstance(row, dict) else row[0]
+            if self.owns(shard, user_id):
+                return self.pool_for_user(user_id, write=write)
+        return None
+
+    async def refresh(self) -> None:
+        """Reload the bucket map and frozen set from the directory shard."""
+        rows = await execute_fetchall(self.pools[0], SHARD_MAP_SQL)
+        overrides: dict[int, int] = {}
+        frozen: set[int] = set()
+        for row in rows:
+            bucket, shard, is_frozen = (
+                (row["bucket"], row["shard"], row["frozen"])
+                if isinstance(row, dict)
+                else row
+            )
+            overrides[int(bucket)] = int(shard)
+            if is_frozen:
+                frozen.add(int(bucket))
+        self._apply_map(overrides, frozen)
+
+    async def _refresh_forever(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep routing with the last known map
+                logger.warning("shard-map.refresh-failed", exc_info=True)
+
+    def start_refresh(self, interval: float) -> None:
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._refresh_forever(interval))
+
+    async def stop_refresh(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+
+_router: ShardRouter | None = None
+
+
+async def start_shard_router() -> None:
+    """Open one pool per DATABASE_SHARD_URLS entry and load the bucket map."""
+    global _router
+    urls = settings.DATABASE_SHARD_URLS
+    if not urls or _router is not None:
+        return
+    pools = [
+        await open_partitioned_pool(url, f"shard{i}") for i, url in enumerate(urls)
+    ]
+    router = ShardRouter(pools)
+    try:
+        await router.refresh()
+    except Exception:
+        logger.warning("shard-map.load-failed; using default map", exc_info=True)
+    router.start_refresh(settings.ORDER_SHARD_MAP_REFRESH_SECONDS)
+    _router = router
+
+
+def get_shard_router() -> ShardRouter | None:
+    return _router
+
+
+def all_order_pools() -> list[Any]:
+    """Every database holding orders: the shard pools when sharded, else the
+    single DATABASE_URL pool (none before startup)."""
+    shards = get_shard_router()
+    if shards is not None:
+        return list(shards.pools)
+    pool = get_db_pool()
+    return [pool] if pool is not None else []
+
+
+async def stop_shard_router() -> None:
+    global _router
+    if _router is not None:
+        await _router.stop_refresh()
+        for pool in _router.pools:
+            await pool.close()
+        _router = None
@@ -0,0 +1,283 @@
+"""Durable local write-ahead spool for order creation during DB brownouts.
+
+When enabled, a validated order that cannot be written to Postgres (pool
+missing, connection errors, pool checkout timeouts) is appended to a local
+NDJSON spool file and fsync'd before the client is answered with its final
+id and an ACCEPTED status. A background drainer replays the spool into
+Postgres in batches once the database recovers.
+
+Replay is exactly-once in effect: every record carries the UUIDv7 id the
+client was given and is inserted with `ON CONFLICT (id) DO NOTHING`, so a
+crash between the INSERT commit and the offset update only causes a
+harmless re-insert attempt on restart.
+
+Files in ORDER_SPOOL_DIR:
+- orders.spool           append-only NDJSON records
+- orders.spool.offset    byte offset of the first record not yet committed
+- orders.spool.rejected  records the database refused (bad user id, ...)
+"""
+
+import asyncio
+import json
+import os
+import threading
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import psycopg
+import structlog
+
+from .db import execute_fetchall
+from .ids import uuid7
+from .metrics import ORDER_SPOOL_DRAINED, ORDER_SPOOL_PENDING, ORDER_SPOOL_WRITES
+from .pools import set_workload
+from .settings import settings
+from .sharding import get_shard_router
+
+logger = structlog.get_logger()
+
+# created_at keeps the accept time; updated_at is the replay time, so a
+# /orders/changes consumer whose cursor has moved past created_at still sees
+# the order arrive.
+REPLAY_SPOOLED_ORDERS_SQL = """
+WITH new_orders AS (
+    INSERT INTO orders (id, user_id, item_name_id, quantity, notes, created_at, updated_at)
+    SELECT id, user_id, intern_item_name(item_name), quantity, notes, created_at, now()
+    FROM unnest(%s::uuid[], %s::uuid[], %s::text[], %s::int[], %s::text[], %s::timestamptz[])
+        AS s(id, user_id, item_name, quantity, notes, created_at)
+    ON CONFLICT (id) DO NOTHING
+    RETURNING id, user_id
+), events AS (
+    INSERT INTO order_events (order_id, actor, from_status, to_status)
+    SELECT id, user_id::text, NULL, 'PENDING' FROM new_orders
+)
+SELECT id FROM new_orders
+"""
+
+SPOOL_MODES = ("off", "fallback", "always")
+
+
+class OrderSpool:
+    """Append-only, fsync'd order spool with a committed-offset cursor.
+
+    File I/O runs in worker threads under one lock, so appends, replay
+    reads and compaction never interleave.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], mode: str = "fallback"):
+        if mode not in SPOOL_MODES:
+            raise ValueError(f"ORDER_SPOOL_MODE must be one of {SPOOL_MODES}")
+        self.mode = mode
+        self.dir = Path(directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.path = self.dir / "orders.spool"
+        self.offset_path = self.dir / "orders.spool.offset"
+        self.rejected_path = self.dir / "orders.spool.rejected"
+        self._lock = threading.Lock()
+        # id -> record for orders accepted but not yet in Postgres, so reads
+        # can answer for them; rebuilt from the undrained tail on startup.
+        self.pending: dict[str, dict[str, Any]] = {}
+        _, records = self._read_from_offset(limit=None)
+        for rec in records:
+            self.pending[rec["id"]] = rec
+        ORDER_SPOOL_PENDING.set(len(self.pending))
+
+    async def append(
+        self,
+        user_id: Any,
+        item_name: str,
+        quantity: int,
+        notes: str | None,
+        order_id: str | None = None,
+    ) -> dict[str, Any]:
+        """Durably record one order and return the spooled record.
+
+        Returns only after the record is fsync'd, so the id handed to the
+        client survives a process crash.
+        """
+        record = {
+            "id": order_id or str(uuid7()),
+            "user_id": user_id,
+            "item_name": item_name,
+            "quantity": quantity,
+            "notes": notes,
+            "created_at": datetime.now(UTC).isoformat(),
+        }
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        await asyncio.to_thread(self._append_line, line)
+        self.pending[record["id"]] = record
+        ORDER_SPOOL_WRITES.inc()
+        ORDER_SPOOL_PENDING.set(len(self.pending))
+        return record
+
+    def _append_line(self, line: bytes) -> None:
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _read_offset(self) -> int:
+        try:
+            return int(self.offset_path.read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp = self.offset_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="ascii") as fh:
+            fh.write(str(offset))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def _read_from_offset(self, limit: int | None) -> tuple[int, list[dict[str, Any]]]:
+        """Return (end offset, records) for up to `limit` undrained records."""
+        with self._lock:
+            offset = self._read_offset()
+            records: list[dict[str, Any]] = []
+            try:
+                fh = open(self.path, "rb")
+            except FileNotFoundError:
+                return offset, records
+            with fh:
+                if offset > os.fstat(fh.fileno()).st_size:
+                    # compaction truncated the file but crashed before the
+                    # offset reset; everything before was already drained.
+                    # Persist the reset before new appends grow past it.
+                    offset = 0
+                    self._write_offset(0)
+                fh.seek(offset)
+                while limit is None or len(records) < limit:
+                    line = fh.readline()
+                    if not line.endswith(b"\n"):
+                        # torn final write from a crash: never acknowledged
+                        break
+                    offset += len(line)
+                    records.append(json.loads(line))
+            return offset, records
+
+    def _commit(self, end_offset: int) -> None:
+        with self._lock:
+            if end_offset >= self.path.stat().st_size:
+                # fully drained: truncate so the spool never grows unbounded
+                with open(self.path, "r+b") as fh:
+                    fh.truncate(0)
+                    os.fsync(fh.fileno())
+                end_offset = 0
+            self._write_offset(end_offset)
+
+    def _reject(self, records: list[dict[str, Any]]) -> None:
+        with self._lock, open(self.rejected_path, "ab") as fh:
+            for rec in records:
+                fh.write((json.dumps(rec) + "\n").encode("utf-8"))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+    async def drain_once(self, pool: Any, batch_size: int) -> int:
+        """Replay up to `batch_size` spooled orders; returns how many were
+        consumed from the spool (inserted, duplicate, or rejected)."""
+        end_offset, records = await asyncio.to_thread(
+            self._read_from_offset, batch_size
+        )
+        if not records:
+            return 0
+        try:
+            await self._replay(pool, records)
+        except (psycopg.errors.IntegrityError, psycopg.errors.DataError):
+            # isolate the poison record(s) so the rest of the spool drains
+            rejected: list[dict[str, Any]] = []
+            for rec in records:
+                try:
+                    await self._replay(pool, [rec])
+                except (psycopg.errors.IntegrityError, psycopg.errors.DataError):
+                    logger.exception("order-spool.rejected", order_id=rec["id"])
+                    rejected.append(rec)
+            await asyncio.to_thread(self._reject, rejected)
+        await asyncio.to_thread(self._commit, end_offset)
+        for rec in records:
+            self.pending.pop(rec["id"], None)
+        ORDER_SPOOL_DRAINED.inc(len(records))
+        ORDER_SPOOL_PENDING.set(len(self.pending))
+        return len(records)
+
+    async def _replay(self, pool: Any, records: list[dict[str, Any]]) -> None:
+        shards = get_shard_router()
+        if shards is None:
+            await self._replay_to(pool, records)
+            return
+        # raises BucketFrozenError while a bucket is mid-move; the drainer
+        # backs off and the (idempotent) replay is retried later
+        for shard_pool, group in shards.partition(
+            records, lambda r: r["user_id"], write=True
+        ):
+            await self._replay_to(shard_pool, group)
+
+    async def _replay_to(self, pool: Any, records: list[dict[str, Any]]) -> None:
+        await execute_fetchall(
+            pool,
+            REPLAY_SPOOLED_ORDERS_SQL,
+            (
+                [r["id"] for r in records],
+                [r["user_id"] for r in records],
+                [r["item_name"] for r in records],
+                [r["quantity"] for r in records],
+                [r["notes"] for r in records],
+                [r["created_at"] for r in records],
+            ),
+        )
+
+
+async def _drain_forever(spool: OrderSpool, get_pool: Any) -> None:
+    set_workload("user_write")
+    delay = settings.ORDER_SPOOL_DRAIN_INTERVAL_SECONDS
+    while True:
+        try:
+            pool = get_pool()
+            drained = 1
+            while pool is not None and drained:
+                drained = await spool.drain_once(
+                    pool, settings.ORDER_SPOOL_DRAIN_BATCH_SIZE
+                )
+            delay = settings.ORDER_SPOOL_DRAIN_INTERVAL_SECONDS
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # DB still unavailable: back off, capped, and retry later
+            logger.warning("order-spool.drain-failed", exc_info=True)
+            delay = min(delay * 2, 30.0)
+        await asyncio.sleep(delay)
+
+
+_spool: OrderSpool | None = None
+_drainer: asyncio.Task[None] | None = None
+
+
+async def start_order_spool(get_pool: Any) -> None:
+    """Open the spool and start its drainer unless ORDER_SPOOL_MODE is off."""
+    global _spool, _drainer
+    if settings.ORDER_SPOOL_MODE == "off" or _spool is not None:
+        return
+    _spool = await asyncio.to_thread(
+        OrderSpool, settings.ORDER_SPOOL_DIR, settings.ORDER_SPOOL_MODE
+    )
+    _drainer = asyncio.create_task(_drain_forever(_spool, get_pool))
+
+
+def get_order_spool() -> OrderSpool | None:
+    return _spool
+
+
+async def stop_order_spool() -> None:
+    global _spool, _drainer
+    if _drainer is not None:
+        _drainer.cancel()
+        try:
+            await _drainer
+        except asyncio.CancelledError:
+            pass
+        _drainer = None
+    _spool = None
@@ -0,0 +1,200 @@
+"""Item-name autocomplete from an in-memory prefix index.
+
+Every replica keeps the distinct item names ordered so far, with their order
+counts, in a character trie whose nodes cache their ITEM_SUGGEST_TOP_K most
+popular names. A suggestion is a walk down the typed prefix plus a copy of
+that node's list: no database query and no scan of the matching names, so
+each keystroke is answered in microseconds.
+
+The index is built once from per-item counts of every order and then tailed
+on `(created_at, id)`: orders created since the last refresh are the keys
+between the previous bound and a bound taken CHANGES_SETTLE_SECONDS in the
+past. `created_at` never changes, and unlike the id it orders pre-UUIDv7
+(random v4) rows too. Counts only ever grow, which keeps
+each node's cached top-k exact under incremental updates. Popularity is
+approximate at the edges (orders replayed late from the spool may be missed),
+which is fine for ranking suggestions.
+"""
+
+import asyncio
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import structlog
+
+from .db import execute_fetchall
+from .pools import set_workload
+from .settings import settings
+from .sharding import all_order_pools
+
+logger = structlog.get_logger()
+
+# Per-item counts of orders created before the bound the tail then starts
+# from, so no order is counted by both.
+ITEM_POPULARITY_SQL = (
+    "SELECT n.name AS item_name, c.count "
+    "FROM (SELECT item_name_id, count(*) FROM orders WHERE created_at < %s "
+    "GROUP BY item_name_id) c "
+    "JOIN item_names n ON n.id = c.item_name_id"
+)
+# Orders created after the `(created_at, id)` cursor and before the bound,
+# oldest first. The batch is cut on orders_created_at_id_idx before the join,
+# so at most one batch is ever sorted.
+NEW_ORDER_ITEMS_SQL = (
+    "SELECT o.created_at, o.id, n.name AS item_name "
+    "FROM (SELECT created_at, id, item_name_id FROM orders "
+    "WHERE (created_at, id) > (%s::timestamptz, %s::uuid) AND created_at < %s "
+    "ORDER BY created_at, id LIMIT %s) o "
+    "JOIN item_names n ON n.id = o.item_name_id ORDER BY o.created_at, o.id"
+)
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        self.top: list[str] = []
+
+
+class PrefixIndex:
+    """Case-insensitive prefix trie caching the top-k names at every node."""
+
+    def __init__(self, top_k: int = 10) -> None:
+        self.top_k = top_k
+        self.counts: dict[str, int] = {}
+        self._root = _Node()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, name: str, count: int = 1) -> None:
+        name = name.strip()
+        if not name:
+            return
+        self.counts[name] = self.counts.get(name, 0) + count
+        node = self._root
+        self._offer(node, name)
+        for ch in name.casefold():
+            node = node.children.setdefault(ch, _Node())
+            self._offer(node, name)
+
+    def _offer(self, node: _Node, name: str) -> None:
+        top, counts = node.top, self.counts
+        if name not in top:
+            if len(top) >= self.top_k and counts[top[-1]] >= counts[name]:
+                return
+            top.append(name)
+        top.sort(key=lambda n: (-counts[n], n))
+        del top[self.top_k :]
+
+    def suggest(self, prefix: str, limit: int | None = None) -> list[dict[str, Any]]:
+        """Most ordered names starting with `prefix` (case-insensitive)."""
+        node: _Node | None = self._root
+        for ch in prefix.strip().casefold():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        names = node.top[: limit or self.top_k]
+        return [{"item_name": n, "orders": self.counts[n]} for n in names]
+
+
+class ItemSuggester:
+    """Builds a PrefixIndex from orders and keeps it current."""
+
+    def __init__(self, top_k: int) -> None:
+        self.index = PrefixIndex(top_k)
+        self.loaded = False
+        # per-database `(created_at, id)` cursor, keyed by position in the pool list
+        self._after: dict[int, tuple[datetime, str]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @staticmethod
+    def _bound() -> datetime:
+        return datetime.now(UTC) - timedelta(seconds=settings.CHANGES_SETTLE_SECONDS)
+
+    async def refresh(self, pools: list[Any]) -> int:
+        """Count orders created since the last refresh; returns how many."""
+        seen = 0
+        for n, pool in enumerate(pools):
+            before = self._bound()
+            after = self._after.get(n)
+            if after is None:
+                counts = await execute_fetchall(pool, ITEM_POPULARITY_SQL, (before,))
+                for r in counts:
+                    name, count = (
+                        (r["item_name"], r["count"]) if isinstance(r, dict) else r
+                    )
+                    self.index.add(name, int(count))
+                    seen += int(count)
+                self._after[n] = (before, str(UUID(int=0)))
+                continue
+            while True:
+                rows = await execute_fetchall(
+                    pool,
+                    NEW_ORDER_ITEMS_SQL,
+                    (*after, before, settings.ITEM_SUGGEST_BATCH_SIZE),
+                )
+                for r in rows:
+                    self.index.add(r["item_name"] if isinstance(r, dict) else r[2])
+                seen += len(rows)
+                if len(rows) < settings.ITEM_SUGGEST_BATCH_SIZE:
+                    after = (before, str(UUID(int=0)))
+                    break
+                last = rows[-1]
+                created_at, last_id = (
+                    (last["created_at"], last["id"])
+                    if isinstance(last, dict)
+                    else last[:2]
+                )
+                after = (created_at, str(last_id))
+            self._after[n] = after
+        self.loaded = True
+        return seen
+
+    async def _refresh_forever(self, get_pools: Callable[[], list[Any]]) -> None:
+        set_workload("bulk_read")
+        while True:
+            try:
+                await self.refresh(get_pools())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("item-suggest.refresh-failed", exc_info=True)
+            await asyncio.sleep(settings.ITEM_SUGGEST_REFRESH_SECONDS)
+
+    def start(self, get_pools: Callable[[], list[Any]]) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_forever(get_pools))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+_suggester: ItemSuggester | None = None
+
+
+async def start_item_suggester() -> None:
+    global _suggester
+    if settings.ITEM_SUGGEST_ENABLED and _suggester is None:
+        _suggester = ItemSuggester(settings.ITEM_SUGGEST_TOP_K)
+        _suggester.start(all_order_pools)
+
+
+def get_item_suggester() -> ItemSuggester | None:
+    return _suggester
+
+
+async def stop_item_suggester() -> None:
+    global _suggester
+    if _suggester is not None:
+        await _suggester.stop()
+        _suggester = None
@@ -0,0 +1,431 @@
+"""Durable background jobs: a Postgres queue and the worker runtime.
+
+Long admin operations (bulk decisions, archive runs, rollup catch-up) are
+enqueued as rows in `jobs` and run off the request path by a worker that is
+embedded in every replica (JOBS_WORKER_ENABLED).
+
+- Claiming: one loop per registered job kind takes the kind's advisory
+  transaction lock, counts that kind's live running jobs and, while that is
+  below the kind's concurrency limit, claims the oldest due job with
+  `FOR UPDATE SKIP LOCKED`. The lock makes the limit hold across replicas.
+  Taking it in its own statement means the count's snapshot already sees
+  every claim committed before ours.
+- Leases: a claim holds the job until `locked_until`. A heartbeat renews
+  it while the handler runs; if the replica dies, the lease runs out and
+  another replica reclaims the job (counting another attempt), or fails it
+  when that was its last attempt.
+- Progress: handlers call `JobContext.report(done, total)`, which also
+  renews the lease.
+- Retries: a failed attempt is requeued with exponential backoff and
+  jitter until `max_attempts`, then marked `failed` with the last error.
+  Every state change is guarded by `locked_by`, so a worker that lost its
+  lease cannot overwrite the new owner's state.
+
+Handlers must be idempotent: a job can run again after a crash part-way.
+"""
+
+import asyncio
+import json
+import os
+import random
+import socket
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import structlog
+
+from .db import execute_fetchall, execute_fetchone, execute_transaction, get_db_pool
+from .ids import uuid7
+from .pools import set_workload
+from .scheduler import add_periodic_task, remove_periodic_task
+from .settings import settings
+from .sharding import get_shard_router
+
+logger = structlog.get_logger()
+
+JOB_KEYS = [
+    "id",
+    "kind",
+    "params",
+    "status",
+    "attempts",
+    "max_attempts",
+    "run_after",
+    "progress_done",
+    "progress_total",
+    "result",
+    "last_error",
+    "created_by",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "updated_at",
+]
+CLAIMED_KEYS = [
+    "id",
+    "kind",
+    "params",
+    "attempts",
+    "max_attempts",
+    "progress_done",
+    "created_by",
+]
+
+ENQUEUE_JOB_SQL = (
+    "INSERT INTO jobs (id, kind, params, max_attempts, created_by) "
+    "VALUES (%s, %s, %s::jsonb, %s, %s) RETURNING id"
+)
+JOB_BY_ID_SQL = (
+    "SELECT id, kind, params, status, attempts, max_attempts, run_after, "
+    "progress_done, progress_total, result, last_error, created_by, created_at, "
+    "started_at, finished_at, updated_at FROM jobs WHERE id = %s"
+)
+LOCK_JOB_KIND_SQL = "SELECT pg_advisory_xact_lock(hashtext('jobs:' || %s))"
+# A running job whose lease expired on its last attempt is failed rather
+# than reclaimed; run in the claim transaction, before CLAIM_JOB_SQL.
+EXPIRE_JOBS_SQL = """
+UPDATE jobs
+SET status = 'failed', last_error = 'lease expired on the last attempt',
+    locked_by = NULL, locked_until = NULL, finished_at = now(), updated_at = now()
+WHERE kind = %s AND status = 'running' AND locked_until <= now()
+  AND attempts >= max_attempts
+RETURNING id
+"""
+# Claim one due job of a kind if fewer than the limit are running. Queued
+# jobs and running jobs whose lease expired with attempts left are both
+# claimable.
+CLAIM_JOB_SQL = """
+WITH live AS (
+    SELECT count(*) AS n FROM jobs
+    WHERE kind = %s AND status = 'running' AND locked_until > now()
+), next AS (
+    SELECT id FROM jobs
+    WHERE kind = %s
+      AND (
+        (status = 'queued' AND run_after <= now())
+        OR (status = 'running' AND locked_until <= now() AND attempts < max_attempts)
+      )
+      AND (SELECT n FROM live) < %s
+    ORDER BY run_after, id
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE jobs j
+SET status = 'running', attempts = j.attempts + 1, locked_by = %s,
+    locked_until = now() + make_interval(secs => %s),
+    started_at = coalesce(j.started_at, now()), updated_at = now()
+FROM next WHERE j.id = next.id
+RETURNING j.id, j.kind, j.params, j.attempts, j.max_attempts, j.progress_done,
+    j.created_by
+"""
+RENEW_JOB_SQL = (
+    "UPDATE jobs SET locked_until = now() + make_interval(secs => %s), updated_at = now() "
+    "WHERE id = %s AND locked_by = %s AND status = 'running' RETURNING id"
+)
+REPORT_JOB_SQL = (
+    "UPDATE jobs SET progress_done = %s, progress_total = coalesce(%s, progress_total), "
+    "locked_until = now() + make_interval(secs => %s), updated_at = now() "
+    "WHERE id = %s AND locked_by = %s AND status = 'running' RETURNING id"
+)
+COMPLETE_JOB_SQL = (
+    "UPDATE jobs SET status = 'succeeded', result = %s::jsonb, last_error = NULL, "
+    "locked_by = NULL, locked_until = NULL, finished_at = now(), updated_at = now() "
+    "WHERE id = %s AND locked_by = %s RETURNING id"
+)
+FAIL_JOB_SQL = """
+UPDATE jobs
+SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+    run_after = now() + make_interval(secs => %s),
+    finished_at = CASE WHEN attempts >= max_attempts THEN now() END,
+    last_error = %s, locked_by = NULL, locked_until = NULL, updated_at = now()
+WHERE id = %s AND locked_by = %s
+RETURNING status
+"""
+# Shutdown mid-job: hand it straight back without spending an attempt.
+RELEASE_JOB_SQL = (
+    "UPDATE jobs SET status = 'queued', attempts = greatest(attempts - 1, 0), "
+    "run_after = now(), locked_by = NULL, locked_until = NULL, updated_at = now() "
+    "WHERE id = %s AND locked_by = %s RETURNING id"
+)
+# Run by the scheduler's leader on JOBS_PURGE_SCHEDULE.
+PURGE_JOBS_SQL = (
+    "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') "
+    "AND finished_at < now() - make_interval(days => %s) RETURNING id"
+)
+
+
+class LeaseLostError(Exception):
+    """Another worker took the job over after this worker's lease expired."""
+
+
+@dataclass(slots=True)
+class JobType:
+    handler: Callable[["JobContext"], Awaitable[dict[str, Any] | None]]
+    concurrency: int = 1
+    max_attempts: int = 5
+    # checks params at enqueue time; raises ValueError on bad input
+    validate: Callable[[dict[str, Any]], dict[str, Any]] | None = None
+
+
+JOB_TYPES: dict[str, JobType] = {}
+
+
+def register_job(
+    kind: str,
+    *,
+    concurrency: int = 1,
+    max_attempts: int = 5,
+    validate: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+) -> Callable[[Any], Any]:
+    """Register a handler for `kind`; JOBS_CONCURRENCY may override the limit."""
+
+    def decorate(handler: Any) -> Any:
+        JOB_TYPES[kind] = JobType(handler, concurrency, max_attempts, validate)
+        return handler
+
+    return decorate
+
+
+def jobs_pool() -> Any:
+    """The database holding `jobs`: the directory shard when sharded."""
+    shards = get_shard_router()
+    if shards is not None:
+        return shards.pools[0]
+    return get_db_pool()
+
+
+def retry_delay(attempt: int) -> float:
+    """Backoff before retrying after failed attempt number `attempt`."""
+    base = settings.JOBS_RETRY_BASE_SECONDS * 2 ** max(0, attempt - 1)
+    return min(settings.JOBS_RETRY_MAX_SECONDS, base) * random.uniform(0.5, 1.0)  # noqa: S311
+
+
+def _json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, (str, bytes)) else value
+
+
+async def enqueue_job(
+    pool: Any,
+    kind: str,
+    params: dict[str, Any],
+    created_by: str | None = None,
+    max_attempts: int | None = None,
+) -> str:
+    """Queue a job of a registered kind; returns its id.
+
+    Raises KeyError for an unknown kind and ValueError for invalid params.
+    """
+    job_type = JOB_TYPES[kind]
+    if job_type.validate is not None:
+        params = job_type.validate(params)
+    job_id = str(uuid7())
+    await execute_fetchone(
+        pool,
+        ENQUEUE_JOB_SQL,
+        (
+            job_id,
+            kind,
+            json.dumps(params),
+            max_attempts or job_type.max_attempts,
+            created_by,
+        ),
+    )
+    return job_id
+
+
+async def get_job(pool: Any, job_id: str) -> dict[str, Any] | None:
+    row = await execute_fetchone(pool, JOB_BY_ID_SQL, (job_id,))
+    if not row:
+        return None
+    job = dict(row) if isinstance(row, dict) else dict(zip(JOB_KEYS, row))
+    job["id"] = str(job["id"])
+    job["params"] = _json(job.get("params"))
+    job["result"] = _json(job.get("result"))
+    return job
+
+
+async def claim_job(
+    pool: Any, kind: str, worker_id: str, limit: int, lease: float
+) -> dict[str, Any] | None:
+    rows = await execute_transaction(
+        pool,
+        [
+            (LOCK_JOB_KIND_SQL, (kind,)),
+            (EXPIRE_JOBS_SQL, (kind,)),
+            (CLAIM_JOB_SQL, (kind, kind, limit, worker_id, lease)),
+        ],
+    )
+    if not rows:
+        return None
+    row = rows[0]
+    job = dict(row) if isinstance(row, dict) else dict(zip(CLAIMED_KEYS, row))
+    job["id"] = str(job["id"])
+    job["params"] = _json(job.get("params")) or {}
+    return job
+
+
+class JobContext:
+    """What a handler sees of its job: params, attempt and progress."""
+
+    def __init__(self, pool: Any, job: dict[str, Any], worker_id: str) -> None:
+        self._pool = pool
+        self.id: str = job["id"]
+        self.kind: str = job["kind"]
+        self.params: dict[str, Any] = job["params"]
+        self.attempt: int = int(job["attempts"])
+        # progress reported by earlier attempts; lets a handler resume
+        self.done: int = int(job.get("progress_done") or 0)
+        self.created_by: str | None = job.get("created_by")
+        self.worker_id = worker_id
+
+    async def report(self, done: int, total: int | None = None) -> None:
+        """Record progress and renew the lease; raises LeaseLostError."""
+        self.done = done
+        row = await execute_fetchone(
+            self._pool,
+            REPORT_JOB_SQL,
+            (done, total, settings.JOBS_LEASE_SECONDS, self.id, self.worker_id),
+        )
+        if not row:
+            raise LeaseLostError(self.id)
+
+
+class JobWorker:
+    """Claims and runs jobs of every registered kind in this replica."""
+
+    def __init__(self, get_pool: Callable[[], Any], worker_id: str | None = None):
+        self._get_pool = get_pool
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._loops: list[asyncio.Task[None]] = []
+        self._running: set[asyncio.Task[None]] = set()
+
+    def limit(self, kind: str) -> int:
+        return max(1, settings.JOBS_CONCURRENCY.get(kind, JOB_TYPES[kind].concurrency))
+
+    def start(self) -> None:
+        if not self._loops:
+            self._loops = [
+                asyncio.create_task(self._claim_forever(kind)) for kind in JOB_TYPES
+            ]
+
+    async def stop(self) -> None:
+        """Stop claiming and hand running jobs back to the queue."""
+        for task in [*self._loops, *self._running]:
+            task.cancel()
+        await asyncio.gather(*self._loops, *self._running, return_exceptions=True)
+        self._loops = []
+        self._running.clear()
+
+    async def _claim_forever(self, kind: str) -> None:
+        set_workload("bulk_read")
+        limit = self.limit(kind)
+        slots = asyncio.Semaphore(limit)
+        while True:
+            await slots.acquire()
+            job = None
+            try:
+                pool = self._get_pool()
+                if pool is not None:
+                    job = await claim_job(
+                        pool, kind, self.worker_id, limit, settings.JOBS_LEASE_SECONDS
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("jobs.claim-failed", kind=kind, exc_info=True)
+            if job is None:
+                slots.release()
+                await asyncio.sleep(settings.JOBS_POLL_SECONDS)
+                continue
+            task = asyncio.create_task(self.run(pool, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _heartbeat(self, pool: Any, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOBS_LEASE_SECONDS / 3)
+            try:
+                await execute_fetchone(
+                    pool,
+                    RENEW_JOB_SQL,
+                    (settings.JOBS_LEASE_SECONDS, job_id, self.worker_id),
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("jobs.heartbeat-failed", job_id=job_id, exc_info=True)
+
+    async def run(self, pool: Any, job: dict[str, Any]) -> str:
+        """Run one claimed job to its next state; returns that state."""
+        ctx = JobContext(pool, job, self.worker_id)
+        log = logger.bind(job_id=ctx.id, kind=ctx.kind, attempt=ctx.attempt)
+        heartbeat = asyncio.create_task(self._heartbeat(pool, ctx.id))
+        try:
+            result = await JOB_TYPES[ctx.kind].handler(ctx)
+        except asyncio.CancelledError:
+            await asyncio.shield(
+                execute_fetchone(pool, RELEASE_JOB_SQL, (ctx.id, self.worker_id))
+            )
+            log.info("jobs.released")
+            raise
+        except LeaseLostError:
+            log.warning("jobs.lease-lost")
+            return "lost"
+        except Exception as exc:
+            row = await execute_fetchone(
+                pool,
+                FAIL_JOB_SQL,
+                (retry_delay(ctx.attempt), repr(exc), ctx.id, self.worker_id),
+            )
+            state = (
+                (row.get("status") if isinstance(row, dict) else row[0])
+                if row
+                else "lost"
+            )
+            log.warning("jobs.attempt-failed", state=state, error=repr(exc))
+            return state
+        finally:
+            heartbeat.cancel()
+        row = await execute_fetchone(
+            pool, COMPLETE_JOB_SQL, (json.dumps(result or {}), ctx.id, self.worker_id)
+        )
+        log.info("jobs.succeeded")
+        return "succeeded" if row else "lost"
+
+
+async def purge_finished_jobs() -> int:
+    """Delete finished jobs past JOBS_RETENTION_DAYS; returns how many."""
+    pool = jobs_pool()
+    if pool is None:
+        return 0
+    rows = await execute_fetchall(pool, PURGE_JOBS_SQL, (settings.JOBS_RETENTION_DAYS,))
+    if rows:
+        logger.info("jobs.purged", jobs=len(rows))
+    return len(rows)
+
+
+_worker: JobWorker | None = None
+
+
+async def start_job_worker() -> None:
+    global _worker
+    add_periodic_task(
+        "jobs-purge", settings.JOBS_PURGE_SCHEDULE, purge_finished_jobs, jitter=60
+    )
+    if settings.JOBS_WORKER_ENABLED and _worker is None:
+        _worker = JobWorker(jobs_pool)
+        _worker.start()
+
+
+def get_job_worker() -> JobWorker | None:
+    return _worker
+
+
+async def stop_job_worker() -> None:
+    global _worker
+    remove_periodic_task("jobs-purge")
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
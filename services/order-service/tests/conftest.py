@@ -0,0 +1,115 @@
+from collections.abc import Callable, Generator
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+
+from app.main import app
+from app.orders import get_current_user, require_admin
+
+ADMIN_CLAIMS = {"sub": "admin-1", "username": "admin", "is_admin": True}
+USER_CLAIMS = {"sub": "u1", "username": "tester", "is_admin": False}
+
+
+class RecordingPool:
+    """Stand-in for the asyncpg-style pool that app.db talks to.
+
+    Every query is recorded in `calls` as (sql, params) and answered from
+    `answers`: the value of the first key that is a substring of the SQL.
+    A value may be a list of rows, a list of pages (lists of rows) answering
+    successive calls in turn, or a callable taking the params. `fetchrow`
+    returns the first row of the answer.
+    """
+
+    def __init__(self, answers: dict[str, Any] | None = None) -> None:
+        self.answers = answers if answers is not None else {}
+        self.calls: list[tuple[str, Any]] = []
+
+    def answer(self, sql: str, params: Any) -> Any:
+        self.calls.append((sql, params))
+        for fragment, rows in self.answers.items():
+            if fragment in sql:
+                if callable(rows):
+                    return rows(params)
+                if rows and isinstance(rows[0], list):
+                    return rows.pop(0)
+                return rows
+        return []
+
+    def acquire(self) -> "_AcquireCM":
+        return _AcquireCM(_Conn(self))
+
+
+class _Conn:
+    def __init__(self, pool: RecordingPool) -> None:
+        self.pool = pool
+
+    async def fetchrow(self, sql: str, params: Any = None) -> Any:
+        rows = self.pool.answer(sql, params)
+        return rows[0] if rows else None
+
+    async def fetchall(self, sql: str, params: Any = None) -> list[Any]:
+        return list(self.pool.answer(sql, params))
+
+
+class _AcquireCM:
+    def __init__(self, conn: _Conn) -> None:
+        self.conn = conn
+
+    async def __aenter__(self) -> _Conn:
+        return self.conn
+
+    async def __aexit__(
+        self, exc_type: type | None, exc: BaseException | None, tb: object | None
+    ) -> bool:
+        return False
+
+
+def order_row(n: int = 1, **fields: Any) -> dict[str, Any]:
+    """An orders row as the listing queries return it; `fields` override."""
+    created = datetime(2026, 1, 1, 0, 0, n % 60, tzinfo=UTC)
+    row = {
+        "id": f"00000000-0000-7000-9000-{n:012d}",
+        "user_id": "u1",
+        "item_name": "widget",
+        "quantity": 1,
+        "notes": None,
+        "status": "PENDING",
+        "created_at": created,
+        "updated_at": created,
+        "admin_action_at": None,
+    }
+    row.update(fields)
+    return row
+
+
+@pytest.fixture
+def recording_pool() -> type[RecordingPool]:
+    return RecordingPool
+
+
+@pytest.fixture
+def make_order() -> Callable[..., dict[str, Any]]:
+    return order_row
+
+
+def _override_claims(claims: dict[str, Any], admin: bool) -> Generator[dict[str, Any]]:
+    orig = app.dependency_overrides.copy()
+    overrides: dict[Any, Any] = {get_current_user: lambda: claims}
+    if admin:
+        overrides[require_admin] = lambda: claims
+    app.dependency_overrides = overrides
+    yield claims
+    app.dependency_overrides = orig
+
+
+@pytest.fixture
+def as_admin() -> Generator[dict[str, Any]]:
+    """Authenticate every request as an admin; yields the claims."""
+    yield from _override_claims(dict(ADMIN_CLAIMS), admin=True)
+
+
+@pytest.fixture
+def as_user() -> Generator[dict[str, Any]]:
+    """Authenticate every request as the regular user u1; yields the claims."""
+    yield from _override_claims(dict(USER_CLAIMS), admin=False)
@@ -19,7 +19,7 @@ def _dummy_pool_for_get_order():
             self, sql: str, *args: Any, **kwargs: Any
         ) -> dict[str, Any] | None:
             # Return an order owned by user 'u2' so a request from 'u1' should be forbidden
-            if "SELECT id, user_id" in sql:
+            if "SELECT o.id, o.user_id" in sql:
                 return {
                     "id": TEST_ORDER_ID,
                     "user_id": "u2",
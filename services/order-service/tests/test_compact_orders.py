@@ -0,0 +1,62 @@
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.batcher import BATCH_INSERT_ORDERS_SQL
+from app.inventory import RESERVE_ORDER_SQL
+from app.main import app
+from app.orders import CREATE_ORDER_SQL
+from app.spool import REPLAY_SPOOLED_ORDERS_SQL
+
+client = TestClient(app)
+
+INIT_ORDERS_SQL = Path(__file__).resolve().parents[3] / "infra/postgres/init-orders.sql"
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        CREATE_ORDER_SQL,
+        BATCH_INSERT_ORDERS_SQL,
+        REPLAY_SPOOLED_ORDERS_SQL,
+        RESERVE_ORDER_SQL,
+    ],
+)
+def test_every_order_insert_interns_the_item_name(sql: str) -> None:
+    assert "item_name_id" in sql
+    assert "intern_item_name(" in sql
+
+
+def test_keyset_walks_have_btree_indexes() -> None:
+    # The changes feed, snapshot and archiver page by (updated_at, id) and the
+    # rules engine by id over PENDING rows; both need an ordered index.
+    schema = INIT_ORDERS_SQL.read_text()
+    indexes = re.findall(r"CREATE INDEX[^;]* ON orders\b[^;]*;", schema)
+
+    assert any("(updated_at, id)" in ddl for ddl in indexes)
+    assert any("(id) WHERE status = 'PENDING'" in ddl for ddl in indexes)
+    assert not any("USING brin" in ddl for ddl in indexes)
+    assert "fillfactor" in schema
+
+
+def test_unknown_status_filter_is_rejected(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any
+) -> None:
+    calls: list[Any] = []
+
+    async def _fetchall_merged(*args: Any, **kwargs: Any) -> list[Any]:
+        calls.append(args)
+        return []
+
+    monkeypatch.setattr("app.orders._fetchall_merged", _fetchall_merged)
+
+    unknown = client.get("/orders/admin", params={"status": "SHIPPED"})
+    known = client.get("/orders/admin", params={"status": "PENDING"})
+
+    assert unknown.status_code == 422
+    # only the valid status reached the database
+    assert len(calls) == 1 and calls[0][1] == ("PENDING",)
+    assert known.status_code == 200
@@ -0,0 +1,151 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from psycopg_pool import PoolTimeout
+
+from app.main import app
+from app.pools import PartitionedPool, current_workload, set_workload
+from app.settings import settings
+
+client = TestClient(app)
+
+TEST_ORDER_ID = "11111111-1111-1111-1111-111111111111"
+SIZES = {"user_write": 1, "admin_write": 1, "interactive_read": 1, "bulk_read": 1}
+TIMEOUTS = {
+    "user_write": 1.0,
+    "admin_write": 1.0,
+    "interactive_read": 1.0,
+    "bulk_read": 0.05,
+}
+
+
+class _InnerPool:
+    def __init__(self) -> None:
+        self.in_use = 0
+
+    @asynccontextmanager
+    async def connection(self):
+        self.in_use += 1
+        try:
+            yield object()
+        finally:
+            self.in_use -= 1
+
+
+def test_a_saturated_class_does_not_block_the_others() -> None:
+    inner = _InnerPool()
+    pool = PartitionedPool(inner, SIZES, TIMEOUTS, label="test")
+
+    async def scenario() -> list[str]:
+        held = asyncio.Event()
+        release = asyncio.Event()
+        events: list[str] = []
+
+        async def bulk_reader() -> None:
+            set_workload("bulk_read")
+            async with pool.connection():
+                held.set()
+                await release.wait()
+
+        async def second_bulk_reader() -> None:
+            set_workload("bulk_read")
+            try:
+                async with pool.connection():
+                    events.append("bulk got a connection")
+            except PoolTimeout:
+                events.append("bulk timed out")
+
+        async def approver() -> None:
+            set_workload("admin_write")
+            async with pool.connection():
+                events.append("approve ran")
+
+        reader = asyncio.create_task(bulk_reader())
+        await held.wait()
+        await asyncio.gather(second_bulk_reader(), approver())
+        release.set()
+        await reader
+        return events
+
+    events = asyncio.run(scenario())
+
+    assert sorted(events) == ["approve ran", "bulk timed out"]
+    assert inner.in_use == 0
+
+
+def test_pool_timeout_is_a_503(monkeypatch: pytest.MonkeyPatch, as_user: Any) -> None:
+    class ExhaustedPool:
+        def acquire(self):
+            raise PoolTimeout("no interactive_read connection free within 2.0s")
+
+    monkeypatch.setattr("app.orders.get_db_pool", ExhaustedPool())
+
+    r = client.get("/orders/me")
+
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def _workload_answers(seen: list[str]) -> dict[str, Any]:
+    """Pool answers that note the workload class each statement runs in."""
+
+    def noting(rows: list[Any]):
+        def answer(params: Any) -> list[Any]:
+            seen.append(current_workload())
+            return rows
+
+        return answer
+
+    row = {"id": TEST_ORDER_ID, "user_id": "u1", "status": "APPROVED"}
+    return {"RETURNING": noting([row]), "": noting([])}
+
+
+@pytest.mark.parametrize(
+    ("method", "path", "params", "expected"),
+    [
+        ("get", "/orders/me", {}, "interactive_read"),
+        ("get", "/orders/me", {"stream": "true"}, "bulk_read"),
+        (
+            "get",
+            "/orders/admin",
+            {"min_quantity": 5, "scan": "true", "limit": 5},
+            "bulk_read",
+        ),
+        ("get", "/orders/changes", {}, "bulk_read"),
+        ("post", f"/orders/{TEST_ORDER_ID}/approve", {}, "admin_write"),
+    ],
+)
+def test_routes_run_in_their_workload_class(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    method: str,
+    path: str,
+    params: dict[str, Any],
+    expected: str,
+) -> None:
+    seen: list[str] = []
+    pool = recording_pool(_workload_answers(seen))
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0)
+
+    r = getattr(client, method)(path, params=params)
+
+    assert r.status_code == 200, r.text
+    assert seen and set(seen) == {expected}
+
+
+def test_create_order_runs_as_user_write(
+    monkeypatch: pytest.MonkeyPatch, as_user: Any, recording_pool: Any
+) -> None:
+    seen: list[str] = []
+    pool = recording_pool(_workload_answers(seen))
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 1})
+
+    assert r.status_code == 201, r.text
+    assert seen == ["user_write"]
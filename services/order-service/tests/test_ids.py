@@ -0,0 +1,28 @@
+import time
+
+from app.ids import uuid7, uuid7_floor
+
+
+def test_uuid7_version_and_variant() -> None:
+    u = uuid7()
+    assert u.version == 7
+    assert u.variant == "specified in RFC 4122"
+
+
+def test_uuid7_embeds_current_unix_ms() -> None:
+    before = time.time_ns() // 1_000_000
+    u = uuid7()
+    after = time.time_ns() // 1_000_000
+    assert before <= u.int >> 80 <= after + 1
+
+
+def test_uuid7_strictly_increasing_within_process() -> None:
+    ids = [uuid7() for _ in range(20_000)]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+
+
+def test_uuid7_floor_bounds_earlier_ids() -> None:
+    u = uuid7()
+    ms = u.int >> 80
+    assert uuid7_floor(ms) <= u < uuid7_floor(ms + 1)
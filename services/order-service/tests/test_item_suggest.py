@@ -0,0 +1,93 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.suggest import ItemSuggester, PrefixIndex
+
+client = TestClient(app)
+
+
+def _index() -> PrefixIndex:
+    index = PrefixIndex(top_k=2)
+    index.add("Widget", 5)
+    index.add("widget pro", 9)
+    index.add("Wrench", 1)
+    index.add("gadget", 3)
+    return index
+
+
+def test_suggest_ranks_by_popularity_case_insensitively() -> None:
+    index = _index()
+
+    assert index.suggest("WID") == [
+        {"item_name": "widget pro", "orders": 9},
+        {"item_name": "Widget", "orders": 5},
+    ]
+    assert [s["item_name"] for s in index.suggest("w", limit=1)] == ["widget pro"]
+    assert index.suggest("x") == []
+    assert len(index) == 4
+
+
+def test_increments_promote_names_into_the_cached_top_k() -> None:
+    index = _index()
+    # "Wrench" was cut from the "w" node's top 2; enough new orders bring it back
+    index.add("Wrench", 6)
+
+    assert [s["item_name"] for s in index.suggest("w")] == ["widget pro", "Wrench"]
+    assert index.suggest("wr") == [{"item_name": "Wrench", "orders": 7}]
+
+
+@pytest.mark.asyncio
+async def test_refresh_aggregates_once_then_tails_new_orders(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any
+) -> None:
+    monkeypatch.setattr("app.suggest.settings.ITEM_SUGGEST_BATCH_SIZE", 2)
+    at = datetime(2026, 1, 1, tzinfo=UTC)
+    pool = recording_pool(
+        {
+            "GROUP BY item_name": [{"item_name": "widget", "count": 4}],
+            "WHERE (created_at, id) >": [
+                [
+                    {"created_at": at, "id": "a1", "item_name": "gadget"},
+                    {"created_at": at, "id": "a2", "item_name": "gadget"},
+                ],
+                [{"created_at": at, "id": "a3", "item_name": "gadget"}],
+            ],
+        },
+    )
+    suggester = ItemSuggester(top_k=5)
+
+    assert await suggester.refresh([pool]) == 4
+    assert suggester.loaded
+    first_bound, _ = suggester._after[0]
+    calls = pool.calls
+    assert await suggester.refresh([pool]) == 3
+
+    # every order is counted, by creation time rather than by id, and the
+    # counts stop at the bound the tail starts from: nothing counted twice
+    assert "created_at < %s" in calls[0][0] and "id <" not in calls[0][0]
+    assert calls[0][1] == (first_bound,)
+    # the tail starts at the first refresh's bound and pages by (created_at, id)
+    assert calls[1][1][:2] == (first_bound, str(UUID(int=0)))
+    assert calls[2][1][:2] == (at, "a2")
+    assert calls[1][1][2] == calls[2][1][2] == suggester._after[0][0]
+    assert suggester.index.suggest("g") == [{"item_name": "gadget", "orders": 3}]
+
+
+def test_suggest_endpoint(monkeypatch: pytest.MonkeyPatch, as_user: Any) -> None:
+    suggester = ItemSuggester(top_k=5)
+    suggester.index = _index()
+    monkeypatch.setattr("app.items.get_item_suggester", lambda: suggester)
+
+    r = client.get("/items/suggest", params={"q": "wi", "limit": 1})
+    blank = client.get("/items/suggest", params={"q": " "})
+    monkeypatch.setattr("app.items.get_item_suggester", lambda: None)
+    disabled = client.get("/items/suggest", params={"q": "wi"})
+
+    assert r.status_code == 200
+    assert r.json() == [{"item_name": "widget pro", "orders": 9}]
+    assert blank.json() == [] and disabled.json() == []
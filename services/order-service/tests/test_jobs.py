@@ -0,0 +1,204 @@
+import asyncio
+import json
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import worker
+from app.main import app
+from app.settings import settings
+from app.worker import (
+    CLAIM_JOB_SQL,
+    COMPLETE_JOB_SQL,
+    EXPIRE_JOBS_SQL,
+    FAIL_JOB_SQL,
+    LOCK_JOB_KIND_SQL,
+    REPORT_JOB_SQL,
+    JobWorker,
+    claim_job,
+    register_job,
+    retry_delay,
+)
+
+client = TestClient(app)
+
+JOB_ID = "00000000-0000-7000-8000-000000000001"
+ORDER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def test_enqueue_validates_kind_and_params(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool({"INSERT INTO jobs": [{"id": JOB_ID}]})
+    monkeypatch.setattr("app.jobs.jobs_pool", lambda: pool)
+
+    r = client.post(
+        "/jobs/",
+        json={
+            "kind": "bulk_decide",
+            "params": {"action": "APPROVE", "order_ids": [ORDER_ID]},
+        },
+    )
+    assert r.status_code == 202 and r.json()["status"] == "queued"
+    sql, params = pool.calls[0]
+    assert sql.startswith("INSERT INTO jobs")
+    assert params[1:] == (
+        "bulk_decide",
+        '{"action": "APPROVE", "order_ids": ["' + ORDER_ID + '"]}',
+        5,
+        "admin-1",
+    )
+
+    assert client.post("/jobs/", json={"kind": "nope"}).status_code == 400
+    bad = {"kind": "bulk_decide", "params": {"action": "SHIP", "order_ids": []}}
+    assert client.post("/jobs/", json=bad).status_code == 400
+    assert len(pool.calls) == 1
+
+
+def test_read_job_reports_progress(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    row = {
+        "id": JOB_ID,
+        "kind": "rollups",
+        "params": "{}",
+        "status": "running",
+        "attempts": 1,
+        "progress_done": 40,
+        "progress_total": None,
+        "result": None,
+    }
+    monkeypatch.setattr("app.jobs.jobs_pool", lambda: recording_pool({"SELECT": [row]}))
+    r = client.get(f"/jobs/{JOB_ID}")
+    assert r.status_code == 200
+    assert r.json()["progress_done"] == 40 and r.json()["params"] == {}
+
+    monkeypatch.setattr("app.jobs.jobs_pool", lambda: recording_pool())
+    assert client.get(f"/jobs/{JOB_ID}").status_code == 404
+
+
+def test_claim_locks_the_kind_before_counting_running_jobs(
+    recording_pool: Any,
+) -> None:
+    claimed = {
+        "id": JOB_ID,
+        "kind": "rollups",
+        "params": "{}",
+        "attempts": 1,
+        "max_attempts": 5,
+        "progress_done": 0,
+        "created_by": "admin-1",
+    }
+    pool = recording_pool({"WITH live": [claimed]})
+
+    job = asyncio.run(claim_job(pool, "rollups", "host:1", 2, 60))
+
+    assert [sql for sql, _ in pool.calls] == [
+        LOCK_JOB_KIND_SQL,
+        EXPIRE_JOBS_SQL,
+        CLAIM_JOB_SQL,
+    ]
+    assert pool.calls[1][1] == ("rollups",)
+    assert pool.calls[2][1] == ("rollups", "rollups", 2, "host:1", 60)
+    # an expired lease is only reclaimed while attempts remain
+    assert "locked_until <= now() AND attempts < max_attempts" in CLAIM_JOB_SQL
+    assert "FOR UPDATE SKIP LOCKED" in CLAIM_JOB_SQL
+    assert job is not None and job["params"] == {}
+
+
+def test_retry_delay_backs_off_up_to_the_cap(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(worker.random, "uniform", lambda a, b: 1.0)
+    monkeypatch.setattr(settings, "JOBS_RETRY_BASE_SECONDS", 5)
+    monkeypatch.setattr(settings, "JOBS_RETRY_MAX_SECONDS", 60)
+
+    assert [retry_delay(n) for n in (1, 2, 3, 4, 5)] == [5, 10, 20, 40, 60]
+
+
+@pytest.fixture
+def test_kinds(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(worker, "JOB_TYPES", {})
+    monkeypatch.setattr(settings, "JOBS_LEASE_SECONDS", 60)
+
+    @register_job("count")
+    async def count(ctx: worker.JobContext) -> dict[str, Any]:
+        for n in range(ctx.done + 1, 4):
+            await ctx.report(n, 3)
+        return {"counted": 3}
+
+    @register_job("boom")
+    async def boom(ctx: worker.JobContext) -> None:
+        raise RuntimeError("boom")
+
+    return worker.JOB_TYPES
+
+
+def _claimed(kind: str, done: int = 0) -> dict[str, Any]:
+    return {
+        "id": JOB_ID,
+        "kind": kind,
+        "params": {},
+        "attempts": 1,
+        "progress_done": done,
+        "created_by": "admin-1",
+    }
+
+
+def test_a_job_reports_progress_and_completes(
+    test_kinds: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool({"UPDATE jobs SET": [{"id": JOB_ID}]})
+
+    state = asyncio.run(
+        JobWorker(lambda: pool, "host:1").run(pool, _claimed("count", 1))
+    )
+
+    assert state == "succeeded"
+    assert [sql for sql, _ in pool.calls] == [REPORT_JOB_SQL] * 2 + [COMPLETE_JOB_SQL]
+    assert [params[:2] for _, params in pool.calls[:2]] == [(2, 3), (3, 3)]
+    assert pool.calls[-1][1] == ('{"counted": 3}', JOB_ID, "host:1")
+
+
+def test_a_failed_attempt_is_requeued_with_backoff(
+    monkeypatch: pytest.MonkeyPatch, test_kinds: Any, recording_pool: Any
+) -> None:
+    monkeypatch.setattr(worker, "retry_delay", lambda attempt: 7.5)
+    pool = recording_pool({"UPDATE jobs": [{"status": "queued"}]})
+
+    state = asyncio.run(JobWorker(lambda: pool, "host:1").run(pool, _claimed("boom")))
+
+    assert state == "queued"
+    ((sql, params),) = pool.calls
+    assert sql == FAIL_JOB_SQL
+    assert params == (7.5, "RuntimeError('boom')", JOB_ID, "host:1")
+
+
+def test_bulk_decide_resumes_after_reported_progress(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any
+) -> None:
+    ids = [f"00000000-0000-7000-9000-{n:012d}" for n in range(3)]
+    # the first id was rejected by the attempt that crashed
+    orders = recording_pool(
+        {
+            "id = ANY": [{"id": i} for i in ids],
+            "": lambda params: [{"id": params[0]}],
+        }
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", orders)
+    monkeypatch.setattr("app.sharding.get_db_pool", lambda: orders)
+    jobs_db = recording_pool({"UPDATE jobs SET": [{"id": JOB_ID}]})
+    job = {
+        **_claimed("bulk_decide", done=1),
+        "params": {"action": "REJECT", "order_ids": ids},
+    }
+
+    state = asyncio.run(JobWorker(lambda: jobs_db, "host:1").run(jobs_db, job))
+
+    assert state == "succeeded"
+    *decisions, (_, counted) = orders.calls
+    assert [params[0] for _, params in decisions] == ids[1:]
+    assert counted == (ids, "REJECTED")
+    assert jobs_db.calls[0][1][:2] == (3, 3)
+    # counts cover every id, not only those this attempt decided
+    result = json.loads(jobs_db.calls[-1][1][0])
+    assert result == {"action": "REJECT", "decided": 3, "missing": 0}
@@ -0,0 +1,123 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.analytics import OrderSnapshot, SnapshotRefresher
+from app.main import app
+
+client = TestClient(app)
+
+T0 = datetime(2025, 1, 1, 10, 0, tzinfo=UTC)
+
+
+def _row(n: int, item: str, qty: int, status: str = "PENDING", **kw: Any):
+    created = kw.get("created_at", T0 + timedelta(minutes=n))
+    return {
+        "id": f"00000000-0000-7000-9000-{n:012d}",
+        "item_name": item,
+        "quantity": qty,
+        "status": status,
+        "created_at": created,
+        "updated_at": created,
+        "admin_action_at": kw.get("admin_action_at"),
+    }
+
+
+def _snapshot() -> OrderSnapshot:
+    snap = OrderSnapshot(capacity=2)
+    snap.apply(
+        [
+            _row(1, "widget", 1),
+            _row(2, "widget", 4),
+            _row(3, "gadget", 60),
+            _row(70, "gizmo", 2),
+            _row(71, "widget", 2),
+        ]
+    )
+    return snap
+
+
+def test_upsert_overwrites_in_place() -> None:
+    snap = _snapshot()
+    decided = T0 + timedelta(minutes=2, seconds=30)
+    snap.apply([_row(2, "widget", 4, "APPROVED", admin_action_at=decided)])
+
+    summary = snap.summarize()
+
+    assert snap.size == 5
+    assert summary["by_status"] == {"PENDING": 4, "APPROVED": 1}
+    assert summary["approval_latency_seconds"]["p50"] == 30.0
+
+
+def test_uuid_and_text_ids_share_a_slot() -> None:
+    # psycopg returns UUID objects; fixtures and JSON paths carry text
+    snap = _snapshot()
+    decided = T0 + timedelta(minutes=5)
+    row = _row(3, "gadget", 60, "REJECTED", admin_action_at=decided)
+    snap.apply([{**row, "id": UUID(row["id"])}])
+
+    assert snap.size == 5
+    assert snap.summarize()["by_status"] == {"PENDING": 4, "REJECTED": 1}
+
+
+def test_summary_buckets_histogram_and_top_items() -> None:
+    summary = _snapshot().summarize(bucket="hour", top=2)
+
+    assert summary["orders"] == 5 and summary["quantity"] == 69
+    assert [(v["orders"], v["quantity"]) for v in summary["volume"]] == [
+        (3, 65),
+        (2, 4),
+    ]
+    assert summary["volume"][0]["start"] == T0.isoformat()
+    hist = {(h["min"], h["max"]): h["orders"] for h in summary["quantity_histogram"]}
+    assert hist[(1, 1)] == 1 and hist[(2, 2)] == 2 and hist[(50, 100)] == 1
+    assert [t["item_name"] for t in summary["top_items"]] == ["widget", "gadget"]
+    assert summary["top_items"][0] == {
+        "item_name": "widget",
+        "orders": 3,
+        "quantity": 7,
+    }
+
+
+def test_window_filters_by_created_at() -> None:
+    since = T0 + timedelta(hours=1)
+    summary = _snapshot().summarize(since_ms=int(since.timestamp() * 1000))
+
+    assert summary["orders"] == 2
+
+
+@pytest.mark.asyncio
+async def test_refresher_tails_changes_with_a_cursor(recording_pool: Any) -> None:
+    pages = [[_row(1, "widget", 1), _row(2, "widget", 1)], [_row(3, "gadget", 1)]]
+    pool = recording_pool({"": pages})
+    refresher = SnapshotRefresher(OrderSnapshot())
+
+    assert await refresher.refresh([pool]) == 2
+    assert await refresher.refresh([pool]) == 1
+
+    assert refresher.snapshot.size == 3
+    # the second refresh resumes after the last row of the first
+    assert pool.calls[1][1][:2] == (T0 + timedelta(minutes=2), _row(2, "w", 1)["id"])
+
+
+def test_analytics_endpoint(monkeypatch: pytest.MonkeyPatch, as_admin: Any) -> None:
+    refresher = SnapshotRefresher(_snapshot())
+    monkeypatch.setattr("app.orders.get_order_analytics", lambda: refresher)
+
+    loading = client.get("/orders/analytics")
+    refresher.loaded = True
+    r = client.get(
+        "/orders/analytics",
+        params={"bucket": "day", "since": "2025-01-01T00:00:00Z"},
+    )
+
+    assert loading.status_code == 503
+    assert r.status_code == 200
+    body = r.json()
+    assert body["snapshot_rows"] == 5
+    assert body["volume"] == [
+        {"start": "2025-01-01T00:00:00+00:00", "orders": 5, "quantity": 69}
+    ]
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.archive import LocalArchiveStore, archive_batch
+from app.main import app
+
+client = TestClient(app)
+
+TEST_ORDER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def test_segment_round_trip(tmp_path: Path) -> None:
+    store = LocalArchiveStore(tmp_path)
+    name = store.write_segment([{"id": "a"}, {"id": "b"}])
+
+    assert name.endswith(".ndjson.gz")
+    assert store.read_record(name, 1) == {"id": "b"}
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_concurrent_reads_keep_the_segment_cache_bounded(tmp_path: Path) -> None:
+    store = LocalArchiveStore(tmp_path)
+    segments = [
+        store.write_segment([{"id": f"{n}-{i}"} for i in range(3)]) for n in range(12)
+    ]
+
+    def read(n: int) -> str:
+        return store.read_record(segments[n % 12], n % 3)["id"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(read, range(600)))
+
+    assert ids == [f"{n % 12}-{n % 3}" for n in range(600)]
+    assert len(store._cache) <= store._cache_size
+
+
+@pytest.mark.asyncio
+async def test_archive_batch_indexes_only_deleted_rows(
+    tmp_path: Path, recording_pool: Any, make_order: Any
+) -> None:
+    rows = [make_order(1, status="APPROVED"), make_order(2, status="REJECTED")]
+    pool = recording_pool(
+        {
+            "INSERT INTO order_archive_index": [{"order_id": rows[0]["id"]}],
+            "WHERE o.updated_at <": rows,
+        },
+    )
+    store = LocalArchiveStore(tmp_path)
+
+    assert await archive_batch(pool, store) == 1
+
+    sql, params = pool.calls[-1]
+    assert "DELETE FROM orders" in sql
+    # a stale index row is repointed rather than left behind
+    assert "ON CONFLICT (order_id) DO UPDATE" in sql
+    ids, updated, ordinals, segment = params
+    assert ids == [rows[0]["id"], rows[1]["id"]]
+    assert updated[0] == rows[0]["updated_at"].isoformat()
+    assert ordinals == [0, 1]
+    assert store.read_record(segment, 1)["status"] == "REJECTED"
+
+
+def test_get_order_falls_back_to_archive(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    recording_pool: Any,
+    as_user: dict[str, Any],
+) -> None:
+    store = LocalArchiveStore(tmp_path)
+    segment = store.write_segment(
+        [{"id": TEST_ORDER_ID, "user_id": "u1", "status": "APPROVED"}]
+    )
+    pool = recording_pool(
+        {"FROM order_archive_index": [{"segment": segment, "ordinal": 0}]}
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr("app.orders.get_archive_store", lambda: store)
+
+    r = client.get(f"/orders/{TEST_ORDER_ID}")
+    as_user["sub"] = "u2"
+    forbidden = client.get(f"/orders/{TEST_ORDER_ID}")
+
+    assert r.status_code == 200
+    assert r.json()["archived"] is True
+    assert r.json()["status"] == "APPROVED"
+    assert forbidden.status_code == 403
@@ -0,0 +1,152 @@
+import asyncio
+from typing import Any
+
+import psycopg
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.batcher import OrderInsertBatcher
+from app.main import app
+
+
+def _insert(fail_user: str | None = None):
+    """Answer for the batch INSERT: 'inserts' every id it is given, or raises
+    an IntegrityError for any batch containing `fail_user`."""
+
+    def insert(params: Any) -> list[dict[str, Any]]:
+        ids, user_ids = params[0], params[1]
+        if fail_user is not None and fail_user in user_ids:
+            raise psycopg.errors.ForeignKeyViolation("unknown user")
+        return [{"id": i} for i in ids]
+
+    return {"": insert}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_insert(recording_pool: Any) -> None:
+    pool = recording_pool(_insert())
+    batcher = OrderInsertBatcher(lambda: pool, max_batch_size=10, linger_ms=20)
+    await batcher.start()
+    try:
+        ids = await asyncio.gather(
+            *(batcher.submit(f"u{n}", "widget", 1, None) for n in range(5))
+        )
+    finally:
+        await batcher.stop()
+
+    assert len(pool.calls) == 1
+    assert list(pool.calls[0][1][0]) == ids
+    assert len(set(ids)) == 5
+
+
+@pytest.mark.asyncio
+async def test_batches_respect_max_size(recording_pool: Any) -> None:
+    pool = recording_pool(_insert())
+    batcher = OrderInsertBatcher(lambda: pool, max_batch_size=2, linger_ms=20)
+    await batcher.start()
+    try:
+        await asyncio.gather(
+            *(batcher.submit("u1", "widget", 1, None) for _ in range(5))
+        )
+    finally:
+        await batcher.stop()
+
+    assert sorted(len(params[0]) for _, params in pool.calls) == [1, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_bad_row_only_fails_its_own_caller(recording_pool: Any) -> None:
+    pool = recording_pool(_insert(fail_user="missing"))
+    batcher = OrderInsertBatcher(lambda: pool, max_batch_size=10, linger_ms=20)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit("u1", "widget", 1, None),
+            batcher.submit("missing", "widget", 1, None),
+            batcher.submit("u2", "widget", 1, None),
+            return_exceptions=True,
+        )
+    finally:
+        await batcher.stop()
+
+    assert isinstance(results[0], str)
+    assert isinstance(results[1], psycopg.errors.ForeignKeyViolation)
+    assert isinstance(results[2], str)
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_a_lingering_batch(recording_pool: Any) -> None:
+    pool = recording_pool(_insert())
+    batcher = OrderInsertBatcher(lambda: pool, max_batch_size=10, linger_ms=60_000)
+    await batcher.start()
+    pending = [
+        asyncio.ensure_future(batcher.submit(f"u{n}", "widget", 1, None))
+        for n in range(3)
+    ]
+    await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(batcher.stop(), 1)
+
+    assert len(pool.calls) == 1
+    assert [f.result() for f in pending] == list(pool.calls[0][1][0])
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_a_batch_waiting_for_a_flush_slot(
+    recording_pool: Any,
+) -> None:
+    release = asyncio.Event()
+
+    async def slow_insert(params: Any) -> list[dict[str, Any]]:
+        await release.wait()
+        return [{"id": i} for i in params[0]]
+
+    pool = recording_pool(_insert())
+    batcher = OrderInsertBatcher(
+        lambda: pool, max_batch_size=1, linger_ms=0, max_inflight=1
+    )
+    writes: list[int] = []
+
+    async def write_to(_pool: Any, batch: list[Any]) -> None:
+        writes.append(len(batch))
+        rows = await slow_insert(([i.order_id for i in batch],))
+        for item, row in zip(batch, rows, strict=True):
+            item.future.set_result(row["id"])
+
+    batcher._write_to = write_to  # type: ignore[method-assign]
+    await batcher.start()
+    first = asyncio.ensure_future(batcher.submit("u1", "widget", 1, None))
+    second = asyncio.ensure_future(batcher.submit("u2", "widget", 1, None))
+    await asyncio.sleep(0.01)
+    # the first batch holds the only flush slot; the second waits for it
+    assert writes == [1]
+
+    stopping = asyncio.ensure_future(batcher.stop())
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.wait_for(stopping, 1)
+
+    assert writes == [1, 1]
+    assert first.done() and second.done()
+    assert isinstance(second.result(), str)
+
+
+@pytest.mark.asyncio
+async def test_missing_pool_is_the_usual_500() -> None:
+    batcher = OrderInsertBatcher(lambda: None, max_batch_size=10, linger_ms=0)
+    await batcher.start()
+    try:
+        with pytest.raises(HTTPException) as exc_info:
+            await batcher.submit("u1", "widget", 1, None)
+    finally:
+        await batcher.stop()
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Database pool not available"
+
+
+def test_metrics_endpoint_exports_batch_histogram() -> None:
+    r = TestClient(app).get("/metrics/")
+    assert r.status_code == 200
+    assert "order_insert_batch_size_bucket" in r.text
@@ -0,0 +1,90 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pagination import decode_cursor, encode_cursor
+from app.settings import settings
+
+client = TestClient(app)
+
+pytestmark = pytest.mark.usefixtures("as_admin")
+
+ORDER_3 = "00000000-0000-7000-9000-000000000003"
+
+
+def test_changes_starts_from_beginning_and_returns_cursor(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any, make_order: Any
+) -> None:
+    page = [make_order(1), make_order(2), make_order(3)]
+    pool = recording_pool({"": [page]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get("/orders/changes", params={"limit": 2})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert [o["id"] for o in body["items"]] == [page[0]["id"], page[1]["id"]]
+    assert body["has_more"] is True
+    ts, last_id = decode_cursor(body["next_cursor"], 2)
+    assert last_id == page[1]["id"]
+    assert ts.startswith("2026-01-01T00:00:02")
+    params = pool.calls[0][1]
+    assert params[0] == "-infinity"
+    assert params[3] == 3
+
+
+def test_changes_long_poll_until_rows_arrive(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any, make_order: Any
+) -> None:
+    pool = recording_pool({"": [[], [], [make_order(4)]]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr(settings, "CHANGES_POLL_INTERVAL_SECONDS", 0.0)
+    cursor = encode_cursor("2026-01-01T00:00:03+00:00", ORDER_3)
+
+    r = client.get("/orders/changes", params={"since": cursor, "wait": 5})
+
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()["items"]] == [make_order(4)["id"]]
+    assert len(pool.calls) == 3
+    assert pool.calls[0][1][:2] == (
+        datetime(2026, 1, 1, 0, 0, 3, tzinfo=UTC),
+        UUID(ORDER_3),
+    )
+
+
+def test_changes_empty_without_wait_echoes_cursor(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any
+) -> None:
+    pool = recording_pool()
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    cursor = encode_cursor("2026-01-01T00:00:03+00:00", ORDER_3)
+
+    r = client.get("/orders/changes", params={"since": cursor})
+
+    assert r.status_code == 200
+    assert r.json() == {"items": [], "next_cursor": cursor, "has_more": False}
+    assert len(pool.calls) == 1
+
+
+@pytest.mark.parametrize(
+    "since",
+    [
+        "not-a-cursor",
+        encode_cursor("2026-01-01T00:00:03+00:00", "c"),
+        encode_cursor("soon", ORDER_3),
+    ],
+)
+def test_changes_rejects_malformed_cursor(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any, since: str
+) -> None:
+    pool = recording_pool()
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get("/orders/changes", params={"since": since})
+
+    assert r.status_code == 400
+    assert pool.calls == []
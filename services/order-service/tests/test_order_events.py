@@ -0,0 +1,146 @@
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pagination import decode_cursor, encode_cursor
+
+client = TestClient(app)
+
+TEST_ORDER_ID = "11111111-1111-1111-1111-111111111111"
+
+
+def _event(event_id: int, to_status: str) -> dict[str, Any]:
+    return {
+        "id": event_id,
+        "order_id": TEST_ORDER_ID,
+        "actor": "admin",
+        "from_status": "PENDING",
+        "to_status": to_status,
+        "occurred_at": datetime(2026, 1, 1, 12, 0, event_id, tzinfo=UTC),
+    }
+
+
+def test_cursor_round_trip() -> None:
+    cursor = encode_cursor("2026-01-01T00:00:00+00:00", 42)
+    assert decode_cursor(cursor, 2) == ["2026-01-01T00:00:00+00:00", "42"]
+
+
+def test_approve_writes_event_in_same_statement(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool({"": [{"id": TEST_ORDER_ID}]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post(f"/orders/{TEST_ORDER_ID}/approve")
+
+    assert r.status_code == 200
+    sql, params = pool.calls[0]
+    assert "UPDATE orders SET status = 'APPROVED'" in sql
+    assert "INSERT INTO order_events" in sql
+    assert params == (TEST_ORDER_ID, "admin-1")
+
+
+def test_approve_of_a_decided_order_is_404(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    # a rejected order's stock is already released, so it cannot ship
+    pool = recording_pool({"": []})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post(f"/orders/{TEST_ORDER_ID}/approve")
+
+    assert r.status_code == 404
+    assert "prev.status = 'PENDING'" in pool.calls[0][0]
+
+
+def test_history_paginates_with_cursor(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    rows = [_event(1, "PENDING"), _event(2, "APPROVED"), _event(3, "REJECTED")]
+    pool = recording_pool({"": rows})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get(f"/orders/{TEST_ORDER_ID}/history", params={"limit": 2})
+
+    assert r.status_code == 200
+    body = r.json()
+    assert [e["id"] for e in body["items"]] == [1, 2]
+    assert decode_cursor(body["next_cursor"], 1) == ["2"]
+    # limit + 1 rows are requested so the last page needs no extra round trip
+    assert pool.calls[-1][1] == (TEST_ORDER_ID, 0, 3)
+
+
+@pytest.mark.parametrize(
+    ("path", "cursor"),
+    [
+        (f"/orders/{TEST_ORDER_ID}/history", encode_cursor("x")),
+        ("/orders/events", encode_cursor("2026-01-01T00:00:00+00:00", "x")),
+        ("/orders/events", encode_cursor("yesterday", 1)),
+    ],
+)
+def test_tampered_cursor_is_a_400(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    path: str,
+    cursor: str,
+) -> None:
+    pool = recording_pool()
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    window = {"since": "2026-01-01T00:00:00Z", "until": "2026-01-02T00:00:00Z"}
+
+    r = client.get(path, params={**window, "cursor": cursor})
+
+    assert r.status_code == 400
+    assert pool.calls == []
+
+
+def test_history_forbidden_for_other_users_orders(
+    monkeypatch: pytest.MonkeyPatch, as_user: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool({"": [{"user_id": "u2"}]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get(f"/orders/{TEST_ORDER_ID}/history")
+
+    assert r.status_code == 403
+    assert len(pool.calls) == 1
+
+
+def test_events_window_requires_ordered_bounds(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    monkeypatch.setattr("app.orders.get_db_pool", recording_pool())
+
+    r = client.get(
+        "/orders/events",
+        params={"since": "2026-01-02T00:00:00Z", "until": "2026-01-01T00:00:00Z"},
+    )
+
+    assert r.status_code == 400
+
+
+def test_events_window_returns_time_cursor(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    rows = [_event(1, "APPROVED"), _event(2, "REJECTED")]
+    monkeypatch.setattr("app.orders.get_db_pool", recording_pool({"": rows}))
+
+    r = client.get(
+        "/orders/events",
+        params={
+            "since": "2026-01-01T00:00:00Z",
+            "until": "2026-01-02T00:00:00Z",
+            "limit": 1,
+        },
+    )
+
+    assert r.status_code == 200
+    body = r.json()
+    assert len(body["items"]) == 1
+    ts, event_id = decode_cursor(body["next_cursor"], 2)
+    assert event_id == "1"
+    assert ts.startswith("2026-01-01T12:00:01")
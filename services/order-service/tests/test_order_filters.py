@@ -0,0 +1,173 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.order_filters import (
+    AdminOrderFilter,
+    FilterError,
+    like_prefix,
+    plan_admin_query,
+)
+from app.pagination import encode_cursor
+
+client = TestClient(app)
+
+T0 = datetime(2025, 1, 1, tzinfo=UTC)
+T1 = datetime(2025, 2, 1, tzinfo=UTC)
+USER = "00000000-0000-7000-8000-000000000001"
+
+
+def test_plain_and_status_listings_keep_their_sql() -> None:
+    plain = plan_admin_query(AdminOrderFilter())
+    pending = plan_admin_query(AdminOrderFilter(status="PENDING"))
+
+    assert plain.sql.endswith(
+        "FROM orders o JOIN item_names n ON n.id = o.item_name_id "
+        "ORDER BY o.created_at DESC, o.id DESC"
+    )
+    assert plain.params == () and plain.path == "indexed"
+    assert "WHERE o.status = %s ORDER BY" in pending.sql
+    assert pending.params == ("PENDING",)
+
+
+@pytest.mark.parametrize(
+    ("filters", "index"),
+    [
+        (AdminOrderFilter(user_id="u1"), "orders_user_id_created_at_idx"),
+        (AdminOrderFilter(item_prefix="Wid"), "orders_item_name_id_created_at_idx"),
+        (AdminOrderFilter(created_after=T0), "orders_created_at_id_idx"),
+        (
+            AdminOrderFilter(user_id="u1", min_quantity=5, updated_after=T0),
+            "orders_user_id_created_at_idx",
+        ),
+    ],
+)
+def test_driving_filter_picks_the_index(filters: AdminOrderFilter, index: str) -> None:
+    query = plan_admin_query(filters, limit=10)
+
+    assert query.path == "indexed" and query.index == index
+    assert query.sql.endswith("LIMIT %s") and query.params[-1] == 11
+
+
+def test_values_only_travel_as_parameters() -> None:
+    query = plan_admin_query(
+        AdminOrderFilter(
+            user_id="u1'; DROP TABLE orders; --",
+            item_prefix="50%_off\\",
+            created_after=T0,
+            created_before=T1,
+            max_quantity=9,
+        )
+    )
+
+    assert "DROP" not in query.sql and "off" not in query.sql
+    assert query.params == (
+        "u1'; DROP TABLE orders; --",
+        "50\\%\\_off\\\\%",
+        T0,
+        T1,
+        9,
+    )
+    assert like_prefix("a_b") == "a\\_b%"
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        AdminOrderFilter(min_quantity=50),
+        AdminOrderFilter(status="PENDING", updated_after=T0),
+        AdminOrderFilter(user_id="u1", sort="-quantity"),
+    ],
+)
+def test_unindexed_shapes_need_an_explicit_paginated_scan(
+    filters: AdminOrderFilter,
+) -> None:
+    with pytest.raises(FilterError, match="no supporting index"):
+        plan_admin_query(filters, limit=10)
+    with pytest.raises(FilterError, match="requires limit"):
+        plan_admin_query(filters, scan=True)
+
+    query = plan_admin_query(filters, limit=10, scan=True)
+    assert query.path == "scan" and query.index is None
+
+
+def test_invalid_ranges_and_cursor_without_limit_are_rejected() -> None:
+    with pytest.raises(FilterError, match="created_after"):
+        plan_admin_query(AdminOrderFilter(created_after=T1, created_before=T0))
+    with pytest.raises(FilterError, match="min_quantity"):
+        plan_admin_query(AdminOrderFilter(min_quantity=9, max_quantity=2))
+    with pytest.raises(FilterError, match="cursor requires limit"):
+        plan_admin_query(AdminOrderFilter(), after=(T0, "x"))
+
+
+def _admin_get(monkeypatch: pytest.MonkeyPatch, rows: list[Any], **params: Any):
+    calls: list[Any] = []
+
+    async def _fetchall_merged(*args: Any, **kwargs: Any) -> list[Any]:
+        calls.append((args, kwargs))
+        return rows
+
+    monkeypatch.setattr("app.orders._fetchall_merged", _fetchall_merged)
+    return client.get("/orders/admin", params=params), calls
+
+
+def test_admin_listing_pages_by_keyset_cursor(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, make_order: Any
+) -> None:
+    rows = {n: make_order(n, quantity=n) for n in (1, 2, 3)}
+    r, calls = _admin_get(
+        monkeypatch, [rows[3], rows[2], rows[1]], user_id=USER, limit=2
+    )
+
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()] == [rows[3]["id"], rows[2]["id"]]
+    assert r.headers["X-Query-Path"] == "indexed"
+    assert calls[0][1]["limit"] == 3
+    cursor = r.headers["X-Next-Cursor"]
+
+    r2, calls2 = _admin_get(
+        monkeypatch, [rows[1]], user_id=USER, limit=2, cursor=cursor
+    )
+    (sql, params, *_), _ = calls2[0]
+    assert "(o.created_at, o.id) < (%s::timestamptz, %s::uuid)" in sql
+    assert params == (USER, rows[2]["created_at"], UUID(rows[2]["id"]), 3)
+    assert "X-Next-Cursor" not in r2.headers
+
+    r3, _ = _admin_get(
+        monkeypatch, [], user_id=USER, limit=2, sort="created_at", cursor=cursor
+    )
+    assert r3.status_code == 400
+
+
+def test_admin_listing_validates_filters_and_cursor_values(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any
+) -> None:
+    r, calls = _admin_get(monkeypatch, [], user_id="u1")
+    assert r.status_code == 422
+
+    # a quantity cursor carrying a timestamp, and one carrying a bad id
+    for value, last_id in ((T0.isoformat(), USER), ("5", "not-a-uuid")):
+        cursor = encode_cursor("-quantity", value, last_id)
+        r, calls = _admin_get(
+            monkeypatch, [], user_id=USER, sort="-quantity", limit=2, cursor=cursor
+        )
+        assert r.status_code == 400 and r.json()["detail"] == "invalid cursor"
+        assert calls == []
+
+
+def test_admin_listing_rejects_unindexed_filters(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, make_order: Any
+) -> None:
+    r, calls = _admin_get(monkeypatch, [], min_quantity=50)
+    assert r.status_code == 400 and "scan=true" in r.json()["detail"]
+    assert calls == []
+
+    r, calls = _admin_get(
+        monkeypatch, [make_order(1, quantity=1)], min_quantity=50, scan="true", limit=5
+    )
+    assert r.status_code == 200 and r.headers["X-Query-Path"] == "scan"
+    assert len(calls) == 1
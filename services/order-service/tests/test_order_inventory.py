@@ -0,0 +1,144 @@
+from typing import Any
+
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+
+from app.inventory import ItemCatalog, split_evenly
+from app.main import app
+from app.orders import REJECT_ORDER_SQL
+from app.sharding import ShardRouter
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tracked_widget(monkeypatch: pytest.MonkeyPatch, as_user: Any) -> ItemCatalog:
+    catalog = ItemCatalog()
+    catalog.add("widget", "item-1")
+    monkeypatch.setattr("app.orders.get_item_catalog", lambda: catalog)
+    return catalog
+
+
+def test_split_evenly() -> None:
+    assert split_evenly(10, 4) == [3, 3, 2, 2]
+    assert split_evenly(3, 8) == [1, 1, 1, 0, 0, 0, 0, 0]
+    assert sum(split_evenly(1001, 16)) == 1001
+
+
+def test_tracked_item_reserves_stock_with_the_insert(
+    monkeypatch: pytest.MonkeyPatch, tracked_widget: ItemCatalog, recording_pool: Any
+) -> None:
+    pool = recording_pool({"WITH pick AS": [{"id": "o1"}]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 2})
+
+    assert r.status_code == 201
+    assert len(pool.calls) == 1
+    sql, params = pool.calls[0]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "INSERT INTO inventory_reservations" in sql
+    assert params[:3] == ("item-1", 2, 2)
+
+
+def test_sold_out_item_is_rejected_with_409(
+    monkeypatch: pytest.MonkeyPatch, tracked_widget: ItemCatalog, recording_pool: Any
+) -> None:
+    pool = recording_pool({"WITH locked AS": [{"total": 1}]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 2})
+
+    assert r.status_code == 409
+    # one reservation attempt, then the rebalance that proved it sold out
+    steps = [("WITH pick AS" in s, "WITH locked AS" in s) for s, _ in pool.calls]
+    assert steps == [(True, False), (False, True)]
+
+
+def test_short_shard_borrows_stock_from_the_others(
+    monkeypatch: pytest.MonkeyPatch, tracked_widget: ItemCatalog, recording_pool: Any
+) -> None:
+    buyer = recording_pool(
+        {
+            "WITH pick AS": [[], [{"id": "o1"}]],
+            "balanced AS": [{"total": 1}],
+            "gathered AS": [{"total": 3}],
+        }
+    )
+    donors = [recording_pool({"shares AS": [{"taken": 1}]}) for _ in range(2)]
+    pools = [buyer, *donors]
+    home = ShardRouter(["p0", "p1", "p2"]).shard_for_user("u1")
+    pools.insert(home, pools.pop(0))
+    router = ShardRouter(pools)
+    monkeypatch.setattr("app.orders.get_shard_router", lambda: router)
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 3})
+
+    assert r.status_code == 201
+    # the shortfall of 2 is taken from the donors in turn, then gathered
+    assert [params[1] for _, params in donors[0].calls] == [2]
+    assert [params[1] for _, params in donors[1].calls] == [1]
+    gather = [params for sql, params in buyer.calls if "gathered AS" in sql]
+    assert gather == [("item-1", 2, "item-1")]
+
+
+def test_untracked_item_uses_plain_insert(
+    monkeypatch: pytest.MonkeyPatch, tracked_widget: ItemCatalog, recording_pool: Any
+) -> None:
+    pool = recording_pool({"INSERT INTO orders": [{"id": "o1"}]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post("/orders/", json={"item_name": "gadget", "quantity": 1})
+
+    assert r.status_code == 201
+    assert "inventory_slots" not in pool.calls[0][0]
+
+
+def test_reject_releases_reservation() -> None:
+    assert "UPDATE inventory_reservations" in REJECT_ORDER_SQL
+    assert "available = s.available + released.quantity" in REJECT_ORDER_SQL
+
+
+def test_create_and_list_items(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool(
+        {
+            "INSERT INTO items": [{"item_id": "x"}],
+            "FROM items i": [
+                {"id": "i1", "name": "widget", "available": 7, "slots": 4}
+            ],
+        },
+    )
+    monkeypatch.setattr("app.sharding.get_db_pool", lambda: pool)
+
+    created = client.post("/items/", json={"name": "widget", "stock": 10, "slots": 4})
+    listed = client.get("/items/")
+
+    assert created.status_code == 201
+    _, params = pool.calls[0]
+    assert params[1:] == ("widget", [0, 1, 2, 3], [3, 3, 2, 2])
+    assert listed.status_code == 200
+    assert listed.json() == [{"id": "i1", "name": "widget", "available": 7, "slots": 4}]
+
+
+def test_create_item_is_undone_when_a_shard_rejects_it(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    def duplicate(params: Any) -> list[Any]:
+        raise psycopg.errors.UniqueViolation("items_name_key")
+
+    ok = recording_pool({"INSERT INTO items": [{"item_id": "x"}]})
+    clash = recording_pool({"INSERT INTO items": duplicate})
+    untouched = recording_pool()
+    router = ShardRouter([ok, clash, untouched])
+    monkeypatch.setattr("app.sharding.get_shard_router", lambda: router)
+
+    r = client.post("/items/", json={"name": "widget", "stock": 9, "slots": 2})
+
+    assert r.status_code == 409
+    created_id = ok.calls[0][1][0]
+    assert [sql for sql, _ in ok.calls][1:] == ["DELETE FROM items WHERE id = %s"]
+    assert ok.calls[1][1] == (created_id,)
+    assert untouched.calls == []
@@ -0,0 +1,109 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.archive import LocalArchiveStore
+from app.main import app
+
+client = TestClient(app)
+
+MINE = "00000000-0000-7000-9000-000000000001"
+THEIRS = "00000000-0000-7000-9000-000000000002"
+ARCHIVED = "00000000-0000-7000-9000-000000000003"
+GONE = "00000000-0000-7000-9000-000000000004"
+
+
+def _lookup(ids: list[str]) -> Any:
+    return client.post("/orders/lookup", json={"ids": ids})
+
+
+def test_lookup_fetches_all_ids_in_one_query(
+    monkeypatch: pytest.MonkeyPatch,
+    as_user: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    pool = recording_pool(
+        {
+            "WHERE o.id = ANY(": [
+                make_order(id=THEIRS, user_id="u2"),
+                make_order(id=MINE, user_id="u1"),
+            ]
+        }
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr("app.orders.get_archive_store", lambda: None)
+
+    r = _lookup([MINE, THEIRS, GONE, MINE])
+
+    assert r.status_code == 200
+    body = r.json()
+    assert [o["id"] for o in body["orders"]] == [MINE]
+    assert body["forbidden"] == [THEIRS]
+    assert body["missing"] == [GONE]
+    # duplicates collapse and every id goes out in a single statement
+    assert len(pool.calls) == 1
+    assert pool.calls[0][1] == ([MINE, THEIRS, GONE],)
+
+
+def test_admin_sees_every_order_in_request_order(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    pool = recording_pool(
+        {
+            "WHERE o.id = ANY(": [
+                make_order(id=MINE, user_id="u1"),
+                make_order(id=THEIRS, user_id="u2"),
+            ]
+        }
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr("app.orders.get_archive_store", lambda: None)
+
+    r = _lookup([THEIRS, MINE])
+
+    assert r.status_code == 200
+    assert [o["id"] for o in r.json()["orders"]] == [THEIRS, MINE]
+    assert r.json()["forbidden"] == [] and r.json()["missing"] == []
+
+
+def test_lookup_falls_back_to_archive_for_unresolved_ids(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    as_user: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    store = LocalArchiveStore(tmp_path)
+    segment = store.write_segment(
+        [{"id": ARCHIVED, "user_id": "u1", "status": "APPROVED"}]
+    )
+    pool = recording_pool(
+        {
+            "WHERE o.id = ANY(": [make_order(id=MINE, user_id="u1")],
+            "FROM order_archive_index": [
+                {"order_id": ARCHIVED, "segment": segment, "ordinal": 0}
+            ],
+        },
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+    monkeypatch.setattr("app.orders.get_archive_store", lambda: store)
+
+    r = _lookup([ARCHIVED, MINE, GONE])
+
+    body = r.json()
+    assert [o["id"] for o in body["orders"]] == [ARCHIVED, MINE]
+    assert body["orders"][0]["archived"] is True
+    assert body["missing"] == [GONE]
+    archive_calls = [c for c in pool.calls if "order_archive_index" in c[0]]
+    assert len(archive_calls) == 1 and archive_calls[0][1] == ([ARCHIVED, GONE],)
+
+
+def test_lookup_rejects_empty_and_oversized_batches(as_user: Any) -> None:
+    assert _lookup([]).status_code == 422
+    assert _lookup([MINE] * 501).status_code == 422
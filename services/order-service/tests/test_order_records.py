@@ -0,0 +1,80 @@
+import json
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.records import (
+    AdminOrder,
+    OrderSummary,
+    record_keys,
+    records_from_rows,
+    records_response,
+)
+
+client = TestClient(app)
+
+OID = UUID("01890000-0000-7000-8000-000000000001")
+UID = UUID("00000000-0000-4000-8000-000000000002")
+CREATED = datetime(2025, 1, 1, 12, 0, 0, 123456, tzinfo=UTC)
+
+
+def test_records_are_slotted() -> None:
+    rec = OrderSummary(OID, "widget", 2, "PENDING", CREATED)
+
+    assert not hasattr(rec, "__dict__")
+    with pytest.raises(AttributeError):
+        rec.extra = 1  # type: ignore[attr-defined]
+
+
+def test_json_matches_the_former_dict_encoding() -> None:
+    row = (OID, UID, "widget", 2, "APPROVED", CREATED)
+    body = records_response(records_from_rows(AdminOrder, [row])).body
+
+    former = json.dumps(
+        jsonable_encoder([dict(zip(record_keys(AdminOrder), row))]),
+        separators=(",", ":"),
+    )
+    assert json.loads(body) == json.loads(former)
+    assert json.loads(body)[0]["created_at"] == "2025-01-01T12:00:00.123456+00:00"
+
+
+def test_mapping_rows_are_accepted() -> None:
+    row = {
+        "id": "o1",
+        "item_name": "widget",
+        "quantity": 1,
+        "status": "PENDING",
+        "created_at": None,
+        "notes": "ignored",
+    }
+
+    [rec] = records_from_rows(OrderSummary, [row])
+
+    assert rec == OrderSummary("o1", "widget", 1, "PENDING", None)
+
+
+def test_my_orders_endpoint_serializes_records(
+    monkeypatch: pytest.MonkeyPatch, as_user: dict[str, Any], recording_pool: Any
+) -> None:
+    as_user["sub"] = str(UID)
+    pool = recording_pool({"": [(OID, "widget", 3, "PENDING", CREATED)]})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get("/orders/me")
+
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == [
+        {
+            "id": str(OID),
+            "item_name": "widget",
+            "quantity": 3,
+            "status": "PENDING",
+            "created_at": "2025-01-01T12:00:00.123456+00:00",
+        }
+    ]
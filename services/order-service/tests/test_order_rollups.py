@@ -0,0 +1,89 @@
+from datetime import UTC, datetime
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.rollups import run_rollup_pass
+from app.settings import settings
+
+client = TestClient(app)
+
+WATERMARK = datetime(2025, 1, 1, 12, 0, 30, tzinfo=UTC)
+
+
+@pytest.mark.asyncio
+async def test_pass_drains_backlog_in_batches(
+    monkeypatch: pytest.MonkeyPatch, recording_pool: Any
+) -> None:
+    # three batches: two full, one short
+    pool = recording_pool(
+        {
+            "INSERT INTO order_rollups": [
+                [{"events": 2}],
+                [{"events": 2}],
+                [{"events": 1}],
+            ]
+        },
+    )
+    monkeypatch.setattr(settings, "ORDER_ROLLUP_BATCH_SIZE", 2)
+    monkeypatch.setattr("app.sharding.get_db_pool", lambda: pool)
+
+    assert await run_rollup_pass() == 5
+
+    assert len(pool.calls) == 3
+    sql, params = pool.calls[0]
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert params == (
+        "order_events",
+        settings.CHANGES_SETTLE_SECONDS,
+        2,
+        "order_events",
+    )
+
+
+def test_report_reads_rollups_only(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    bucket = datetime(2025, 1, 1, 12, 0, tzinfo=UTC)
+    pool = recording_pool(
+        {
+            "FROM order_rollups": [
+                {
+                    "bucket_start": bucket,
+                    "status": "PENDING",
+                    "item_name": None,
+                    "orders": 7,
+                    "quantity": 12,
+                }
+            ],
+            "FROM order_rollup_watermark": [{"last_occurred_at": WATERMARK}],
+        },
+    )
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.get(
+        "/orders/admin/rollups",
+        params={"granularity": "minute", "by_item": "false", "status": "PENDING"},
+    )
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["as_of"] == WATERMARK.isoformat()
+    assert body["items"] == [
+        {
+            "bucket_start": "2025-01-01T12:00:00Z",
+            "status": "PENDING",
+            "item_name": None,
+            "orders": 7,
+            "quantity": 12,
+        }
+    ]
+    read = [sql for sql, _ in pool.calls]
+    assert not any("FROM orders" in sql or "order_events" in sql for sql in read)
+    sql, params = pool.calls[0]
+    assert "GROUP BY bucket_start, status" in sql
+    since, until = params[1], params[2]
+    assert (until - since).total_seconds() == 3600
+    assert params[3:5] == ("PENDING", "PENDING")
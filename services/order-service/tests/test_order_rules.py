@@ -0,0 +1,150 @@
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.main import app
+from app.models import OrderRule
+from app.rules import PendingBatch, evaluate, load_rules, run_rules_pass
+
+client = TestClient(app)
+
+RULES = [
+    OrderRule(name="spam", action="REJECT", notes_any=["test order", "FRAUD"]),
+    OrderRule(name="burst", action="REJECT", min_user_orders=20),
+    OrderRule(
+        name="small",
+        action="APPROVE",
+        max_quantity=5,
+        items=["widget", "gadget"],
+        notes_none=["urgent"],
+    ),
+]
+
+
+def _rows() -> list[dict[str, Any]]:
+    return [
+        {
+            "id": "o1",
+            "user_id": "u1",
+            "item_name": "widget",
+            "quantity": 2,
+            "notes": None,
+        },
+        {
+            "id": "o2",
+            "user_id": "u1",
+            "item_name": "widget",
+            "quantity": 9,
+            "notes": None,
+        },
+        {
+            "id": "o3",
+            "user_id": "u2",
+            "item_name": "gizmo",
+            "quantity": 1,
+            "notes": None,
+        },
+        {
+            "id": "o4",
+            "user_id": "u2",
+            "item_name": "gadget",
+            "quantity": 1,
+            "notes": "Fraud?",
+        },
+        {
+            "id": "o5",
+            "user_id": "u3",
+            "item_name": "gadget",
+            "quantity": 1,
+            "notes": "URGENT pls",
+        },
+        {
+            "id": "o6",
+            "user_id": "u4",
+            "item_name": "widget",
+            "quantity": 1,
+            "notes": None,
+        },
+    ]
+
+
+def test_first_matching_rule_decides() -> None:
+    batch = PendingBatch.from_rows(_rows())
+    batch.velocity[:] = [1, 1, 1, 1, 1, 25]
+
+    matched = evaluate(RULES, batch)
+
+    # o6 would pass "small" but the earlier "burst" rule claims it
+    assert matched.tolist() == [2, -1, -1, 0, -1, 1]
+
+
+def test_load_rules(tmp_path: Path) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(
+        json.dumps([{"name": "small", "action": "APPROVE", "max_quantity": 3}])
+    )
+
+    assert load_rules(str(path))[0].max_quantity == 3
+    assert load_rules(str(tmp_path / "missing.json")) == []
+
+
+def test_rule_without_predicates_is_rejected(tmp_path: Path, as_admin: Any) -> None:
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "everything", "action": "APPROVE"}]))
+
+    with pytest.raises(ValidationError, match="no predicates"):
+        load_rules(str(path))
+    r = client.post(
+        "/orders/admin/rules/dry-run",
+        json=[{"name": "everything", "action": "REJECT", "exclude_items": []}],
+    )
+    assert r.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_enforce_pass_decides_in_one_statement(recording_pool: Any) -> None:
+    pool = recording_pool(
+        {
+            "SELECT o.id, o.user_id, n.name AS item_name": _rows(),
+            "GROUP BY user_id": [{"user_id": "u4", "count": 25}],
+            "WITH decided AS": [
+                {"id": "o1", "status": "APPROVED", "actor": "rule:small"},
+                {"id": "o4", "status": "REJECTED", "actor": "rule:spam"},
+            ],
+        },
+    )
+
+    report = await run_rules_pass(RULES, [(pool, None)], dry_run=False)
+
+    decide = [(sql, p) for sql, p in pool.calls if "WITH decided AS" in sql]
+    assert len(decide) == 1
+    ids, statuses, actors = decide[0][1]
+    assert ids == ["o1", "o4", "o6"]
+    assert statuses == ["APPROVED", "REJECTED", "REJECTED"]
+    assert actors == ["rule:small", "rule:spam", "rule:burst"]
+    # o6 lost a race with an admin: only rows still PENDING are counted
+    assert report["approved"] == 1 and report["rejected"] == 1
+    assert report["undecided"] == 3
+
+
+def test_dry_run_endpoint_reports_without_writing(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    pool = recording_pool({"SELECT o.id, o.user_id, n.name AS item_name": _rows()})
+    monkeypatch.setattr("app.orders.get_db_pool", pool)
+
+    r = client.post(
+        "/orders/admin/rules/dry-run",
+        json=[{"name": "small", "action": "APPROVE", "max_quantity": 5}],
+    )
+
+    assert r.status_code == 200
+    body = r.json()
+    assert body["dry_run"] is True
+    assert body["evaluated"] == 6 and body["approved"] == 5
+    assert body["rules"][0]["sample"] == ["o1", "o3", "o4", "o5", "o6"]
+    assert not any("UPDATE" in sql for sql, _ in pool.calls)
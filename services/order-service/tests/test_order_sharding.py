@@ -0,0 +1,117 @@
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.sharding import NUM_BUCKETS, BucketFrozenError, ShardRouter, user_bucket
+
+client = TestClient(app)
+
+USER_IDS = [f"00000000-0000-7000-8000-{n:012d}" for n in range(40)]
+
+
+def _user_on(router: ShardRouter, shard: int) -> str:
+    return next(u for u in USER_IDS if router.shard_for_user(u) == shard)
+
+
+def test_user_bucket_is_stable_and_canonical() -> None:
+    uid = USER_IDS[3]
+    assert user_bucket(uid) == user_bucket(uid.upper())
+    assert 0 <= user_bucket(uid) < NUM_BUCKETS
+    assert len({user_bucket(u) for u in USER_IDS}) > 1
+
+
+def test_router_map_overrides_and_frozen_buckets() -> None:
+    uid = USER_IDS[0]
+    bucket = user_bucket(uid)
+    router = ShardRouter(["p0", "p1", "p2"])
+    assert router.shard_for_user(uid) == bucket % 3
+
+    moved = ShardRouter(["p0", "p1", "p2"], {bucket: 2}, frozen=[bucket])
+
+    assert moved.pool_for_user(uid) == "p2"
+    with pytest.raises(BucketFrozenError):
+        moved.pool_for_user(uid, write=True)
+
+
+def test_admin_list_merges_shards_and_drops_unowned_copies(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    probe = ShardRouter(["p0", "p1"])
+    u0, u1 = _user_on(probe, 0), _user_on(probe, 1)
+    # a row for u1 left behind on shard 0 by an in-progress move
+    stale = make_order(2, user_id=u1)
+    shard0 = recording_pool(
+        {"FROM orders": [make_order(3, user_id=u0), stale, make_order(1, user_id=u0)]}
+    )
+    shard1 = recording_pool(
+        {"FROM orders": [make_order(4, user_id=u1), make_order(2, user_id=u1)]}
+    )
+    router = ShardRouter([shard0, shard1])
+    monkeypatch.setattr("app.orders.get_shard_router", lambda: router)
+
+    r = client.get("/orders/admin")
+
+    assert r.status_code == 200
+    assert [o["created_at"][17:19] for o in r.json()] == ["04", "03", "02", "01"]
+
+
+def test_get_order_locates_owning_shard(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    probe = ShardRouter(["p0", "p1"])
+    u1 = _user_on(probe, 1)
+    order = make_order(5, user_id=u1)
+    shard0 = recording_pool()
+    shard1 = recording_pool(
+        {"SELECT user_id FROM orders": [{"user_id": u1}], "": [order]}
+    )
+    router = ShardRouter([shard0, shard1])
+    monkeypatch.setattr("app.orders.get_shard_router", lambda: router)
+
+    r = client.get(f"/orders/{order['id']}")
+
+    assert r.status_code == 200
+    assert r.json()["user_id"] == u1
+
+
+def test_create_order_in_frozen_bucket_is_retryable(
+    monkeypatch: pytest.MonkeyPatch, as_user: dict[str, Any], recording_pool: Any
+) -> None:
+    uid = as_user["sub"] = USER_IDS[7]
+    router = ShardRouter([recording_pool()], frozen=[user_bucket(uid)])
+    monkeypatch.setattr("app.orders.get_shard_router", lambda: router)
+    monkeypatch.setattr("app.orders.get_order_spool", lambda: None)
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 1})
+
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_summary_sums_owned_counts(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    shard0 = recording_pool({"count(*)": [{"status": "PENDING", "count": 2}]})
+    shard1 = recording_pool(
+        {
+            "count(*)": [
+                {"status": "PENDING", "count": 1},
+                {"status": "APPROVED", "count": 4},
+            ]
+        }
+    )
+    monkeypatch.setattr(
+        "app.orders.get_shard_router", lambda: ShardRouter([shard0, shard1])
+    )
+
+    r = client.get("/orders/admin/summary")
+
+    assert r.json() == {"total": 7, "by_status": {"PENDING": 3, "APPROVED": 4}}
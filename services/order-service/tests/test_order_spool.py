@@ -0,0 +1,195 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+import psycopg
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.settings import settings
+from app.spool import OrderSpool
+
+client = TestClient(app)
+
+
+def _replay(fail_user: str | None = None):
+    """Answer for the replay INSERT: accepts every row, or raises an
+    IntegrityError for any batch containing `fail_user`."""
+
+    def insert(params: Any) -> list[dict[str, Any]]:
+        if fail_user is not None and fail_user in params[1]:
+            raise psycopg.errors.ForeignKeyViolation("unknown user")
+        return [{"id": i} for i in params[0]]
+
+    return {"": insert}
+
+
+class DownPool:
+    """Pool whose every checkout fails like a Postgres outage."""
+
+    def acquire(self):
+        raise psycopg.OperationalError("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_drain_replays_idempotently_and_truncates(
+    tmp_path: Path, recording_pool: Any
+) -> None:
+    spool = OrderSpool(tmp_path)
+    first = await spool.append("u1", "widget", 1, None)
+    await spool.append("u2", "gadget", 2, "n")
+    pool = recording_pool(_replay())
+
+    assert await spool.drain_once(pool, batch_size=10) == 2
+
+    sql, params = pool.calls[0]
+    assert "ON CONFLICT (id) DO NOTHING" in sql
+    assert params[0][0] == first["id"]
+    assert spool.pending == {}
+    assert spool.path.stat().st_size == 0
+    assert await spool.drain_once(pool, batch_size=10) == 0
+
+
+@pytest.mark.asyncio
+async def test_restart_resumes_from_offset_and_skips_torn_tail(
+    tmp_path: Path, recording_pool: Any
+) -> None:
+    spool = OrderSpool(tmp_path)
+    for n in range(3):
+        await spool.append(f"u{n}", "widget", 1, None)
+    await spool.drain_once(recording_pool(_replay()), batch_size=1)
+    with open(spool.path, "ab") as fh:
+        fh.write(b'{"id":"torn')
+
+    reopened = OrderSpool(tmp_path)
+
+    assert sorted(r["user_id"] for r in reopened.pending.values()) == ["u1", "u2"]
+
+
+@pytest.mark.asyncio
+async def test_poison_record_is_set_aside(tmp_path: Path, recording_pool: Any) -> None:
+    spool = OrderSpool(tmp_path)
+    await spool.append("u1", "widget", 1, None)
+    bad = await spool.append("ghost", "widget", 1, None)
+    pool = recording_pool(_replay(fail_user="ghost"))
+
+    assert await spool.drain_once(pool, 10) == 2
+
+    # the failed batch is retried row by row; only u1's row goes in
+    assert [p[1] for _, p in pool.calls] == [["u1", "ghost"], ["u1"], ["ghost"]]
+    assert bad["id"] in spool.rejected_path.read_text()
+
+
+def test_create_order_spools_when_db_is_down(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, as_user: Any
+) -> None:
+    spool = OrderSpool(tmp_path)
+    monkeypatch.setattr("app.orders.get_order_spool", lambda: spool)
+    monkeypatch.setattr("app.orders.get_db_pool", DownPool())
+
+    r = client.post("/orders/", json={"item_name": "widget", "quantity": 2})
+
+    assert r.status_code == 202
+    body = r.json()
+    assert body["status"] == "ACCEPTED"
+    assert body["id"] in spool.pending
+
+    got = client.get(f"/orders/{body['id']}")
+    assert got.status_code == 200
+    assert got.json()["status"] == "ACCEPTED"
+
+
+def test_create_order_without_spool_still_fails(
+    monkeypatch: pytest.MonkeyPatch, as_user: Any
+) -> None:
+    monkeypatch.setattr("app.orders.get_order_spool", lambda: None)
+    monkeypatch.setattr("app.orders.get_db_pool", DownPool())
+    no_raise = TestClient(app, raise_server_exceptions=False)
+
+    r = no_raise.post("/orders/", json={"item_name": "widget", "quantity": 2})
+
+    assert r.status_code == 500
+
+
+INFRA = Path(__file__).resolve().parents[3] / "infra/postgres"
+SCRATCH_SCHEMA = "order_spool_test"
+
+
+class ScratchPool:
+    """Opens a fresh connection per checkout, scoped to SCRATCH_SCHEMA."""
+
+    def __init__(self, dsn: str) -> None:
+        self.dsn = dsn
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        async with await psycopg.AsyncConnection.connect(
+            self.dsn, options=f"-c search_path={SCRATCH_SCHEMA},public"
+        ) as conn:
+            yield conn
+
+
+@pytest.fixture
+def scratch_db() -> Iterator[str]:
+    dsn = os.environ["DATABASE_URL"]
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {SCRATCH_SCHEMA} CASCADE")
+        conn.execute(f"CREATE SCHEMA {SCRATCH_SCHEMA}")
+        conn.execute(f"SET search_path = {SCRATCH_SCHEMA}, public")
+        # shard-prelude.sql stands in for the users table
+        for name in ("shard-prelude.sql", "uuid-v7.sql", "init-orders.sql"):
+            conn.execute((INFRA / name).read_text())
+    try:
+        yield dsn
+    finally:
+        with psycopg.connect(dsn, autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {SCRATCH_SCHEMA} CASCADE")
+
+
+@pytest.mark.skipif(
+    os.getenv("RUN_INTEGRATION", "0") != "1" or not os.getenv("DATABASE_URL"),
+    reason="Integration tests disabled by default (needs RUN_INTEGRATION=1 and DATABASE_URL)",
+)
+def test_replayed_order_reaches_a_changes_cursor_past_its_accept_time(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    as_admin: Any,
+    scratch_db: str,
+) -> None:
+    pool = ScratchPool(scratch_db)
+    monkeypatch.setattr("app.orders.get_db_pool", lambda: pool)
+    monkeypatch.setattr(settings, "CHANGES_SETTLE_SECONDS", 0.0)
+    user_id = str(uuid4())
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute(f"SET search_path = {SCRATCH_SCHEMA}, public")
+        conn.execute("INSERT INTO users (id) VALUES (%s)", (user_id,))
+    spool = OrderSpool(tmp_path)
+    spooled = asyncio.run(spool.append(user_id, "widget", 1, None))
+    time.sleep(0.01)
+    # an order that reached the database directly, after the spooled one
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute(f"SET search_path = {SCRATCH_SCHEMA}, public")
+        conn.execute(
+            "INSERT INTO orders (user_id, item_name_id, quantity) "
+            "VALUES (%s, intern_item_name('gadget'), 1)",
+            (user_id,),
+        )
+    first = client.get("/orders/changes").json()
+    assert [o["item_name"] for o in first["items"]] == ["gadget"]
+
+    assert asyncio.run(spool.drain_once(pool, batch_size=10)) == 1
+    r = client.get("/orders/changes", params={"since": first["next_cursor"]})
+
+    assert r.status_code == 200
+    (replayed,) = r.json()["items"]
+    assert replayed["id"] == spooled["id"]
+    created_at = datetime.fromisoformat(replayed["created_at"])
+    assert created_at == datetime.fromisoformat(spooled["created_at"])
+    assert datetime.fromisoformat(replayed["updated_at"]) > created_at
@@ -0,0 +1,135 @@
+import asyncio
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import execute_stream
+from app.main import app
+from app.settings import settings
+from app.sharding import ShardRouter
+
+client = TestClient(app)
+
+USER_IDS = [f"00000000-0000-7000-8000-{n:012d}" for n in range(40)]
+
+
+class _ServerCursorPool:
+    """Mimics psycopg's pool.connection() / conn.cursor(name=...) API."""
+
+    def __init__(self, rows: list[Any]) -> None:
+        self.rows = rows
+        self.fetches: list[int] = []
+        self.names: list[str | None] = []
+        self.closed = False
+
+    def connection(self):
+        pool = self
+
+        class Cursor:
+            pos = 0
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc: Any) -> None:
+                pool.closed = True
+
+            async def execute(self, sql: str, params: Any) -> None:
+                pass
+
+            async def fetchmany(self, size: int) -> list[Any]:
+                pool.fetches.append(size)
+                out = pool.rows[self.pos : self.pos + size]
+                self.pos += size
+                return out
+
+        class Conn:
+            def cursor(self, name: str | None = None):
+                pool.names.append(name)
+                return Cursor()
+
+        class ConnCM:
+            async def __aenter__(self):
+                return Conn()
+
+            async def __aexit__(self, *exc: Any) -> None:
+                pass
+
+        return ConnCM()
+
+
+def test_execute_stream_reads_a_named_cursor_chunk_by_chunk() -> None:
+    pool = _ServerCursorPool(list(range(5)))
+
+    async def collect() -> list[list[Any]]:
+        return [chunk async for chunk in execute_stream(pool, "SELECT 1", (), 2)]
+
+    assert asyncio.run(collect()) == [[0, 1], [2, 3], [4]]
+    assert pool.names == ["order_stream"]
+    assert pool.fetches == [2, 2, 2, 2]
+    assert pool.closed
+
+
+def test_streamed_listing_matches_the_buffered_one(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    rows = [make_order(n, user_id=USER_IDS[0]) for n in range(5, 0, -1)]
+    monkeypatch.setattr("app.orders.get_db_pool", recording_pool({"": rows}))
+    monkeypatch.setattr(settings, "ORDER_STREAM_CHUNK_ROWS", 2)
+
+    for path in ("/orders/me", f"/orders/user/{USER_IDS[0]}", "/orders/admin"):
+        buffered = client.get(path)
+        streamed = client.get(path, params={"stream": "true"})
+        assert streamed.status_code == 200
+        assert streamed.headers["content-type"] == "application/json"
+        assert streamed.content == buffered.content
+
+
+def test_empty_stream_is_an_empty_array(
+    monkeypatch: pytest.MonkeyPatch, as_admin: Any, recording_pool: Any
+) -> None:
+    monkeypatch.setattr("app.orders.get_db_pool", recording_pool())
+
+    r = client.get("/orders/me", params={"stream": "true"})
+
+    assert r.status_code == 200 and r.json() == []
+
+
+def test_admin_stream_merges_shards_in_order(
+    monkeypatch: pytest.MonkeyPatch,
+    as_admin: Any,
+    recording_pool: Any,
+    make_order: Any,
+) -> None:
+    probe = ShardRouter(["p0", "p1"])
+    u0 = next(u for u in USER_IDS if probe.shard_for_user(u) == 0)
+    u1 = next(u for u in USER_IDS if probe.shard_for_user(u) == 1)
+    # a row for u1 left behind on shard 0 by an in-progress move
+    on_shard0 = [(u0, 6), (u1, 4), (u0, 3), (u0, 1)]
+    shard0 = recording_pool({"": [make_order(n, user_id=u) for u, n in on_shard0]})
+    shard1 = recording_pool({"": [make_order(n, user_id=u1) for n in (5, 4, 2)]})
+    router = ShardRouter([shard0, shard1])
+    monkeypatch.setattr("app.orders.get_shard_router", lambda: router)
+    monkeypatch.setattr(settings, "ORDER_STREAM_CHUNK_ROWS", 2)
+
+    r = client.get("/orders/admin", params={"stream": "true"})
+
+    assert r.status_code == 200
+    assert [o["created_at"][17:19] for o in r.json()] == [
+        "06",
+        "05",
+        "04",
+        "03",
+        "02",
+        "01",
+    ]
+
+
+def test_stream_cannot_be_paginated(as_admin: Any) -> None:
+    r = client.get("/orders/admin", params={"stream": "true", "limit": 10})
+
+    assert r.status_code == 400
@@ -0,0 +1,153 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import psycopg
+import pytest
+
+from app.scheduler import (
+    LEADER_ALIVE_SQL,
+    TRY_LEADER_LOCK_SQL,
+    IntervalSchedule,
+    PeriodicTask,
+    Scheduler,
+    parse_schedule,
+)
+
+T0 = datetime(2026, 3, 14, 10, 7, 30, tzinfo=UTC)
+
+
+@pytest.mark.parametrize(
+    ("spec", "expected"),
+    [
+        ("*/15 * * * *", datetime(2026, 3, 14, 10, 15, tzinfo=UTC)),
+        ("0 3 * * *", datetime(2026, 3, 15, 3, 0, tzinfo=UTC)),
+        ("30 2 1 * *", datetime(2026, 4, 1, 2, 30, tzinfo=UTC)),
+        # 2026-03-14 is a Saturday; 7 means Sunday
+        ("0 0 * * 7", datetime(2026, 3, 15, 0, 0, tzinfo=UTC)),
+        ("0 9-17/4 * * 1-5", datetime(2026, 3, 16, 9, 0, tzinfo=UTC)),
+        # day-of-month OR day-of-week when both are set
+        ("0 0 20 * 1", datetime(2026, 3, 16, 0, 0, tzinfo=UTC)),
+        ("@daily", datetime(2026, 3, 15, 0, 0, tzinfo=UTC)),
+    ],
+)
+def test_cron_next_slot(spec: str, expected: datetime) -> None:
+    assert parse_schedule(spec).next_after(T0) == expected
+
+
+def test_bad_schedules_are_rejected() -> None:
+    for spec in ("* * * *", "61 * * * *", "*/0 * * * *", "@every 0"):
+        with pytest.raises(ValueError):
+            parse_schedule(spec)
+    assert parse_schedule("@every 90s") == IntervalSchedule(90.0)
+
+
+class LockServer:
+    """Session-level advisory locks shared by fake connections."""
+
+    def __init__(self) -> None:
+        self.holder: FakeConn | None = None
+
+
+class FakeConn:
+    def __init__(self, server: LockServer) -> None:
+        self.server = server
+        self.broken = False
+        self.closed = False
+        self.sql: list[str] = []
+
+    async def execute(self, sql: str, params: Any):
+        if self.broken:
+            raise psycopg.OperationalError("server closed the connection")
+        self.sql.append(sql)
+        if sql == TRY_LEADER_LOCK_SQL:
+            if self.server.holder in (None, self):
+                self.server.holder = self
+            row = (self.server.holder is self,)
+        else:
+            row = (1,)
+
+        class Cursor:
+            async def fetchone(self):
+                return row
+
+        return Cursor()
+
+    async def close(self) -> None:
+        self.closed = True
+        if self.server.holder is self:
+            self.server.holder = None
+
+
+def _scheduler(server: LockServer, tasks: dict[str, PeriodicTask]) -> Scheduler:
+    async def connect() -> FakeConn:
+        return FakeConn(server)
+
+    return Scheduler(connect, "test:maintenance", tasks)
+
+
+def test_only_the_leader_runs_tasks_and_a_follower_takes_over() -> None:
+    server = LockServer()
+    runs: list[str] = []
+
+    def tasks(name: str) -> dict[str, PeriodicTask]:
+        async def run() -> None:
+            runs.append(name)
+
+        return {"t": PeriodicTask("t", IntervalSchedule(60), run)}
+
+    a = _scheduler(server, tasks("a"))
+    b = _scheduler(server, tasks("b"))
+
+    async def scenario() -> None:
+        await a.tick(T0)
+        await b.tick(T0)
+        await asyncio.sleep(0)
+        assert (a.leader, b.leader) == (True, False)
+        assert runs == ["a"]
+
+        # the leader's connection drops: it steps down, the lock is freed
+        a._conn.broken = True
+        await a.tick(T0 + timedelta(seconds=5))
+        assert not a.leader and server.holder is None
+        await b.tick(T0 + timedelta(seconds=5))
+        await asyncio.sleep(0)
+        assert b.leader and runs == ["a", "b"]
+        assert b._conn.sql == [TRY_LEADER_LOCK_SQL] * 2
+        await b.tick(T0 + timedelta(seconds=10))
+        assert b._conn.sql[-1] == LEADER_ALIVE_SQL
+
+    asyncio.run(scenario())
+
+
+def test_overlapping_slots_are_skipped_and_jitter_delays_the_start(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr("app.scheduler.random.uniform", lambda a, b: b)
+    release = asyncio.Event()
+    starts: list[datetime] = []
+    clock = [T0]
+
+    async def slow() -> None:
+        starts.append(clock[0])
+        await release.wait()
+
+    task = PeriodicTask("slow", IntervalSchedule(10), slow, jitter=2)
+    scheduler = _scheduler(LockServer(), {"slow": task})
+
+    async def scenario() -> None:
+        for offset in (0, 2, 12, 22):
+            clock[0] = T0 + timedelta(seconds=offset)
+            await scheduler.tick(clock[0])
+            await asyncio.sleep(0)
+        # the first run started after its jitter; later slots found it running
+        assert starts == [T0 + timedelta(seconds=2)]
+        release.set()
+        await asyncio.sleep(0)
+        clock[0] = T0 + timedelta(seconds=34)
+        await scheduler.tick(clock[0])
+        await asyncio.sleep(0)
+        assert starts[-1] == clock[0]
+        await scheduler.stop()
+
+    asyncio.run(scenario())
@@ -15,6 +15,7 @@ from .observability import (
     request_id_middleware,
     setup_logging,
 )
+from .records import parse_orders
 from .schemas import OrderForm
 from .security import (
     build_auth_headers_from_request,
@@ -275,6 +276,33 @@ async def order_page(request: Request):
     return templates.TemplateResponse("order.html", {"request": request})
 
 
+@app.get("/order/suggest", response_class=HTMLResponse)
+async def order_item_suggest(request: Request, item_name: str = "") -> Any:
+    """HTMX fragment: `<option>`s for the item-name datalist as the user types.
+
+    order-service answers from its in-memory prefix index, so a keystroke
+    costs one hop and no database query; any failure just yields no options.
+    """
+    suggestions: list[dict[str, Any]] = []
+    if item_name.strip():
+        headers = await build_auth_headers_from_request(request)
+        async with httpx.AsyncClient() as client:
+            headers = inject_request_id_headers(headers, request)
+            try:
+                r = await client.get(
+                    f"{ORDER_SERVICE_URL}/items/suggest",
+                    params={"q": item_name[:255]},
+                    headers=headers,
+                )
+                payload: Any = r.json() if r.status_code == 200 else []
+            except (httpx.HTTPError, ValueError):
+                payload = []
+        suggestions = _normalize_list(payload)
+    return templates.TemplateResponse(
+        "_item_suggestions.html", {"request": request, "suggestions": suggestions}
+    )
+
+
 @app.post("/order", response_class=HTMLResponse)
 async def submit_order(request: Request) -> Any:
     form = await request.form()
@@ -329,11 +357,7 @@ async def submit_order(request: Request) -> Any:
             raw: Any = r_orders.json() if r_orders.status_code == 200 else []
         except ValueError:
             raw = []
-        orders = _normalize_list(raw)
-        for o in orders:
-            oid = o.get("id")
-            if oid is not None:
-                o["id"] = str(oid)
+        orders = parse_orders(raw)
 
     # If request is from HTMX, return a small fragment (confirmation) to swap into page
     if _is_htmx(request):
@@ -357,11 +381,7 @@ async def orders_page(request: Request) -> Any:
             raw_payload: Any = r.json() if r.status_code == 200 else []
         except ValueError:
             raw_payload = []
-    orders = _normalize_list(raw_payload)
-    for o in orders:
-        oid = o.get("id")
-        if oid is not None:
-            o["id"] = str(oid)
+    orders = parse_orders(raw_payload)
     return templates.TemplateResponse(
         "orders.html", {"request": request, "orders": orders}
     )
@@ -406,11 +426,7 @@ async def admin_page(request: Request) -> Any:
         except ValueError:
             raw = []
 
-    orders = _normalize_list(raw)
-    for o in orders:
-        oid = o.get("id")
-        if oid is not None:
-            o["id"] = str(oid)
+    orders = parse_orders(raw)
 
     return templates.TemplateResponse(
         "admin.html", {"request": request, "orders": orders, "status_code": status_code}
@@ -0,0 +1,49 @@
+"""Slotted order records for rendering order-service listings.
+
+A listing is checked and coerced once, as it arrives from order-service,
+into `__slots__` dataclasses that the templates read directly. That replaces
+the per-row dict copies and the follow-up id normalisation loops, and a slot
+record is a fraction of the size of the dict it replaces.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class OrderRow:
+    id: str
+    item_name: str | None = None
+    quantity: int | None = None
+    status: str | None = None
+    created_at: str | None = None
+    user_id: str | None = None
+
+
+def _opt_str(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+def parse_orders(payload: Any) -> list[OrderRow]:
+    """Validate an order-service listing; entries without an id are dropped."""
+    if not isinstance(payload, list):
+        return []
+    out: list[OrderRow] = []
+    for item in payload:  # pyright: ignore[reportUnknownVariableType]
+        if not isinstance(item, dict) or item.get("id") is None:
+            continue
+        quantity = item.get("quantity")
+        try:
+            out.append(
+                OrderRow(
+                    id=str(item["id"]),
+                    item_name=_opt_str(item.get("item_name")),
+                    quantity=None if quantity is None else int(quantity),
+                    status=_opt_str(item.get("status")),
+                    created_at=_opt_str(item.get("created_at")),
+                    user_id=_opt_str(item.get("user_id")),
+                )
+            )
+        except (TypeError, ValueError):
+            continue
+    return out
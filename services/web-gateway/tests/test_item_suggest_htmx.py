@@ -0,0 +1,109 @@
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+from pytest_types import MonkeyPatch
+
+from app.main import app
+
+
+class DummyResponse:
+    def __init__(self, data: Any, status_code: int = 200) -> None:
+        self._data = data
+        self.status_code = status_code
+
+    def json(self) -> Any:
+        return self._data
+
+
+class DummyClient:
+    def __init__(self, seen: dict[str, Any], response: DummyResponse | Exception):
+        self._seen = seen
+        self._response = response
+
+    async def __aenter__(self) -> "DummyClient":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        return False
+
+    async def get(
+        self,
+        url: str,
+        params: dict[str, str] | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> DummyResponse:
+        self._seen["url"] = url
+        self._seen["params"] = dict(params or {})
+        self._seen["headers"] = dict(headers or {})
+        if isinstance(self._response, Exception):
+            raise self._response
+        return self._response
+
+
+def _patch(
+    monkeypatch: MonkeyPatch, response: DummyResponse | Exception
+) -> dict[str, Any]:
+    seen: dict[str, Any] = {}
+    monkeypatch.setattr(
+        httpx, "AsyncClient", lambda *a, **kw: DummyClient(seen, response)
+    )
+    return seen
+
+
+def test_suggest_renders_datalist_options(monkeypatch: MonkeyPatch) -> None:
+    seen = _patch(
+        monkeypatch,
+        DummyResponse(
+            [
+                {"item_name": "Widget", "orders": 12},
+                {"item_name": "Widget <XL>", "orders": 3},
+            ]
+        ),
+    )
+
+    client = TestClient(app)
+    r = client.get(
+        "/order/suggest",
+        params={"item_name": "wid"},
+        headers={"Authorization": "Bearer token-123"},
+    )
+
+    assert r.status_code == 200
+    assert seen["url"].endswith("/items/suggest")
+    assert seen["params"] == {"q": "wid"}
+    assert seen["headers"].get("Authorization") == "Bearer token-123"
+    assert '<option value="Widget">' in r.text
+    # names are escaped like any other user-supplied text
+    assert "Widget &lt;XL&gt;" in r.text
+
+
+def test_suggest_skips_blank_input_and_tolerates_errors(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    seen = _patch(monkeypatch, DummyResponse({"detail": "nope"}, status_code=503))
+    client = TestClient(app)
+
+    blank = client.get("/order/suggest", params={"item_name": "  "})
+    assert blank.status_code == 200 and "<option" not in blank.text
+    assert "url" not in seen
+
+    failed = client.get("/order/suggest", params={"item_name": "w"})
+    assert failed.status_code == 200 and "<option" not in failed.text
+
+
+def test_suggest_renders_no_options_when_order_service_is_down(
+    monkeypatch: MonkeyPatch,
+) -> None:
+    _patch(monkeypatch, httpx.ConnectError("connection refused"))
+
+    r = TestClient(app).get("/order/suggest", params={"item_name": "w"})
+
+    assert r.status_code == 200 and "<option" not in r.text
+
+
+def test_order_page_wires_autocomplete() -> None:
+    r = TestClient(app).get("/order")
+
+    assert 'hx-get="/order/suggest"' in r.text
+    assert 'list="item-suggestions"' in r.text
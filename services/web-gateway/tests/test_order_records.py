@@ -0,0 +1,58 @@
+from typing import Any
+
+import httpx
+from fastapi.testclient import TestClient
+from pytest_types import MonkeyPatch
+
+from app.main import app
+from app.records import OrderRow, parse_orders
+
+
+def test_parse_orders_validates_once() -> None:
+    rows = parse_orders(
+        [
+            {"id": 7, "item_name": "widget", "quantity": "2", "status": "PENDING"},
+            {"item_name": "no id"},
+            {"id": "bad", "quantity": "many"},
+            "not a mapping",
+        ]
+    )
+
+    assert rows == [OrderRow(id="7", item_name="widget", quantity=2, status="PENDING")]
+    assert not hasattr(rows[0], "__dict__")
+    assert parse_orders({"detail": "nope"}) == []
+
+
+class DummyResponse:
+    status_code = 200
+
+    def json(self) -> Any:
+        return [
+            {
+                "id": "o1",
+                "item_name": "widget",
+                "quantity": 2,
+                "status": "PENDING",
+                "created_at": "2025-01-01T12:00:00+00:00",
+            }
+        ]
+
+
+class DummyClient:
+    async def __aenter__(self) -> "DummyClient":
+        return self
+
+    async def __aexit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        return False
+
+    async def get(self, url: str, headers: dict[str, str] | None = None) -> Any:
+        return DummyResponse()
+
+
+def test_orders_page_renders_records(monkeypatch: MonkeyPatch) -> None:
+    monkeypatch.setattr(httpx, "AsyncClient", lambda *a, **kw: DummyClient())
+
+    r = TestClient(app).get("/orders", headers={"Authorization": "Bearer t"})
+
+    assert r.status_code == 200
+    assert "<td>o1</td>" in r.text and "<td>widget</td>" in r.text
@@ -0,0 +1,137 @@
+import asyncio
+import math
+import random
+import uuid
+
+import httpx
+import pytest
+
+from scripts import load_test
+from scripts.load_test import (
+    Histogram,
+    Window,
+    build_parser,
+    build_windows,
+    find_saturation,
+)
+
+
+def test_histogram_keeps_three_significant_digits():
+    rng = random.Random(1)
+    values = sorted(rng.lognormvariate(9, 1.5) for _ in range(20_000))
+    hist = Histogram()
+    for value in values:
+        hist.record(value / 1_000_000)
+
+    for p in (50, 90, 99, 99.9):
+        exact = values[math.ceil(len(values) * p / 100) - 1] / 1000
+        assert hist.percentile(p) == pytest.approx(exact, rel=1e-3, abs=0.001)
+    assert hist.percentile(100) == pytest.approx(values[-1] / 1000, abs=0.001)
+    for value in (0, 1, 2047, 2048, 2049, 123_456, 10**9):
+        idx = Histogram.index(value)
+        assert Histogram.highest_equivalent(idx) >= value
+        assert Histogram.index(Histogram.highest_equivalent(idx)) == idx
+
+
+def test_histogram_round_trips_and_merges():
+    a, b = Histogram(), Histogram()
+    for ms in range(1, 101):
+        (a if ms % 2 else b).record(ms / 1000)
+
+    merged = Histogram.from_dict(a.to_dict())
+    merged.merge(Histogram.from_dict(b.to_dict()))
+
+    assert merged.total == 100
+    assert merged.percentile(50) == pytest.approx(50, rel=1e-3)
+    assert merged.summary()["min"] == 1 and merged.summary()["max"] == 100
+
+
+def test_load_shapes_and_saturation():
+    ramp = build_windows(build_parser().parse_args(["--rate", "10", "--ramp-to", "50", "--duration", "40"]))
+    assert [(w.rate_from, w.rate_to) for w in ramp] == [(10, 20), (20, 30), (30, 40), (40, 50)]
+    steps = build_windows(build_parser().parse_args(["--steps", "5,10", "--step-duration", "3"]))
+    assert [(w.start, w.offered) for w in steps] == [(0, 5), (3, 10)]
+
+    healthy, slow = Window(0, 10, 20, 20, ok=200), Window(10, 10, 40, 40, ok=400)
+    healthy.response.record(0.050)
+    slow.response.record(0.900)
+    assert find_saturation([healthy], 500, 0.01) is None
+    sat = find_saturation([healthy, slow], 500, 0.01)
+    assert (sat["last_good_rps"], sat["first_bad_rps"]) == (20, 40)
+    assert sat["reasons"] == ["p99 900ms > 500ms"]
+
+
+def fake_services(health_delay: float = 0.0):
+    """An httpx transport answering like auth-service, order-service and the gateway."""
+    lock = asyncio.Lock()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        port, path, method = request.url.port, request.url.path, request.method
+        cookies = dict(
+            pair.split("=", 1) for pair in request.headers.get("cookie", "").split("; ") if pair
+        )
+        if port == 8001 and path == "/register":
+            return httpx.Response(201, json={"username": "x"})
+        if port == 8001 and path == "/token":
+            return httpx.Response(200, json={"access_token": "tok", "refresh_token": "r"})
+        if port == 8002 and path == "/health":
+            async with lock:
+                await asyncio.sleep(health_delay)
+            return httpx.Response(200, json={"status": "ok"})
+        if port == 8002 and path == "/orders/" and method == "POST":
+            return httpx.Response(201, json={"id": str(uuid.uuid4())})
+        if port == 8002 and path in ("/orders/me", "/orders/admin"):
+            return httpx.Response(200, json=[{"id": str(uuid.uuid4())}])
+        if port == 8002 and path.endswith("/approve"):
+            return httpx.Response(200, json={"status": "APPROVED"})
+        if port == 8000 and path == "/login":
+            headers = [("set-cookie", "access_token=tok"), ("set-cookie", "csrf_token=c1")]
+            return httpx.Response(303, headers=headers)
+        if port == 8000 and path == "/order":
+            form = dict(pair.split("=", 1) for pair in request.content.decode().split("&"))
+            return httpx.Response(200 if form["csrf_token"] == cookies["csrf_token"] else 403)
+        if port == 8000 and path == "/orders":
+            return httpx.Response(200)
+        if port == 8000 and path.startswith("/admin/"):
+            ok = request.headers.get("x-csrf-token") == cookies.get("csrf_token")
+            return httpx.Response(200 if ok else 403)
+        return httpx.Response(404)
+
+    return httpx.MockTransport(handler)
+
+
+def run(argv, transport):
+    args = build_parser().parse_args(argv)
+    args.started_at = "now"
+    mix = load_test.parse_mix(args.mix)
+    return asyncio.run(load_test.run_load(args, mix, transport=transport))
+
+
+def test_every_scenario_runs_against_the_services():
+    mix = ",".join(load_test.SCENARIOS)
+    report = run(
+        ["--mix", mix, "--rate", "300", "--duration", "1", "--window", "0.5", "--warmup", "0",
+         "--users", "5", "--admin-user", "admin", "--admin-password", "pw", "--arrivals", "uniform"],
+        fake_services(),
+    )
+
+    assert report["totals"]["errors"] == 0
+    assert set(report["scenarios"]) == set(load_test.SCENARIOS)
+    assert report["steps"]["gateway_order_form"]["statuses"].keys() == {"200"}
+    assert report["steps"]["gateway_admin_approve"]["statuses"].keys() == {"200"}
+    assert sum(w["arrivals"] for w in report["windows"]) == pytest.approx(300, abs=2)
+    assert report["saturation"] is None
+
+
+def test_response_time_counts_the_queue_behind_a_slow_server():
+    # the server takes 20ms per request, one at a time (50/s); 100/s are offered
+    report = run(
+        ["--mix", "health", "--rate", "100", "--duration", "1", "--window", "1", "--warmup", "0",
+         "--users", "1", "--max-inflight", "2", "--arrivals", "uniform"],
+        fake_services(health_delay=0.02),
+    )
+
+    health = report["scenarios"]["health"]
+    assert health["service_ms"]["p99"] < 100
+    assert health["response_ms"]["p99"] > 500
+    assert report["saturation"]["first_bad_rps"] == 100
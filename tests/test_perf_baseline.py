@@ -0,0 +1,137 @@
+import json
+
+import pytest
+
+from scripts import benchmark, perf_baseline
+from scripts.load_test import Histogram
+from scripts.perf_baseline import (
+    budget_violations,
+    compare_metric,
+    extract,
+    metric,
+    rank_interval,
+)
+
+
+def run_with(name, value, ci=None, better="lower"):
+    return {"metrics": {name: metric(value, better, ci)}}
+
+
+def test_rank_interval_brackets_the_quantile():
+    assert rank_interval(1000, 0.5) == (469, 531)
+    lo, hi = rank_interval(100, 0.99)
+    assert lo < 99 <= hi == 100
+
+
+def test_noise_test_with_three_or_more_baseline_runs():
+    runs = [run_with("p99_ms", v) for v in (100, 104, 97, 101)]
+
+    slower = compare_metric("p99_ms", metric(130, "lower"), runs, 0.10)
+    within_tolerance = compare_metric("p99_ms", metric(108, "lower"), runs, 0.10)
+    faster = compare_metric("p99_ms", metric(70, "lower"), runs, 0.10)
+
+    assert (slower["verdict"], slower["baseline"]) == ("REGRESSED", 100.5)
+    assert within_tolerance["verdict"] == "ok"
+    assert faster["verdict"] == "improved"
+    # noisy history: 30% worse is still within 3 robust standard deviations
+    noisy = [run_with("p99_ms", v) for v in (60, 100, 140, 80, 120)]
+    assert compare_metric("p99_ms", metric(130, "lower"), noisy, 0.10)["verdict"] == "ok"
+
+
+def test_confidence_intervals_with_one_baseline_run():
+    runs = [run_with("create_order.throughput_rps", 100, [95, 105], better="higher")]
+
+    dropped = compare_metric("create_order.throughput_rps", metric(80, "higher", [76, 84]), runs, 0.10)
+    overlapping = compare_metric("create_order.throughput_rps", metric(85, "higher", [70, 98]), runs, 0.10)
+
+    assert (dropped["verdict"], dropped["test"]) == ("REGRESSED", "95% CIs apart")
+    assert (overlapping["verdict"], overlapping["test"]) == ("ok", "95% CIs overlap")
+    untested = compare_metric("x.p50_ms", metric(2, "lower"), [run_with("x.p50_ms", 1)], 0.10)
+    assert (untested["verdict"], untested["test"]) == ("REGRESSED", "tolerance only")
+
+
+def load_test_report(latencies_ms):
+    hist = Histogram()
+    for ms in latencies_ms:
+        hist.record(ms / 1000)
+    scenario = {"ok": hist.total, "errors": 1, "throughput_rps": hist.total / 10, "histogram": hist.to_dict()}
+    return {
+        "meta": {"shape": "constant", "mix": {"list_orders": 5.0, "create_order": 3.0}},
+        "totals": {"elapsed_s": 10},
+        "scenarios": {"create_order": scenario},
+        "windows": [],
+    }
+
+
+def test_extract_reads_load_test_histograms():
+    kind, suite, metrics = extract(load_test_report(range(1, 1001)))
+
+    assert (kind, suite) == ("load_test", "load_test:constant:create_order=3,list_orders=5")
+    p99 = metrics["create_order.p99_ms"]
+    assert p99["value"] == pytest.approx(990, rel=1e-3)
+    assert p99["ci"][0] < 990 < p99["ci"][1]
+    assert metrics["create_order.error_rate"]["value"] == pytest.approx(1 / 1001)
+    assert metrics["create_order.throughput_rps"]["better"] == "higher"
+
+
+def test_budgets_match_suite_and_metric_globs():
+    budgets = [
+        {"suite": "load_test:*", "metric": "*.p95_ms", "max": 500},
+        {"suite": "load_test:*", "metric": "*.throughput_rps", "min": 50},
+        {"suite": "benchmark:*", "metric": "p95_ms", "max": 1},
+    ]
+    metrics = {
+        "create_order.p95_ms": metric(620, "lower"),
+        "list_orders.p95_ms": metric(80, "lower"),
+        "create_order.throughput_rps": metric(40, "higher"),
+    }
+
+    assert budget_violations("load_test:constant:x", metrics, budgets) == [
+        "create_order.p95_ms 620 > budget 500",
+        "create_order.throughput_rps 40 < budget 50",
+    ]
+
+
+def test_benchmark_health_p95_budget_comes_from_the_budgets_file():
+    slow = [float(ms) for ms in range(100, 300)]
+
+    assert benchmark.budget_violations("http://localhost:8001/health", slow, 0, perf_baseline.BUDGETS) == [
+        "p95_ms 289 > budget 200"
+    ]
+    assert benchmark.budget_violations("http://localhost:8001/orders/me", slow, 0, perf_baseline.BUDGETS) == []
+
+
+def test_benchmark_error_rate_budget_is_checked():
+    fast = [1.0] * 95
+
+    assert benchmark.budget_violations("http://localhost:8001/orders/me", fast, 5, perf_baseline.BUDGETS) == [
+        "error_rate 0.05 > budget 0.01"
+    ]
+
+
+def test_compare_handles_a_benchmark_file_without_samples(tmp_path, capsys):
+    result = tmp_path / "run.json"
+    result.write_text(json.dumps({"meta": {"url": "http://x/health"}, "requests": 3, "errors": 3, "latencies_ms": []}))
+
+    assert extract(json.loads(result.read_text()))[2] == {"error_rate": metric(1.0, "lower")}
+    assert perf_baseline.main(["--store", str(tmp_path / "h.jsonl"), "compare", str(result)]) == 1
+    assert "error_rate 1 > budget 0.01" in capsys.readouterr().out
+
+
+def test_record_compare_and_trend(tmp_path, capsys):
+    store = tmp_path / "history.jsonl"
+    result = tmp_path / "run.json"
+    for shift in (0, 1, -1):
+        result.write_text(json.dumps(load_test_report([ms + shift for ms in range(1, 1001)])))
+        assert perf_baseline.main(["--store", str(store), "record", str(result), "--label", "base"]) == 0
+    result.write_text(json.dumps(load_test_report([ms * 1.5 for ms in range(1, 1001)])))
+
+    assert perf_baseline.main(["--store", str(store), "compare", str(result), "--json", str(tmp_path / "cmp.json")]) == 1
+    comparison = json.loads((tmp_path / "cmp.json").read_text())
+    assert set(comparison["regressions"]) == {"create_order.p50_ms", "create_order.p95_ms", "create_order.p99_ms"}
+    assert len(store.read_text().splitlines()) == 3
+
+    capsys.readouterr()
+    assert perf_baseline.main(["--store", str(store), "trend", "--metric", "*.p99_ms"]) == 0
+    out = capsys.readouterr().out
+    assert "create_order.p99_ms" in out and "3 run(s)" in out
@@ -0,0 +1,115 @@
+import os
+import re
+
+import pytest
+
+from scripts import query_plans
+from scripts.query_plans import PlanCase, check_plan, outline, plan_nodes, render
+
+ROWS = int(os.getenv("QUERY_PLAN_ROWS", "1000000"))
+USERS = int(os.getenv("QUERY_PLAN_USERS", "10000"))
+ITEMS = int(os.getenv("QUERY_PLAN_ITEMS", "1000"))
+SCHEMA = "plan_check"
+
+CASES = query_plans.plan_cases(ROWS, USERS, ITEMS)
+
+
+def test_every_sql_constant_has_a_plan_case():
+    constants = set(query_plans.sql_constants())
+    planned = {case.name for case in CASES if ":admin:" not in case.name}
+
+    assert constants - planned - set(query_plans.NOT_PLANNED) == set()
+    assert planned - constants == set()
+    assert set(query_plans.NOT_PLANNED) - constants == set()
+
+
+def test_sql_constants_use_percent_only_in_placeholders():
+    # psycopg reads any other `%` as a broken placeholder; use mod() instead
+    stray = {
+        name
+        for name, sql in query_plans.sql_constants().items()
+        if "%" in re.sub(r"%(s|%|\(\w+\)s)", "", sql)
+    }
+    assert stray == set()
+
+
+USER_ORDERS_PLAN = {
+    "Node Type": "Sort",
+    "Plan Rows": 4000,
+    "Sort Key": ["o.created_at DESC"],
+    "Plans": [
+        {
+            "Node Type": "Seq Scan",
+            "Relation Name": "orders",
+            "Plan Rows": 4000,
+            "Filter": "(user_id = $1)",
+        }
+    ],
+}
+
+
+def test_check_plan_flags_scans_sorts_missing_indexes_and_estimates():
+    case = PlanCase(
+        "orders.USER_ORDERS_SQL",
+        "SELECT ...",
+        indexes=("orders_user_id_created_at_idx",),
+        max_rows=1000,
+        sort_rows=100,
+    )
+    nodes = plan_nodes(USER_ORDERS_PLAN)
+
+    problems = check_plan(case, nodes)
+
+    assert sorted(problems.values()) == [
+        "does not use orders_user_id_created_at_idx",
+        "estimates 4000 rows, expected <= 1000",
+        "seq scan on orders",
+    ]
+    relaxed = PlanCase(
+        "orders.USER_ORDERS_SQL", "SELECT ...", seq_scans=frozenset({"orders"}), sort_rows=None
+    )
+    assert check_plan(relaxed, nodes) == {}
+
+
+def test_render_marks_offending_nodes_and_diffs_the_baseline():
+    case = PlanCase("orders.USER_ORDERS_SQL", "SELECT ...", sort_rows=None)
+    nodes = plan_nodes(USER_ORDERS_PLAN)
+    recorded = ["Sort", "  Index Scan using orders_user_id_created_at_idx on orders"]
+
+    report = render(case, nodes, check_plan(case, nodes), recorded)
+
+    assert "Seq Scan on orders  (rows=4000)  [Filter: (user_id = $1)]  <-- seq scan on orders" in report
+    assert "-  Index Scan using orders_user_id_created_at_idx on orders" in report
+    assert "+  Seq Scan on orders" in report
+    assert outline(nodes) == ["Sort", "  Seq Scan on orders"]
+
+
+integration = pytest.mark.skipif(
+    os.getenv("RUN_INTEGRATION", "0") != "1" or not os.getenv("DATABASE_URL"),
+    reason="Integration tests disabled by default (needs RUN_INTEGRATION=1 and DATABASE_URL)",
+)
+
+
+@pytest.fixture(scope="module")
+def plan_db():
+    """Seed a scratch schema once (QUERY_PLAN_ROWS orders) and drop it afterwards."""
+    psycopg = pytest.importorskip("psycopg")
+    database_url = os.environ["DATABASE_URL"]
+    args = type("Args", (), {"rows": ROWS, "users": USERS, "items": ITEMS, "schema": SCHEMA})
+    query_plans.seed(database_url, args)
+    conn = psycopg.connect(database_url, **query_plans.bench.conn_options(SCHEMA))
+    yield conn
+    conn.close()
+    query_plans.bench.drop_schema(database_url, SCHEMA)
+
+
+@integration
+@pytest.mark.parametrize("case", CASES, ids=[case.name for case in CASES])
+def test_query_plan(plan_db, case):
+    try:
+        nodes = query_plans.explain(plan_db, case)
+    finally:
+        plan_db.rollback()
+    problems = check_plan(case, nodes)
+    recorded = query_plans.load_baseline().get(case.name)
+    assert not problems, "\n" + render(case, nodes, problems, recorded)
@@ -0,0 +1,39 @@
+import random
+import re
+from collections import Counter
+from datetime import UTC, datetime
+
+from scripts.seed_synthetic_data import order_times, uuid7_text, zipf_sampler
+
+END = datetime(2026, 1, 31, 12, tzinfo=UTC)
+
+
+def test_uuid7_text_is_a_version_7_uuid_of_the_millisecond():
+    ms = int(END.timestamp() * 1000)
+    text = uuid7_text(ms, random.Random(1))
+
+    assert re.fullmatch(r"[0-9a-f]{8}-[0-9a-f]{4}-7[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}", text)
+    assert int(text.replace("-", "")[:12], 16) == ms
+    assert uuid7_text(ms, random.Random(1)) == text
+
+
+def test_order_times_are_sorted_growing_and_exact():
+    times = list(order_times(random.Random(1), 10_000, 10, 1.0, END))
+
+    assert len(times) == 10_000
+    assert times == sorted(times)
+    assert times[-1] < END.timestamp()
+    per_day = Counter(int(t // 86400) for t in times)
+    days = sorted(per_day)
+    assert per_day[days[-1]] > 1.5 * per_day[days[0]]
+
+
+def test_zipf_sampler_is_skewed_and_seeded():
+    pick = zipf_sampler(random.Random(3), 1000, 1.0)
+    draws = [pick() for _ in range(20_000)]
+    counts = Counter(draws)
+
+    assert counts[0] > 5 * counts[9]
+    assert max(counts) < 1000
+    again = zipf_sampler(random.Random(3), 1000, 1.0)
+    assert [again() for _ in range(20_000)] == draws